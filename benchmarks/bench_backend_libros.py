@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de backends de libros: Excel por COM (xlwings) contra archivo (openpyxl)
+
+Genera un template de CCE con --filas filas y, para cada backend disponible,
+mide la apertura, la escritura de resultados fila por fila (G, H, I y J en
+cada fila, como las operaciones), la escritura en bloque con HojaConBuffer
+y el costo de cada wb.save(). Sin xlwings instalado (por ejemplo en Linux)
+solo se mide openpyxl; con --plantilla se usa un template real.
+
+Uso:
+    python benchmarks/bench_backend_libros.py --filas 1000 --guardados 5
+    python benchmarks/bench_backend_libros.py --plantilla templates/CCE-Formato.xlsm --hoja CCE
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.buffer_resultados import HojaConBuffer  # noqa: E402
+from src.core.libro_archivo import OPENPYXL_DISPONIBLE, BackendArchivo  # noqa: E402
+from src.core.pool_excel import XLWINGS_DISPONIBLE, PoolExcel  # noqa: E402
+
+CABECERA_CCE = ["ID", "Memorandum", "Cuenta", "Beneficiario", "CCI", "Monto",
+                "IB", "BN", "COMENTARIO", "MENSAJE_EMULADOR"]
+
+
+def crear_plantilla(ruta: Path, filas: int):
+    """Template de CCE con filas pendientes (sin resultados en G:J)"""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    hoja = wb.active
+    hoja.title = "CCE"
+    hoja.append(CABECERA_CCE)
+    for fila in range(1, filas + 1):
+        hoja.append([fila, "1234-2025", "00000012345", "JUAN PEREZ",
+                     f"{fila:020d}", 100.0 + fila, None, None, None, None])
+    wb.save(ruta)
+
+
+def resultados(fila: int):
+    return ["SI", "SI", "ABONADO", f"OPERACION {fila} GRABADA"]
+
+
+def medir(backend, ruta: Path, hoja_nombre: str, filas: int, guardados: int):
+    """Devuelve (apertura, s/fila celda por celda, s/fila en bloque, s/guardado)"""
+    inicio = time.perf_counter()
+    wb = backend.abrir(str(ruta))
+    apertura = time.perf_counter() - inicio
+    try:
+        hoja = wb.sheets[hoja_nombre]
+
+        inicio = time.perf_counter()
+        for fila in range(2, filas + 2):
+            for columna, valor in zip("GHIJ", resultados(fila)):
+                hoja.range(f"{columna}{fila}").value = valor
+        por_fila = (time.perf_counter() - inicio) / filas
+
+        buffer = HojaConBuffer(hoja, filas)
+        inicio = time.perf_counter()
+        for fila in range(2, filas + 2):
+            for columna, valor in zip("GHIJ", resultados(fila)):
+                buffer.range(f"{columna}{fila}").value = valor
+        buffer.vaciar()
+        en_bloque = (time.perf_counter() - inicio) / filas
+
+        inicio = time.perf_counter()
+        for _ in range(guardados):
+            wb.save()
+        por_guardado = (time.perf_counter() - inicio) / max(guardados, 1)
+    finally:
+        backend.devolver(wb)
+    return apertura, por_fila, en_bloque, por_guardado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000, help="Filas del template generado y filas a escribir")
+    parser.add_argument("--guardados", type=int, default=5, help="Guardados a promediar")
+    parser.add_argument("--plantilla", type=Path, help="Template real (se copia antes de escribir)")
+    parser.add_argument("--hoja", default="CCE", help="Hoja de resultados del template")
+    args = parser.parse_args()
+
+    if not OPENPYXL_DISPONIBLE:
+        print("openpyxl no está instalado")
+        sys.exit(1)
+
+    backends = [BackendArchivo.obtener()]
+    if XLWINGS_DISPONIBLE:
+        backends.insert(0, PoolExcel.obtener())
+    else:
+        print("xlwings no está instalado: solo se mide openpyxl")
+
+    directorio = Path(tempfile.mkdtemp(prefix="bench_backend_"))
+    try:
+        original = directorio / "plantilla.xlsx"
+        if args.plantilla:
+            original = directorio / args.plantilla.name
+            shutil.copy(args.plantilla, original)
+        else:
+            crear_plantilla(original, args.filas)
+
+        print(f"Plantilla: {original.stat().st_size / 1024:.0f} KB, {args.filas} filas escritas")
+        print(f"{'Backend':<10}{'Abrir s':>10}{'ms/fila celdas':>16}{'ms/fila bloque':>16}{'ms/guardado':>13}")
+        for backend in backends:
+            copia = directorio / f"{backend.nombre}{original.suffix}"
+            shutil.copy(original, copia)
+            apertura, por_fila, en_bloque, por_guardado = medir(
+                backend, copia, args.hoja, args.filas, args.guardados
+            )
+            print(f"{backend.nombre:<10}{apertura:>10.2f}{por_fila * 1000:>16.3f}"
+                  f"{en_bloque * 1000:>16.3f}{por_guardado * 1000:>13.0f}")
+    finally:
+        PoolExcel.cerrar_global()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
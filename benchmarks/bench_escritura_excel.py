@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de escritura de resultados: celda por celda contra HojaConBuffer
+
+Reproduce lo que escriben las operaciones por fila (CCE: G, H, I y J en las
+filas abonadas e I en las rechazadas) sobre un template de 1.000 filas y
+compara la escritura directa con el buffer vaciado cada N filas. Sin Excel
+se usa una hoja falsa que cobra una latencia fija por cada llamado COM; con
+--plantilla se escribe en un libro real con xlwings.
+
+Uso:
+    python benchmarks/bench_escritura_excel.py --filas 1000 --latencia 0.002
+    python benchmarks/bench_escritura_excel.py --plantilla templates/CCE-Formato.xlsm
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.buffer_resultados import HojaConBuffer, columna_a_indice  # noqa: E402
+
+try:
+    import xlwings as xw
+    XLWINGS_DISPONIBLE = True
+except ImportError:
+    XLWINGS_DISPONIBLE = False
+
+
+class _RangoCOM:
+    """Rango de la hoja falsa; cada asignación cuesta un llamado COM"""
+
+    def __init__(self, hoja, referencia):
+        self._hoja = hoja
+        letras = referencia.rstrip('0123456789')
+        self._columna = columna_a_indice(letras)
+        self._fila = int(referencia[len(letras):])
+
+    @property
+    def value(self):
+        self._hoja.llamar()
+        return self._hoja.celdas.get((self._fila, self._columna))
+
+    @value.setter
+    def value(self, valor):
+        self._hoja.llamar()
+        filas = valor if isinstance(valor, list) else [[valor]]
+        for i, fila in enumerate(filas):
+            fila = fila if isinstance(fila, list) else [fila]
+            for j, dato in enumerate(fila):
+                self._hoja.celdas[(self._fila + i, self._columna + j)] = dato
+
+
+class HojaCOM:
+    """Hoja en memoria con latencia por llamado, como xlwings sobre COM"""
+
+    def __init__(self, latencia: float):
+        self.latencia = latencia
+        self.celdas = {}
+        self.llamadas = 0
+
+    def llamar(self):
+        self.llamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def range(self, referencia):
+        return _RangoCOM(self, referencia)
+
+
+def resultados_cce(filas: int, rechazo: float, semilla: int = 3):
+    """Celdas que escribe CCE por fila: (fila, [(columna, valor), ...])"""
+    aleatorio = random.Random(semilla)
+    for fila in range(2, filas + 2):
+        if aleatorio.random() < rechazo:
+            yield fila, [('I', 'Formato no correcto de CCI')]
+        else:
+            yield fila, [('G', 3.5), ('H', 1.2), ('I', 'ABONADO'),
+                         ('J', f'**TRANSFERENCIA GRABADA NRO {fila:06d}')]
+
+
+def escribir(hoja, filas: int, rechazo: float, al_terminar_fila=None):
+    for fila, celdas in resultados_cce(filas, rechazo):
+        for columna, valor in celdas:
+            hoja.range(f'{columna}{fila}').value = valor
+        if al_terminar_fila:
+            al_terminar_fila()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000, help="Filas del template")
+    parser.add_argument("--latencia", type=float, default=0.002, help="Segundos por llamado COM (hoja falsa)")
+    parser.add_argument("--rechazo", type=float, default=0.1, help="Proporción de filas rechazadas")
+    parser.add_argument("--vaciados", type=int, nargs="+", default=[1, 50, 0],
+                        help="Filas por vaciado a medir (0 = solo al final)")
+    parser.add_argument("--plantilla", type=Path, help="Libro real donde escribir (requiere xlwings)")
+    args = parser.parse_args()
+
+    app = wb = None
+    if args.plantilla:
+        if not XLWINGS_DISPONIBLE:
+            print("xlwings no está instalado; no se puede usar --plantilla")
+            sys.exit(1)
+        app = xw.App(visible=False)
+        wb = app.books.open(str(args.plantilla))
+
+    def nueva_hoja():
+        if wb is not None:
+            hoja = wb.sheets[0]
+            hoja.range(f'G2:J{args.filas + 1}').value = None
+            return hoja
+        return HojaCOM(args.latencia)
+
+    def contenido(hoja):
+        if wb is not None:
+            return hoja.range(f'G2:J{args.filas + 1}').value
+        return dict(hoja.celdas)
+
+    try:
+        print(f"{'Modo':<22}{'Llamados':>10}{'Segundos':>10}{'us/fila':>10}")
+
+        hoja = nueva_hoja()
+        inicio = time.perf_counter()
+        escribir(hoja, args.filas, args.rechazo)
+        duracion = time.perf_counter() - inicio
+        llamados = getattr(hoja, 'llamadas', '-')
+        referencia = contenido(hoja)
+        print(f"{'celda por celda':<22}{llamados:>10}{duracion:>10.3f}{duracion / args.filas * 1e6:>10.0f}")
+
+        diferencias = 0
+        for filas_por_vaciado in args.vaciados:
+            buffer = HojaConBuffer(nueva_hoja(), filas_por_vaciado)
+            inicio = time.perf_counter()
+            escribir(buffer, args.filas, args.rechazo,
+                     buffer.vaciar if filas_por_vaciado == 1 else None)
+            buffer.vaciar()
+            duracion = time.perf_counter() - inicio
+
+            modo = f"buffer cada {filas_por_vaciado}" if filas_por_vaciado else "buffer al final"
+            print(f"{modo:<22}{buffer.llamadas_com:>10}{duracion:>10.3f}{duracion / args.filas * 1e6:>10.0f}")
+            if contenido(buffer.hoja) != referencia:
+                diferencias += 1
+                print(f"  El contenido difiere de la escritura celda por celda ({modo})")
+    finally:
+        if wb is not None:
+            wb.close()
+            app.quit()
+
+    print(f"Diferencias con la escritura celda por celda: {diferencias}")
+    sys.exit(1 if diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las operaciones de host contra el simulador local
+
+Ejecuta el flujo por fila de CCE, Ahorros, Cuentas Corrientes, Cargo y
+cargo LBTR sobre HostSimulado y reporta filas por minuto. No necesita la
+ventana "prod" ni Excel: los resultados se escriben en una hoja en memoria.
+Con --backend tn3270 las operaciones hablan TN3270 con un servidor local
+que envuelve al simulador, igual que lo harían con el mainframe. Con
+--sesiones N, CCE y Ahorros reparten las filas entre N sesiones en paralelo
+y se comprueba que ninguna fila se grabe dos veces.
+
+Uso:
+    python benchmarks/bench_host_simulado.py --filas 20 --latencia 0.1 --error 0.05
+    python benchmarks/bench_host_simulado.py --backend tn3270
+    python benchmarks/bench_host_simulado.py --backend tn3270 --sesiones 4 --filas 40
+"""
+
+import argparse
+import datetime
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.host import (  # noqa: E402
+    HostSimulado, ServidorTN3270Simulado, SimulatedHostSession, TN3270HostSession,
+)
+
+
+class _Celda:
+    """Celda de la hoja en memoria"""
+
+    def __init__(self, hoja, referencia):
+        self._hoja = hoja
+        self._referencia = referencia
+
+    @property
+    def value(self):
+        return self._hoja.celdas.get(self._referencia)
+
+    @value.setter
+    def value(self, valor):
+        self._hoja.celdas[self._referencia] = valor
+
+
+class HojaMemoria:
+    """Hoja mínima compatible con hoja.range('A1').value"""
+
+    def __init__(self):
+        self.celdas = {}
+
+    def range(self, referencia):
+        return _Celda(self, referencia)
+
+
+def _cuenta(indice: int) -> str:
+    return f"{indice:011d}"
+
+
+def _titular(indice: int) -> str:
+    return f"BENEFICIARIO {indice}"
+
+
+def bench_cce(operacion, ventana, hoja, filas, directorio, fecha):
+    # Mismo recorrido que execute_cce: filas pendientes y procesar_pendientes
+    pendientes = [(i + 2, f"{i:020d}", f"BENEFICIARIO {i}", "1234-2025", _cuenta(1), 150.0 + i)
+                  for i in range(filas)]
+    resultados = operacion.procesar_pendientes(
+        ventana, pendientes,
+        lambda op, sesion, h, p: op._procesar_abono_cce(sesion, h, *p, directorio, fecha),
+        hoja, lambda: None
+    )
+    return sum(1 for r in resultados if r)
+
+
+def bench_ahorros(operacion, ventana, hoja, filas, directorio, fecha):
+    pendientes = [(i + 2, _cuenta(i), "1234", 80.0 + i, _titular(i)) for i in range(filas)]
+    resultados = operacion.procesar_pendientes(
+        ventana, pendientes,
+        lambda op, sesion, h, p: op._procesar_abono_ahorros(sesion, h, *p, directorio, fecha),
+        hoja, lambda: None
+    )
+    return sum(1 for r in resultados if r and r['exito'])
+
+
+def bench_cte(operacion, ventana, hoja, filas, directorio, fecha):
+    exitosas = 0
+    for i in range(filas):
+        cargo = operacion._procesar_cargo_cte(
+            ventana, hoja, i + 2, _cuenta(i), 500.0, "1234", "S", "GLOSA", _cuenta(i + 1)
+        )
+        if not cargo['exito']:
+            continue
+        abono = operacion._procesar_abono_cte(
+            ventana, hoja, i + 2, _cuenta(i + 1), 500.0, "1234", "GLOSA", _cuenta(i), cargo['itf']
+        )
+        exitosas += bool(abono['exito'])
+    return exitosas
+
+
+def bench_cargo(operacion, ventana, hoja, filas, directorio, fecha):
+    exitosas = 0
+    for i in range(filas):
+        exitosas += bool(operacion._procesar_cargo_individual(
+            ventana, hoja, i + 2, _cuenta(i), 1000.0, "1234", "84", "GLOSA 1", "GLOSA 2", ""
+        ))
+    return exitosas
+
+
+def bench_cargo_lbtr(operacion, ventana, hoja, filas, directorio, fecha):
+    exitosas = 0
+    for i in range(filas):
+        exitosas += bool(operacion._procesar_cargo_lbtr_individual(
+            ventana, hoja, i + 2, _cuenta(i), 25000.0, "1234", "MEMO 1234-2025-BN-7101 ANEXO 1"
+        ))
+    return exitosas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=20, help="Filas por operación")
+    parser.add_argument("--latencia", type=float, default=0.1, help="Latencia del host en segundos")
+    parser.add_argument("--variacion", type=float, default=0.0, help="Variación de la latencia")
+    parser.add_argument("--error", type=float, default=0.0, help="Probabilidad de error por etapa")
+    parser.add_argument("--sondeo", type=float, default=0.05, help="Pausa entre capturas de pantalla")
+    parser.add_argument("--backend", choices=("simulado", "tn3270"), default="simulado",
+                        help="Sesión en memoria o TN3270 contra un servidor local")
+    parser.add_argument("--sesiones", type=int, default=1,
+                        help="Sesiones en paralelo para CCE y Ahorros")
+    args = parser.parse_args()
+
+    from src.operations.cce_operations import CCEOperations
+    from src.operations.ahorros_operations import AhorrosOperations
+    from src.operations.cte_operations import CTEOperations
+    from src.operations.cargo_operations import CargoOperations
+    from src.operations.lbtr_operations import LBTROperations
+
+    # (nombre, clase, función, admite varias sesiones)
+    casos = [
+        ("CCE", CCEOperations, bench_cce, True),
+        ("AHORROS", AhorrosOperations, bench_ahorros, True),
+        ("CTA_CTES", CTEOperations, bench_cte, False),
+        ("Cargo", CargoOperations, bench_cargo, False),
+        ("Cargo LBTR", LBTROperations, bench_cargo_lbtr, False),
+    ]
+
+    errores = {'validacion': args.error, 'grabacion': args.error}
+    fecha = datetime.datetime.now()
+
+    def fabrica_host():
+        return HostSimulado(
+            latencia=args.latencia, variacion=args.variacion, errores=errores, semilla=7,
+            titulares={_cuenta(i): _titular(i) for i in range(args.filas)},
+        )
+
+    print(f"Backend: {args.backend}  Sesiones: {args.sesiones}")
+    print(f"{'Operación':<12}{'Filas':>7}{'OK':>6}{'Segundos':>10}{'Filas/min':>11}{'AID':>6}{'Grabadas':>10}")
+    duplicadas = False
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, clase, funcion, paralela in casos:
+            operacion = clase()
+            operacion.sondeo_pantalla = args.sondeo
+            cantidad = args.sesiones if paralela else 1
+            servidor = None
+            if args.backend == "tn3270":
+                servidor = ServidorTN3270Simulado(fabrica_host)
+                direccion = servidor.iniciar()
+                sesiones = [TN3270HostSession(*direccion) for _ in range(cantidad)]
+                for sesion in sesiones:
+                    sesion.connect()
+                hosts = servidor.hosts
+            else:
+                hosts = [fabrica_host() for _ in range(cantidad)]
+                sesiones = [SimulatedHostSession(host) for host in hosts]
+            hoja = HojaMemoria()
+
+            inicio = time.perf_counter()
+            ventana = sesiones if len(sesiones) > 1 else sesiones[0]
+            exitosas = funcion(operacion, ventana, hoja, args.filas, directorio, fecha)
+            duracion = time.perf_counter() - inicio
+
+            for sesion in sesiones:
+                sesion.close()
+            if servidor is not None:
+                servidor.detener()
+
+            por_minuto = args.filas / duracion * 60 if duracion else 0
+            aid = sum(host.estadisticas['aid'] for host in hosts)
+            grabadas = sum(host.estadisticas['grabadas'] for host in hosts)
+            if paralela and grabadas > args.filas:
+                duplicadas = True
+            print(f"{nombre:<12}{args.filas:>7}{exitosas:>6}{duracion:>10.2f}{por_minuto:>11.1f}"
+                  f"{aid:>6}{grabadas:>10}")
+
+    if duplicadas:
+        print("ERROR: hay filas grabadas más de una vez")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de ingesta de memos (leer_xlc): fila por fila contra bloque
+
+Genera memos sintéticos con la estructura de los anexos (N°, Beneficiario,
+Nº  Cuenta, Tipo de Cuenta, Entidad Financiera, Monto (S/)) y compara la
+ingesta anterior (iterrows, un BaseLogic("") por campo y una asignación por
+celda) con la vectorizada (normalización por columna y una sola asignación
+2-D). La escritura va a una hoja falsa que cobra una latencia fija por
+llamado COM; --guardado agrega el costo de wb.save() por registro que tenía
+la versión anterior.
+
+Para LBTR compara el recorrido con estado es_lbtr contra la agrupación
+vectorizada de las líneas de RUC y domicilio, sobre memos de varias hojas
+con --beneficiarios transferencias.
+
+Uso:
+    python benchmarks/bench_ingesta_memo.py --lineas 100 1000 10000
+    python benchmarks/bench_ingesta_memo.py --lineas 300 --latencia 0.002 --guardado 0.2
+    python benchmarks/bench_ingesta_memo.py --lineas --beneficiarios 200 800 5000
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import pandas as pd  # noqa: E402
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.base_logic import BaseLogic  # noqa: E402
+from src.core.ingesta_memo import bloque_lbtr, clasificar_memo, escribir_bloque  # noqa: E402
+from src.core.normalizacion import limpiar_beneficiarios, limpiar_cuentas  # noqa: E402
+from bench_escritura_excel import HojaCOM  # noqa: E402
+
+NOMBRES = ["JUAN PEREZ", "MARIA  LOPEZ & HIJOS", "CONSTRUCTORA ÑAÑEZ S.A.C.", "ana\nquispe", " LUIS TORRES "]
+ENTIDADES = ["BCP", "INTERBANK", "BBVA", "SCOTIABANK", "NACION"]
+
+
+def memo_sintetico(lineas: int, semilla: int = 7) -> pd.DataFrame:
+    """Memo con mezcla de CCI, cuentas de 11 dígitos, filas incompletas y montos altos"""
+    aleatorio = random.Random(semilla)
+    filas = []
+    for numero in range(1, lineas + 1):
+        if aleatorio.random() < 0.7:
+            cuenta = "-".join(["".join(aleatorio.choices("0123456789", k=5)) for _ in range(4)])
+        else:
+            cuenta = "".join(aleatorio.choices("0123456789", k=11))
+        filas.append({
+            'N°': None if aleatorio.random() < 0.05 else str(numero),
+            'Beneficiario': aleatorio.choice(NOMBRES),
+            'Nº  Cuenta': cuenta,
+            'Tipo de Cuenta': aleatorio.choice(["AHORROS", "CORRIENTE"]),
+            'Entidad Financiera': aleatorio.choice(ENTIDADES),
+            'Monto (S/)': round(aleatorio.uniform(10, 15000), 2)
+        })
+    return pd.DataFrame(filas)
+
+
+def memo_lbtr(beneficiarios: int, hojas: int = 4, semilla: int = 11) -> pd.DataFrame:
+    """Memo de varias hojas: cada transferencia seguida a veces de sus líneas de RUC y domicilio"""
+    aleatorio = random.Random(semilla)
+    vacia = {'N°': None, 'Nº  Cuenta': None, 'Tipo de Cuenta': None,
+             'Entidad Financiera': None, 'Monto (S/)': None}
+    partes = []
+    por_hoja = max(1, beneficiarios // hojas)
+    for inicio in range(0, beneficiarios, por_hoja):
+        filas = []
+        for numero in range(inicio + 1, min(inicio + por_hoja, beneficiarios) + 1):
+            filas.append({
+                'N°': str(numero),
+                'Beneficiario': aleatorio.choice(NOMBRES),
+                'Nº  Cuenta': "".join(aleatorio.choices("0123456789", k=20)),
+                'Tipo de Cuenta': "CORRIENTE",
+                'Entidad Financiera': aleatorio.choice(ENTIDADES),
+                'Monto (S/)': round(aleatorio.uniform(500, 90000), 2)
+            })
+            if aleatorio.random() < 0.6:
+                filas.append({**vacia, 'Beneficiario': f"RUC {aleatorio.randrange(10**10, 10**11)}"})
+            if aleatorio.random() < 0.5:
+                filas.append({**vacia, 'Beneficiario': "DOMICILIO AV. LOS OLIVOS 123"})
+            if aleatorio.random() < 0.1:
+                filas.append({**vacia, 'Beneficiario': None})
+        partes.append(pd.DataFrame(filas))
+    return pd.concat(partes, ignore_index=True)
+
+
+def lbtr_fila_por_fila(hoja, df: pd.DataFrame):
+    """Recorrido anterior de LBTROperations.leer_xlc con el estado es_lbtr"""
+    df = df.drop(df[df['Entidad Financiera'] == 'NACION'].index)
+    ultima_fila = 1
+    es_lbtr = False
+    for _, fila in df.iterrows():
+        numero = fila['N°']
+        beneficiario = fila['Beneficiario']
+        monto = fila['Monto (S/)']
+        if pd.isna(beneficiario):
+            continue
+        elif numero and monto > 9999.99:
+            ultima_fila += 1
+            es_lbtr = True
+            hoja.range(f'B{ultima_fila}').value = "00000012345"
+            hoja.range(f'E{ultima_fila}').value = BaseLogic("").limpiar_texto_beneficiario(str(beneficiario))
+            hoja.range(f'F{ultima_fila}').value = fila['Nº  Cuenta']
+            hoja.range(f'G{ultima_fila}').value = fila['Entidad Financiera']
+            hoja.range(f'H{ultima_fila}').value = monto
+            hoja.range(f'C{ultima_fila}').value = f"MEMO 1234-2025-BN-7101 ANEXO {numero}"
+            hoja.range(f'D{ultima_fila}').value = "GLOSA"
+            hoja.range(f'I{ultima_fila}').value = None
+            hoja.range(f'J{ultima_fila}').value = None
+        elif numero and monto < 10000:
+            es_lbtr = False
+        if es_lbtr and pd.isna(numero):
+            if "RUC" in str(beneficiario):
+                hoja.range(f'I{ultima_fila}').value = beneficiario
+            elif "DOMICILIO" in str(beneficiario):
+                hoja.range(f'J{ultima_fila}').value = beneficiario
+
+
+def lbtr_en_bloque(hoja, df: pd.DataFrame):
+    lineas = clasificar_memo(df, ['LBTR'])['LBTR']
+    escribir_bloque(hoja, 'B2', bloque_lbtr(lineas, "1234", "2025", "00000012345", 1, "GLOSA"))
+
+
+def filtrar_cce(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtro de CCEOperations.leer_xlc"""
+    df = df.copy()
+    df['Nº  Cuenta'] = df['Nº  Cuenta'].str.replace('-', '', regex=False)
+    df_filtro = df.dropna(subset=['N°', 'Nº  Cuenta', 'Monto (S/)'])
+    df_cci_valido = df_filtro[df_filtro['Nº  Cuenta'].str.len() == 20]
+    return df_cci_valido[df_cci_valido['Monto (S/)'] < 10000].reset_index(drop=True)
+
+
+def fila_por_fila(hoja, df: pd.DataFrame, memo: str, cuenta: str, guardado: float):
+    ultima_fila = 1
+    for _, fila in filtrar_cce(df).iterrows():
+        ultima_fila += 1
+        beneficiario = BaseLogic("").limpiar_texto_beneficiario(fila['Beneficiario'])
+        cuenta_cci = BaseLogic("").limpiar_numero_cuenta(fila['Nº  Cuenta'])
+        monto = fila['Monto (S/)']
+        hoja.range(f'B{ultima_fila}').value = memo
+        hoja.range(f'C{ultima_fila}').value = cuenta
+        hoja.range(f'D{ultima_fila}').value = beneficiario
+        hoja.range(f'E{ultima_fila}').value = cuenta_cci
+        hoja.range(f'F{ultima_fila}').value = monto
+        if guardado:
+            time.sleep(guardado)
+
+
+def en_bloque(hoja, df: pd.DataFrame, memo: str, cuenta: str, guardado: float):
+    df_cce = filtrar_cce(df)
+    bloque = pd.DataFrame({
+        'B': memo,
+        'C': cuenta,
+        'D': limpiar_beneficiarios(df_cce['Beneficiario']),
+        'E': limpiar_cuentas(df_cce['Nº  Cuenta']),
+        'F': df_cce['Monto (S/)']
+    })
+    escribir_bloque(hoja, 'B2', bloque)
+    if guardado:
+        time.sleep(guardado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lineas", type=int, nargs="*", default=[100, 1000, 10000], help="Líneas de los memos CCE")
+    parser.add_argument("--beneficiarios", type=int, nargs="*", default=[200, 1000],
+                        help="Transferencias de los memos LBTR")
+    parser.add_argument("--latencia", type=float, default=0.0005, help="Segundos por llamado COM")
+    parser.add_argument("--guardado", type=float, default=0.0, help="Segundos por wb.save()")
+    args = parser.parse_args()
+
+    # BaseLogic("") registra una línea por instancia; no medir la consola
+    logging.disable(logging.INFO)
+
+    diferencias = 0
+    if args.lineas:
+        print(f"{'Líneas':>8}{'Modo':>14}{'Llamados':>10}{'Segundos':>10}{'Aceleración':>13}")
+    for lineas in args.lineas:
+        df = memo_sintetico(lineas)
+        tiempos = {}
+        hojas = {}
+        for modo, funcion in (("fila por fila", fila_por_fila), ("bloque", en_bloque)):
+            hoja = HojaCOM(args.latencia)
+            inicio = time.perf_counter()
+            funcion(hoja, df, "1234", "00000012345", args.guardado)
+            tiempos[modo] = time.perf_counter() - inicio
+            hojas[modo] = hoja
+            aceleracion = tiempos["fila por fila"] / tiempos[modo] if tiempos[modo] else 0
+            print(f"{lineas:>8}{modo:>14}{hoja.llamadas:>10}{tiempos[modo]:>10.3f}{aceleracion:>12.1f}x")
+        if hojas["fila por fila"].celdas != hojas["bloque"].celdas:
+            diferencias += 1
+            print(f"  El contenido escrito difiere ({lineas} líneas)")
+
+    if args.beneficiarios:
+        print(f"{'LBTR':>8}{'Modo':>14}{'Llamados':>10}{'Segundos':>10}{'Aceleración':>13}")
+    for beneficiarios in args.beneficiarios:
+        df = memo_lbtr(beneficiarios)
+        tiempos = {}
+        hojas = {}
+        for modo, funcion in (("fila por fila", lbtr_fila_por_fila), ("bloque", lbtr_en_bloque)):
+            hoja = HojaCOM(args.latencia)
+            inicio = time.perf_counter()
+            funcion(hoja, df)
+            tiempos[modo] = time.perf_counter() - inicio
+            hojas[modo] = hoja
+            aceleracion = tiempos["fila por fila"] / tiempos[modo] if tiempos[modo] else 0
+            print(f"{beneficiarios:>8}{modo:>14}{hoja.llamadas:>10}{tiempos[modo]:>10.3f}{aceleracion:>12.1f}x")
+        if hojas["fila por fila"].celdas != hojas["bloque"].celdas:
+            diferencias += 1
+            print(f"  El contenido escrito difiere ({beneficiarios} transferencias)")
+
+    print(f"Diferencias entre modos: {diferencias}")
+    sys.exit(1 if diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del parser declarativo de pantallas del host
+
+Genera un corpus de paneles con HostSimulado (validación y grabación de CCE,
+Ahorros, Cuentas Corrientes, Cargo y cargo LBTR, con y sin errores), comprueba
+que cada layout extrae lo mismo que el parseo anterior por cortes fijos y
+compara el tiempo de ambos. Con --corpus se agregan capturas .txt guardadas
+como evidencia (una pantalla por archivo, el layout en el nombre).
+
+Uso:
+    python benchmarks/bench_layouts.py --repeticiones 2000
+    python benchmarks/bench_layouts.py --corpus output/Procesados/CCE/Alerta
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.host.layouts import LAYOUTS, parsear_pantalla  # noqa: E402
+from src.host.simulador import HostSimulado  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# Parseo anterior (cortes fijos y búsquedas por línea), como referencia
+# ----------------------------------------------------------------------
+
+def _anterior_cce_validacion(lineas):
+    comision_ib = comision_bn = None
+    for linea in lineas:
+        if "COMISION IB" in linea:
+            texto = linea[35:42].strip()
+            comision_ib = float(texto) if texto else 0
+        if "COMISION BN" in linea:
+            texto = linea[35:42].strip()
+            comision_bn = float(texto) if texto else 0
+        if "MSG" in linea:
+            mensaje = linea[7:54].strip()
+            return comision_ib, comision_bn, mensaje, '**DATOS CORRECTOS' in mensaje
+    return comision_ib, comision_bn, "", False
+
+
+def _anterior_cce_grabacion(lineas):
+    for linea in lineas:
+        if "MSG" in linea:
+            return linea.strip(), "TRANSFERENCIA GRABADA" in linea
+    return "", False
+
+
+def _anterior_ahorros(lineas):
+    mensaje = lineas[23].strip() if len(lineas) > 23 else "Error: Respuesta incompleta del sistema"
+    secuencia = lineas[13][:41].replace('SECUENCIA', '').strip()
+    beneficiario = lineas[13][41:].strip()
+    itf = lineas[15].replace('IMPUESTO ITF', '').strip()
+    return secuencia, beneficiario, itf, mensaje, "OK" in mensaje
+
+
+def _anterior_linea23(lineas, texto_ok):
+    mensaje = lineas[23].strip() if len(lineas) > 23 else ""
+    itf_texto = lineas[7][61:].strip() if len(lineas) > 7 else ""
+    itf = float(itf_texto) if itf_texto else 0
+    return itf, mensaje, texto_ok in mensaje
+
+
+def _anterior_cargo_validacion(lineas):
+    for linea in lineas:
+        if "DATOS CORRECTOS PUEDE GRABAR" in linea:
+            return linea.strip(), True
+    mensaje = lineas[23].strip() if len(lineas) > 23 else ""
+    return mensaje, "DATOS CORRECTOS PUEDE GRABAR" in mensaje
+
+
+def _anterior_cargo_grabacion(lineas):
+    mensaje = ""
+    for linea in lineas:
+        if "GRABACION CORRECTA" in linea:
+            mensaje = linea.strip()
+            break
+    if not mensaje and len(lineas) > 29:
+        mensaje = lineas[29].strip()
+    if not mensaje:
+        for linea in lineas:
+            if any(m in linea for m in ["GRABACION", "ERROR", "RECHAZADO", "CORRECTO"]):
+                mensaje = linea.strip()
+                break
+    mensaje = mensaje or "NO SE DETECTÓ MENSAJE DE GRABACIÓN"
+    return mensaje, "GRABACION CORRECTA" in mensaje
+
+
+def _nuevo(nombre, lineas):
+    r = parsear_pantalla(nombre, lineas)
+    if nombre == 'CCE_VALIDACION':
+        return r['comision_ib'], r['comision_bn'], r.mensaje, r.es('DATOS_CORRECTOS')
+    if nombre == 'CCE_GRABACION':
+        return r.mensaje, r.es('GRABADO')
+    if nombre == 'AHORROS_ABONO':
+        return r['secuencia'], r['beneficiario'], r['itf'], r.mensaje, r.es('GRABADO')
+    if nombre in ('CTE_VALIDACION', 'CTE_GRABACION'):
+        return r['itf'], r.mensaje, r.estado in ('DATOS_CORRECTOS', 'GRABADO')
+    if nombre == 'CARGO_VALIDACION':
+        return r.mensaje, r.es('DATOS_CORRECTOS')
+    if nombre == 'CARGO_GRABACION':
+        return r.mensaje, r.es('GRABADO')
+    if nombre == 'LBTR_CARGO_VALIDACION':
+        return r.mensaje, r.es('DATOS_CORRECTOS')
+    return r.mensaje, r.es('GRABADO')
+
+
+ANTERIOR = {
+    'CCE_VALIDACION': _anterior_cce_validacion,
+    'CCE_GRABACION': _anterior_cce_grabacion,
+    'AHORROS_ABONO': _anterior_ahorros,
+    'CTE_VALIDACION': lambda l: _anterior_linea23(l, 'DATOS CORRECTOS PUEDE GRABAR'),
+    'CTE_GRABACION': lambda l: _anterior_linea23(l, 'GRABACION CORRECTA'),
+    'CARGO_VALIDACION': _anterior_cargo_validacion,
+    'CARGO_GRABACION': _anterior_cargo_grabacion,
+    'LBTR_CARGO_VALIDACION': lambda l: _anterior_linea23(l, 'CORRECTOS')[1:],
+    'LBTR_CARGO_GRABACION': lambda l: _anterior_linea23(l, 'GRABACION CORRECTA')[1:],
+}
+
+
+# ----------------------------------------------------------------------
+# Corpus
+# ----------------------------------------------------------------------
+
+def _pantalla(host: HostSimulado, tokens: List[str], tecla: str) -> List[str]:
+    for token in tokens:
+        host.teclear(token)
+    host.presionar(tecla)
+    return host.pantalla().splitlines()
+
+
+def generar_corpus(errores: float) -> List[Tuple[str, List[str]]]:
+    """Recorre las transacciones del simulador y guarda cada panel de respuesta"""
+    host = HostSimulado(latencia=0.0, errores={'validacion': errores, 'grabacion': errores},
+                        cuentas_sobregiradas={"00000000003"}, semilla=11)
+    corpus = []
+
+    for i in range(20):
+        cuenta = f"{i % 5:011d}"
+        host.presionar('f5')
+        host.pantalla()
+
+        pantalla = _pantalla(host, ["220", f"{i:020d}", f"BENEF {i}", "MEMO", cuenta], 'enter')
+        pantalla = _pantalla(host, ["SOL", f"{100 + i:.2f}", "1"], 'enter')
+        corpus.append(('CCE_VALIDACION', pantalla))
+        corpus.append(('CCE_GRABACION', _pantalla(host, [], 'f4')))
+
+        host.presionar('f5')
+        corpus.append(('AHORROS_ABONO', _pantalla(host, ["441", cuenta, "1234", f"{50 + i:.2f}"], 'f1')))
+
+        host.presionar('f5')
+        _pantalla(host, ["312", cuenta, "500.00"], 'enter')
+        pantalla = _pantalla(host, ["1234", "S", "GLOSA", "TRANSF", cuenta], 'enter')
+        corpus.append(('CTE_VALIDACION', pantalla))
+        corpus.append(('CTE_GRABACION', _pantalla(host, [], 'f4')))
+
+        host.presionar('f5')
+        pantalla = _pantalla(host, ["042", cuenta, "1000.00", "1234", "84", "G1", "G2"], 'enter')
+        corpus.append(('CARGO_VALIDACION', pantalla))
+        corpus.append(('LBTR_CARGO_VALIDACION', pantalla))
+        pantalla = _pantalla(host, [], 'f4')
+        corpus.append(('CARGO_GRABACION', pantalla))
+        corpus.append(('LBTR_CARGO_GRABACION', pantalla))
+
+    return corpus
+
+
+def cargar_corpus(directorio: Path) -> List[Tuple[str, List[str]]]:
+    """Lee capturas .txt cuyo nombre contiene el nombre del layout"""
+    corpus = []
+    for archivo in sorted(directorio.glob("*.txt")):
+        for nombre in LAYOUTS:
+            if nombre in archivo.name.upper():
+                corpus.append((nombre, archivo.read_text(encoding="utf-8").splitlines()))
+                break
+    return corpus
+
+
+def medir(funcion, corpus, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for nombre, lineas in corpus:
+            funcion(nombre, lineas)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=1000, help="Pasadas sobre el corpus")
+    parser.add_argument("--error", type=float, default=0.2, help="Probabilidad de error en el corpus generado")
+    parser.add_argument("--corpus", type=Path, help="Directorio con capturas .txt adicionales")
+    args = parser.parse_args()
+
+    corpus = generar_corpus(args.error)
+    if args.corpus:
+        corpus += cargar_corpus(args.corpus)
+
+    diferencias = 0
+    por_layout: Dict[str, int] = {}
+    for nombre, lineas in corpus:
+        por_layout[nombre] = por_layout.get(nombre, 0) + 1
+        anterior, nuevo = ANTERIOR[nombre](lineas), _nuevo(nombre, lineas)
+        if anterior != nuevo:
+            diferencias += 1
+            print(f"Diferencia en {nombre}: anterior={anterior} nuevo={nuevo}")
+
+    print(f"Pantallas en el corpus: {len(corpus)}")
+    for nombre, cantidad in sorted(por_layout.items()):
+        print(f"  {nombre:<24}{cantidad:>5}")
+    print(f"Diferencias con el parseo anterior: {diferencias}")
+
+    total = len(corpus) * args.repeticiones
+    t_anterior = medir(lambda n, l: ANTERIOR[n](l), corpus, args.repeticiones)
+    t_nuevo = medir(parsear_pantalla, corpus, args.repeticiones)
+    print(f"{'Parser':<12}{'Segundos':>10}{'us/pantalla':>13}")
+    print(f"{'anterior':<12}{t_anterior:>10.3f}{t_anterior / total * 1e6:>13.2f}")
+    print(f"{'layouts':<12}{t_nuevo:>10.3f}{t_nuevo / total * 1e6:>13.2f}")
+
+    sys.exit(1 if diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del llenado del formulario de nueva transferencia LBTR
+
+Compara el llenado tecla por tecla (find_element, click, clear y send_keys
+por campo y un Select por combo) con el llenado en una sola llamada a
+execute_script. Para cada modo mide solo el llenado y, con --guardar, la
+transferencia completa (llenado, Guardar, modal) en transferencias por
+minuto. Sin --url levanta el simulador local (ServidorLBTRSimulado); con
+--url usa otra página LBTR, un ambiente de pruebas y nunca producción.
+Necesita Selenium, Edge y msedgedriver.
+
+Uso:
+    python benchmarks/bench_lbtr_llenado.py --transferencias 40 --guardar --latencia 0.2
+    python benchmarks/bench_lbtr_llenado.py --url http://pruebas:9080/LBTR-web/#/login --usuario ... --clave ...
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.sesion_lbtr import SesionLBTR, formulario_listo  # noqa: E402
+from src.lbtr import ServidorLBTRSimulado  # noqa: E402
+from src.operations.lbtr_operations import LBTROperations  # noqa: E402
+
+
+class _Celda:
+    """Celda de la hoja en memoria"""
+
+    def __init__(self, hoja, referencia):
+        self._hoja = hoja
+        self._referencia = referencia
+
+    @property
+    def value(self):
+        return self._hoja.celdas.get(self._referencia)
+
+    @value.setter
+    def value(self, valor):
+        self._hoja.celdas[self._referencia] = valor
+
+
+class HojaMemoria:
+    """Hoja mínima compatible con hoja.range('K2').value"""
+
+    def __init__(self):
+        self.celdas = {}
+
+    def range(self, referencia):
+        return _Celda(self, referencia)
+
+
+def _campos(operacion: LBTROperations, indice: int):
+    return [
+        ("selConcepto", "1"),
+        ("selEntidad", operacion._obtener_codigo_entidad("INTERBANK")),
+        ("monto", operacion.formatear_monto(10000 + indice)),
+        ("observacion", f"MEMO {indice:04d}-2026 PAGO A PROVEEDOR"),
+        ("observacionITF", f"MEMO {indice:04d}-2026"),
+        ("numCuentaBen", "00312345678901234567"),
+        ("nombreBen", f"PROVEEDOR DE PRUEBA {indice} SAC"),
+        ("selTipoDocBen", "5"),
+        ("direccionBen", "AV. JAVIER PRADO ESTE 1234 SAN ISIDRO LIMA"),
+        ("numDocumentoBen", f"20{indice:09d}"),
+    ]
+
+
+def bench_llenado(operacion, driver, modo: str, transferencias: int) -> list:
+    """Milisegundos de llenado por transferencia, sin guardar"""
+    tiempos = []
+    for indice in range(transferencias):
+        operacion.sesion_web.esperar(formulario_listo)
+        campos = _campos(operacion, indice)
+        inicio = time.perf_counter()
+        if modo == "script":
+            if not operacion._llenar_por_script(driver, campos):
+                raise RuntimeError("El llenado por script no encontró todos los campos")
+        else:
+            operacion._llenar_por_teclado(driver, campos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def bench_guardar(operacion, driver, transferencias: int):
+    """Transferencias completas con el modo configurado en la operación"""
+    hoja = HojaMemoria()
+    exitosas = 0
+    inicio = time.perf_counter()
+    for indice in range(transferencias):
+        exitosas += bool(operacion._procesar_transferencia_lbtr(
+            driver, hoja, indice + 2, f"MEMO {indice:04d}-2026 PAGO A PROVEEDOR", f"MEMO {indice:04d}-2026",
+            f"PROVEEDOR DE PRUEBA {indice} SAC", "00312345678901234567", "INTERBANK", 10000 + indice,
+            f"20{indice:09d}", "AV. JAVIER PRADO ESTE 1234 SAN ISIDRO LIMA"
+        ))
+    return exitosas, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Página de login de LBTR; sin ella se usa el simulador local")
+    parser.add_argument("--latencia", type=float, default=0.1, help="Latencia de la API del simulador")
+    parser.add_argument("--usuario", default="usuario")
+    parser.add_argument("--clave", default="clave")
+    parser.add_argument("--driver", default=shutil.which("msedgedriver") or "msedgedriver.exe",
+                        help="Ruta de msedgedriver")
+    parser.add_argument("--transferencias", type=int, default=20, help="Transferencias por modo")
+    parser.add_argument("--guardar", action="store_true", help="Medir también la transferencia completa")
+    parser.add_argument("--ventana", action="store_true", help="Mostrar el navegador")
+    args = parser.parse_args()
+
+    simulador = None
+    if not args.url:
+        simulador = ServidorLBTRSimulado(latencia=args.latencia)
+        args.url = simulador.iniciar()
+
+    operacion = LBTROperations()
+    sesion = operacion.sesion_web
+    sesion.headless = not args.ventana
+    try:
+        driver = sesion.prestar(args.url, args.usuario, args.clave, args.driver)
+        print(f"{'Modo':<10}{'Llenado ms (mediana)':>22}{'p95':>8}{'Guardadas':>11}{'Transf/min':>12}")
+        for modo in ("keys", "script"):
+            operacion.modo_llenado = modo
+            tiempos = sorted(bench_llenado(operacion, driver, modo, args.transferencias))
+            p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+            columnas = f"{modo:<10}{statistics.median(tiempos):>22.1f}{p95:>8.1f}"
+            if args.guardar:
+                exitosas, duracion = bench_guardar(operacion, driver, args.transferencias)
+                columnas += f"{exitosas:>11}{args.transferencias / duracion * 60:>12.1f}"
+            print(columnas)
+        sesion.devolver()
+    finally:
+        SesionLBTR.cerrar_global()
+        if simulador is not None:
+            simulador.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de LBTR contra el simulador web local
+
+Levanta ServidorLBTRSimulado, genera una plantilla LBTR con --transferencias
+filas válidas y ejecuta LBTROperations.exec_lbtr completo con Edge sin
+ventana: login, menú, formulario, Guardar y modal, escribiendo en la
+plantilla con openpyxl. Repite el lote --lotes veces con la misma sesión de
+navegador para separar el primer lote (arranque de Edge y login) de los
+siguientes, y reporta transferencias por minuto. Con --api las
+transferencias van directo a la API del simulador (lbtr_details.api) con
+--conexiones pedidos en curso a la vez, sin navegador. Los mensajes de la
+operación se imprimen en la consola en lugar de abrir ventanas.
+
+Sin --api necesita Selenium, Microsoft Edge y msedgedriver.
+
+Uso:
+    python benchmarks/bench_lbtr_simulado.py --transferencias 20 --latencia 0.2
+    python benchmarks/bench_lbtr_simulado.py --llenado keys --error 0.1 --lotes 3
+    python benchmarks/bench_lbtr_simulado.py --api --conexiones 4 --transferencias 200
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.sesion_lbtr import SesionLBTR  # noqa: E402
+from src.lbtr import ServidorLBTRSimulado  # noqa: E402
+from src.operations import lbtr_operations  # noqa: E402
+from src.operations.lbtr_operations import LBTROperations  # noqa: E402
+from src.utils.config_manager import ConfigManager  # noqa: E402
+
+CABECERA_LBTR = ["ID", "Cuenta_cargo", "OBS_1", "OBS_2", "Beneficiario", "CCI",
+                 "Entidad_Financiera", "Importe", "RUC", "DOMICILIO", "ESTADO"]
+
+
+class MensajesConsola:
+    """Reemplaza a tkinter.messagebox: el benchmark corre sin ventanas"""
+
+    def __init__(self):
+        self.mensajes = []
+
+    def _mostrar(self, titulo, mensaje):
+        self.mensajes.append((titulo, mensaje))
+        print(f"  [{titulo}] {' | '.join(str(mensaje).splitlines())}")
+
+    def showinfo(self, title=None, message=None, **_):
+        self._mostrar(title, message)
+
+    showerror = showwarning = showinfo
+
+
+class ConfigBenchmark(ConfigManager):
+    """info.json con la plantilla, el simulador y un diario temporales"""
+
+    def __init__(self, plantilla: Path, enlace: str, directorio: Path, llenado: str, timeout: float,
+                 conexiones: int = 0):
+        super().__init__()
+        self.plantilla = plantilla
+        self.enlace = enlace
+        self.directorio = directorio
+        self.llenado = llenado
+        self.timeout = timeout
+        self.conexiones = conexiones
+
+    def leer_json(self, tipo_operacion: str):
+        return str(self.plantilla), str(self.directorio)
+
+    def lbtr_credenciales(self) -> str:
+        return self.enlace
+
+    def get_excel_writes(self):
+        configuracion = super().get_excel_writes()
+        configuracion.update(backend="openpyxl", warm_excel=False,
+                             journal_file=str(self.directorio / "diario.db"))
+        return configuracion
+
+    def get_lbtr_session(self):
+        configuracion = super().get_lbtr_session()
+        configuracion.update(fill_mode=self.llenado, timeout=self.timeout)
+        return configuracion
+
+    def get_lbtr_api(self):
+        configuracion = super().get_lbtr_api()
+        configuracion.update(enabled=self.conexiones > 0, base="", timeout=self.timeout,
+                             connections=max(self.conexiones, 1))
+        return configuracion
+
+
+def _cci(indice: int) -> str:
+    """CCI de 20 dígitos con sus dígitos de control correctos"""
+    def control(digitos: str) -> str:
+        productos = [int(d) * (1 + posicion % 2) for posicion, d in enumerate(digitos)]
+        return str((10 - sum(p - 9 if p > 9 else p for p in productos) % 10) % 10)
+
+    entidad_oficina = "003200"
+    cuenta = f"{indice + 1:012d}"
+    return entidad_oficina + cuenta + control(entidad_oficina) + control(cuenta)
+
+
+def crear_plantilla(ruta: Path, transferencias: int, lote: int):
+    """Plantilla LBTR con transferencias pendientes (ESTADO vacío)"""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    hoja = wb.active
+    hoja.title = "LBTR"
+    hoja.append(CABECERA_LBTR)
+    for indice in range(transferencias):
+        hoja.append([
+            indice + 1, "00012345678",
+            f"MEMO {lote:02d}15-2026 PAGO A PROVEEDOR {indice + 1}", f"MEMO {lote:02d}15-2026",
+            f"PROVEEDOR DE PRUEBA {indice + 1} SAC", _cci(indice), "INTERBANK",
+            10000.0 + indice, f"RUC: 20{indice:09d}", "DOMICILIO: AV. JAVIER PRADO ESTE 1234 LIMA", None,
+        ])
+    wb.save(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transferencias", type=int, default=20, help="Filas por lote")
+    parser.add_argument("--lotes", type=int, default=2, help="Lotes seguidos con la misma sesión")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latencia de la API en segundos")
+    parser.add_argument("--variacion", type=float, default=0.0, help="Variación de la latencia")
+    parser.add_argument("--error", type=float, default=0.0, help="Probabilidad de rechazo por transferencia")
+    parser.add_argument("--llenado", choices=("script", "keys"), default="script", help="lbtr_details.fill_mode")
+    parser.add_argument("--timeout", type=float, default=30.0, help="lbtr_details.timeout")
+    parser.add_argument("--driver", default=shutil.which("msedgedriver") or "msedgedriver.exe",
+                        help="Ruta de msedgedriver")
+    parser.add_argument("--ventana", action="store_true", help="Mostrar el navegador")
+    parser.add_argument("--api", action="store_true", help="Enviar por la API sin navegador")
+    parser.add_argument("--conexiones", type=int, default=4, help="Pedidos a la API en curso a la vez")
+    args = parser.parse_args()
+
+    simulador = ServidorLBTRSimulado(usuarios={"usuario": "clave"}, latencia=args.latencia,
+                                     variacion=args.variacion, errores={"transferencia": args.error},
+                                     semilla=1)
+    enlace = simulador.iniciar()
+    lbtr_operations.messagebox = MensajesConsola()
+
+    modo = f"API ({args.conexiones} conexiones)" if args.api else f"navegador ({args.llenado})"
+    print(f"Simulador: {enlace}  Modo: {modo}  Latencia: {args.latencia}s  Error: {args.error}")
+    print(f"{'Lote':<6}{'Filas':>7}{'OK':>6}{'Rechazo':>9}{'Segundos':>10}{'Transf/min':>12}{'Logins':>8}")
+    try:
+        with tempfile.TemporaryDirectory() as temporal:
+            directorio = Path(temporal)
+            for lote in range(1, args.lotes + 1):
+                plantilla = directorio / f"LBTR-{lote}.xlsx"
+                crear_plantilla(plantilla, args.transferencias, lote)
+
+                operacion = LBTROperations()
+                operacion.config_manager = ConfigBenchmark(plantilla, enlace, directorio, args.llenado,
+                                                           args.timeout, args.conexiones if args.api else 0)
+                operacion.configurar_escritura(operacion.config_manager.get_excel_writes())
+                operacion.sesion_web.configurar(operacion.config_manager.get_lbtr_session())
+                operacion.sesion_web.headless = not args.ventana
+                operacion.modo_llenado = args.llenado
+                operacion._find_edge_driver = lambda: args.driver
+
+                antes = dict(simulador.estadisticas)
+                inicio = time.perf_counter()
+                operacion.exec_lbtr("usuario", "clave")
+                duracion = time.perf_counter() - inicio
+
+                exitosas = simulador.estadisticas['transferencias'] - antes['transferencias']
+                rechazadas = simulador.estadisticas['rechazadas'] - antes['rechazadas']
+                logins = simulador.estadisticas['logins'] - antes['logins']
+                print(f"{lote:<6}{args.transferencias:>7}{exitosas:>6}{rechazadas:>9}{duracion:>10.2f}"
+                      f"{(exitosas + rechazadas) / duracion * 60:>12.1f}{logins:>8}")
+    finally:
+        SesionLBTR.cerrar_global()
+        simulador.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de normalización de beneficiarios y cuentas
+
+Compara, sobre columnas sintéticas de --filas valores, la limpieza anterior
+(BaseLogic.limpiar_texto_beneficiario y limpiar_numero_cuenta valor por
+valor, y las operaciones .str encadenadas de ingesta_memo por columna)
+contra src/core/normalizacion por valor y por columna, y contra las
+variantes descartadas: str.translate con tabla precompilada y expresión de
+espacios, y los kernels de pyarrow. Verifica que todos coincidan; las
+cuentas se generan solo con guiones y espacios como separadores y los
+beneficiarios sin retornos de carro, donde la limpieza anterior y la nueva
+dan lo mismo.
+
+Uso:
+    python benchmarks/bench_normalizacion.py --filas 10000
+    python benchmarks/bench_normalizacion.py --filas 1000 10000 100000 --repeticiones 5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import pandas as pd  # noqa: E402
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+import src.utils  # noqa: E402,F401  (inicializa utils antes que core)
+from src.core.normalizacion import (  # noqa: E402
+    limpiar_beneficiario, limpiar_beneficiarios, limpiar_cuenta, limpiar_cuentas,
+)
+
+NOMBRES = ["JUAN PEREZ", "maria  lopez & hijos", "CONSTRUCTORA ÑAÑEZ S.A.C.", "ana\nquispe",
+           " LUIS   TORRES ", "peña\n& asociados", None]
+
+
+def beneficiario_anterior(texto):
+    """BaseLogic.limpiar_texto_beneficiario antes de normalizacion.py"""
+    if not texto:
+        return ""
+    texto_limpio = texto.strip().upper()
+    texto_limpio = texto_limpio.replace('\n', ' ')
+    texto_limpio = texto_limpio.replace('Ñ', 'N')
+    texto_limpio = texto_limpio.replace('&', 'Y')
+    while '  ' in texto_limpio:
+        texto_limpio = texto_limpio.replace('  ', ' ')
+    return texto_limpio.strip()
+
+
+def cuenta_anterior(numero):
+    """BaseLogic.limpiar_numero_cuenta antes de normalizacion.py"""
+    if not numero:
+        return ""
+    return str(numero).replace('-', '').replace(' ', '').strip()
+
+
+def beneficiarios_anterior(serie):
+    """ingesta_memo.limpiar_beneficiarios antes de normalizacion.py"""
+    return (serie.fillna('').astype(str)
+            .str.strip().str.upper()
+            .str.replace('\n', ' ', regex=False)
+            .str.replace('Ñ', 'N', regex=False)
+            .str.replace('&', 'Y', regex=False)
+            .str.replace(r' {2,}', ' ', regex=True)
+            .str.strip())
+
+
+def cuentas_anterior(serie):
+    """ingesta_memo.limpiar_cuentas antes de normalizacion.py"""
+    return (serie.fillna('').astype(str)
+            .str.replace('-', '', regex=False)
+            .str.replace(' ', '', regex=False)
+            .str.strip())
+
+
+TRADUCCION = str.maketrans({'\r': ' ', '\n': ' ', 'Ñ': 'N', '&': 'Y'})
+ESPACIOS = re.compile(r' {2,}')
+NO_DIGITOS = re.compile(r'\D+')
+
+
+def beneficiario_traduccion(texto):
+    if not texto:
+        return ""
+    return ESPACIOS.sub(' ', texto.strip().upper().translate(TRADUCCION)).strip()
+
+
+def cuenta_expresion(numero):
+    if not numero:
+        return ""
+    return NO_DIGITOS.sub('', str(numero))
+
+
+def beneficiarios_arrow(serie):
+    arreglo = pc.utf8_upper(pc.utf8_trim(pa.array(serie.fillna('').astype(str).tolist()), ' '))
+    for origen, destino in (('\r', ' '), ('\n', ' '), ('Ñ', 'N'), ('&', 'Y')):
+        arreglo = pc.replace_substring(arreglo, origen, destino)
+    return pc.utf8_trim(pc.replace_substring_regex(arreglo, ' {2,}', ' '), ' ').to_pylist()
+
+
+def cuentas_arrow(serie):
+    arreglo = pa.array(serie.fillna('').astype(str).tolist())
+    return pc.replace_substring_regex(arreglo, r'\D+', '').to_pylist()
+
+
+def columnas_sinteticas(filas: int, semilla: int = 7):
+    aleatorio = random.Random(semilla)
+    beneficiarios = [aleatorio.choice(NOMBRES) for _ in range(filas)]
+    cuentas = []
+    for _ in range(filas):
+        if aleatorio.random() < 0.05:
+            cuentas.append(None)
+        elif aleatorio.random() < 0.6:
+            cuentas.append("-".join("".join(aleatorio.choices("0123456789", k=5)) for _ in range(4)))
+        else:
+            cuentas.append(" ".join("".join(aleatorio.choices("0123456789", k=4)) for _ in range(3)))
+    return pd.Series(beneficiarios, dtype=object), pd.Series(cuentas, dtype=object)
+
+
+def medir(funcion, repeticiones: int):
+    """Mejor tiempo de repeticiones corridas y el último resultado"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, list(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[10000], help="Valores por columna")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Corridas por medición (se toma la mejor)")
+    args = parser.parse_args()
+
+    diferencias = 0
+    print(f"{'Filas':>8}{'Columna':>14}{'Modo':>14}{'ms':>10}{'Aceleración':>13}")
+    for filas in args.filas:
+        beneficiarios, cuentas = columnas_sinteticas(filas)
+        casos = (
+            ("beneficiario", beneficiarios, beneficiario_anterior, beneficiarios_anterior,
+             beneficiario_traduccion, beneficiarios_arrow, limpiar_beneficiario, limpiar_beneficiarios),
+            ("cuenta", cuentas, cuenta_anterior, cuentas_anterior,
+             cuenta_expresion, cuentas_arrow, limpiar_cuenta, limpiar_cuentas),
+        )
+        for nombre, serie, anterior, columna_anterior, precompilada, arrow, por_valor, por_columna in casos:
+            modos = [
+                ("anterior", lambda: [anterior(valor) for valor in serie]),
+                (".str", lambda: columna_anterior(serie)),
+                ("translate/re", lambda: [precompilada(valor) for valor in serie]),
+                ("por valor", lambda: [por_valor(valor) for valor in serie]),
+                ("columna", lambda: por_columna(serie)),
+            ]
+            if PYARROW_DISPONIBLE:
+                modos.insert(3, ("pyarrow", lambda: arrow(serie)))
+            tiempos = {}
+            resultados = {}
+            for modo, funcion in modos:
+                tiempos[modo], resultados[modo] = medir(funcion, args.repeticiones)
+                aceleracion = tiempos["anterior"] / tiempos[modo] if tiempos[modo] else 0
+                print(f"{filas:>8}{nombre:>14}{modo:>14}{tiempos[modo] * 1000:>10.2f}{aceleracion:>12.1f}x")
+            if any(resultado != resultados["anterior"] for resultado in resultados.values()):
+                diferencias += 1
+                print(f"  Los resultados difieren ({nombre}, {filas} filas)")
+
+    print(f"Diferencias entre modos: {diferencias}")
+    sys.exit(1 if diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
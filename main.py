@@ -24,6 +24,8 @@ sys.path.insert(0, str(BASE_DIR))
 try:
     from src.interface.main_window import FideRappiApp
     from src.utils.logger import setup_logger
+    from src.core.pool_excel import PoolExcel
+    from src.core.sesion_lbtr import SesionLBTR
     
     def main():
         """Función principal de la aplicación"""
@@ -37,6 +39,11 @@ try:
             app.title("FideRAPPI - Sistema de Carga de Datos v2.0")
             app.mainloop()
             
+            # Cerrar la instancia de Excel compartida por las operaciones
+            PoolExcel.cerrar_global()
+            # Cerrar el navegador de LBTR que quedó abierto entre lotes
+            SesionLBTR.cerrar_global()
+            
         except Exception as e:
             error_msg = f"Error al iniciar la aplicación: {str(e)}\n{traceback.format_exc()}"
             print(error_msg)
@@ -0,0 +1,85 @@
+"""
+Backends de libros de Excel
+Define la interfaz WorkbookBackend que usan las operaciones para abrir,
+escribir y guardar sus plantillas. Hay dos implementaciones: el pool de
+Excel por COM (xlwings) y la edición directa del archivo (openpyxl), que
+no necesita Excel instalado
+"""
+
+from contextlib import contextmanager
+
+from src.utils.logger import LoggerMixin, get_logger
+
+BACKENDS = ('xlwings', 'openpyxl')
+
+# El cambio a openpyxl por falta de xlwings se avisa una sola vez por proceso
+_aviso_sin_xlwings = False
+
+
+class WorkbookBackend(LoggerMixin):
+    """
+    Interfaz común para pedir prestado un libro y devolverlo
+
+    Los libros que entrega cada backend exponen el subconjunto de xlwings que
+    usan las operaciones: wb.sheets[nombre], wb.save([ruta]) y en la hoja
+    range(...).value, range(...).end('up'), range(...).delete(),
+    range(...).insert(), cells.last_cell y used_range.last_cell.
+    """
+
+    nombre = ''
+
+    def abrir(self, ruta: str):
+        """
+        Presta un libro
+
+        Args:
+            ruta: Ruta del libro
+
+        Returns:
+            Libro; devolverlo con devolver()
+        """
+        raise NotImplementedError
+
+    def devolver(self, wb):
+        """Cierra el libro prestado sin guardar"""
+        raise NotImplementedError
+
+    @contextmanager
+    def libro(self, ruta: str):
+        """Presta un libro durante un bloque with"""
+        wb = self.abrir(ruta)
+        try:
+            yield wb
+        finally:
+            self.devolver(wb)
+
+    def precalentar(self):
+        """Prepara el backend en segundo plano (por defecto no hace nada)"""
+
+    def cerrar(self):
+        """Libera los recursos del backend (por defecto no hace nada)"""
+
+
+def backend_libros(nombre: str = 'xlwings') -> WorkbookBackend:
+    """
+    Backend compartido de la aplicación
+
+    Args:
+        nombre: 'xlwings' (Excel por COM) u 'openpyxl' (archivo directo); sin
+            xlwings instalado se usa openpyxl
+
+    Returns:
+        Instancia única del backend
+    """
+    from src.core.pool_excel import XLWINGS_DISPONIBLE, PoolExcel
+    from src.core.libro_archivo import BackendArchivo
+
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de libros desconocido: {nombre}")
+    global _aviso_sin_xlwings
+    if nombre == 'xlwings' and not XLWINGS_DISPONIBLE:
+        if not _aviso_sin_xlwings:
+            _aviso_sin_xlwings = True
+            get_logger("FideRAPPI.backend_libros").warning("xlwings no está instalado; los libros se editan con openpyxl")
+        nombre = 'openpyxl'
+    return PoolExcel.obtener() if nombre == 'xlwings' else BackendArchivo.obtener()
@@ -2,8 +2,26 @@
 Lógica base compartida para todas las operaciones de FideRAPPI
 """
 
+import os
+import time
 from datetime import datetime
-from typing import Dict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from src.core.backend_libros import WorkbookBackend, backend_libros
+from src.core.buffer_resultados import HojaConBuffer
+from src.core.carga_plantilla import leer_tabla
+from src.core.ejecucion_paralela import EjecutorParalelo, HojaDiferida
+from src.core.diario_ejecucion import (
+    APLICADA, COMPLETADA, EN_DUDA, INICIADA, DiarioEjecucion, HojaRegistrada, TransaccionEnDuda,
+)
+from src.core.normalizacion import limpiar_beneficiario, limpiar_cuenta
+from src.core.politica_guardado import PoliticaGuardado
+from src.core.pool_excel import PoolExcel
+from src.core.registros import Registro, memoria_registros
+from src.core.screen_conditions import CondicionPantalla, pantalla_cambio, pantalla_sin_mensaje, todas
+from src.core.validacion_previa import ValidacionPrevia
+from src.host.session import HostSession, crear_sesion
 from src.utils.logger import LoggerMixin
 
 class BaseLogic(LoggerMixin):
@@ -17,6 +35,9 @@ class BaseLogic(LoggerMixin):
         10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
     }
     
+    # Columna de estado de la hoja de resultados; ahí se marcan las filas en duda
+    COLUMNA_ESTADO: Optional[str] = None
+    
     def __init__(self, tipo_operacion: str):
         """
         Inicializa la lógica base
@@ -27,7 +48,18 @@ class BaseLogic(LoggerMixin):
         self.tipo_operacion = tipo_operacion
         self.ejecucion_en_progreso = True
         self.seleccion = None
-        self.intervalo = 0.8  # Intervalo de espera para automatización
+        self.intervalo = 0.8  # Espera máxima para pantallas que pueden no cambiar
+        self.timeout_pantalla = 10.0  # Espera máxima por la respuesta del host
+        self.sondeo_pantalla = 0.1  # Pausa entre capturas al esperar la pantalla
+        self.sesion: Optional[HostSession] = None  # Sesión con el host de la ventana actual
+        self.filas_por_vaciado = 50  # Filas de resultados acumuladas antes de escribirlas en Excel
+        self.filas_por_guardado = 20  # Filas terminadas entre guardados del libro
+        self.segundos_por_guardado = 60.0  # Tiempo máximo entre guardados del libro
+        self.ruta_diario: Optional[str] = None  # Diario de ejecución (SQLite); None sin diario
+        self.diario: Optional[DiarioEjecucion] = None
+        self.politica: Optional[PoliticaGuardado] = None  # Confirma en el diario lo que se guardó
+        self.plantilla = ""  # Libro de la ejecución actual, clave en el diario
+        self.libros: WorkbookBackend = PoolExcel.obtener()  # Backend de libros (excel_writes.backend)
         self.detener_proceso = False
         self.deteccion_activa = False
         
@@ -128,24 +160,11 @@ class BaseLogic(LoggerMixin):
         Returns:
             Texto limpiado
         """
-        if not texto:
-            return ""
-        
-        # Convertir a mayúsculas y limpiar caracteres especiales
-        texto_limpio = texto.strip().upper()
-        texto_limpio = texto_limpio.replace('\n', ' ')
-        texto_limpio = texto_limpio.replace('Ñ', 'N')
-        texto_limpio = texto_limpio.replace('&', 'Y')
-        
-        # Limpiar espacios múltiples
-        while '  ' in texto_limpio:
-            texto_limpio = texto_limpio.replace('  ', ' ')
-        
-        return texto_limpio.strip()
+        return limpiar_beneficiario(texto)
     
     def limpiar_numero_cuenta(self, numero: str) -> str:
         """
-        Limpia un número de cuenta eliminando guiones y espacios
+        Limpia un número de cuenta dejando solo sus dígitos
         
         Args:
             numero: Número de cuenta a limpiar
@@ -153,10 +172,7 @@ class BaseLogic(LoggerMixin):
         Returns:
             Número limpio
         """
-        if not numero:
-            return ""
-        
-        return str(numero).replace('-', '').replace(' ', '').strip()
+        return limpiar_cuenta(numero)
     
     def validar_longitud_cuenta(self, numero: str, longitud_esperada: int) -> bool:
         """
@@ -185,6 +201,399 @@ class BaseLogic(LoggerMixin):
         """
         return f"{monto:.{decimales}f}"
     
+    def activar_ventana(self, ventana):
+        """
+        Prepara la sesión con el host y trae al frente la ventana del emulador
+        
+        Args:
+            ventana: Ventana "prod" de pyautogui o una HostSession ya creada
+        """
+        if isinstance(ventana, HostSession):
+            self.sesion = ventana
+        elif self.sesion is None or getattr(self.sesion, 'ventana', None) is not ventana:
+            self.sesion = crear_sesion(ventana)
+        self.sesion.activate()
+    
+    def escribir(self, texto: str):
+        """Escribe texto en el campo actual del host"""
+        self.sesion.send_keys(texto)
+    
+    def presionar(self, tecla: str):
+        """Presiona una tecla (tab o AID) sin esperar respuesta"""
+        self.sesion.press(tecla)
+    
+    def capturar_pantalla(self) -> List[str]:
+        """
+        Lee la pantalla actual del host
+        
+        Returns:
+            Líneas de la pantalla del emulador
+        """
+        return self.sesion.read_screen()
+    
+    def guardar_captura(self, ruta: str):
+        """Guarda la pantalla actual como evidencia"""
+        self.sesion.save_evidence(ruta)
+    
+    def esperar_pantalla(self, condicion: CondicionPantalla,
+                         timeout: Optional[float] = None) -> List[str]:
+        """
+        Espera a que la pantalla del host cumpla una condición
+        
+        Args:
+            condicion: Función que recibe las líneas y devuelve True al cumplirse
+            timeout: Segundos máximos de espera (por defecto timeout_pantalla)
+        
+        Returns:
+            Última captura de la pantalla, se cumpla o no la condición
+        """
+        if timeout is None:
+            timeout = self.timeout_pantalla
+        
+        return self.sesion.wait_for(
+            condicion, timeout, self.sondeo_pantalla,
+            cancelar=lambda: self.detener_proceso
+        )
+    
+    def presionar_y_esperar(self, tecla: str, condicion: Optional[CondicionPantalla] = None,
+                            timeout: Optional[float] = None) -> List[str]:
+        """
+        Presiona una tecla de función y espera a que el host repinte la pantalla
+        
+        Args:
+            tecla: Tecla a enviar (enter, f1, f4, f5...)
+            condicion: Condición adicional que debe cumplir la nueva pantalla
+            timeout: Segundos máximos de espera
+        
+        Returns:
+            Líneas de la pantalla tras la respuesta del host
+        """
+        anterior = self.capturar_pantalla()
+        self.presionar(tecla)
+        
+        esperada = pantalla_cambio(anterior)
+        if condicion is not None:
+            esperada = todas(esperada, condicion)
+        
+        return self.esperar_pantalla(esperada, timeout)
+    
+    def limpiar_pantalla(self) -> List[str]:
+        """
+        Presiona F5 y espera la pantalla en blanco, lista para un código de transacción
+        
+        Si la pantalla ya estaba limpia F5 no la repinta; por eso se espera
+        a que no haya mensaje del host y no a un cambio de pantalla.
+        
+        Returns:
+            Líneas de la pantalla limpia
+        """
+        self.presionar('f5')
+        return self.esperar_pantalla(pantalla_sin_mensaje())
+    
+    def ingresar_transaccion(self, codigo: str) -> List[str]:
+        """
+        Escribe el código de transacción y espera la pantalla de ingreso de datos
+        
+        El emulador del banco envía el código al completar el campo; con las
+        demás sesiones se envía con Enter. En ambos casos los datos no se
+        teclean hasta que el host repinta la pantalla.
+        
+        Args:
+            codigo: Código de transacción ('220', '441', '042'...)
+        
+        Returns:
+            Líneas de la pantalla de la transacción
+        """
+        if not self.sesion.envia_transaccion:
+            self.escribir(codigo)
+            return self.presionar_y_esperar('enter')
+        
+        self.escribir(codigo)
+        eco = self.capturar_pantalla()
+        return self.esperar_pantalla(pantalla_cambio(eco), self.intervalo)
+    
+    def grabar(self, tecla: str, condicion: CondicionPantalla) -> List[str]:
+        """
+        Presiona la tecla que graba la transacción y espera la respuesta del host
+        
+        A diferencia de presionar_y_esperar, si la respuesta no llega no
+        devuelve la pantalla anterior: la transacción pudo haberse grabado.
+        
+        Args:
+            tecla: Tecla de grabación (f4, f1...)
+            condicion: Condición que cumple la pantalla con la respuesta
+        
+        Returns:
+            Líneas de la pantalla con la respuesta
+        
+        Raises:
+            TransaccionEnDuda: Si el host no respondió dentro de timeout_pantalla
+        """
+        anterior = self.capturar_pantalla()
+        self.presionar(tecla)
+        
+        esperada = todas(pantalla_cambio(anterior), condicion)
+        lineas = self.esperar_pantalla(esperada)
+        if not esperada(lineas):
+            raise TransaccionEnDuda(f"VERIFICAR EN HOST: sin respuesta a {tecla.upper()}")
+        return lineas
+    
+    def procesar_pendientes(self, ventana, pendientes: Sequence[Any],
+                            procesar: Callable[[Any, Any, Any, Any], Any],
+                            hoja, guardar: Callable[[], None],
+                            exito: Callable[[Any], bool] = bool) -> List[Any]:
+        """
+        Procesa las filas pendientes en una sesión o repartidas entre varias
+        
+        Args:
+            ventana: Ventana/sesión del host, o lista de sesiones para trabajar en
+                paralelo (HostSession o clientes concurrentes como ClienteAPILBTR)
+            pendientes: Datos de cada fila a procesar; el primer elemento es la fila de la hoja
+            procesar: Función (operacion, sesion, hoja, pendiente) -> resultado de la fila
+            hoja: Hoja donde se escriben los resultados
+            guardar: Se llama después de cada fila (por ejemplo politica.fila_terminada)
+            exito: Indica si el resultado de la fila corresponde a una transacción grabada
+        
+        Returns:
+            Resultado de cada fila en el orden de pendientes; None si no se procesó
+            y EN_DUDA si se envió sin respuesta (esa sesión no toma más filas)
+        """
+        procesar_fila = procesar
+        
+        def procesar(operacion, sesion, hoja_fila, pendiente):
+            return self.transaccion_con_diario(
+                hoja_fila, pendiente[0], pendiente[1:],
+                lambda h: procesar_fila(operacion, sesion, h, pendiente), exito
+            )
+        
+        sesiones = list(ventana) if isinstance(ventana, (list, tuple)) else [ventana]
+        
+        if len(sesiones) > 1:
+            if all(getattr(s, 'concurrente', False) for s in sesiones):
+                ejecutor = EjecutorParalelo(type(self), sesiones, procesar)
+                return ejecutor.ejecutar(pendientes, hoja, guardar, lambda: self.detener_proceso)
+            self.logger.warning("Las ventanas del emulador comparten teclado; se usa solo la primera")
+        
+        resultados = [None] * len(pendientes)
+        for indice, pendiente in enumerate(pendientes):
+            if self.detener_proceso:
+                break
+            try:
+                resultados[indice] = procesar(self, sesiones[0], hoja, pendiente)
+            except TransaccionEnDuda as e:
+                self.logger.error(f"Fila {pendiente[0]} en duda, se detiene el lote: {e}")
+                resultados[indice] = EN_DUDA
+                guardar()
+                break
+            guardar()
+        return resultados
+    
+    def transaccion_con_diario(self, hoja, fila: int, datos: Sequence[Any],
+                               procesar: Callable[[Any], Any],
+                               exito: Callable[[Any], bool] = bool) -> Any:
+        """
+        Ejecuta una transacción registrándola en el diario antes y después
+        
+        Si el diario indica que la transacción ya se grabó o quedó en duda en
+        una ejecución anterior, no se envía de nuevo.
+        
+        Args:
+            hoja: Hoja donde la transacción escribe su resultado
+            fila: Fila de la hoja
+            datos: Datos que identifican la transacción (incluir el tipo si hay varias por fila)
+            procesar: Función (hoja) -> resultado; escribe el resultado en la hoja recibida
+            exito: Indica si el resultado corresponde a una transacción grabada
+        
+        Returns:
+            Resultado de procesar, o None si la transacción no se envió
+        
+        Raises:
+            TransaccionEnDuda: Si procesar la envió sin respuesta; el mensaje
+                queda en COLUMNA_ESTADO y la transacción en duda en el diario
+        """
+        if self.diario is None:
+            return self._procesar_marcando_duda(hoja, fila, procesar)
+        
+        hash_ = DiarioEjecucion.hash_idempotencia(self.tipo_operacion, datos)
+        estado, grabada = self.diario.estado(self.plantilla, fila, hash_)
+        if estado in (INICIADA, EN_DUDA) or (estado in (COMPLETADA, APLICADA) and grabada):
+            self.logger.info(f"Fila {fila} omitida: transacción {estado.lower()} en el diario")
+            return None
+        
+        self.diario.iniciar(self.plantilla, fila, hash_)
+        registro = HojaRegistrada(hoja)
+        try:
+            resultado = self._procesar_marcando_duda(registro, fila, procesar)
+        except TransaccionEnDuda:
+            self._al_aplicar(hoja, lambda: self.politica.transaccion_en_duda(fila, hash_))
+            raise
+        grabada = bool(exito(resultado))
+        self.diario.completar(self.plantilla, fila, hash_, grabada, registro.celdas)
+        self._al_aplicar(hoja, lambda: self.politica.transaccion_aplicada(fila, hash_, grabada))
+        return resultado
+    
+    def _al_aplicar(self, hoja, funcion: Callable[[], None]):
+        """
+        Ejecuta funcion cuando las celdas ya escritas en hoja llegaron a la hoja real
+        
+        En los hilos de trabajo la hoja es diferida y el aviso viaja por la misma
+        cola que las celdas; así el diario solo da por guardado lo que estaba
+        en la hoja al guardar el libro.
+        """
+        if isinstance(hoja, HojaDiferida):
+            hoja.al_aplicar(funcion)
+        else:
+            funcion()
+    
+    def _procesar_marcando_duda(self, hoja, fila: int, procesar: Callable[[Any], Any]) -> Any:
+        """Ejecuta la transacción; si queda en duda lo escribe en COLUMNA_ESTADO y propaga el error"""
+        try:
+            return procesar(hoja)
+        except TransaccionEnDuda as e:
+            if self.COLUMNA_ESTADO:
+                hoja.range(f'{self.COLUMNA_ESTADO}{fila}').value = str(e)
+            raise
+    
+    def hoja_con_buffer(self, hoja) -> HojaConBuffer:
+        """
+        Envuelve una hoja de resultados para escribir sus celdas en bloques
+
+        Args:
+            hoja: Hoja de xlwings donde la operación escribe los resultados
+
+        Returns:
+            Hoja con escritura diferida; se vacía al guardar el libro
+        """
+        return HojaConBuffer(hoja, self.filas_por_vaciado)
+
+    def configurar_escritura(self, configuracion: Dict[str, Any]):
+        """
+        Aplica la configuración excel_writes de info.json
+
+        Args:
+            configuracion: Diccionario de ConfigManager.get_excel_writes()
+        """
+        self.filas_por_vaciado = int(configuracion["flush_rows"])
+        self.filas_por_guardado = int(configuracion["save_every_rows"])
+        self.segundos_por_guardado = float(configuracion["save_every_seconds"])
+        self.ruta_diario = configuracion["journal_file"] if configuracion["journal"] else None
+        self.libros = backend_libros(configuracion["backend"])
+
+    def crear_politica_guardado(self, wb, ruta_libro: str, hoja) -> PoliticaGuardado:
+        """
+        Crea la política de guardado del libro y retoma la ejecución anterior
+
+        Debe llamarse antes de leer la tabla, para que las filas reaplicadas
+        desde el diario ya figuren como procesadas.
+
+        Args:
+            wb: Libro de xlwings
+            ruta_libro: Ruta del libro; identifica la plantilla en el diario
+            hoja: Hoja donde la operación escribe resultados
+
+        Returns:
+            PoliticaGuardado lista para fila_terminada / guardar / cerrar
+        """
+        self.diario = DiarioEjecucion(self.ruta_diario) if self.ruta_diario else None
+        self.plantilla = str(Path(ruta_libro).resolve())
+        politica = PoliticaGuardado(wb, hoja, self.filas_por_guardado, self.segundos_por_guardado,
+                                    self.diario, self.plantilla, self.COLUMNA_ESTADO)
+        self.politica = politica
+        politica.recuperar()
+        return politica
+
+    def abrir_plantilla(self, ruta_libro: str, nombre_hoja: str, columnas: Dict[str, type]):
+        """
+        Abre la plantilla una sola vez: libro, hoja de resultados y filas tipadas
+
+        El libro se pide al backend de libros, se retoma la ejecución anterior
+        desde el diario y las filas se leen de la misma hoja abierta, sin
+        volver a parsear el archivo con pandas.
+
+        Args:
+            ruta_libro: Ruta de la plantilla
+            nombre_hoja: Hoja con la tabla de la operación
+            columnas: Columnas que usa la operación y su tipo
+
+        Returns:
+            (wb, hoja con buffer, política de guardado, DataFrame)
+        """
+        inicio = time.perf_counter()
+        wb = self.libros.abrir(ruta_libro)
+        politica = None
+        try:
+            hoja = self.hoja_con_buffer(wb.sheets[nombre_hoja])
+            politica = self.crear_politica_guardado(wb, ruta_libro, hoja)
+            tabla = leer_tabla(hoja, columnas)
+        except Exception:
+            try:
+                if politica is not None:
+                    politica.cerrar()
+            finally:
+                self.libros.devolver(wb)
+            raise
+
+        duracion = time.perf_counter() - inicio
+        tamano = os.path.getsize(ruta_libro) / 1024
+        self.logger.info(
+            f"Plantilla {os.path.basename(ruta_libro)} ({tamano:.0f} KB, {len(tabla)} filas) "
+            f"cargada en {duracion:.2f} s ({duracion * 1000 / max(tamano, 1):.1f} ms/KB)"
+        )
+        return wb, hoja, politica, tabla
+
+    def preparar_registros(self, tabla, tipo_registro: Type[Registro],
+                           validacion: Optional[ValidacionPrevia] = None, hoja=None) -> List[Registro]:
+        """
+        Normaliza la tabla de la plantilla en registros de la operación
+
+        Con validacion, las filas pendientes se validan todas antes de
+        devolver los registros: las rechazadas llevan el motivo en rechazo y
+        los motivos se escriben en COLUMNA_ESTADO de la hoja de una vez.
+
+        Args:
+            tabla: Filas leídas con abrir_plantilla
+            tipo_registro: Subclase de Registro de la operación
+            validacion: Reglas de validación previa de la operación
+            hoja: Hoja de resultados (requerida con validacion)
+
+        Returns:
+            Registros con la fila de Excel y los campos ya convertidos
+        """
+        inicio = time.perf_counter()
+        normalizada = tipo_registro.normalizar(tabla)
+        registros = tipo_registro.desde_normalizada(normalizada)
+        self.logger.info(
+            f"{len(registros)} registros {tipo_registro.__name__} preparados en "
+            f"{(time.perf_counter() - inicio) * 1000:.0f} ms ({memoria_registros(registros) / 1024:.0f} KB)"
+        )
+
+        if validacion is not None:
+            inicio = time.perf_counter()
+            motivos = validacion.motivos(normalizada)
+            for registro in registros:
+                registro.rechazo = motivos.get(registro.fila)
+            llamadas = self.escribir_rechazos(hoja, motivos)
+            self.logger.info(
+                f"Validación previa: {len(motivos)} filas rechazadas en "
+                f"{(time.perf_counter() - inicio) * 1000:.0f} ms ({llamadas} escrituras en la hoja)"
+            )
+        return registros
+
+    def escribir_rechazos(self, hoja, motivos: Dict[int, str]) -> int:
+        """
+        Escribe los motivos de rechazo en COLUMNA_ESTADO en un solo vaciado
+
+        Returns:
+            Cantidad de asignaciones en la hoja
+        """
+        if not motivos:
+            return 0
+        if isinstance(hoja, HojaConBuffer):
+            return hoja.escribir_columna(self.COLUMNA_ESTADO, motivos)
+        for fila, motivo in motivos.items():
+            hoja.range(f'{self.COLUMNA_ESTADO}{fila}').value = motivo
+        return len(motivos)
+
     def detener_operacion(self):
         """Marca la operación para ser detenida"""
         self.detener_proceso = True
@@ -0,0 +1,209 @@
+"""
+Buffer de escritura diferida para las celdas de resultado
+Las operaciones escriben con hoja.range('I12').value = x como siempre; el
+buffer guarda esos valores en memoria y los vuelca agrupados en bloques
+rectangulares contiguos, un llamado COM por bloque en lugar de uno por celda
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import LoggerMixin
+
+_REFERENCIA_CELDA = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d+)$')
+
+
+def columna_a_indice(letras: str) -> int:
+    """Convierte la letra de columna ('A', 'AB') en índice base 1"""
+    indice = 0
+    for letra in letras.upper():
+        indice = indice * 26 + ord(letra) - 64
+    return indice
+
+
+def indice_a_columna(indice: int) -> str:
+    """Convierte un índice de columna base 1 en su letra"""
+    letras = ""
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+class _CeldaBuffer:
+    """Celda cuyo valor se guarda en el buffer hasta el siguiente vaciado"""
+
+    __slots__ = ('_buffer', '_fila', '_columna')
+
+    def __init__(self, buffer: 'HojaConBuffer', fila: int, columna: int):
+        self._buffer = buffer
+        self._fila = fila
+        self._columna = columna
+
+    @property
+    def value(self):
+        return self._buffer.leer(self._fila, self._columna)
+
+    @value.setter
+    def value(self, valor):
+        self._buffer.escribir(self._fila, self._columna, valor)
+
+
+class HojaConBuffer(LoggerMixin):
+    """
+    Envoltura de una hoja de xlwings con escritura diferida de celdas sueltas
+
+    Solo se difieren las asignaciones a una celda ('I12'); cualquier otro uso
+    de la hoja (rangos, inserciones, cells...) vacía antes el buffer para que
+    Excel vea siempre los valores en el orden en que se escribieron.
+    """
+
+    def __init__(self, hoja, filas_por_vaciado: int = 50):
+        """
+        Args:
+            hoja: Hoja real (xlwings.Sheet o compatible)
+            filas_por_vaciado: Vacía solo al acumular esta cantidad de filas; 0 solo con vaciar()
+        """
+        self.hoja = hoja
+        self.filas_por_vaciado = filas_por_vaciado
+        self.llamadas_com = 0  # Asignaciones hechas en la hoja real
+        self._pendientes: Dict[int, Dict[int, Any]] = {}
+        self._escrituras: List[Tuple[int, int, Any]] = []  # Para el diario de resultados
+
+    @property
+    def pendientes(self) -> int:
+        """Cantidad de celdas escritas que aún no llegaron a Excel"""
+        return sum(len(columnas) for columnas in self._pendientes.values())
+
+    @property
+    def modificada(self) -> bool:
+        """True si hay celdas escritas que no se tomaron con tomar_escrituras"""
+        return bool(self._escrituras)
+
+    def range(self, referencia, *args, **kwargs):
+        """Celda diferida para referencias simples; rango real para todo lo demás"""
+        if isinstance(referencia, str) and not args and not kwargs:
+            coincidencia = _REFERENCIA_CELDA.match(referencia)
+            if coincidencia:
+                return _CeldaBuffer(self, int(coincidencia.group(2)),
+                                    columna_a_indice(coincidencia.group(1)))
+        self.vaciar()
+        return self.hoja.range(referencia, *args, **kwargs)
+
+    def __getattr__(self, nombre: str):
+        # Atributos de la hoja real (cells, name, book...) con el buffer ya vaciado
+        if nombre.startswith('_') or nombre == 'hoja':
+            raise AttributeError(nombre)
+        self.vaciar()
+        return getattr(self.hoja, nombre)
+
+    def leer(self, fila: int, columna: int) -> Any:
+        """Valor pendiente de la celda o, si no hay, el de la hoja real"""
+        columnas = self._pendientes.get(fila)
+        if columnas is not None and columna in columnas:
+            return columnas[columna]
+        return self.hoja.range(f"{indice_a_columna(columna)}{fila}").value
+
+    def escribir(self, fila: int, columna: int, valor: Any):
+        """Guarda el valor de la celda; vacía si se alcanzó el límite de filas"""
+        if (fila not in self._pendientes and self.filas_por_vaciado
+                and len(self._pendientes) >= self.filas_por_vaciado):
+            self.vaciar()
+        self._pendientes.setdefault(fila, {})[columna] = valor
+        self._escrituras.append((fila, columna, valor))
+
+    def escribir_columna(self, columna: str, valores: Dict[int, Any]) -> int:
+        """
+        Escribe varias filas de una columna en un solo vaciado
+
+        A diferencia de escribir, no vacía a mitad de camino al llegar a
+        filas_por_vaciado: las filas consecutivas quedan en un mismo bloque.
+
+        Args:
+            columna: Letra de la columna
+            valores: Fila -> valor
+
+        Returns:
+            Cantidad de asignaciones (llamados COM) realizadas
+        """
+        indice = columna_a_indice(columna)
+        for fila, valor in valores.items():
+            self._pendientes.setdefault(fila, {})[indice] = valor
+            self._escrituras.append((fila, indice, valor))
+        return self.vaciar()
+
+    def tomar_escrituras(self) -> List[Tuple[str, Any]]:
+        """Devuelve (referencia, valor) de las celdas escritas desde la última llamada"""
+        escrituras, self._escrituras = self._escrituras, []
+        return [(f"{indice_a_columna(columna)}{fila}", valor) for fila, columna, valor in escrituras]
+
+    def vaciar(self) -> int:
+        """
+        Escribe en Excel todas las celdas pendientes
+
+        Cada fila se divide en tramos de columnas contiguas y los tramos con
+        las mismas columnas en filas consecutivas se unen en un solo bloque.
+        Los huecos no se rellenan: leer y reescribir celdas vecinas pisaría
+        fórmulas del template.
+
+        Returns:
+            Cantidad de asignaciones (llamados COM) realizadas
+        """
+        if not self._pendientes:
+            return 0
+
+        bloques = self._bloques()
+        self._pendientes = {}
+        for columna, fila, valores in bloques:
+            celda = self.hoja.range(f"{indice_a_columna(columna)}{fila}")
+            if len(valores) == 1 and len(valores[0]) == 1:
+                celda.value = valores[0][0]
+            else:
+                # xlwings expande la lista anidada desde la celda superior izquierda
+                celda.value = valores
+        self.llamadas_com += len(bloques)
+        return len(bloques)
+
+    def _bloques(self) -> List[Tuple[int, int, List[List[Any]]]]:
+        """Agrupa las celdas pendientes en bloques (columna, fila inicial, valores)"""
+        cerrados: List[Tuple[int, int, List[List[Any]]]] = []
+        # (columna inicial, ancho) -> [fila inicial, última fila, valores]
+        abiertos: Dict[Tuple[int, int], List[Any]] = {}
+
+        for fila in sorted(self._pendientes):
+            columnas = self._pendientes[fila]
+            tramos = []
+            inicio: Optional[int] = None
+            anterior = None
+            valores: List[Any] = []
+            for columna in sorted(columnas):
+                if anterior is not None and columna == anterior + 1:
+                    valores.append(columnas[columna])
+                else:
+                    if inicio is not None:
+                        tramos.append((inicio, valores))
+                    inicio, valores = columna, [columnas[columna]]
+                anterior = columna
+            tramos.append((inicio, valores))
+
+            vistos = set()
+            for inicio, valores in tramos:
+                clave = (inicio, len(valores))
+                vistos.add(clave)
+                bloque = abiertos.get(clave)
+                if bloque is not None and bloque[1] == fila - 1:
+                    bloque[1] = fila
+                    bloque[2].append(valores)
+                else:
+                    if bloque is not None:
+                        cerrados.append((clave[0], bloque[0], bloque[2]))
+                    abiertos[clave] = [fila, fila, [valores]]
+
+            # Los bloques que esta fila no continuó ya no pueden crecer
+            for clave in [c for c in abiertos if c not in vistos]:
+                bloque = abiertos.pop(clave)
+                cerrados.append((clave[0], bloque[0], bloque[2]))
+
+        for clave, bloque in abiertos.items():
+            cerrados.append((clave[0], bloque[0], bloque[2]))
+        return cerrados
@@ -0,0 +1,171 @@
+"""
+Caché en disco de memos ya leídos
+Volver a cargar el mismo memorándum (por ejemplo con "Limpiar excel" o con
+otra posición de observación en LBTR) no vuelve a parsear el Excel: la tabla
+validada y combinada se guarda en formato columnar, identificada por ruta,
+tamaño, fecha de modificación y hash del contenido. Las entradas menos
+usadas se descartan al superar el tamaño máximo
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.logger import LoggerMixin
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+
+def huella_archivo(ruta: str) -> str:
+    """Identifica el archivo por ruta, tamaño, fecha de modificación y hash del contenido"""
+    ruta_absoluta = str(Path(ruta).resolve())
+    estado = os.stat(ruta_absoluta)
+    contenido = hashlib.sha256()
+    with open(ruta_absoluta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            contenido.update(bloque)
+    texto = f"{ruta_absoluta}|{estado.st_size}|{estado.st_mtime_ns}|{contenido.hexdigest()}"
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+class CacheMemos(LoggerMixin):
+    """Caché LRU de tablas de memo con tamaño máximo en disco"""
+
+    _instancias: Dict[str, 'CacheMemos'] = {}
+    _bloqueo_instancias = threading.Lock()
+
+    @classmethod
+    def desde_config(cls, configuracion: Dict) -> Optional['CacheMemos']:
+        """
+        Caché compartida para la configuración memo_cache de info.json
+
+        Returns:
+            None si la caché está desactivada
+        """
+        if not configuracion.get("enabled", True):
+            return None
+        directorio = str(configuracion["dir"])
+        with cls._bloqueo_instancias:
+            if directorio not in cls._instancias:
+                cls._instancias[directorio] = cls(directorio, int(configuracion["max_mb"]) * 1024 * 1024)
+            return cls._instancias[directorio]
+
+    def __init__(self, directorio: str, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            directorio: Carpeta de la caché (se crea si no existe)
+            max_bytes: Tamaño máximo de las entradas; se descartan las menos usadas
+        """
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.formato = 'parquet' if PARQUET_DISPONIBLE else 'pickle'
+        self._ruta_indice = self.directorio / "indice.json"
+        self._bloqueo = threading.Lock()
+        self._indice: Dict[str, Dict] = self._leer_indice()
+
+    def _leer_indice(self) -> Dict[str, Dict]:
+        try:
+            with open(self._ruta_indice, 'r', encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _guardar_indice(self):
+        temporal = self._ruta_indice.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self._indice, archivo)
+        os.replace(temporal, self._ruta_indice)
+
+    def obtener(self, huella: str) -> Optional[Tuple[pd.DataFrame, bool]]:
+        """
+        Tabla guardada para la huella
+
+        Returns:
+            (tabla, hoja_no_util) o None si no está en caché
+        """
+        with self._bloqueo:
+            entrada = self._indice.get(huella)
+            if entrada is None:
+                return None
+            ruta = self.directorio / entrada["archivo"]
+            try:
+                if entrada["formato"] == 'parquet':
+                    tabla = _restaurar_nulos(pd.read_parquet(ruta))
+                else:
+                    with open(ruta, 'rb') as archivo:
+                        tabla = pickle.load(archivo)
+            except Exception as e:
+                self.logger.warning(f"Entrada de caché ilegible, se descarta: {e}")
+                self._descartar(huella)
+                self._guardar_indice()
+                return None
+            entrada["ultimo_uso"] = time.time()
+            self._guardar_indice()
+            return tabla, entrada["hoja_no_util"]
+
+    def guardar(self, huella: str, tabla: pd.DataFrame, hoja_no_util: bool):
+        """Guarda la tabla y descarta las entradas menos usadas si se supera el tamaño máximo"""
+        with self._bloqueo:
+            formato = self.formato
+            archivo = f"{huella}.{formato}"
+            ruta = self.directorio / archivo
+            try:
+                if formato == 'parquet':
+                    tabla.to_parquet(ruta, index=False)
+                else:
+                    with open(ruta, 'wb') as destino:
+                        pickle.dump(tabla, destino, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                self.logger.warning(f"No se pudo guardar el memo en caché: {e}")
+                return
+
+            self._indice[huella] = {
+                "archivo": archivo,
+                "formato": formato,
+                "bytes": ruta.stat().st_size,
+                "hoja_no_util": bool(hoja_no_util),
+                "ultimo_uso": time.time()
+            }
+            self._recortar()
+            self._guardar_indice()
+
+    def _recortar(self):
+        """Descarta las entradas menos usadas hasta quedar bajo el tamaño máximo"""
+        total = sum(entrada["bytes"] for entrada in self._indice.values())
+        for huella in sorted(self._indice, key=lambda h: self._indice[h]["ultimo_uso"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._indice[huella]["bytes"]
+            self._descartar(huella)
+
+    def _descartar(self, huella: str):
+        entrada = self._indice.pop(huella, None)
+        if entrada is not None:
+            try:
+                os.remove(self.directorio / entrada["archivo"])
+            except OSError:
+                pass
+
+    @property
+    def bytes_usados(self) -> int:
+        return sum(entrada["bytes"] for entrada in self._indice.values())
+
+
+def _restaurar_nulos(tabla: pd.DataFrame) -> pd.DataFrame:
+    """Parquet devuelve None en columnas de texto; read_excel deja NaN"""
+    for columna in tabla.columns:
+        if tabla[columna].dtype == object:
+            tabla[columna] = tabla[columna].where(tabla[columna].notna(), float('nan'))
+    return tabla
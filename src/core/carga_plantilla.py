@@ -0,0 +1,92 @@
+"""
+Carga de plantillas en una sola pasada
+La plantilla ya está abierta en Excel para escribir resultados; las filas se
+leen de esa misma hoja con un solo llamado COM en lugar de volver a parsear
+el archivo con pandas. Solo se conservan las columnas que usa la operación,
+convertidas a los tipos declarados
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+
+def _a_texto(valor: Any) -> Any:
+    """Como dtype=str de read_excel: vacío queda NaN y los enteros sin '.0'"""
+    if valor is None or valor == "":
+        return float('nan')
+    if isinstance(valor, float):
+        return str(int(valor)) if valor.is_integer() else str(valor)
+    return str(valor)
+
+
+def _a_numero(valor: Any) -> float:
+    if valor is None or valor == "":
+        return float('nan')
+    return float(valor)
+
+
+def tabla_desde_valores(valores: Sequence[Sequence[Any]], columnas: Dict[str, type]) -> pd.DataFrame:
+    """
+    Arma la tabla tipada a partir de los valores de la hoja (cabecera en la primera fila)
+
+    Las filas vacías del final se descartan, como hace read_excel; las del
+    medio se conservan para que el índice siga siendo fila de Excel - 2.
+
+    Args:
+        valores: Filas de la hoja tal como las devuelve xlwings
+        columnas: Columnas a conservar y su tipo (str, float u otro tipo de pandas)
+    """
+    if not valores:
+        return pd.DataFrame({nombre: pd.Series(dtype=object if tipo is str else tipo)
+                             for nombre, tipo in columnas.items()})
+
+    cabecera = list(valores[0])
+    filas = list(valores[1:])
+    while filas and all(valor is None or valor == "" for valor in filas[-1]):
+        filas.pop()
+
+    datos = {}
+    for nombre, tipo in columnas.items():
+        if nombre not in cabecera:
+            continue
+        posicion = cabecera.index(nombre)
+        crudos = [fila[posicion] if posicion < len(fila) else None for fila in filas]
+        if tipo is str:
+            datos[nombre] = pd.Series([_a_texto(v) for v in crudos], dtype=object)
+        elif tipo is float:
+            datos[nombre] = pd.Series([_a_numero(v) for v in crudos], dtype='float64')
+        else:
+            datos[nombre] = pd.Series(crudos).astype(tipo)
+    return pd.DataFrame(datos, index=pd.RangeIndex(len(filas)))
+
+
+def leer_tabla(hoja, columnas: Dict[str, type]) -> pd.DataFrame:
+    """
+    Lee la tabla de una hoja abierta con cabecera en la fila 1
+
+    Args:
+        hoja: Hoja de xlwings (o HojaConBuffer, que vacía antes de leer)
+        columnas: Columnas a conservar y su tipo
+
+    Returns:
+        DataFrame con índice 0 para la fila 2 de Excel
+    """
+    ultima = hoja.used_range.last_cell
+    valores: Optional[List[List[Any]]] = hoja.range(
+        (1, 1), (ultima.row, ultima.column)
+    ).options(ndim=2).value
+    return tabla_desde_valores(valores or [], columnas)
+
+
+def leer_tabla_archivo(ruta: str, nombre_hoja: str, columnas: Dict[str, type]) -> pd.DataFrame:
+    """
+    Lee de disco un libro que no se va a escribir, solo con las columnas necesarias
+
+    Args:
+        ruta: Ruta del libro
+        nombre_hoja: Hoja a leer
+        columnas: Columnas a conservar y su tipo
+    """
+    return pd.read_excel(ruta, sheet_name=nombre_hoja, header=0, dtype=columnas,
+                         usecols=lambda nombre: nombre in columnas)
@@ -0,0 +1,246 @@
+"""
+Diario de ejecución en SQLite (modo WAL)
+Cada transacción con el host o con LBTR se registra antes de enviarse y
+después de terminar, por plantilla, fila y hash de idempotencia. Con eso una
+ejecución cortada se retoma sin volver a grabar lo ya grabado: lo terminado
+se reaplica en el libro y lo que quedó a medias se marca para verificar
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.logger import LoggerMixin
+
+# Estados de una transacción (el último evento manda)
+INICIADA = 'INICIADA'      # Registrada antes de enviar la transacción
+COMPLETADA = 'COMPLETADA'  # El host respondió; las celdas aún no están en el libro guardado
+APLICADA = 'APLICADA'      # Las celdas del resultado ya están en el libro guardado
+EN_DUDA = 'EN_DUDA'        # Se cortó entre INICIADA y COMPLETADA: verificar en el host
+LIBERADA = 'LIBERADA'      # El operador verificó la fila y permite reintentarla
+
+
+class TransaccionEnDuda(Exception):
+    """
+    La transacción se envió y no hubo respuesta: pudo grabarse o no
+
+    El mensaje va a la columna de estado de la fila; la transacción queda
+    en duda en el diario y no se reenvía hasta verificarla.
+    """
+
+
+class DiarioEjecucion(LoggerMixin):
+    """Diario append-only de transacciones, compartido por los hilos de una ejecución"""
+
+    def __init__(self, ruta: Path):
+        """
+        Args:
+            ruta: Archivo SQLite del diario (se crea si no existe)
+        """
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._bloqueo = threading.Lock()
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=FULL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS eventos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                plantilla TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                exito INTEGER,
+                celdas TEXT,
+                momento REAL NOT NULL
+            )
+        """)
+        self._conexion.execute(
+            "CREATE INDEX IF NOT EXISTS eventos_clave ON eventos (plantilla, fila, hash, id)"
+        )
+
+    @staticmethod
+    def hash_idempotencia(operacion: str, datos: Sequence[Any]) -> str:
+        """
+        Hash estable de una transacción
+
+        Args:
+            operacion: Tipo de operación (CCE, AHORROS...) y tipo de transacción si hay varias por fila
+            datos: Datos que identifican la transacción (cuenta, monto, memo...)
+        """
+        texto = json.dumps([operacion, *datos], ensure_ascii=False, default=str)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+    def _agregar(self, plantilla: str, fila: int, hash_: str, estado: str,
+                 exito: Optional[bool] = None, celdas: Optional[List[Tuple[str, Any]]] = None) -> int:
+        with self._bloqueo:
+            cursor = self._conexion.execute(
+                "INSERT INTO eventos (plantilla, fila, hash, estado, exito, celdas, momento) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (plantilla, fila, hash_, estado, None if exito is None else int(exito),
+                 None if celdas is None else json.dumps(celdas, ensure_ascii=False, default=str),
+                 time.time())
+            )
+            return cursor.lastrowid
+
+    def _agregar_varios(self, plantilla: str, estado: str,
+                        claves: List[Tuple[int, str, Optional[int]]]):
+        """Agrega el mismo estado a varias transacciones (fila, hash, éxito) en una sola escritura"""
+        if not claves:
+            return
+        momento = time.time()
+        with self._bloqueo:
+            self._conexion.execute("BEGIN")
+            try:
+                self._conexion.executemany(
+                    "INSERT INTO eventos (plantilla, fila, hash, estado, exito, momento) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(plantilla, fila, hash_, estado, exito, momento) for fila, hash_, exito in claves]
+                )
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+            self._conexion.execute("COMMIT")
+
+    def _ultimos(self, plantilla: str) -> List[tuple]:
+        """Último evento de cada transacción de la plantilla"""
+        with self._bloqueo:
+            return self._conexion.execute("""
+                SELECT e.id, e.fila, e.hash, e.estado, e.exito, e.celdas
+                FROM eventos e
+                JOIN (SELECT MAX(id) AS id FROM eventos WHERE plantilla = ?
+                      GROUP BY fila, hash) u ON u.id = e.id
+                ORDER BY e.id
+            """, (plantilla,)).fetchall()
+
+    def estado(self, plantilla: str, fila: int, hash_: str) -> Tuple[Optional[str], Optional[bool]]:
+        """
+        Estado actual de una transacción
+
+        Returns:
+            (estado, exito); (None, None) si nunca se intentó
+        """
+        with self._bloqueo:
+            registro = self._conexion.execute(
+                "SELECT estado, exito FROM eventos WHERE plantilla = ? AND fila = ? AND hash = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (plantilla, fila, hash_)
+            ).fetchone()
+        if registro is None:
+            return None, None
+        return registro[0], None if registro[1] is None else bool(registro[1])
+
+    def iniciar(self, plantilla: str, fila: int, hash_: str):
+        """Registra la transacción antes de enviarla"""
+        self._agregar(plantilla, fila, hash_, INICIADA)
+
+    def completar(self, plantilla: str, fila: int, hash_: str, exito: bool,
+                  celdas: List[Tuple[str, Any]]):
+        """Registra el resultado y las celdas que la transacción escribió en la hoja"""
+        self._agregar(plantilla, fila, hash_, COMPLETADA, exito, celdas)
+
+    def marcar_aplicadas(self, plantilla: str, claves: List[Tuple[int, str, Optional[bool]]]) -> int:
+        """
+        Marca como aplicadas transacciones cuyas celdas ya están en el libro guardado
+
+        Args:
+            plantilla: Libro que se guardó
+            claves: (fila, hash, éxito) de cada transacción; el éxito se conserva
+                para que la transacción siga sin reenviarse
+
+        Returns:
+            Cantidad de transacciones marcadas
+        """
+        self._agregar_varios(plantilla, APLICADA, [
+            (fila, hash_, None if exito is None else int(exito)) for fila, hash_, exito in claves
+        ])
+        return len(claves)
+
+    def por_aplicar(self, plantilla: str) -> List[Tuple[int, str, Optional[bool], List[Tuple[str, Any]]]]:
+        """Transacciones completadas cuyo resultado no llegó a un libro guardado: (fila, hash, éxito, celdas)"""
+        return [(r[1], r[2], None if r[4] is None else bool(r[4]), json.loads(r[5]) if r[5] else [])
+                for r in self._ultimos(plantilla) if r[3] == COMPLETADA]
+
+    def iniciadas(self, plantilla: str) -> List[Tuple[int, str]]:
+        """Transacciones iniciadas que nunca terminaron: (fila, hash)"""
+        return [(r[1], r[2]) for r in self._ultimos(plantilla) if r[3] == INICIADA]
+
+    def filas_en_duda(self, plantilla: str) -> List[int]:
+        """Filas con alguna transacción en duda"""
+        return sorted({r[1] for r in self._ultimos(plantilla) if r[3] == EN_DUDA})
+
+    def marcar_en_duda(self, plantilla: str, claves: List[Tuple[int, str]]) -> int:
+        """
+        Pasa a EN_DUDA transacciones iniciadas cuyo aviso ya está en el libro guardado
+
+        Args:
+            plantilla: Libro que se guardó
+            claves: (fila, hash) de cada transacción
+
+        Returns:
+            Cantidad de transacciones marcadas
+        """
+        self._agregar_varios(plantilla, EN_DUDA, [(fila, hash_, None) for fila, hash_ in claves])
+        return len(claves)
+
+    def liberar(self, plantilla: str, fila: int) -> int:
+        """
+        Permite reintentar una fila en duda después de verificarla en el host
+
+        Returns:
+            Cantidad de transacciones liberadas
+        """
+        liberadas = [(fila, r[2], None) for r in self._ultimos(plantilla) if r[1] == fila and r[3] == EN_DUDA]
+        self._agregar_varios(plantilla, LIBERADA, liberadas)
+        return len(liberadas)
+
+    def resumen(self, plantilla: str) -> Dict[str, int]:
+        """Cantidad de transacciones de la plantilla por estado actual"""
+        resumen: Dict[str, int] = {}
+        for registro in self._ultimos(plantilla):
+            resumen[registro[3]] = resumen.get(registro[3], 0) + 1
+        return resumen
+
+    def cerrar(self):
+        with self._bloqueo:
+            self._conexion.close()
+
+
+class HojaRegistrada:
+    """Hoja que anota las celdas escritas por una transacción y las reenvía a la hoja real"""
+
+    def __init__(self, hoja):
+        self.hoja = hoja
+        self.celdas: List[Tuple[str, Any]] = []
+
+    def range(self, referencia, *args, **kwargs):
+        if isinstance(referencia, str) and not args and not kwargs:
+            return _CeldaRegistrada(self, referencia)
+        return self.hoja.range(referencia, *args, **kwargs)
+
+    def __getattr__(self, nombre: str):
+        if nombre in ('hoja', 'celdas'):
+            raise AttributeError(nombre)
+        return getattr(self.hoja, nombre)
+
+
+class _CeldaRegistrada:
+    __slots__ = ('_registro', '_referencia')
+
+    def __init__(self, registro: HojaRegistrada, referencia: str):
+        self._registro = registro
+        self._referencia = referencia
+
+    @property
+    def value(self):
+        return self._registro.hoja.range(self._referencia).value
+
+    @value.setter
+    def value(self, valor):
+        self._registro.celdas.append((self._referencia, valor))
+        self._registro.hoja.range(self._referencia).value = valor
+
@@ -0,0 +1,161 @@
+"""
+Ejecución de filas pendientes repartidas entre varias sesiones del host
+Cada sesión tiene su propio hilo y su propia instancia de la operación; las
+escrituras en la hoja se devuelven al hilo que abrió el libro (xlwings/COM
+no admite escrituras desde otros hilos)
+"""
+
+import queue
+import threading
+from typing import Any, Callable, List, Sequence
+
+from src.core.diario_ejecucion import EN_DUDA, TransaccionEnDuda
+from src.utils.logger import LoggerMixin
+
+
+class _CeldaDiferida:
+    """Celda que envía su valor a la cola de escrituras"""
+
+    def __init__(self, cola: queue.Queue, referencia: str):
+        self._cola = cola
+        self._referencia = referencia
+
+    @property
+    def value(self):
+        raise RuntimeError("La hoja diferida solo admite escrituras desde los hilos de trabajo")
+
+    @value.setter
+    def value(self, valor):
+        self._cola.put(('celda', self._referencia, valor))
+
+
+class HojaDiferida:
+    """Hoja compatible con hoja.range('A1').value = x para los hilos de trabajo"""
+
+    def __init__(self, cola: queue.Queue):
+        self._cola = cola
+
+    def range(self, referencia: str) -> _CeldaDiferida:
+        return _CeldaDiferida(self._cola, referencia)
+
+    def al_aplicar(self, funcion: Callable[[], None]):
+        """Ejecuta funcion en el hilo principal después de aplicar las celdas ya enviadas"""
+        self._cola.put(('aviso', funcion))
+
+
+class EjecutorParalelo(LoggerMixin):
+    """Reparte filas pendientes entre sesiones y consolida los resultados en la hoja"""
+
+    def __init__(self, fabrica_operacion: Callable[[], Any], sesiones: Sequence[Any],
+                 procesar: Callable[[Any, Any, Any, Any], Any]):
+        """
+        Args:
+            fabrica_operacion: Crea una instancia de la operación por sesión
+            sesiones: Sesiones independientes con el host (una por hilo)
+            procesar: Función (operacion, sesion, hoja, pendiente) -> resultado de la fila
+        """
+        self.fabrica_operacion = fabrica_operacion
+        self.sesiones = list(sesiones)
+        self.procesar = procesar
+
+    def ejecutar(self, pendientes: Sequence[Any], hoja, guardar: Callable[[], None],
+                 detener: Callable[[], bool]) -> List[Any]:
+        """
+        Procesa las filas pendientes con un hilo por sesión
+
+        Cada fila sale una sola vez de la cola compartida, así ninguna se
+        procesa (ni se graba en el host) dos veces aunque los hilos avancen a
+        ritmos distintos. Una fila que falla con excepción no se reintenta;
+        si quedó en duda (TransaccionEnDuda) su sesión no toma más filas.
+
+        Args:
+            pendientes: Datos de cada fila a procesar
+            hoja: Hoja real donde aplicar las escrituras (se usa solo en este hilo)
+            guardar: Se llama tras aplicar cada fila terminada (por ejemplo wb.save)
+            detener: Devuelve True para dejar de tomar filas nuevas
+
+        Returns:
+            Resultado de cada fila en el orden de pendientes; None si no se procesó
+            y EN_DUDA si se envió sin respuesta
+        """
+        trabajo: queue.Queue = queue.Queue()
+        for indice, pendiente in enumerate(pendientes):
+            trabajo.put((indice, pendiente))
+
+        escrituras: queue.Queue = queue.Queue()
+        resultados: List[Any] = [None] * len(pendientes)
+        parar = threading.Event()
+        operaciones = []
+        hilos = []
+
+        for numero, sesion in enumerate(self.sesiones, start=1):
+            operacion = self.fabrica_operacion()
+            operacion.iniciar_operacion()
+            operacion.activar_ventana(sesion)
+            operaciones.append(operacion)
+            hilo = threading.Thread(
+                target=self._trabajar,
+                args=(operacion, sesion, trabajo, escrituras, parar),
+                name=f"sesion-host-{numero}",
+                daemon=True
+            )
+            hilos.append(hilo)
+
+        self.logger.info(f"Procesando {len(pendientes)} filas con {len(hilos)} sesiones en paralelo")
+        for hilo in hilos:
+            hilo.start()
+
+        activos = len(hilos)
+        while activos:
+            if detener() and not parar.is_set():
+                parar.set()
+                for operacion in operaciones:
+                    operacion.detener_operacion()
+
+            try:
+                mensaje = escrituras.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            tipo = mensaje[0]
+            if tipo == 'celda':
+                hoja.range(mensaje[1]).value = mensaje[2]
+            elif tipo == 'aviso':
+                mensaje[1]()
+            elif tipo == 'fila':
+                resultados[mensaje[1]] = mensaje[2]
+                guardar()
+            elif tipo == 'fin':
+                activos -= 1
+
+        for hilo in hilos:
+            hilo.join()
+        for operacion in operaciones:
+            operacion.finalizar_operacion()
+
+        return resultados
+
+    def _trabajar(self, operacion, sesion, trabajo: queue.Queue,
+                  escrituras: queue.Queue, parar: threading.Event):
+        """Hilo de una sesión: toma filas de la cola hasta vaciarla o detenerse"""
+        hoja = HojaDiferida(escrituras)
+        try:
+            while not parar.is_set():
+                try:
+                    indice, pendiente = trabajo.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    resultado = self.procesar(operacion, sesion, hoja, pendiente)
+                except TransaccionEnDuda as e:
+                    self.logger.error(f"Fila en duda en {threading.current_thread().name}, "
+                                      f"la sesión no toma más filas: {e}")
+                    escrituras.put(('fila', indice, EN_DUDA))
+                    break
+                except Exception as e:
+                    self.logger.error(f"Error procesando fila en {threading.current_thread().name}: {e}")
+                    resultado = None
+                escrituras.put(('fila', indice, resultado))
+        finally:
+            escrituras.put(('fin',))
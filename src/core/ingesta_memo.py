@@ -0,0 +1,331 @@
+"""
+Ingesta de memos (leer_xlc) en bloque
+El memo se filtra y normaliza como DataFrame completo y se escribe en el
+template con una sola asignación 2-D, en lugar de recorrerlo fila por fila
+escribiendo celda por celda. El mismo memo puede repartirse de una vez entre
+los templates de CCE, Ahorros, Cuentas Corrientes y LBTR
+"""
+
+import zipfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.core.backend_libros import WorkbookBackend, backend_libros
+from src.core.cache_memos import CacheMemos, huella_archivo
+from src.core.lectura_xlsx import cabeceras_libro
+from src.core.normalizacion import limpiar_beneficiarios, limpiar_cuentas
+
+# Columnas que debe tener una hoja del memo para considerarse útil
+COLUMNAS_MEMO = {
+    'N°': str,
+    'Beneficiario': str,
+    'Nº  Cuenta': str,
+    'Tipo de Cuenta': str,
+    'Entidad Financiera': str,
+    'Monto (S/)': float
+}
+
+SIN_DESTINO = 'SIN_DESTINO'
+
+
+class DestinoMemo:
+    """Template de una operación que recibe líneas del memo desde la columna B"""
+
+    def __init__(self, operacion: str, nombre_hoja: str, celda_con_datos: str,
+                 celda_limpieza: str, rango_resultados: str, limpia_con_una_fila: bool = False):
+        """
+        Args:
+            operacion: Clave de la operación en info.json
+            nombre_hoja: Hoja del template
+            celda_con_datos: Celda vacía si el template no tiene filas cargadas
+            celda_limpieza: Celda que se revisa para decidir si limpiar
+            rango_resultados: Resultados de la ejecución anterior que se borran al limpiar
+            limpia_con_una_fila: Limpiar cuando la última fila es la 2 (LBTR) en lugar de cuando no lo es
+        """
+        self.operacion = operacion
+        self.nombre_hoja = nombre_hoja
+        self.celda_con_datos = celda_con_datos
+        self.celda_limpieza = celda_limpieza
+        self.rango_resultados = rango_resultados
+        self.limpia_con_una_fila = limpia_con_una_fila
+
+
+DESTINOS = {
+    'CCE': DestinoMemo('CCE', 'CCE', 'D2', 'E2', 'G2:J2'),
+    'AHORROS': DestinoMemo('AHORROS', 'Ahorros', 'F2', 'D2', 'G2:K2'),
+    'CTA_CTES': DestinoMemo('CTA_CTES', 'Corriente', 'B2', 'C2', 'H2:I2'),
+    'LBTR': DestinoMemo('LBTR', 'LBTR', 'D2', 'E2', 'K2', limpia_con_una_fila=True),
+}
+
+
+def leer_memo(ruta_xlc: str, cache: Optional[CacheMemos] = None) -> Tuple[Optional[pd.DataFrame], bool]:
+    """
+    Lee y combina las hojas útiles del memo (se ignoran las de detracción)
+
+    Args:
+        ruta_xlc: Memo a leer
+        cache: Caché de memos; si el archivo no cambió se evita volver a parsearlo
+
+    Returns:
+        (tabla combinada o None si no hay hojas útiles, True si se omitió alguna hoja)
+    """
+    if cache is None:
+        return _parsear_memo(ruta_xlc)
+
+    huella = huella_archivo(ruta_xlc)
+    guardado = cache.obtener(huella)
+    if guardado is not None:
+        return guardado
+
+    df, hoja_no_util = _parsear_memo(ruta_xlc, huella)
+    if df is not None:
+        cache.guardar(huella, df, hoja_no_util)
+    return df, hoja_no_util
+
+
+def cabecera_de_memo(cabecera: List[Any]) -> bool:
+    """La fila 1 tiene exactamente las columnas del memo (en cualquier orden, sin repetir)"""
+    return len(cabecera) == len(COLUMNAS_MEMO) and set(cabecera) == set(COLUMNAS_MEMO)
+
+
+def _parsear_memo(ruta_xlc: str, huella: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], bool]:
+    """
+    Parsea solo las hojas cuya cabecera es la del memo
+
+    Los nombres y la fila 1 de cada hoja se leen antes del XML del libro; las
+    hojas de detracción o con otra cabecera no se llegan a parsear. Los .xls
+    se leen completos como antes.
+    """
+    hoja_no_util = False
+    try:
+        cabeceras = cabeceras_libro(ruta_xlc, huella)
+    except zipfile.BadZipFile:
+        hojas = pd.read_excel(ruta_xlc, dtype=COLUMNAS_MEMO, sheet_name=None)
+    else:
+        nombres = []
+        for nombre_hoja, cabecera in cabeceras.items():
+            if "DETRACCION" in nombre_hoja.upper():
+                continue
+            if cabecera_de_memo(cabecera):
+                nombres.append(nombre_hoja)
+            else:
+                hoja_no_util = True
+        hojas = pd.read_excel(ruta_xlc, dtype=COLUMNAS_MEMO, sheet_name=nombres) if nombres else {}
+
+    hojas_validas = []
+    for nombre_hoja, df in hojas.items():
+        if "DETRACCION" in nombre_hoja.upper():
+            continue
+        # Datos fuera de las columnas de la cabecera también descartan la hoja
+        if set(df.columns) == set(COLUMNAS_MEMO):
+            hojas_validas.append(df)
+        else:
+            hoja_no_util = True
+
+    if not hojas_validas:
+        return None, hoja_no_util
+    return pd.concat(hojas_validas, ignore_index=True), hoja_no_util
+
+
+def clasificar_memo(df: pd.DataFrame, operaciones: Iterable[str] = DESTINOS) -> Dict[str, pd.DataFrame]:
+    """
+    Reparte las líneas del memo entre las operaciones con las reglas de cada leer_xlc
+
+    CCE: CCI de 20 dígitos y monto menor a 10.000. AHORROS y CTA_CTES: cuenta
+    de 11 dígitos del tipo correspondiente. LBTR: el memo sin las líneas de
+    NACION; las transferencias (monto mayor a 9.999,99) y sus líneas de RUC
+    y domicilio se arman en bloque_lbtr. La longitud se mide sobre la cuenta
+    ya limpia, la misma que se escribe en el template.
+
+    Returns:
+        Líneas de cada operación pedida, con el índice del memo
+    """
+    longitud = limpiar_cuentas(df['Nº  Cuenta']).str.len()
+    completa = df['N°'].notna() & df['Nº  Cuenta'].notna() & df['Monto (S/)'].notna()
+    tipo = df['Tipo de Cuenta']
+
+    reglas = {
+        'CCE': lambda: completa & (longitud == 20) & (df['Monto (S/)'] < 10000),
+        'AHORROS': lambda: completa & (longitud == 11) & (tipo == 'AHORROS'),
+        'CTA_CTES': lambda: completa & (longitud == 11) & (tipo == 'CORRIENTE'),
+        'LBTR': lambda: df['Entidad Financiera'] != 'NACION',
+    }
+    return {operacion: df[reglas[operacion]()] for operacion in operaciones}
+
+
+def bloque_cce(lineas: pd.DataFrame, memo: str, nro_cuenta: str) -> pd.DataFrame:
+    """Columnas B a F del template CCE"""
+    return pd.DataFrame({
+        'B': memo,
+        'C': nro_cuenta,
+        'D': limpiar_beneficiarios(lineas['Beneficiario']),
+        'E': limpiar_cuentas(lineas['Nº  Cuenta']),
+        'F': lineas['Monto (S/)']
+    })
+
+
+def bloque_ahorros(lineas: pd.DataFrame, memo: str, nro_cuenta: str) -> pd.DataFrame:
+    """Columnas B a F del template de Ahorros"""
+    return bloque_cce(lineas, memo, nro_cuenta)
+
+
+def bloque_cte(lineas: pd.DataFrame, memo: str, nro_cuenta: str, year: str) -> pd.DataFrame:
+    """Columnas B a F del template de Cuentas Corrientes"""
+    return pd.DataFrame({
+        'B': memo,
+        'C': nro_cuenta,
+        'D': limpiar_cuentas(lineas['Nº  Cuenta']),
+        'E': lineas['Monto (S/)'],
+        'F': f'MEMO {memo}-{year}-BN-7101'
+    })
+
+
+def bloque_lbtr(lineas: pd.DataFrame, memo: str, year: str, nro_cuenta: str,
+                posicion: int, glosa: str) -> pd.DataFrame:
+    """
+    Columnas B a J del template LBTR: una fila por transferencia
+
+    Una línea con monto mayor a 9.999,99 abre una transferencia y una con
+    monto menor a 10.000 la cierra; las líneas sin N° mientras está abierta
+    aportan su RUC (I) y su domicilio (J). El estado se arrastra con ffill
+    y las líneas de continuación se asignan a su transferencia por grupo.
+    Las líneas sin beneficiario no cuentan.
+    """
+    lineas = lineas[lineas['Beneficiario'].notna()]
+    numero = lineas['N°']
+    monto = lineas['Monto (S/)']
+    beneficiario = lineas['Beneficiario'].astype(str)
+
+    con_numero = numero.isna() | (numero != '')  # NaN cuenta como N° presente
+    abre = con_numero & (monto > 9999.99)
+    cierra = con_numero & ~abre & (monto < 10000)
+    abierta = abre.astype(float).where(abre | cierra).ffill().fillna(0).astype(bool)
+    transferencia = abre.cumsum()
+
+    continuacion = abierta & numero.isna()
+    es_ruc = continuacion & beneficiario.str.contains('RUC', regex=False)
+    es_domicilio = continuacion & ~es_ruc & beneficiario.str.contains('DOMICILIO', regex=False)
+    ruc = lineas['Beneficiario'][es_ruc].groupby(transferencia[es_ruc]).last()
+    domicilio = lineas['Beneficiario'][es_domicilio].groupby(transferencia[es_domicilio]).last()
+
+    transferencias = lineas[abre]
+    grupo = transferencia[abre]
+    observacion = f"MEMO {memo}-{year}-BN-7101 ANEXO " + transferencias['N°'].astype(str)
+    obs_c, obs_d = (observacion, glosa) if posicion == 1 else (glosa, observacion)
+    return pd.DataFrame({
+        'B': nro_cuenta,
+        'C': obs_c,
+        'D': obs_d,
+        'E': limpiar_beneficiarios(transferencias['Beneficiario']),
+        'F': transferencias['Nº  Cuenta'],
+        'G': transferencias['Entidad Financiera'],
+        'H': transferencias['Monto (S/)'],
+        'I': grupo.map(ruc),
+        'J': grupo.map(domicilio)
+    }).reset_index(drop=True)
+
+
+def escribir_bloque(hoja, celda_inicial: str, bloque: pd.DataFrame) -> int:
+    """
+    Escribe el DataFrame en la hoja con una sola asignación desde celda_inicial
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    if bloque.empty:
+        return 0
+    valores: List[List[Any]] = bloque.astype(object).where(bloque.notna(), None).values.tolist()
+    hoja.range(celda_inicial).value = valores
+    return len(valores)
+
+
+def escribir_en_plantilla(hoja, destino: DestinoMemo, bloque: pd.DataFrame, limpiar: bool = False) -> int:
+    """
+    Agrega el bloque debajo de la última fila cargada del template
+
+    Args:
+        hoja: Hoja del template
+        destino: Template de la operación
+        bloque: Columnas desde la B a escribir
+        limpiar: Borrar antes las filas y los resultados de la carga anterior
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    if limpiar:
+        ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
+        una_fila = ultima_fila == 2 if destino.limpia_con_una_fila else ultima_fila != 2
+        if una_fila or hoja.range(destino.celda_limpieza).value:
+            hoja.range('2:90').delete()
+            hoja.range(destino.rango_resultados).value = None
+
+    ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
+    if hoja.range(destino.celda_con_datos).value is None:
+        ultima_fila = 1
+    return escribir_bloque(hoja, f'B{ultima_fila + 1}', bloque)
+
+
+def repartir_memo(ruta_xlc: str, rutas: Dict[str, str], memo: str, year: str, nro_cuenta: str,
+                  posicion: Optional[int] = None, glosa: Optional[str] = None,
+                  limpiar: bool = False, cache: Optional[CacheMemos] = None,
+                  libros: Optional[WorkbookBackend] = None) -> Dict[str, int]:
+    """
+    Lee el memo una vez y carga sus líneas en todos los templates que correspondan
+
+    Args:
+        ruta_xlc: Memo a repartir
+        rutas: Template de cada operación (clave de DESTINOS); las que falten no se cargan
+        memo, year, nro_cuenta: Datos del memorándum y cuenta de cargo
+        posicion, glosa: Observaciones de LBTR; sin glosa no se carga LBTR
+        limpiar: Limpiar cada template que reciba líneas
+        cache: Caché de memos leídos
+        libros: Backend con el que se abren los templates (por defecto Excel)
+
+    Returns:
+        Filas cargadas por operación (None si no se cargó por falta de
+        template o de glosa), SIN_DESTINO (líneas completas que ninguna regla
+        tomó) y 'hojas_omitidas' (1 si alguna hoja no tenía el formato)
+
+    Raises:
+        ValueError: Si el memo no tiene hojas con el formato esperado
+    """
+    df, hoja_no_util = leer_memo(ruta_xlc, cache)
+    if df is None:
+        raise ValueError("No se encontraron hojas válidas en el archivo")
+
+    operaciones = [op for op in DESTINOS if rutas.get(op) and (op != 'LBTR' or glosa)]
+    lineas = clasificar_memo(df, operaciones)
+
+    bloques = {}
+    for operacion, filas in lineas.items():
+        if operacion == 'CCE':
+            bloques[operacion] = bloque_cce(filas, f'{memo}-{year}', nro_cuenta)
+        elif operacion == 'AHORROS':
+            bloques[operacion] = bloque_ahorros(filas, memo, nro_cuenta)
+        elif operacion == 'CTA_CTES':
+            bloques[operacion] = bloque_cte(filas, memo, nro_cuenta, year)
+        else:
+            bloques[operacion] = bloque_lbtr(filas, memo, year, nro_cuenta, posicion, glosa)
+
+    reparto: Dict[str, Optional[int]] = {operacion: None for operacion in DESTINOS}
+    libros = libros or backend_libros()
+    for operacion, bloque in bloques.items():
+        reparto[operacion] = 0
+        if bloque.empty:
+            continue
+        destino = DESTINOS[operacion]
+        with libros.libro(rutas[operacion]) as wb:
+            reparto[operacion] = escribir_en_plantilla(wb.sheets[destino.nombre_hoja], destino, bloque, limpiar)
+            wb.save()
+
+    # Líneas completas que no corresponden a ningún template
+    completas = df['N°'].notna() & df['Nº  Cuenta'].notna() & df['Monto (S/)'].notna()
+    tomadas = pd.Series(False, index=df.index)
+    for operacion, filas in clasificar_memo(df).items():
+        if operacion == 'LBTR':
+            filas = filas[filas['Monto (S/)'] > 9999.99]
+        tomadas.loc[filas.index] = True
+    reparto[SIN_DESTINO] = int((completas & ~tomadas).sum())
+    reparto['hojas_omitidas'] = int(hoja_no_util)
+    return reparto
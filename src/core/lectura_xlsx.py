@@ -0,0 +1,220 @@
+"""
+Lectura de cabeceras directamente del paquete xlsx/xlsm
+Los nombres de hoja y la primera fila se obtienen recorriendo el XML dentro
+del zip, sin abrir Excel ni parsear las hojas completas: el XML de cada hoja
+se lee en streaming solo hasta terminar la fila 1. Las cabeceras de cada
+libro quedan en memoria por huella del archivo
+"""
+
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.cache_memos import huella_archivo
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+_LETRAS_COLUMNA = re.compile(r'[A-Z]+')
+
+# Cabeceras por huella de archivo (los últimos libros consultados)
+_MAX_LIBROS = 64
+_cabeceras_por_huella: 'OrderedDict[str, Dict[str, List[Optional[str]]]]' = OrderedDict()
+_bloqueo = threading.Lock()
+
+
+def _indice_columna(referencia: str) -> int:
+    """'C1' -> 2"""
+    indice = 0
+    for letra in _LETRAS_COLUMNA.match(referencia).group():
+        indice = indice * 26 + ord(letra) - 64
+    return indice - 1
+
+
+def hojas_libro(archivo: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """
+    Hojas del libro en su orden
+
+    Returns:
+        Lista de (nombre de la hoja, ruta de su XML dentro del zip)
+    """
+    destinos = {}
+    with archivo.open('xl/_rels/workbook.xml.rels') as rels:
+        for relacion in ET.parse(rels).getroot().iter(_REL):
+            destino = relacion.get('Target')
+            destinos[relacion.get('Id')] = destino.lstrip('/') if destino.startswith('/') else f'xl/{destino}'
+
+    with archivo.open('xl/workbook.xml') as libro:
+        raiz = ET.parse(libro).getroot()
+    return [(hoja.get('name'), destinos[hoja.get(_REL_ID)])
+            for hoja in raiz.iter(f'{_MAIN}sheet')]
+
+
+def _primera_fila(archivo: zipfile.ZipFile, ruta_xml: str) -> List[Tuple[int, str, Optional[str]]]:
+    """Celdas de la fila 1 como (columna, tipo, valor crudo), sin leer el resto de la hoja"""
+    celdas = []
+    with archivo.open(ruta_xml) as hoja:
+        for _, elemento in ET.iterparse(hoja, events=('end',)):
+            if elemento.tag != f'{_MAIN}row':
+                continue
+            # Las filas vienen en orden: si la primera no es la 1, la cabecera está vacía
+            if elemento.get('r', '1') == '1':
+                for columna, celda in enumerate(elemento.iter(f'{_MAIN}c')):
+                    referencia = celda.get('r')
+                    if referencia:
+                        columna = _indice_columna(referencia)
+                    tipo = celda.get('t', 'n')
+                    if tipo == 'inlineStr':
+                        valor = ''.join(t.text or '' for t in celda.iter(f'{_MAIN}t'))
+                    else:
+                        nodo = celda.find(f'{_MAIN}v')
+                        valor = nodo.text if nodo is not None else None
+                    celdas.append((columna, tipo, valor))
+            break
+    return celdas
+
+
+def _textos_compartidos(archivo: zipfile.ZipFile, indices: Set[int]) -> Dict[int, str]:
+    """Solo los textos compartidos pedidos; la lectura se corta al llegar al mayor índice"""
+    if not indices or 'xl/sharedStrings.xml' not in archivo.namelist():
+        return {}
+    textos = {}
+    ultimo = max(indices)
+    posicion = 0
+    with archivo.open('xl/sharedStrings.xml') as compartidos:
+        for _, elemento in ET.iterparse(compartidos, events=('end',)):
+            if elemento.tag != f'{_MAIN}si':
+                continue
+            if posicion in indices:
+                # Texto con formato: se concatenan las corridas, sin la guía fonética
+                fonetica = {id(t) for rph in elemento.iter(f'{_MAIN}rPh') for t in rph.iter(f'{_MAIN}t')}
+                textos[posicion] = ''.join(t.text or '' for t in elemento.iter(f'{_MAIN}t')
+                                           if id(t) not in fonetica)
+            elemento.clear()
+            if posicion >= ultimo:
+                break
+            posicion += 1
+    return textos
+
+
+def _valor_cabecera(tipo: str, valor: Optional[str], textos: Dict[int, str]):
+    if valor is None:
+        return None
+    if tipo == 's':
+        return textos.get(int(valor))
+    if tipo in ('str', 'inlineStr', 'e'):
+        return valor
+    if tipo == 'b':
+        return valor == '1'
+    numero = float(valor)
+    return int(numero) if numero.is_integer() else numero
+
+
+def cabeceras_libro(ruta: str, huella: Optional[str] = None) -> Dict[str, List[Optional[str]]]:
+    """
+    Fila 1 de cada hoja del libro, sin parsear el contenido de las hojas
+
+    Args:
+        ruta: Libro xlsx/xlsm
+        huella: Huella del archivo si ya se calculó (huella_archivo)
+
+    Returns:
+        Diccionario hoja -> valores de la fila 1 (None en celdas vacías, sin
+        las vacías del final), en el orden del libro
+
+    Raises:
+        zipfile.BadZipFile: Si el archivo no es un paquete xlsx (por ejemplo .xls)
+    """
+    huella = huella or huella_archivo(ruta)
+    with _bloqueo:
+        if huella in _cabeceras_por_huella:
+            _cabeceras_por_huella.move_to_end(huella)
+            return _cabeceras_por_huella[huella]
+
+    with zipfile.ZipFile(ruta) as archivo:
+        filas = {nombre: _primera_fila(archivo, ruta_xml) for nombre, ruta_xml in hojas_libro(archivo)}
+        textos = _textos_compartidos(archivo, {int(valor) for celdas in filas.values()
+                                               for _, tipo, valor in celdas if tipo == 's' and valor is not None})
+
+    cabeceras = {}
+    for nombre, celdas in filas.items():
+        fila: List[Optional[str]] = []
+        for columna, tipo, valor in celdas:
+            fila.extend([None] * (columna - len(fila)))
+            fila.append(_valor_cabecera(tipo, valor, textos))
+        while fila and fila[-1] is None:
+            fila.pop()
+        cabeceras[nombre] = fila
+
+    with _bloqueo:
+        _cabeceras_por_huella[huella] = cabeceras
+        while len(_cabeceras_por_huella) > _MAX_LIBROS:
+            _cabeceras_por_huella.popitem(last=False)
+    return cabeceras
+
+
+class ComparacionCabecera:
+    """Diferencias entre la fila 1 de una hoja y la cabecera esperada"""
+
+    def __init__(self, hoja: str, esperada: List[str], encontrada: Optional[List[Optional[str]]]):
+        """
+        Args:
+            hoja: Hoja comparada
+            esperada: Cabecera esperada
+            encontrada: Fila 1 de la hoja (None si la hoja no existe)
+        """
+        self.hoja = hoja
+        self.esperada = list(esperada)
+        self.hoja_presente = encontrada is not None
+        encontrada = list(encontrada or [])
+        tramo = encontrada[:len(esperada)]
+        tramo += [None] * (len(esperada) - len(tramo))
+
+        self.coincide = self.hoja_presente and tramo == self.esperada
+        self.faltantes = [columna for columna in esperada if columna not in encontrada]
+        self.sobrantes = [columna for columna in tramo if columna is not None and columna not in esperada]
+        self.desplazadas = [
+            (columna, posicion, encontrada.index(columna))
+            for posicion, columna in enumerate(esperada)
+            if columna in encontrada and encontrada.index(columna) != posicion
+        ]
+
+    def detalle(self) -> str:
+        """Diferencias en texto para mostrar al usuario"""
+        if not self.hoja_presente:
+            return f"La hoja '{self.hoja}' no está presente en el archivo"
+        if self.coincide:
+            return "La cabecera coincide con el formato esperado"
+        lineas = []
+        if self.faltantes:
+            lineas.append(f"Columnas faltantes: {', '.join(map(str, self.faltantes))}")
+        if self.sobrantes:
+            lineas.append(f"Columnas no esperadas: {', '.join(map(str, self.sobrantes))}")
+        for columna, esperada, encontrada in self.desplazadas:
+            lineas.append(f"'{columna}' está en la columna {_letra_columna(encontrada)} "
+                          f"(se esperaba en {_letra_columna(esperada)})")
+        return "\n".join(lineas)
+
+
+def _letra_columna(indice: int) -> str:
+    """2 -> 'C'"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def comparar_cabecera(ruta: str, hoja: str, esperada: List[str]) -> ComparacionCabecera:
+    """
+    Compara la fila 1 de la hoja con la cabecera esperada sin abrir Excel
+
+    Raises:
+        zipfile.BadZipFile: Si el archivo no es un paquete xlsx/xlsm
+    """
+    return ComparacionCabecera(hoja, esperada, cabeceras_libro(ruta).get(hoja))
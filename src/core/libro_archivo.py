@@ -0,0 +1,427 @@
+"""
+Libros editados directamente en el archivo (openpyxl)
+Implementa WorkbookBackend sin Excel: el libro se carga en memoria con
+openpyxl (conservando las macros de los .xlsm) y las hojas responden al
+mismo subconjunto de xlwings que usan las operaciones, de modo que
+escribir una celda no cuesta un llamado COM y el proceso puede correr en
+un equipo sin Excel. Las fórmulas se leen con el último valor calculado
+que guardó Excel
+"""
+
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from src.core.backend_libros import WorkbookBackend
+from src.core.buffer_resultados import columna_a_indice, indice_a_columna
+
+try:
+    import openpyxl
+    from openpyxl.utils.cell import range_boundaries
+    from openpyxl.worksheet.table import TableColumn
+    OPENPYXL_DISPONIBLE = True
+except ImportError:
+    OPENPYXL_DISPONIBLE = False
+
+# Límites de una hoja xlsx (cells.last_cell en xlwings)
+MAX_FILAS = 1048576
+MAX_COLUMNAS = 16384
+
+_CELDA = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d+)$')
+_FILAS = re.compile(r'^\$?(\d+):\$?(\d+)$')
+_COLUMNAS = re.compile(r'^\$?([A-Za-z]{1,3}):\$?([A-Za-z]{1,3})$')
+_FILA_ACTUAL = re.compile(r'\[@\[?([^\]]+?)\]?\]')
+
+_DIRECCIONES = {'up': (-1, 0), 'down': (1, 0), 'left': (0, -1), 'right': (0, 1)}
+
+
+def _es_formula(valor: Any) -> bool:
+    return (isinstance(valor, str) and valor.startswith('=')) or hasattr(valor, 'text')
+
+
+def _a_excel(valor: Any) -> Any:
+    """Valor a escribir: como en Excel, texto vacío y NaN dejan la celda vacía"""
+    if valor is None or valor == "":
+        return None
+    if hasattr(valor, 'to_pydatetime'):
+        return valor.to_pydatetime()
+    if hasattr(valor, 'item') and not isinstance(valor, (list, tuple)):
+        # Escalares de numpy
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def _de_excel(valor: Any) -> Any:
+    """Valor leído: como xlwings, los números llegan como float y lo vacío como None"""
+    if valor == "":
+        return None
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return float(valor)
+    return valor
+
+
+class RangoArchivo:
+    """Rango rectangular de una HojaArchivo con la interfaz de xlwings.Range"""
+
+    def __init__(self, hoja: 'HojaArchivo', fila1: int, columna1: int,
+                 fila2: Optional[int] = None, columna2: Optional[int] = None, ndim: Optional[int] = None):
+        self.hoja = hoja
+        self.fila1, self.columna1 = fila1, columna1
+        self.fila2 = fila2 if fila2 is not None else fila1
+        self.columna2 = columna2 if columna2 is not None else columna1
+        self.ndim = ndim
+
+    @property
+    def row(self) -> int:
+        return self.fila1
+
+    @property
+    def column(self) -> int:
+        return self.columna1
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.fila2 - self.fila1 + 1, self.columna2 - self.columna1 + 1
+
+    @property
+    def address(self) -> str:
+        inicio = f"${indice_a_columna(self.columna1)}${self.fila1}"
+        if self.shape == (1, 1):
+            return inicio
+        return f"{inicio}:${indice_a_columna(self.columna2)}${self.fila2}"
+
+    @property
+    def last_cell(self) -> 'RangoArchivo':
+        return RangoArchivo(self.hoja, self.fila2, self.columna2)
+
+    @property
+    def filas_completas(self) -> bool:
+        return self.columna1 == 1 and self.columna2 == MAX_COLUMNAS
+
+    @property
+    def columnas_completas(self) -> bool:
+        return self.fila1 == 1 and self.fila2 == MAX_FILAS
+
+    def options(self, ndim: Optional[int] = None, **_) -> 'RangoArchivo':
+        return RangoArchivo(self.hoja, self.fila1, self.columna1, self.fila2, self.columna2, ndim)
+
+    def _recortado(self) -> Tuple[int, int, int, int]:
+        """Límites sin las filas y columnas posteriores a los datos (rangos '2:90' o 'I:I')"""
+        hoja = self.hoja.hoja
+        return (self.fila1, self.columna1,
+                max(self.fila1, min(self.fila2, hoja.max_row)),
+                max(self.columna1, min(self.columna2, hoja.max_column)))
+
+    @property
+    def value(self) -> Any:
+        fila1, columna1, fila2, columna2 = self._recortado()
+        if self.shape == (1, 1):
+            fila2, columna2 = fila1, columna1
+        leer = self.hoja.leer
+        valores = [[leer(fila, columna) for columna in range(columna1, columna2 + 1)]
+                   for fila in range(fila1, fila2 + 1)]
+        if self.ndim == 2:
+            return valores
+        if len(valores) == 1 and len(valores[0]) == 1:
+            return valores[0][0]
+        if len(valores) == 1:
+            return valores[0]
+        if all(len(fila) == 1 for fila in valores):
+            return [fila[0] for fila in valores]
+        return valores
+
+    @value.setter
+    def value(self, valor: Any):
+        if isinstance(valor, (list, tuple)):
+            # Como xlwings: la lista se expande desde la celda superior izquierda
+            filas = valor if valor and isinstance(valor[0], (list, tuple)) else [valor]
+            for desplazamiento_fila, fila in enumerate(filas):
+                for desplazamiento_columna, dato in enumerate(fila):
+                    self.hoja.escribir(self.fila1 + desplazamiento_fila,
+                                       self.columna1 + desplazamiento_columna, dato)
+            return
+
+        if self.shape == (1, 1):
+            self.hoja.escribir(self.fila1, self.columna1, valor)
+            return
+
+        # Un escalar se repite en todo el rango; en rangos de filas o columnas enteras
+        # solo importan las celdas con datos
+        fila1, columna1, fila2, columna2 = self._recortado() if valor is None else (
+            self.fila1, self.columna1, self.fila2, self.columna2)
+        for fila in range(fila1, fila2 + 1):
+            for columna in range(columna1, columna2 + 1):
+                self.hoja.escribir(fila, columna, valor)
+
+    def clear_contents(self):
+        self.value = None
+
+    def end(self, direccion: str) -> 'RangoArchivo':
+        """Como Ctrl+flecha en Excel: borde del bloque con datos o siguiente celda con datos"""
+        paso_fila, paso_columna = _DIRECCIONES[direccion.lower()]
+        hoja = self.hoja.hoja
+        fila, columna = self.fila1, self.columna1
+        # Después de los datos todo está vacío: no hace falta recorrer hasta el final
+        if paso_fila < 0:
+            fila = min(fila, hoja.max_row + 1)
+        if paso_columna < 0:
+            columna = min(columna, hoja.max_column + 1)
+
+        def dentro(f: int, c: int) -> bool:
+            return 1 <= f <= MAX_FILAS and 1 <= c <= MAX_COLUMNAS
+
+        vacia = self.hoja.vacia
+        siguiente = (fila + paso_fila, columna + paso_columna)
+        if not dentro(*siguiente):
+            return RangoArchivo(self.hoja, fila, columna)
+
+        if not vacia(fila, columna) and not vacia(*siguiente):
+            while dentro(*siguiente) and not vacia(*siguiente):
+                fila, columna = siguiente
+                siguiente = (fila + paso_fila, columna + paso_columna)
+        else:
+            fila, columna = siguiente
+            while vacia(fila, columna):
+                if (paso_fila > 0 and fila > hoja.max_row) or (paso_columna > 0 and columna > hoja.max_column):
+                    fila = MAX_FILAS if paso_fila else fila
+                    columna = MAX_COLUMNAS if paso_columna else columna
+                    break
+                siguiente = (fila + paso_fila, columna + paso_columna)
+                if not dentro(*siguiente):
+                    break
+                fila, columna = siguiente
+        return RangoArchivo(self.hoja, fila, columna)
+
+    def delete(self, shift: Optional[str] = None):
+        """Elimina filas o columnas enteras desplazando el resto"""
+        if self.filas_completas:
+            self.hoja.hoja.delete_rows(self.fila1, self.fila2 - self.fila1 + 1)
+        elif self.columnas_completas:
+            self.hoja.hoja.delete_cols(self.columna1, self.columna2 - self.columna1 + 1)
+        else:
+            raise NotImplementedError("Solo se pueden eliminar filas o columnas enteras")
+
+    def insert(self, shift: Optional[str] = None):
+        """Inserta filas o columnas enteras en la posición del rango"""
+        if self.columnas_completas or shift == 'right':
+            self.hoja.insertar_columnas(self.columna1, self.columna2 - self.columna1 + 1)
+        elif self.filas_completas or shift == 'down':
+            self.hoja.hoja.insert_rows(self.fila1, self.fila2 - self.fila1 + 1)
+        else:
+            raise NotImplementedError("Solo se pueden insertar filas o columnas enteras")
+
+
+class HojaArchivo:
+    """Hoja de un LibroArchivo con la interfaz de xlwings.Sheet"""
+
+    def __init__(self, libro: 'LibroArchivo', hoja):
+        self.libro = libro
+        self.hoja = hoja
+
+    @property
+    def name(self) -> str:
+        return self.hoja.title
+
+    @property
+    def cells(self) -> RangoArchivo:
+        return RangoArchivo(self, 1, 1, MAX_FILAS, MAX_COLUMNAS)
+
+    @property
+    def used_range(self) -> RangoArchivo:
+        return RangoArchivo(self, self.hoja.min_row, self.hoja.min_column,
+                            self.hoja.max_row, self.hoja.max_column)
+
+    def range(self, referencia, referencia_final=None) -> RangoArchivo:
+        """
+        Rango por referencia de Excel ('B2', 'G2:J2', '2:90', 'I:I') o por
+        coordenadas (fila, columna), como en xlwings
+        """
+        if referencia_final is not None:
+            inicio, fin = self.range(referencia), self.range(referencia_final)
+            return RangoArchivo(self, inicio.fila1, inicio.columna1, fin.fila2, fin.columna2)
+        if isinstance(referencia, tuple):
+            return RangoArchivo(self, int(referencia[0]), int(referencia[1]))
+
+        texto = referencia.strip()
+        filas = _FILAS.match(texto)
+        if filas:
+            return RangoArchivo(self, int(filas.group(1)), 1, int(filas.group(2)), MAX_COLUMNAS)
+        columnas = _COLUMNAS.match(texto)
+        if columnas:
+            return RangoArchivo(self, 1, columna_a_indice(columnas.group(1)),
+                                MAX_FILAS, columna_a_indice(columnas.group(2)))
+        extremos = texto.split(':')
+        celdas = [_CELDA.match(extremo) for extremo in extremos]
+        if len(extremos) > 2 or not all(celdas):
+            raise ValueError(f"Referencia de rango no soportada: {referencia}")
+        rango = RangoArchivo(self, int(celdas[0].group(2)), columna_a_indice(celdas[0].group(1)))
+        if len(celdas) == 2:
+            rango.fila2, rango.columna2 = int(celdas[1].group(2)), columna_a_indice(celdas[1].group(1))
+        return rango
+
+    def _celda(self, fila: int, columna: int):
+        # Sin hoja.cell(), que crearía la celda y agrandaría la hoja
+        return self.hoja._cells.get((fila, columna))
+
+    def vacia(self, fila: int, columna: int) -> bool:
+        celda = self._celda(fila, columna)
+        return celda is None or celda.value is None or celda.value == ""
+
+    def leer(self, fila: int, columna: int) -> Any:
+        celda = self._celda(fila, columna)
+        if celda is None:
+            return None
+        if _es_formula(celda.value):
+            # Último valor que Excel calculó para la fórmula
+            return _de_excel(self.libro.valores_calculados(self.name).cell(fila, columna).value)
+        return _de_excel(celda.value)
+
+    def escribir(self, fila: int, columna: int, valor: Any):
+        valor = _a_excel(valor)
+        if isinstance(valor, str) and valor.startswith('=') and '[@' in valor:
+            if self._escribir_columna_calculada(fila, columna, valor):
+                return
+        self.hoja.cell(fila, columna).value = valor
+
+    def _tabla_en(self, fila: int, columna: int):
+        for tabla in self.hoja.tables.values():
+            columna_min, fila_min, columna_max, fila_max = range_boundaries(tabla.ref)
+            if columna_min <= columna <= columna_max and fila_min < fila <= fila_max:
+                return tabla, (columna_min, fila_min, columna_max, fila_max)
+        return None, None
+
+    def _escribir_columna_calculada(self, fila: int, columna: int, formula: str) -> bool:
+        """
+        Fórmula con [@Columna] dentro de una tabla: como Excel, se guarda con la
+        referencia estructurada completa y se extiende a toda la columna de la tabla
+        """
+        tabla, limites = self._tabla_en(fila, columna)
+        if tabla is None:
+            return False
+        formula = _FILA_ACTUAL.sub(lambda m: f"{tabla.displayName}[[#This Row],[{m.group(1)}]]", formula)
+        _, fila_min, _, fila_max = limites
+        for fila_tabla in range(fila_min + 1, fila_max + 1):
+            self.hoja.cell(fila_tabla, columna).value = formula
+        return True
+
+    def insertar_columnas(self, columna: int, cantidad: int):
+        """Inserta columnas y ensancha o desplaza las tablas afectadas"""
+        self.hoja.insert_cols(columna, cantidad)
+        for tabla in self.hoja.tables.values():
+            columna_min, fila_min, columna_max, fila_max = range_boundaries(tabla.ref)
+            if columna > columna_max:
+                continue
+            if columna <= columna_min:
+                columna_min += cantidad
+            else:
+                siguiente_id = max((c.id for c in tabla.tableColumns), default=0) + 1
+                posicion = columna - columna_min
+                for indice in range(cantidad):
+                    tabla.tableColumns.insert(posicion + indice, TableColumn(
+                        id=siguiente_id + indice, name=f"Columna{siguiente_id + indice}"
+                    ))
+            columna_max += cantidad
+            tabla.ref = (f"{indice_a_columna(columna_min)}{fila_min}:"
+                         f"{indice_a_columna(columna_max)}{fila_max}")
+            if tabla.autoFilter is not None:
+                tabla.autoFilter.ref = tabla.ref
+
+    def sincronizar_tablas(self):
+        """Los nombres de columna de cada tabla deben coincidir con su fila de encabezado"""
+        for tabla in self.hoja.tables.values():
+            columna_min, fila_min, _, _ = range_boundaries(tabla.ref)
+            for desplazamiento, columna_tabla in enumerate(tabla.tableColumns):
+                encabezado = self.hoja.cell(fila_min, columna_min + desplazamiento).value
+                if encabezado is not None:
+                    columna_tabla.name = str(encabezado)
+
+
+class HojasArchivo:
+    """Colección wb.sheets: por nombre, por posición o iterando"""
+
+    def __init__(self, libro: 'LibroArchivo'):
+        self._libro = libro
+        self._hojas = {}
+
+    def _hoja(self, nombre: str) -> HojaArchivo:
+        if nombre not in self._hojas:
+            self._hojas[nombre] = HojaArchivo(self._libro, self._libro.wb[nombre])
+        return self._hojas[nombre]
+
+    def __getitem__(self, clave) -> HojaArchivo:
+        if isinstance(clave, int):
+            clave = self._libro.wb.sheetnames[clave]
+        return self._hoja(clave)
+
+    def __iter__(self) -> Iterator[HojaArchivo]:
+        return (self._hoja(nombre) for nombre in self._libro.wb.sheetnames)
+
+    def __len__(self) -> int:
+        return len(self._libro.wb.sheetnames)
+
+
+class LibroArchivo:
+    """Libro cargado con openpyxl con la interfaz de xlwings.Book"""
+
+    def __init__(self, ruta: str):
+        self.fullname = str(Path(ruta).resolve())
+        self.keep_vba = Path(ruta).suffix.lower() in ('.xlsm', '.xltm')
+        self.wb = openpyxl.load_workbook(ruta, keep_vba=self.keep_vba)
+        self.sheets = HojasArchivo(self)
+        self._valores = None
+        self._bloqueo = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return Path(self.fullname).name
+
+    def valores_calculados(self, nombre_hoja: str):
+        """Hoja con los valores que Excel guardó para las fórmulas (se carga al primer uso)"""
+        with self._bloqueo:
+            if self._valores is None:
+                self._valores = openpyxl.load_workbook(self.fullname, data_only=True)
+        return self._valores[nombre_hoja]
+
+    def save(self, ruta: Optional[str] = None):
+        """Guarda el libro; con ruta lo guarda como copia y sigue trabajando sobre ella"""
+        for hoja in self.sheets:
+            hoja.sincronizar_tablas()
+        destino = str(Path(ruta).resolve()) if ruta else self.fullname
+        self.wb.save(destino)
+        self.fullname = destino
+
+    def close(self):
+        self._valores = None
+        self.wb.close()
+
+
+class BackendArchivo(WorkbookBackend):
+    """Backend que edita las plantillas como archivo, sin Excel"""
+
+    nombre = 'openpyxl'
+
+    _instancia: Optional['BackendArchivo'] = None
+    _bloqueo_instancia = threading.Lock()
+
+    @classmethod
+    def obtener(cls) -> 'BackendArchivo':
+        """Backend único de la aplicación"""
+        with cls._bloqueo_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    def abrir(self, ruta: str) -> LibroArchivo:
+        if not OPENPYXL_DISPONIBLE:
+            raise RuntimeError("openpyxl no está instalado")
+        return LibroArchivo(ruta)
+
+    def devolver(self, wb: LibroArchivo):
+        try:
+            wb.close()
+        except Exception as e:
+            self.logger.warning(f"Error cerrando libro: {e}")
@@ -0,0 +1,51 @@
+"""
+Normalización de beneficiarios y números de cuenta
+Una sola definición para los dos caminos: por valor (BaseLogic) y por
+columna (ingesta de memos y registros de plantilla). Con textos cortos como
+estos los replace de str le ganan a str.translate con tabla no ASCII y a
+re.sub, y pasar la columna a pyarrow cuesta más que limpiarla; ver
+benchmarks/bench_normalizacion.py antes de cambiar la implementación
+"""
+
+import re
+
+import pandas as pd
+
+_NO_DIGITOS = re.compile(r'\D+')
+
+
+def limpiar_beneficiario(texto: str) -> str:
+    """Mayúsculas, saltos de línea como espacio, Ñ -> N, & -> Y y sin espacios dobles"""
+    if not texto:
+        return ""
+    texto = texto.strip().upper().replace('\r', ' ').replace('\n', ' ').replace('Ñ', 'N').replace('&', 'Y')
+    while '  ' in texto:
+        texto = texto.replace('  ', ' ')
+    return texto.strip()
+
+
+def limpiar_cuenta(numero) -> str:
+    """Solo los dígitos del número de cuenta"""
+    if not numero:
+        return ""
+    numero = str(numero).replace('-', '').replace(' ', '')
+    # Guiones y espacios son los separadores habituales; la expresión solo
+    # corre si quedan otros (puntos, barras, letras)
+    return numero if numero.isdecimal() else _NO_DIGITOS.sub('', numero)
+
+
+def limpiar_beneficiarios(serie: pd.Series) -> pd.Series:
+    """limpiar_beneficiario por columna: vacío queda ''"""
+    valores = serie.fillna('').astype(str).tolist()
+    return pd.Series([limpiar_beneficiario(valor) for valor in valores], index=serie.index, dtype=object)
+
+
+def limpiar_cuentas(serie: pd.Series) -> pd.Series:
+    """limpiar_cuenta por columna: vacío queda ''"""
+    cuentas = (serie.fillna('').astype(str)
+               .str.replace('-', '', regex=False)
+               .str.replace(' ', '', regex=False))
+    otros = ~cuentas.str.isdecimal() & (cuentas != '')
+    if otros.any():
+        cuentas = cuentas.mask(otros, cuentas[otros].str.replace(_NO_DIGITOS.pattern, '', regex=True))
+    return cuentas
@@ -0,0 +1,149 @@
+"""
+Política de guardado del libro de resultados
+Guardar un .xlsm grande tarda más que la transacción del host, así que el
+libro se guarda cada N filas o cada T segundos; lo que aún no se guardó está
+en el diario de ejecución y se reaplica si la ejecución se corta
+"""
+
+import time
+from typing import Any, List, Optional, Tuple
+
+from src.core.buffer_resultados import HojaConBuffer
+from src.core.diario_ejecucion import DiarioEjecucion
+from src.utils.logger import LoggerMixin
+
+MENSAJE_EN_DUDA = "VERIFICAR EN HOST: ejecución interrumpida durante la transacción"
+
+
+class PoliticaGuardado(LoggerMixin):
+    """Decide cuándo guardar el libro y confirma en el diario lo que quedó guardado"""
+
+    def __init__(self, wb, hoja: Any, filas: int = 20, segundos: float = 60.0,
+                 diario: Optional[DiarioEjecucion] = None, plantilla: str = "",
+                 columna_estado: Optional[str] = None):
+        """
+        Args:
+            wb: Libro de xlwings
+            hoja: Hoja del libro donde se escriben resultados (con o sin buffer)
+            filas: Guardar cada esta cantidad de filas terminadas; 0 no guarda por filas
+            segundos: Guardar si pasó este tiempo desde el último guardado; 0 no guarda por tiempo
+            diario: Diario de ejecución; None para no llevarlo
+            plantilla: Clave del libro en el diario
+            columna_estado: Columna donde se marcan las filas en duda; vaciarla libera la fila
+        """
+        self.wb = wb
+        self.hoja = hoja
+        self.filas = filas
+        self.segundos = segundos
+        self.diario = diario
+        self.plantilla = plantilla
+        self.columna_estado = columna_estado
+        self.guardados = 0
+        self.filas_en_duda = []
+        self._filas_sin_guardar = 0
+        self._ultimo_guardado = time.monotonic()
+        self._aplicadas: List[Tuple[int, str, Optional[bool]]] = []  # Celdas en la hoja, sin guardar
+        self._en_duda: List[Tuple[int, str]] = []  # Aviso de duda en la hoja, sin guardar
+
+    def recuperar(self) -> int:
+        """
+        Retoma una ejecución cortada de la misma plantilla
+
+        Reaplica en bloque las celdas de las transacciones completadas que no
+        llegaron a un libro guardado y marca en la hoja las que quedaron a
+        medias, que no se vuelven a enviar hasta verificarlas en el host. Una
+        fila en duda cuya columna de estado el operador dejó vacía se libera
+        para reintentarla.
+
+        Returns:
+            Cantidad de filas reaplicadas
+        """
+        if self.diario is None:
+            return 0
+
+        por_aplicar = self.diario.por_aplicar(self.plantilla)
+        for fila, hash_, exito, celdas in por_aplicar:
+            for referencia, valor in celdas:
+                self.hoja.range(referencia).value = valor
+            self.transaccion_aplicada(fila, hash_, exito)
+
+        liberadas = []
+        if self.columna_estado:
+            for fila in self.diario.filas_en_duda(self.plantilla):
+                if self._estado_vacio(fila):
+                    self.diario.liberar(self.plantilla, fila)
+                    liberadas.append(fila)
+
+        for fila, hash_ in self.diario.iniciadas(self.plantilla):
+            if self.columna_estado and self._estado_vacio(fila):
+                self.hoja.range(f"{self.columna_estado}{fila}").value = MENSAJE_EN_DUDA
+            self.transaccion_en_duda(fila, hash_)
+
+        if self._aplicadas or self._en_duda:
+            self.guardar()
+        self.filas_en_duda = self.diario.filas_en_duda(self.plantilla)
+
+        if por_aplicar or self.filas_en_duda:
+            self.logger.warning(
+                f"Ejecución anterior interrumpida: {len(por_aplicar)} filas reaplicadas, "
+                f"{len(self.filas_en_duda)} en duda {self.filas_en_duda}"
+            )
+        if liberadas:
+            self.logger.info(f"Filas en duda liberadas por el operador: {liberadas}")
+        return len(por_aplicar)
+
+    def _estado_vacio(self, fila: int) -> bool:
+        valor = self.hoja.range(f"{self.columna_estado}{fila}").value
+        return valor is None or not str(valor).strip()
+
+    def transaccion_aplicada(self, fila: int, hash_: str, exito: Optional[bool]):
+        """Anota una transacción completada cuyas celdas ya están en la hoja; pasa a APLICADA al guardar"""
+        self._aplicadas.append((fila, hash_, exito))
+
+    def transaccion_en_duda(self, fila: int, hash_: str):
+        """Anota una transacción sin respuesta cuyo aviso ya está en la hoja; pasa a EN_DUDA al guardar"""
+        self._en_duda.append((fila, hash_))
+
+    def fila_terminada(self):
+        """Cuenta la fila y guarda el libro si corresponde"""
+        self._filas_sin_guardar += 1
+        if self.filas and self._filas_sin_guardar >= self.filas:
+            self.guardar()
+        elif self.segundos and time.monotonic() - self._ultimo_guardado >= self.segundos:
+            self.guardar()
+
+    def guardar(self):
+        """Vacía el buffer, guarda el libro y confirma en el diario lo guardado"""
+        # Solo lo anotado hasta aquí está en la hoja que se va a guardar
+        aplicadas, self._aplicadas = self._aplicadas, []
+        en_duda, self._en_duda = self._en_duda, []
+        try:
+            if isinstance(self.hoja, HojaConBuffer):
+                self.hoja.vaciar()
+                self.hoja.tomar_escrituras()
+            self.wb.save()
+        except Exception:
+            self._aplicadas[:0] = aplicadas
+            self._en_duda[:0] = en_duda
+            raise
+        if self.diario is not None:
+            self.diario.marcar_aplicadas(self.plantilla, aplicadas)
+            self.diario.marcar_en_duda(self.plantilla, en_duda)
+        self.guardados += 1
+        self._filas_sin_guardar = 0
+        self._ultimo_guardado = time.monotonic()
+
+    def hay_cambios(self) -> bool:
+        """True si hay filas o celdas escritas después del último guardado"""
+        return bool(self._filas_sin_guardar or self._aplicadas or self._en_duda) or (
+            isinstance(self.hoja, HojaConBuffer) and self.hoja.modificada
+        )
+
+    def cerrar(self):
+        """Guarda lo pendiente al detener, fallar o terminar la operación"""
+        try:
+            if self.hay_cambios():
+                self.guardar()
+        finally:
+            if self.diario is not None:
+                self.diario.cerrar()
@@ -0,0 +1,229 @@
+"""
+Pool de Excel compartido por las operaciones
+Mantiene una sola instancia oculta de Excel viva durante toda la aplicación;
+las operaciones piden prestado el libro y lo devuelven al terminar, sin pagar
+el arranque en frío de Excel en cada ejecución. Mientras haya libros
+prestados se suspenden la actualización de pantalla, los eventos y el
+cálculo automático
+"""
+
+import os
+import signal
+import threading
+from typing import Optional
+
+from src.core.backend_libros import WorkbookBackend
+
+try:
+    import xlwings as xw
+    XLWINGS_DISPONIBLE = True
+except ImportError:
+    XLWINGS_DISPONIBLE = False
+
+try:
+    import pythoncom
+    PYTHONCOM_DISPONIBLE = True
+except ImportError:
+    PYTHONCOM_DISPONIBLE = False
+
+
+def _inicializar_com():
+    """Cada hilo que use COM debe inicializarlo (no hace nada fuera de Windows)"""
+    if PYTHONCOM_DISPONIBLE:
+        pythoncom.CoInitialize()
+
+
+class PoolExcel(WorkbookBackend):
+    """Instancia de Excel oculta y reutilizable, con chequeo de salud y reinicio"""
+
+    nombre = 'xlwings'
+
+    _instancia: Optional['PoolExcel'] = None
+    _bloqueo_instancia = threading.Lock()
+
+    @classmethod
+    def obtener(cls) -> 'PoolExcel':
+        """Pool único de la aplicación"""
+        with cls._bloqueo_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    @classmethod
+    def cerrar_global(cls):
+        """Cierra el pool de la aplicación si llegó a crearse"""
+        with cls._bloqueo_instancia:
+            pool, cls._instancia = cls._instancia, None
+        if pool is not None:
+            pool.cerrar()
+
+    def __init__(self):
+        self._bloqueo = threading.RLock()
+        self._local = threading.local()
+        self._pid: Optional[int] = None
+        self._fin: Optional[threading.Event] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._prestados = 0
+        self.arranques = 0
+
+    def _iniciar_instancia(self):
+        """
+        Arranca Excel en un hilo propio que conserva la referencia
+
+        Excel abierto por automatización se cierra cuando se liberan todas las
+        referencias; como las operaciones corren en hilos que terminan, el
+        pool mantiene una referencia viva en su hilo hasta cerrar().
+        """
+        if not XLWINGS_DISPONIBLE:
+            raise RuntimeError("xlwings no está instalado")
+
+        listo = threading.Event()
+        fin = threading.Event()
+        resultado = {}
+
+        def mantener():
+            _inicializar_com()
+            try:
+                app = xw.App(visible=False, add_book=False)
+                app.display_alerts = False
+                resultado['pid'] = app.pid
+            except Exception as e:
+                resultado['error'] = e
+                listo.set()
+                return
+            listo.set()
+            fin.wait()
+            try:
+                app.quit()
+            except Exception:
+                pass
+
+        hilo = threading.Thread(target=mantener, name="pool-excel", daemon=True)
+        hilo.start()
+        if not listo.wait(120):
+            fin.set()
+            raise RuntimeError("Excel no terminó de iniciar")
+        if 'error' in resultado:
+            raise resultado['error']
+
+        self._pid, self._fin, self._hilo = resultado['pid'], fin, hilo
+        self.arranques += 1
+        self.logger.info(f"Instancia de Excel del pool iniciada (pid {self._pid})")
+
+    @staticmethod
+    def _sana(app) -> bool:
+        """Chequeo de salud: la instancia responde a un llamado COM"""
+        try:
+            len(app.books)
+            return True
+        except Exception:
+            return False
+
+    def _descartar(self):
+        """Suelta la instancia que no responde y termina su proceso"""
+        pid, fin = self._pid, self._fin
+        self._pid = self._fin = self._hilo = None
+        self._prestados = 0
+        if fin is not None:
+            fin.set()
+        if pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def app(self):
+        """
+        Instancia de Excel para el hilo actual
+
+        Cada hilo obtiene su propia referencia a la misma instancia (los
+        objetos COM no se comparten entre hilos). Si la instancia no responde
+        se descarta y se arranca otra.
+        """
+        with self._bloqueo:
+            app = getattr(self._local, 'app', None)
+            if app is not None and self._local.pid == self._pid and self._sana(app):
+                return app
+
+            if self._pid is not None:
+                _inicializar_com()
+                try:
+                    app = xw.apps[self._pid]
+                except Exception:
+                    app = None
+                if app is None or not self._sana(app):
+                    self.logger.warning("La instancia de Excel del pool no responde; se reinicia")
+                    self._descartar()
+
+            if self._pid is None:
+                self._iniciar_instancia()
+                _inicializar_com()
+                app = xw.apps[self._pid]
+
+            self._local.app, self._local.pid = app, self._pid
+            return app
+
+    def precalentar(self):
+        """Arranca la instancia en segundo plano para que la primera operación no espere"""
+        if not XLWINGS_DISPONIBLE:
+            return
+
+        def arrancar():
+            try:
+                self.app()
+            except Exception as e:
+                self.logger.warning(f"No se pudo precalentar Excel: {e}")
+
+        threading.Thread(target=arrancar, name="pool-excel-arranque", daemon=True).start()
+
+    def abrir(self, ruta: str):
+        """
+        Presta un libro abierto en la instancia del pool
+
+        Args:
+            ruta: Ruta del libro
+
+        Returns:
+            Libro de xlwings; devolverlo con devolver()
+        """
+        app = self.app()
+        wb = app.books.open(ruta)
+        with self._bloqueo:
+            self._prestados += 1
+            if self._prestados == 1:
+                # Excel solo acepta cambiar el cálculo con un libro abierto
+                self._configurar(app, suspendido=True)
+        return wb
+
+    def devolver(self, wb):
+        """Cierra el libro prestado (sin guardar) y deja la instancia viva"""
+        with self._bloqueo:
+            if self._prestados == 1:
+                # Restaurar antes de cerrar: sin libros abiertos Excel rechaza el cambio
+                app = getattr(self._local, 'app', None)
+                if app is not None and self._local.pid == self._pid:
+                    self._configurar(app, suspendido=False)
+            self._prestados = max(0, self._prestados - 1)
+        try:
+            wb.close()
+        except Exception as e:
+            self.logger.warning(f"Error cerrando libro del pool: {e}")
+
+    def _configurar(self, app, suspendido: bool):
+        try:
+            app.screen_updating = not suspendido
+            app.enable_events = not suspendido
+            app.calculation = 'manual' if suspendido else 'automatic'
+        except Exception as e:
+            self.logger.warning(f"No se pudo configurar Excel: {e}")
+
+    def cerrar(self):
+        """Cierra la instancia de Excel (al salir de la aplicación)"""
+        with self._bloqueo:
+            fin, hilo = self._fin, self._hilo
+            self._pid = self._fin = self._hilo = None
+            self._prestados = 0
+            self._local = threading.local()
+        if fin is not None:
+            fin.set()
+            hilo.join(timeout=30)
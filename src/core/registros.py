@@ -0,0 +1,94 @@
+"""
+Registros de plantilla con slots
+Cada operación declara su tipo de registro: qué columnas usa y cómo se
+normalizan. La tabla se convierte de una vez por columna y el bucle de
+ejecución trabaja con atributos simples, sin construir una Series por fila
+con iterrows() ni repetir strip/isna/float en cada campo
+"""
+
+import sys
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from src.core.normalizacion import limpiar_beneficiarios, limpiar_cuentas
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    """Como str(valor).strip(): vacío queda 'nan'"""
+    return serie.astype(object).where(serie.notna(), 'nan').astype(str).str.strip()
+
+
+def _texto_opcional(serie: pd.Series) -> pd.Series:
+    """Como str(valor).strip() si hay valor, "" si está vacío"""
+    return serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+
+
+CONVERSIONES: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'texto': _texto,
+    'opcional': _texto_opcional,
+    'cuenta': lambda serie: limpiar_cuentas(_texto(serie)),
+    'beneficiario': lambda serie: limpiar_beneficiarios(_texto(serie)),
+    'monto': lambda serie: serie.astype(float),
+    'monto_o_cero': lambda serie: serie.astype(float).fillna(0),
+    # Sin convertir: las columnas de estado se consultan con pd.isna
+    'valor': lambda serie: serie,
+}
+
+
+class Registro:
+    """
+    Fila de una plantilla ya normalizada
+
+    Las subclases declaran CAMPOS (atributo -> (columna, conversión de
+    CONVERSIONES)) y __slots__ = tuple(CAMPOS). El atributo fila es la fila
+    de Excel (índice de la tabla + 2) y rechazo el motivo de la validación
+    previa si la fila no debe enviarse (None si pasó o no se validó).
+    """
+
+    __slots__ = ('fila', 'rechazo')
+
+    CAMPOS: Dict[str, Tuple[str, str]] = {}
+
+    def __init__(self, fila: int, *valores):
+        self.fila = fila
+        self.rechazo = None
+        for nombre, valor in zip(self.CAMPOS, valores):
+            setattr(self, nombre, valor)
+
+    @classmethod
+    def normalizar(cls, tabla: pd.DataFrame) -> pd.DataFrame:
+        """Tabla con una columna por campo, ya convertida, y el mismo índice"""
+        return pd.DataFrame({nombre: CONVERSIONES[conversion](tabla[columna])
+                             for nombre, (columna, conversion) in cls.CAMPOS.items()},
+                            index=tabla.index)
+
+    @classmethod
+    def desde_tabla(cls, tabla: pd.DataFrame) -> List['Registro']:
+        """Convierte la tabla entera, una columna a la vez"""
+        return cls.desde_normalizada(cls.normalizar(tabla))
+
+    @classmethod
+    def desde_normalizada(cls, normalizada: pd.DataFrame) -> List['Registro']:
+        """Registros de una tabla que ya pasó por normalizar"""
+        columnas = [normalizada[nombre].tolist() for nombre in cls.CAMPOS]
+        filas = (normalizada.index + 2).tolist()
+        return [cls(fila, *valores) for fila, *valores in zip(filas, *columnas)]
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{nombre}={getattr(self, nombre)!r}" for nombre in ('fila',) + tuple(self.CAMPOS))
+        return f"{self.__class__.__name__}({campos})"
+
+
+def memoria_registros(registros: Sequence[Registro]) -> int:
+    """Bytes que ocupan los registros y sus valores (sin contar objetos compartidos dos veces)"""
+    vistos = set()
+    total = 0
+    for registro in registros:
+        total += sys.getsizeof(registro)
+        for nombre in ('fila', 'rechazo') + tuple(registro.CAMPOS):
+            valor = getattr(registro, nombre)
+            if id(valor) not in vistos:
+                vistos.add(id(valor))
+                total += sys.getsizeof(valor)
+    return total
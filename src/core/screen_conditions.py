@@ -0,0 +1,106 @@
+"""
+Condiciones de espera sobre la pantalla del emulador
+Cada condición recibe las líneas capturadas y devuelve True cuando se cumple
+"""
+
+from typing import List
+
+# Definida junto a HostSession.wait_for, que es quien evalúa las condiciones
+from src.host.session import CondicionPantalla
+
+
+def pantalla_cambio(anterior: List[str]) -> CondicionPantalla:
+    """
+    Se cumple cuando el contenido de la pantalla es distinto al capturado antes
+
+    Args:
+        anterior: Líneas capturadas antes de enviar la tecla
+
+    Returns:
+        Condición de espera
+    """
+    referencia = list(anterior)
+
+    def condicion(lineas: List[str]) -> bool:
+        return bool(lineas) and lineas != referencia
+
+    return condicion
+
+
+def texto_presente(*textos: str) -> CondicionPantalla:
+    """
+    Se cumple cuando alguno de los textos aparece en cualquier línea
+
+    Args:
+        textos: Textos a buscar (por ejemplo un prompt de campo)
+
+    Returns:
+        Condición de espera
+    """
+    def condicion(lineas: List[str]) -> bool:
+        return any(texto in linea for linea in lineas for texto in textos)
+
+    return condicion
+
+
+def linea_msg_presente() -> CondicionPantalla:
+    """Se cumple cuando existe una línea MSG con contenido"""
+    def condicion(lineas: List[str]) -> bool:
+        for linea in lineas:
+            if "MSG" in linea and linea[7:54].strip():
+                return True
+        return False
+
+    return condicion
+
+
+def linea_con_contenido(indice: int) -> CondicionPantalla:
+    """
+    Se cumple cuando la línea indicada existe y no está vacía
+
+    Args:
+        indice: Número de línea (base 0) donde el host escribe su mensaje
+
+    Returns:
+        Condición de espera
+    """
+    def condicion(lineas: List[str]) -> bool:
+        return len(lineas) > indice and bool(lineas[indice].strip())
+
+    return condicion
+
+
+def pantalla_sin_mensaje(fila_mensaje: int = 23) -> CondicionPantalla:
+    """
+    Se cumple cuando la pantalla no muestra ningún mensaje del host, como
+    queda después de F5 lista para un código de transacción
+
+    Args:
+        fila_mensaje: Línea (base 0) donde el host escribe sus mensajes; las
+            líneas MSG se revisan en cualquier fila
+
+    Returns:
+        Condición de espera
+    """
+    con_mensaje = cualquiera(linea_con_contenido(fila_mensaje), linea_msg_presente())
+
+    def condicion(lineas: List[str]) -> bool:
+        return bool(lineas) and not con_mensaje(lineas)
+
+    return condicion
+
+
+def todas(*condiciones: CondicionPantalla) -> CondicionPantalla:
+    """Se cumple cuando todas las condiciones se cumplen"""
+    def condicion(lineas: List[str]) -> bool:
+        return all(c(lineas) for c in condiciones)
+
+    return condicion
+
+
+def cualquiera(*condiciones: CondicionPantalla) -> CondicionPantalla:
+    """Se cumple cuando alguna de las condiciones se cumple"""
+    def condicion(lineas: List[str]) -> bool:
+        return any(c(lineas) for c in condiciones)
+
+    return condicion
@@ -0,0 +1,308 @@
+"""
+Sesión de LBTR reutilizable entre lotes
+Mantiene un solo Edge con la sesión iniciada y estacionado en el formulario
+de nueva transferencia interbancaria. Cada lote lo pide prestado y lo
+devuelve sin cerrarlo, así el siguiente no paga el arranque del navegador,
+la carga de la aplicación, el login ni la navegación por el menú. Mientras
+nadie lo usa, un hilo lo mantiene activo y detecta si la sesión venció
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+from src.utils.logger import LoggerMixin
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.common.action_chains import ActionChains
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.edge.options import Options
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import WebDriverException
+    SELENIUM_DISPONIBLE = True
+except ImportError:
+    SELENIUM_DISPONIBLE = False
+
+# Campo que solo existe en la pantalla de login: si aparece, la sesión venció
+CAMPO_LOGIN = "password"
+MENSAJE_LOGIN = '//*[@id="principal-login"]/div[2]/div/form/div[1]/div[6]'
+LOGIN_INCORRECTO = "Usuario y/o Contraseña incorrecta"
+MENU = "dropdownMenu3"
+
+# Una sola ida y vuelta: formulario a la vista y ambos selects habilitados y con sus opciones
+# cargadas desde el servidor (la primera es el "Seleccione")
+_FORMULARIO_LISTO = """
+var concepto = document.getElementById('selConcepto');
+var entidad = document.getElementById('selEntidad');
+return !!(concepto && entidad && concepto.offsetParent !== null
+          && !concepto.disabled && !entidad.disabled
+          && concepto.options.length > 1 && entidad.options.length > 1);
+"""
+
+
+def formulario_listo(driver) -> bool:
+    """Condición de espera: el formulario de nueva transferencia acepta datos"""
+    return driver.execute_script(_FORMULARIO_LISTO)
+
+
+class SesionLBTR(LoggerMixin):
+    """Edge con la sesión de LBTR iniciada, prestado a un lote a la vez"""
+
+    _instancia: Optional['SesionLBTR'] = None
+    _bloqueo_instancia = threading.Lock()
+
+    @classmethod
+    def obtener(cls) -> 'SesionLBTR':
+        """Sesión única de la aplicación"""
+        with cls._bloqueo_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    @classmethod
+    def cerrar_global(cls):
+        """Cierra el navegador de la aplicación si llegó a abrirse"""
+        with cls._bloqueo_instancia:
+            sesion, cls._instancia = cls._instancia, None
+        if sesion is not None:
+            sesion.cerrar()
+
+    def __init__(self):
+        self._bloqueo = threading.RLock()
+        self.driver = None
+        self._enlace: Optional[str] = None
+        self._usuario: Optional[str] = None
+        self._perfil: Optional[str] = None
+        self._iniciada = False
+        self._prestada = False
+        self._fin: Optional[threading.Event] = None
+        self.reutilizar = True
+        self.segundos_keep_alive = 240.0
+        self.timeout = 30.0
+        # Sin ventana (benchmarks contra el simulador local)
+        self.headless = False
+        self.arranques = 0
+        self.logins = 0
+
+    def configurar(self, configuracion: dict):
+        """
+        Aplica lbtr_details de info.json
+
+        Args:
+            configuracion: Diccionario de ConfigManager.get_lbtr_session()
+        """
+        self.reutilizar = bool(configuracion["warm_session"])
+        self.segundos_keep_alive = float(configuracion["keep_alive_seconds"])
+        self.timeout = float(configuracion["timeout"])
+
+    def prestar(self, enlace: str, usuario: str, clave: str, ruta_driver: str):
+        """
+        Driver con la sesión iniciada y el formulario de nueva transferencia abierto
+
+        Reutiliza el navegador del lote anterior si sigue vivo y es del mismo
+        enlace y usuario; solo vuelve a iniciar sesión si venció y solo
+        navega si el formulario no está a la vista.
+
+        Raises:
+            RuntimeError: Si no se pudo abrir el navegador, iniciar sesión o llegar al formulario
+        """
+        if not SELENIUM_DISPONIBLE:
+            raise RuntimeError("Selenium no está instalado")
+
+        with self._bloqueo:
+            inicio = time.perf_counter()
+            if self.driver is not None and (enlace, usuario) != (self._enlace, self._usuario):
+                self._cerrar_driver()
+            if self.driver is not None and not self._vivo():
+                self.logger.warning("El navegador de LBTR no responde; se abre otro")
+                self._cerrar_driver()
+
+            try:
+                if self.driver is None:
+                    self._abrir_driver(enlace, ruta_driver)
+                    self._enlace, self._usuario = enlace, usuario
+                elif self._iniciada and self.vencida():
+                    self.logger.info("La sesión de LBTR venció; se inicia de nuevo")
+                    self._iniciada = False
+
+                if not self._iniciada:
+                    self._login(usuario, clave)
+                if not formulario_listo(self.driver):
+                    self.navegar_a_nueva()
+            except Exception:
+                # Un navegador a medio iniciar no se vuelve a prestar
+                self._cerrar_driver()
+                raise
+
+            self._prestada = True
+            self.logger.info(f"Sesión de LBTR lista en {time.perf_counter() - inicio:.2f} s")
+            if self.reutilizar:
+                self._iniciar_keep_alive()
+            return self.driver
+
+    def reanudar(self, clave: str):
+        """Vuelve a iniciar sesión a mitad de un lote (sesión vencida) y abre el formulario"""
+        with self._bloqueo:
+            self._iniciada = False
+            self.driver.get(self._enlace)
+            self._login(self._usuario, clave)
+            self.navegar_a_nueva()
+
+    def devolver(self):
+        """Termina el préstamo; sin reutilizar, cierra el navegador"""
+        with self._bloqueo:
+            self._prestada = False
+            if not self.reutilizar:
+                self._cerrar_driver()
+
+    def esperar(self, condicion, timeout: Optional[float] = None):
+        """
+        Espera explícita sobre el navegador prestado
+
+        Raises:
+            TimeoutException: Si la condición no se cumple en timeout (lbtr_details.timeout)
+        """
+        return WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=0.1).until(condicion)
+
+    def vencida(self) -> bool:
+        """True si el navegador muestra la pantalla de login"""
+        return self._visible(By.NAME, CAMPO_LOGIN)
+
+    def recargar(self):
+        """
+        Recarga la aplicación después de una transferencia fallida
+
+        Si la sesión sigue activa vuelve al formulario; si cayó en el login
+        la siguiente fila del lote la retoma con reanudar.
+        """
+        self.driver.refresh()
+        self.esperar(EC.any_of(EC.visibility_of_element_located((By.ID, MENU)),
+                               EC.visibility_of_element_located((By.NAME, CAMPO_LOGIN))))
+        if not self.vencida():
+            self.navegar_a_nueva()
+
+    def _visible(self, por: str, valor: str) -> bool:
+        # Sin espera implícita find_elements responde en el acto si no hay nada;
+        # las vistas ocultas de la aplicación pueden seguir en la página
+        return any(elemento.is_displayed() for elemento in self.driver.find_elements(por, valor))
+
+    def _vivo(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _abrir_driver(self, enlace: str, ruta_driver: str):
+        servicio = webdriver.EdgeService(executable_path=ruta_driver)
+        opciones = Options()
+        opciones.add_argument('--ignore-certificate-errors')
+        opciones.add_argument("--inprivate")
+        # Directorio único de datos de usuario para evitar conflictos
+        self._perfil = os.path.join(os.getcwd(), "temp_browser_data", str(int(time.time())))
+        opciones.add_argument(f"--user-data-dir={self._perfil}")
+        # Deshabilitar extensiones y otras características que pueden causar problemas
+        opciones.add_argument("--disable-extensions")
+        opciones.add_argument("--disable-plugins")
+        opciones.add_argument("--no-sandbox")
+        opciones.add_argument("--disable-dev-shm-usage")
+        if self.headless:
+            opciones.add_argument("--headless=new")
+
+        self.driver = webdriver.Edge(service=servicio, options=opciones)
+        if not self.headless:
+            self.driver.maximize_window()
+        # Todas las esperas son explícitas: con espera implícita cada
+        # comprobación de ausencia tardaría el plazo completo
+        self.driver.implicitly_wait(0)
+        self.driver.get(enlace)
+        self._iniciada = False
+        self.arranques += 1
+
+    def _login(self, usuario: str, clave: str):
+        # La página conserva lo tecleado en un intento fallido
+        campo_usuario = self.esperar(EC.element_to_be_clickable((By.NAME, "user")))
+        campo_usuario.clear()
+        campo_usuario.send_keys(usuario)
+        campo_clave = self.driver.find_element(By.NAME, CAMPO_LOGIN)
+        campo_clave.clear()
+        campo_clave.send_keys(clave)
+        self.driver.find_element(By.ID, "btnSave").click()
+
+        # Termina con el menú de la aplicación o con el mensaje de error
+        self.esperar(EC.any_of(EC.visibility_of_element_located((By.ID, MENU)),
+                               EC.text_to_be_present_in_element((By.XPATH, MENSAJE_LOGIN), LOGIN_INCORRECTO)))
+        if not self._visible(By.ID, MENU):
+            raise RuntimeError("Usuario y/o clave incorrectos.")
+        self._iniciada = True
+        self.logins += 1
+
+    def navegar_a_nueva(self):
+        """Abre el formulario de nueva transferencia interbancaria desde el menú"""
+        menu = self.esperar(EC.element_to_be_clickable((By.ID, MENU)))
+        acciones = ActionChains(self.driver)
+        acciones.move_to_element(menu).perform()
+
+        submenu = self.esperar(EC.visibility_of_element_located(
+            (By.XPATH, "//a[text()='Transferencia interbancaria']")))
+        acciones.move_to_element(submenu).perform()
+
+        nuevo = self.esperar(EC.element_to_be_clickable((By.LINK_TEXT, "Nuevo")))
+        acciones.move_to_element(nuevo).perform()
+        nuevo.click()
+        self.esperar(formulario_listo)
+
+    def _iniciar_keep_alive(self):
+        if self._fin is not None:
+            return
+        self._fin = threading.Event()
+        threading.Thread(target=self._keep_alive, args=(self._fin,),
+                         name="sesion-lbtr", daemon=True).start()
+
+    def _keep_alive(self, fin: threading.Event):
+        """
+        Entre lotes vuelve a abrir el formulario de nueva transferencia
+
+        Es una navegación que la aplicación hace contra el servidor (carga
+        los combos) y renueva la sesión; si en cambio aparece el login, la
+        sesión ya venció y el próximo préstamo inicia sesión de nuevo.
+        """
+        while not fin.wait(self.segundos_keep_alive):
+            with self._bloqueo:
+                if self._prestada or self.driver is None or not self._iniciada:
+                    continue
+                try:
+                    if not self._vivo():
+                        self.logger.warning("El navegador de LBTR se cerró")
+                        self._cerrar_driver()
+                    elif self.vencida():
+                        self.logger.info("La sesión de LBTR venció mientras estaba inactiva")
+                        self._iniciada = False
+                    else:
+                        self.navegar_a_nueva()
+                except Exception as e:
+                    self.logger.warning(f"Keep-alive de LBTR falló: {e}")
+
+    def _cerrar_driver(self):
+        driver, perfil = self.driver, self._perfil
+        self.driver = self._perfil = None
+        self._iniciada = False
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if perfil:
+            shutil.rmtree(perfil, ignore_errors=True)
+
+    def cerrar(self):
+        """Cierra el navegador y borra su perfil temporal (al salir de la aplicación)"""
+        with self._bloqueo:
+            if self._fin is not None:
+                self._fin.set()
+                self._fin = None
+            self._cerrar_driver()
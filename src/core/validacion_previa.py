@@ -0,0 +1,119 @@
+"""
+Validación previa del lote
+Antes de la primera transacción con el host o con LBTR se validan de una
+vez, por columnas, todas las filas pendientes de la plantilla: longitudes,
+límites de monto de info.json, dígitos de control del CCI, filas repetidas
+dentro del lote y memorándum faltante. Los motivos de rechazo se escriben
+juntos en la columna de estado y solo las filas válidas llegan al host
+"""
+
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Regla: recibe la tabla normalizada (columnas = campos del registro) y
+# devuelve True en las filas que rechaza
+Regla = Callable[[pd.DataFrame], pd.Series]
+
+FILA_REPETIDA = 'Fila repetida en el lote'
+
+
+def cci_valido(cci: pd.Series) -> pd.Series:
+    """
+    True si el CCI tiene 20 dígitos y sus dos dígitos de control son correctos
+
+    El primero controla entidad y oficina (6 dígitos) y el segundo la cuenta
+    (12 dígitos): cada dígito se multiplica alternando por 1 y 2 desde la
+    izquierda, los productos de dos cifras se reducen a la suma de sus
+    cifras y el dígito es lo que le falta a la suma para llegar a la
+    siguiente decena. El cálculo aún no se contrastó con CCI reales del
+    banco, por eso la regla viene desactivada (cci_check_digits).
+    """
+    valido = cci.astype(str).str.fullmatch(r'[0-9]{20}').fillna(False).astype(bool)
+    if not valido.any():
+        return valido
+    digitos = (np.frombuffer(cci[valido].astype(str).str.cat().encode('ascii'), dtype=np.uint8)
+               .reshape(-1, 20).astype(np.int64) - ord('0'))
+    correcto = ((digitos[:, 18] == _digito_control(digitos[:, :6]))
+                & (digitos[:, 19] == _digito_control(digitos[:, 6:18])))
+    valido[valido] = correcto
+    return valido
+
+
+def _digito_control(digitos: np.ndarray) -> np.ndarray:
+    productos = digitos * np.resize([1, 2], digitos.shape[1])
+    productos -= 9 * (productos > 9)
+    return (10 - productos.sum(axis=1) % 10) % 10
+
+
+def falta(campo: str) -> Regla:
+    """Campo vacío (los campos 'texto' de un registro quedan 'nan')"""
+    return lambda tabla: tabla[campo].isna() | tabla[campo].astype(str).str.strip().isin(('', 'nan'))
+
+
+def longitud_distinta(campo: str, longitud: int) -> Regla:
+    return lambda tabla: tabla[campo].str.len() != longitud
+
+
+def monto_invalido(campo: str) -> Regla:
+    """Monto vacío, cero o negativo"""
+    return lambda tabla: ~(tabla[campo] > 0)
+
+
+def monto_mayor(campo: str, maximo: float) -> Regla:
+    return lambda tabla: tabla[campo] > maximo
+
+
+def monto_menor(campo: str, minimo: float) -> Regla:
+    return lambda tabla: tabla[campo] < minimo
+
+
+def cci_invalido(campo: str) -> Regla:
+    return lambda tabla: ~cci_valido(tabla[campo])
+
+
+class ValidacionPrevia:
+    """
+    Reglas de validación previa de una operación
+
+    Las reglas se evalúan en orden sobre la tabla completa y cada fila
+    pendiente se queda con el motivo de la primera que la rechaza. Las filas
+    repetidas se buscan solo entre las pendientes (una fila ya procesada no
+    bloquea a la que se cargó para reintentarla) y se rechazan todas menos
+    la primera aparición.
+    """
+
+    def __init__(self, pendiente: Regla, reglas: Sequence[Tuple[str, Regla]],
+                 repetidas: Sequence[str] = ()):
+        """
+        Args:
+            pendiente: True en las filas que todavía no se procesaron
+            reglas: (motivo que se escribe en la hoja, regla)
+            repetidas: Campos que identifican una fila repetida; vacío no las busca
+        """
+        self.pendiente = pendiente
+        self.reglas = list(reglas)
+        self.repetidas = list(repetidas)
+
+    def motivos(self, tabla: pd.DataFrame) -> Dict[int, str]:
+        """
+        Returns:
+            Fila de Excel (índice + 2) -> motivo, solo de las filas pendientes rechazadas
+        """
+        if tabla.empty:
+            return {}
+        pendiente = pd.Series(self.pendiente(tabla), index=tabla.index).astype(bool)
+        motivo = pd.Series(None, index=tabla.index, dtype=object)
+        for texto, regla in self.reglas:
+            libre = pendiente & motivo.isna()
+            if not libre.any():
+                break
+            rechaza = pd.Series(regla(tabla), index=tabla.index).fillna(False).astype(bool)
+            motivo[libre & rechaza] = texto
+        if self.repetidas:
+            libre = pendiente & motivo.isna()
+            repetida = tabla[pendiente].duplicated(subset=self.repetidas).reindex(tabla.index, fill_value=False)
+            motivo[libre & repetida] = FILA_REPETIDA
+        motivo = motivo.dropna()
+        return dict(zip((motivo.index + 2).tolist(), motivo.tolist()))
@@ -0,0 +1,15 @@
+# src/host/__init__.py
+"""
+Acceso al host bancario de FideRAPPI
+Sesiones sobre el emulador, TN3270 directo y simulador local SICA/SITB
+"""
+
+from src.host.session import HostSession, GuiHostSession, SimulatedHostSession, crear_sesion
+from src.host.simulador import HostSimulado
+from src.host.tn3270 import TN3270HostSession
+from src.host.servidor_tn3270 import ServidorTN3270Simulado
+
+__all__ = [
+    'HostSession', 'GuiHostSession', 'SimulatedHostSession', 'crear_sesion',
+    'HostSimulado', 'TN3270HostSession', 'ServidorTN3270Simulado',
+]
@@ -0,0 +1,295 @@
+"""
+Layouts declarativos de las pantallas del host
+Cada panel declara dónde están sus campos y cómo se reconoce su mensaje;
+el layout se compila una vez y extrae un ResultadoPantalla sin volver a
+recorrer la pantalla por cada campo
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Campo:
+    """Campo de pantalla en una fila fija o en la línea que contiene un ancla"""
+
+    def __init__(self, nombre: str, fila: Optional[int] = None, ancla: Optional[str] = None,
+                 inicio: int = 0, fin: Optional[int] = None, quitar: str = "",
+                 tipo: Callable[[str], Any] = str, defecto: Any = None):
+        """
+        Args:
+            nombre: Nombre del campo en el resultado
+            fila: Fila fija (base 0) donde está el campo
+            ancla: Texto que identifica la línea cuando la fila no es fija
+            inicio: Columna inicial
+            fin: Columna final (exclusiva); None hasta el final de la línea
+            quitar: Etiqueta a eliminar del texto extraído
+            tipo: Conversión del texto (str, float...)
+            defecto: Valor cuando el texto está vacío
+        """
+        if (fila is None) == (ancla is None):
+            raise ValueError(f"El campo {nombre} necesita fila o ancla, no ambos")
+        self.nombre = nombre
+        self.fila = fila
+        self.ancla = ancla
+        self.inicio = inicio
+        self.fin = fin
+        self.quitar = quitar
+        self.tipo = tipo
+        self.defecto = defecto
+
+    def extraer(self, linea: str) -> Any:
+        """Convierte el texto del campo en la línea indicada"""
+        texto = linea[self.inicio:self.fin]
+        if self.quitar:
+            texto = texto.replace(self.quitar, '')
+        texto = texto.strip()
+        if not texto:
+            return self.defecto
+        return self.tipo(texto)
+
+
+class Mensaje:
+    """Origen del mensaje del host: fila fija o primera línea con alguna de las anclas"""
+
+    def __init__(self, fila: Optional[int] = None, anclas: Sequence[str] = (),
+                 inicio: int = 0, fin: Optional[int] = None):
+        """
+        Args:
+            fila: Fila fija (base 0) del mensaje
+            anclas: Textos que identifican la línea del mensaje
+            inicio: Columna inicial del mensaje
+            fin: Columna final (exclusiva); None hasta el final de la línea
+        """
+        if (fila is None) == (not anclas):
+            raise ValueError("El mensaje necesita fila o anclas, no ambos")
+        self.fila = fila
+        self.anclas = tuple(anclas)
+        self.inicio = inicio
+        self.fin = fin
+
+    def extraer(self, linea: str) -> str:
+        return linea[self.inicio:self.fin].strip()
+
+
+class ResultadoPantalla:
+    """Valores extraídos de una pantalla según su layout"""
+
+    __slots__ = ('layout', 'mensaje', 'estado', 'valores', 'fila_mensaje')
+
+    def __init__(self, layout: str, mensaje: str, estado: Optional[str],
+                 valores: Dict[str, Any], fila_mensaje: Optional[int] = None):
+        self.layout = layout
+        self.mensaje = mensaje
+        self.estado = estado
+        self.valores = valores
+        self.fila_mensaje = fila_mensaje  # None si ningún origen del mensaje apareció
+
+    def __getitem__(self, nombre: str) -> Any:
+        return self.valores[nombre]
+
+    def get(self, nombre: str, defecto: Any = None) -> Any:
+        """Valor de un campo; defecto si la pantalla no lo tenía"""
+        valor = self.valores.get(nombre)
+        return defecto if valor is None else valor
+
+    def es(self, *estados: str) -> bool:
+        """True si el mensaje corresponde a alguno de los estados"""
+        return self.estado in estados
+
+    def __repr__(self) -> str:
+        return f"ResultadoPantalla({self.layout}, estado={self.estado}, mensaje={self.mensaje!r})"
+
+
+class LayoutPantalla:
+    """Layout compilado de un panel del host"""
+
+    def __init__(self, nombre: str, campos: Sequence[Campo] = (),
+                 mensajes: Sequence[Mensaje] = (),
+                 estados: Sequence[Tuple[str, str]] = (),
+                 mensaje_defecto: str = ""):
+        """
+        Args:
+            nombre: Identificador del panel
+            campos: Campos a extraer
+            mensajes: Orígenes del mensaje en orden de prioridad
+            estados: Pares (estado, texto) que clasifican el mensaje, en orden
+            mensaje_defecto: Mensaje cuando ningún origen aplica
+        """
+        self.nombre = nombre
+        self.campos = list(campos)
+        self.mensajes = list(mensajes)
+        self.estados = list(estados)
+        self.mensaje_defecto = mensaje_defecto
+
+        # Compilación: tuplas planas para el recorrido y filas recordadas por ancla
+        self._campos = tuple((campo.nombre, campo.fila, (campo.ancla,) if campo.ancla else None,
+                              campo.extraer) for campo in self.campos)
+        self._mensajes = tuple((origen.fila, origen.anclas or None, origen.extraer)
+                               for origen in self.mensajes)
+        self._pistas: Dict[Tuple[str, ...], int] = {}
+
+    def _fila_ancla(self, anclas: Tuple[str, ...], lineas: List[str]) -> Optional[int]:
+        """
+        Primera fila que contiene alguna de las anclas
+
+        Los paneles se repiten fila tras fila del template, así que primero se
+        prueba la fila donde el ancla apareció la última vez y solo si no está
+        se recorre la pantalla
+        """
+        pista = self._pistas.get(anclas)
+        if pista is not None and pista < len(lineas):
+            linea = lineas[pista]
+            for ancla in anclas:
+                if ancla in linea:
+                    return pista
+
+        for indice, linea in enumerate(lineas):
+            for ancla in anclas:
+                if ancla in linea:
+                    self._pistas[anclas] = indice
+                    return indice
+        return None
+
+    def extraer(self, lineas: List[str]) -> ResultadoPantalla:
+        """
+        Extrae campos, mensaje y estado de una pantalla capturada
+
+        Args:
+            lineas: Líneas de la pantalla
+
+        Returns:
+            ResultadoPantalla con los valores tipados; los campos ausentes valen None
+        """
+        total = len(lineas)
+
+        valores = {}
+        for nombre, fila, anclas, extraer in self._campos:
+            indice = fila if anclas is None else self._fila_ancla(anclas, lineas)
+            if indice is None or indice >= total:
+                valores[nombre] = None
+            else:
+                valores[nombre] = extraer(lineas[indice])
+
+        mensaje = ""
+        fila_mensaje = None
+        for fila, anclas, extraer in self._mensajes:
+            indice = fila if anclas is None else self._fila_ancla(anclas, lineas)
+            if indice is not None and indice < total:
+                mensaje = extraer(lineas[indice])
+                fila_mensaje = indice
+                if mensaje:
+                    break
+        if not mensaje:
+            mensaje = self.mensaje_defecto
+
+        estado = None
+        if mensaje:
+            for nombre, texto in self.estados:
+                if texto in mensaje:
+                    estado = nombre
+                    break
+
+        return ResultadoPantalla(self.nombre, mensaje, estado, valores, fila_mensaje)
+
+
+# Estados comunes
+DATOS_CORRECTOS = 'DATOS_CORRECTOS'
+GRABADO = 'GRABADO'
+SOBREGIRO = 'SOBREGIRO'
+
+LAYOUTS: Dict[str, LayoutPantalla] = {}
+
+
+def registrar_layout(layout: LayoutPantalla) -> LayoutPantalla:
+    """Agrega un layout al registro por su nombre"""
+    LAYOUTS[layout.nombre] = layout
+    return layout
+
+
+def obtener_layout(nombre: str) -> LayoutPantalla:
+    """Devuelve el layout registrado con ese nombre"""
+    try:
+        return LAYOUTS[nombre]
+    except KeyError:
+        raise ValueError(f"Layout de pantalla no registrado: {nombre}") from None
+
+
+def parsear_pantalla(nombre: str, lineas: List[str]) -> ResultadoPantalla:
+    """Extrae el resultado de una pantalla con el layout indicado"""
+    return obtener_layout(nombre).extraer(lineas)
+
+
+# 220 - CCE: validación con comisiones y grabación con F4
+registrar_layout(LayoutPantalla(
+    'CCE_VALIDACION',
+    campos=[
+        Campo('comision_ib', ancla='COMISION IB', inicio=35, fin=42, tipo=float, defecto=0.0),
+        Campo('comision_bn', ancla='COMISION BN', inicio=35, fin=42, tipo=float, defecto=0.0),
+    ],
+    mensajes=[Mensaje(anclas=['MSG'], inicio=7, fin=54)],
+    estados=[(DATOS_CORRECTOS, '**DATOS CORRECTOS')],
+))
+registrar_layout(LayoutPantalla(
+    'CCE_GRABACION',
+    mensajes=[Mensaje(anclas=['MSG'])],
+    estados=[(GRABADO, 'TRANSFERENCIA GRABADA')],
+))
+
+# 441 - Ahorros: secuencia y titular en la línea 13, ITF en la 15, mensaje en la 23
+registrar_layout(LayoutPantalla(
+    'AHORROS_ABONO',
+    campos=[
+        Campo('secuencia', fila=13, fin=41, quitar='SECUENCIA', defecto=''),
+        Campo('beneficiario', fila=13, inicio=41, defecto=''),
+        Campo('itf', fila=15, quitar='IMPUESTO ITF', defecto=''),
+    ],
+    mensajes=[Mensaje(fila=23)],
+    estados=[(GRABADO, 'OK')],
+    mensaje_defecto="Error: Respuesta incompleta del sistema",
+))
+
+# 311/312/321/322 - Cuentas corrientes: ITF en la línea 7, mensaje en la 23
+registrar_layout(LayoutPantalla(
+    'CTE_VALIDACION',
+    campos=[Campo('itf', fila=7, inicio=61, tipo=float, defecto=0.0)],
+    mensajes=[Mensaje(fila=23)],
+    estados=[(DATOS_CORRECTOS, 'DATOS CORRECTOS PUEDE GRABAR'), (SOBREGIRO, 'CUENTA SOBREGIRADA')],
+    mensaje_defecto="Error: Respuesta incompleta",
+))
+registrar_layout(LayoutPantalla(
+    'CTE_GRABACION',
+    campos=[Campo('itf', fila=7, inicio=61, tipo=float, defecto=0.0)],
+    mensajes=[Mensaje(fila=23)],
+    estados=[(GRABADO, 'GRABACION CORRECTA')],
+    mensaje_defecto="Error en grabación",
+))
+
+# 042 - Cargo: el mensaje puede moverse según el panel, se busca por texto
+registrar_layout(LayoutPantalla(
+    'CARGO_VALIDACION',
+    mensajes=[Mensaje(anclas=['DATOS CORRECTOS PUEDE GRABAR']), Mensaje(fila=23)],
+    estados=[(DATOS_CORRECTOS, 'DATOS CORRECTOS PUEDE GRABAR')],
+))
+registrar_layout(LayoutPantalla(
+    'CARGO_GRABACION',
+    mensajes=[
+        Mensaje(anclas=['GRABACION CORRECTA']),
+        Mensaje(fila=29),  # Emulador configurado con más filas (modelo 3)
+        Mensaje(anclas=['GRABACION', 'ERROR', 'RECHAZADO', 'CORRECTO']),
+    ],
+    estados=[(GRABADO, 'GRABACION CORRECTA')],
+    mensaje_defecto="NO SE DETECTÓ MENSAJE DE GRABACIÓN",
+))
+
+# 042 desde LBTR: mensaje en la línea 23
+registrar_layout(LayoutPantalla(
+    'LBTR_CARGO_VALIDACION',
+    mensajes=[Mensaje(fila=23)],
+    estados=[(DATOS_CORRECTOS, 'CORRECTOS')],
+    mensaje_defecto="Error: Respuesta incompleta del sistema",
+))
+registrar_layout(LayoutPantalla(
+    'LBTR_CARGO_GRABACION',
+    mensajes=[Mensaje(fila=23)],
+    estados=[(GRABADO, 'GRABACION CORRECTA')],
+    mensaje_defecto="Error en grabación",
+))
@@ -0,0 +1,165 @@
+"""
+Servidor TN3270 local sobre HostSimulado
+Permite probar TN3270HostSession sin acceso al mainframe: negocia Telnet,
+pinta las pantallas del simulador con sus campos de entrada y traduce los
+campos modificados de cada tecla AID a lo que el simulador espera
+"""
+
+import socket
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from src.host.simulador import HostSimulado
+from src.host.tn3270 import (
+    AIDS, ATR_NUMERICO, ATR_PROTEGIDO, DO, IAC, OPT_BINARY, OPT_EOR, OPT_TTYPE,
+    ORD_IC, ORD_RA, ORD_SBA, ORD_SF, SB, SE, TTYPE_SEND, WCC_REINICIAR_MDT,
+    WCC_RESTAURAR_TECLADO, WILL, FlujoTelnet, a_ebcdic, codificar_atributo,
+    codificar_direccion, decodificar_direccion, empaquetar_registro,
+)
+from src.utils.logger import LoggerMixin
+
+CMD_ERASE_WRITE = 0xF5
+NOMBRES_AID = {codigo: nombre for nombre, codigo in AIDS.items()}
+
+
+class ServidorTN3270Simulado(LoggerMixin):
+    """Servidor TN3270 de una pantalla por conexión, respaldado por HostSimulado"""
+
+    def __init__(self, fabrica_host: Callable[[], HostSimulado] = HostSimulado,
+                 direccion: str = "127.0.0.1", puerto: int = 0):
+        """
+        Args:
+            fabrica_host: Crea el HostSimulado de cada conexión
+            direccion: Interfaz donde escuchar
+            puerto: Puerto TCP (0 elige uno libre)
+        """
+        self.fabrica_host = fabrica_host
+        self.direccion = direccion
+        self.puerto = puerto
+        self.hosts: List[HostSimulado] = []
+
+        self._socket: Optional[socket.socket] = None
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self) -> Tuple[str, int]:
+        """
+        Empieza a aceptar conexiones en segundo plano
+
+        Returns:
+            (dirección, puerto) donde escucha el servidor
+        """
+        self._socket = socket.create_server((self.direccion, self.puerto))
+        self.puerto = self._socket.getsockname()[1]
+        self._hilo = threading.Thread(target=self._aceptar, name="tn3270-servidor", daemon=True)
+        self._hilo.start()
+        self.logger.info(f"Servidor TN3270 simulado escuchando en {self.direccion}:{self.puerto}")
+        return self.direccion, self.puerto
+
+    def detener(self):
+        """Deja de aceptar conexiones"""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _aceptar(self):
+        """Acepta conexiones y atiende cada una en su propio hilo"""
+        while self._socket is not None:
+            try:
+                conexion, _ = self._socket.accept()
+            except OSError:
+                break
+            conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def _atender(self, conexion: socket.socket):
+        """Negocia la sesión y responde a cada tecla AID del terminal"""
+        host = self.fabrica_host()
+        self.hosts.append(host)
+        flujo = FlujoTelnet()
+
+        try:
+            conexion.sendall(bytes([
+                IAC, DO, OPT_TTYPE,
+                IAC, SB, OPT_TTYPE, TTYPE_SEND, IAC, SE,
+                IAC, DO, OPT_EOR, IAC, WILL, OPT_EOR,
+                IAC, DO, OPT_BINARY, IAC, WILL, OPT_BINARY,
+            ]))
+            conexion.sendall(empaquetar_registro(self._pantalla(host)))
+
+            while True:
+                datos = conexion.recv(65536)
+                if not datos:
+                    break
+                for tipo, valor in flujo.alimentar(datos):
+                    if tipo == 'registro' and valor:
+                        self._procesar_entrada(host, valor)
+                        conexion.sendall(empaquetar_registro(self._pantalla(host)))
+        except OSError:
+            pass
+        finally:
+            conexion.close()
+
+    def _procesar_entrada(self, host: HostSimulado, datos: bytes):
+        """Entrega al simulador los campos modificados y la tecla AID"""
+        nombre = NOMBRES_AID.get(datos[0])
+        if nombre is None:
+            # Respuestas a consultas y Read Modified sin tecla
+            return
+
+        campos = {fila * HostSimulado.COLUMNAS + columna: ''
+                  for fila, columna, _ in host.campos_entrada()}
+        for posicion, valor in self._segmentos(datos[3:]):
+            if posicion in campos:
+                campos[posicion] = valor
+
+        for posicion in sorted(campos):
+            if campos[posicion]:
+                host.teclear(campos[posicion])
+        host.presionar(nombre)
+        host.esperar_respuesta()
+
+    def _segmentos(self, datos: bytes) -> List[Tuple[int, str]]:
+        """Separa los pares (dirección, texto) de un Read Modified"""
+        segmentos = []
+        i = 0
+        while i < len(datos):
+            if datos[i] != ORD_SBA:
+                i += 1
+                continue
+            posicion = decodificar_direccion(datos[i + 1], datos[i + 2])
+            fin = datos.find(bytes([ORD_SBA]), i + 3)
+            fin = len(datos) if fin < 0 else fin
+            segmentos.append((posicion, datos[i + 3:fin].decode('cp037')))
+            i = fin
+        return segmentos
+
+    def _pantalla(self, host: HostSimulado) -> bytes:
+        """Arma un Erase/Write con el texto del simulador y sus campos de entrada"""
+        columnas = HostSimulado.COLUMNAS
+        tamano = HostSimulado.FILAS * columnas
+        lineas = host.pantalla().split("\n")
+
+        registro = bytearray([CMD_ERASE_WRITE,
+                              codificar_atributo(WCC_RESTAURAR_TECLADO | WCC_REINICIAR_MDT)])
+        for fila, linea in enumerate(lineas):
+            texto = linea[:columnas - 1] if fila == len(lineas) - 1 else linea[:columnas]
+            registro += bytes([ORD_SBA]) + codificar_direccion(fila * columnas) + a_ebcdic(texto)
+
+        # Campo protegido en la última posición: cubre toda la pantalla
+        registro += bytes([ORD_SBA]) + codificar_direccion(tamano - 1)
+        registro += bytes([ORD_SF, codificar_atributo(ATR_PROTEGIDO)])
+
+        cursor = None
+        for fila, columna, longitud in host.campos_entrada():
+            inicio = fila * columnas + columna
+            fin = inicio + longitud
+            registro += bytes([ORD_SBA]) + codificar_direccion(inicio - 1)
+            registro += bytes([ORD_SF, codificar_atributo(0)])
+            registro += bytes([ORD_RA]) + codificar_direccion(fin) + b'\x00'
+            registro += bytes([ORD_SF, codificar_atributo(ATR_PROTEGIDO | ATR_NUMERICO)])
+            if cursor is None:
+                cursor = inicio
+
+        if cursor is not None:
+            registro += bytes([ORD_SBA]) + codificar_direccion(cursor) + bytes([ORD_IC])
+        return bytes(registro)
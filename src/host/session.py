@@ -0,0 +1,199 @@
+"""
+Sesiones con el host bancario
+Define la interfaz HostSession y sus implementaciones sobre la ventana del
+emulador (pyautogui) y sobre el simulador local
+"""
+
+import os
+import time
+from typing import Callable, List, Optional
+
+try:
+    import pyautogui
+    import pyperclip
+    GUI_DISPONIBLE = True
+except Exception:
+    # Sin entorno gráfico (por ejemplo en Linux sin pantalla)
+    pyautogui = None
+    pyperclip = None
+    GUI_DISPONIBLE = False
+
+from src.utils.logger import LoggerMixin
+
+CondicionPantalla = Callable[[List[str]], bool]
+
+
+class HostSession(LoggerMixin):
+    """Interfaz común para enviar teclas y leer la pantalla del host"""
+
+    TECLAS_AID = ('enter', 'clear') + tuple(f'f{n}' for n in range(1, 25))
+
+    # True si la sesión puede usarse en paralelo con otras (no depende del foco)
+    concurrente = True
+
+    # True si el terminal envía el código de transacción al completar su
+    # campo; si no, la operación lo envía con Enter
+    envia_transaccion = False
+
+    def activate(self):
+        """Prepara la sesión antes de teclear (por defecto no hace nada)"""
+
+    def send_keys(self, texto: str):
+        """Escribe texto en el campo actual"""
+        raise NotImplementedError
+
+    def send_tab(self):
+        """Avanza al siguiente campo de entrada"""
+        raise NotImplementedError
+
+    def send_aid(self, tecla: str):
+        """Envía una tecla de atención (Enter, Clear, F1-F24) al host"""
+        raise NotImplementedError
+
+    def read_screen(self) -> List[str]:
+        """Devuelve las líneas visibles de la pantalla"""
+        raise NotImplementedError
+
+    def press(self, tecla: str):
+        """
+        Presiona una tecla por nombre, como en pyautogui
+
+        Args:
+            tecla: 'tab' o una tecla AID (enter, f1...f24, clear)
+        """
+        nombre = tecla.lower()
+        if nombre == 'tab':
+            self.send_tab()
+        elif nombre in self.TECLAS_AID:
+            self.send_aid(nombre)
+        else:
+            raise ValueError(f"Tecla no soportada por la sesión: {tecla}")
+
+    def wait_for(self, condicion: CondicionPantalla, timeout: float,
+                 sondeo: float = 0.1,
+                 cancelar: Optional[Callable[[], bool]] = None) -> List[str]:
+        """
+        Espera hasta que la pantalla cumpla una condición
+
+        Args:
+            condicion: Función que recibe las líneas y devuelve True al cumplirse
+            timeout: Segundos máximos de espera
+            sondeo: Pausa entre lecturas de la pantalla
+            cancelar: Función que devuelve True para abandonar la espera
+
+        Returns:
+            Última lectura de la pantalla, se cumpla o no la condición
+        """
+        limite = time.monotonic() + timeout
+        lineas = self.read_screen()
+
+        while not condicion(lineas):
+            if cancelar is not None and cancelar():
+                break
+            if time.monotonic() >= limite:
+                self.logger.warning(f"La pantalla no respondió en {timeout:.1f} s")
+                break
+            time.sleep(sondeo)
+            lineas = self.read_screen()
+
+        return lineas
+
+    def save_evidence(self, ruta: str):
+        """Guarda la pantalla actual como texto junto a la ruta indicada"""
+        ruta_texto = os.path.splitext(ruta)[0] + ".txt"
+        with open(ruta_texto, "w", encoding="utf-8") as archivo:
+            archivo.write("\n".join(self.read_screen()))
+
+    def close(self):
+        """Libera los recursos de la sesión"""
+
+
+class GuiHostSession(HostSession):
+    """Sesión sobre la ventana del emulador usando teclado y portapapeles"""
+
+    # El teclado y el portapapeles son únicos en el equipo
+    concurrente = False
+
+    # El emulador del banco envía el código de transacción por su cuenta
+    envia_transaccion = True
+
+    def __init__(self, ventana):
+        """
+        Args:
+            ventana: Ventana "prod" obtenida con pyautogui.getWindowsWithTitle
+        """
+        if not GUI_DISPONIBLE:
+            raise RuntimeError("pyautogui/pyperclip no están disponibles en este equipo")
+        self.ventana = ventana
+
+    def activate(self):
+        """Trae al frente la ventana del emulador si no está activa"""
+        if not self.ventana.isActive:
+            self.ventana.maximize()
+            self.ventana.activate()
+
+    def send_keys(self, texto: str):
+        pyautogui.write(texto)
+
+    def send_tab(self):
+        pyautogui.press('tab')
+
+    def send_aid(self, tecla: str):
+        pyautogui.press(tecla)
+
+    def read_screen(self) -> List[str]:
+        """Copia el contenido del emulador al portapapeles y lo lee"""
+        pyperclip.copy('')
+        pyautogui.hotkey('ctrl', 'c')
+
+        # El portapapeles se llena de forma asíncrona
+        limite = time.monotonic() + 1.0
+        texto = pyperclip.paste()
+        while not texto and time.monotonic() < limite:
+            time.sleep(0.02)
+            texto = pyperclip.paste()
+
+        return texto.splitlines()
+
+    def save_evidence(self, ruta: str):
+        """Guarda una captura de la pantalla completa"""
+        screenshot = pyautogui.screenshot()
+        screenshot.save(ruta)
+
+
+class SimulatedHostSession(HostSession):
+    """Sesión en memoria sobre HostSimulado, para pruebas y benchmarks"""
+
+    def __init__(self, host):
+        """
+        Args:
+            host: Instancia de HostSimulado
+        """
+        self.host = host
+
+    def send_keys(self, texto: str):
+        self.host.teclear(texto)
+
+    def send_tab(self):
+        self.host.presionar('tab')
+
+    def send_aid(self, tecla: str):
+        self.host.presionar(tecla)
+
+    def read_screen(self) -> List[str]:
+        return self.host.pantalla().splitlines()
+
+
+def crear_sesion(ventana) -> HostSession:
+    """
+    Obtiene la sesión para una ventana del emulador
+
+    Args:
+        ventana: Ventana de pyautogui o una HostSession ya creada
+
+    Returns:
+        Sesión lista para usar
+    """
+    if isinstance(ventana, HostSession):
+        return ventana
+    return GuiHostSession(ventana)
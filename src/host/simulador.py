@@ -0,0 +1,424 @@
+"""
+Simulador local del host SICA/SITB
+Reproduce las pantallas que recorren las operaciones (220, 441, 042, 311/312/321/322)
+con latencia configurable e inyección de errores, sin necesidad de una ventana "prod"
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.utils.logger import LoggerMixin
+
+
+class HostSimulado(LoggerMixin):
+    """Host bancario simulado que responde a teclas como el emulador real"""
+
+    FILAS = 24
+    COLUMNAS = 80
+    TECLAS_AID = ('enter', 'f1', 'f4', 'f5')
+
+    # Textos que esperan las operaciones
+    MSG_DATOS_CORRECTOS = "**DATOS CORRECTOS - PULSE F4 PARA GRABAR"
+    MSG_TRANSFERENCIA_GRABADA = "TRANSFERENCIA GRABADA"
+    MSG_PUEDE_GRABAR = "DATOS CORRECTOS PUEDE GRABAR"
+    MSG_GRABACION_CORRECTA = "GRABACION CORRECTA"
+    MSG_SOBREGIRO = "CUENTA SOBREGIRADA"
+    MSG_ABONO_OK = "OK ABONO REGISTRADO"
+
+    # Campos de entrada (fila, columna, longitud) de cada pantalla, tal como
+    # los recorren las operaciones con escritura, autoskip y tabulador
+    CAMPO_TRANSACCION = (2, 14, 3)
+    CAMPOS_ENTRADA = {
+        ('220', 0): [20, 40, 40, 11],
+        ('220', 1): [3, 12, 10, 1],
+        ('441', 0): [11, 10, 10, 10, 10, 15],
+        ('042', 0): [11, 15, 10, 2, 50, 50, 50],
+        ('CTE', 0): [11, 15],
+        ('CTE_CARGO', 1): [10, 10, 1, 40, 40, 11],
+        ('CTE_ABONO', 1): [10, 10, 10, 40, 40, 11],
+    }
+    FILA_CAMPOS = 12
+    COLUMNA_CAMPOS = 20
+
+    MANEJADORES = {
+        '220': '_transaccion_cce',
+        '441': '_transaccion_ahorros',
+        '042': '_transaccion_cargo',
+        '311': '_transaccion_cte',
+        '312': '_transaccion_cte',
+        '321': '_transaccion_cte',
+        '322': '_transaccion_cte',
+    }
+
+    # Comisiones fijas de la transacción CCE
+    COMISION_IB = 3.50
+    COMISION_BN = 1.00
+
+    def __init__(self, latencia: float = 0.1, variacion: float = 0.0,
+                 errores: Optional[Dict[str, float]] = None,
+                 titulares: Optional[Dict[str, str]] = None,
+                 cuentas_sobregiradas: Optional[Set[str]] = None,
+                 semilla: Optional[int] = None):
+        """
+        Inicializa el host simulado
+
+        Args:
+            latencia: Segundos que tarda el host en responder a cada tecla AID
+            variacion: Variación aleatoria máxima (+/-) sobre la latencia
+            errores: Probabilidad de error por etapa ('validacion', 'grabacion')
+            titulares: Titular registrado por número de cuenta (para 441)
+            cuentas_sobregiradas: Cuentas que responden CUENTA SOBREGIRADA
+            semilla: Semilla para reproducir la inyección de errores
+        """
+        self.latencia = latencia
+        self.variacion = variacion
+        self.errores = dict(errores or {})
+        self.titulares = dict(titulares or {})
+        self.cuentas_sobregiradas = set(cuentas_sobregiradas or ())
+
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._secuencia = 100000
+
+        self._transaccion = None
+        self._etapa = 0
+        self._datos = {}
+        self._tokens = []
+        self._pantalla = self._pantalla_inicial()
+        self._pendiente = None
+
+        self.estadisticas = {'aid': 0, 'grabadas': 0, 'rechazadas': 0}
+
+    # ------------------------------------------------------------------
+    # Interfaz de terminal
+    # ------------------------------------------------------------------
+
+    def teclear(self, texto: str):
+        """Escribe texto en el campo actual"""
+        with self._lock:
+            self._tokens.append(str(texto))
+            if self._pendiente is None:
+                self._pantalla = self._con_entrada(self._pantalla)
+
+    def presionar(self, tecla: str):
+        """Presiona una tecla; las teclas AID se envían al host"""
+        tecla = tecla.lower()
+        if tecla not in self.TECLAS_AID:
+            return
+
+        with self._lock:
+            self.estadisticas['aid'] += 1
+            lineas = self._procesar_aid(tecla)
+            demora = self.latencia
+            if self.variacion:
+                demora += self._azar.uniform(-self.variacion, self.variacion)
+            self._pendiente = (time.monotonic() + max(demora, 0.0), lineas)
+
+    def pantalla(self) -> str:
+        """Devuelve el texto visible; el host ocupado mantiene la pantalla anterior"""
+        with self._lock:
+            if self._pendiente and time.monotonic() >= self._pendiente[0]:
+                self._pantalla = self._con_entrada(self._pendiente[1])
+                self._pendiente = None
+            return "\n".join(self._pantalla)
+
+    def esperar_respuesta(self):
+        """Bloquea hasta que el host termina de procesar la última tecla AID"""
+        while True:
+            with self._lock:
+                if self._pendiente is None:
+                    return
+                restante = self._pendiente[0] - time.monotonic()
+            if restante > 0:
+                time.sleep(restante)
+            self.pantalla()
+
+    def campos_entrada(self) -> List[Tuple[int, int, int]]:
+        """
+        Campos de entrada de la pantalla actual
+
+        Returns:
+            Lista de (fila, columna, longitud); vacía si la pantalla solo espera una tecla
+        """
+        with self._lock:
+            if self._transaccion is None:
+                return [self.CAMPO_TRANSACCION]
+
+            clave = self._transaccion
+            if clave in ('311', '312', '321', '322'):
+                if self._etapa == 0:
+                    clave = 'CTE'
+                else:
+                    clave = 'CTE_CARGO' if self._transaccion in ('312', '322') else 'CTE_ABONO'
+
+            longitudes = self.CAMPOS_ENTRADA.get((clave, self._etapa), [])
+            return [(self.FILA_CAMPOS + i, self.COLUMNA_CAMPOS, longitud)
+                    for i, longitud in enumerate(longitudes)]
+
+    def guardar_captura(self, ruta: str):
+        """Guarda la pantalla actual como texto junto a la ruta indicada"""
+        ruta_texto = os.path.splitext(ruta)[0] + ".txt"
+        with open(ruta_texto, "w", encoding="utf-8") as archivo:
+            archivo.write(self.pantalla())
+
+    # ------------------------------------------------------------------
+    # Lógica de transacciones
+    # ------------------------------------------------------------------
+
+    def _procesar_aid(self, tecla: str) -> List[str]:
+        """Procesa una tecla AID y devuelve la pantalla de respuesta"""
+        tokens = self._tokens
+        self._tokens = []
+
+        if tecla == 'f5':
+            self._reiniciar()
+            return self._pantalla_inicial()
+
+        if self._transaccion is None:
+            if not tokens:
+                return self._pantalla_inicial("INGRESE CODIGO DE TRANSACCION")
+            self._transaccion = tokens[0][:3]
+            resto = tokens[0][3:]
+            tokens = ([resto] if resto else []) + tokens[1:]
+            if not tokens and tecla == 'enter':
+                # Solo el código: se muestra la pantalla de ingreso de datos
+                return self._pantalla_transaccion()
+
+        manejador = self.MANEJADORES.get(self._transaccion)
+        if manejador is not None:
+            manejador = getattr(self, manejador)
+        if manejador is None:
+            transaccion = self._transaccion
+            self._reiniciar()
+            return self._pantalla_inicial(f"TRANSACCION {transaccion} NO EXISTE")
+
+        return manejador(tecla, tokens)
+
+    def _transaccion_cce(self, tecla: str, tokens: List[str]) -> List[str]:
+        """220 - Abono CCE en dos pantallas, validación y grabación con F4"""
+        if self._etapa == 0 and tecla == 'enter':
+            # CCI, beneficiario, glosa, cuenta
+            self._datos.update(self._asignar(tokens, ['cci', 'beneficiario', 'glosa', 'cuenta']))
+            if len(self._datos.get('cci', '')) != 20:
+                return self._respuesta_msg("**CCI CON FORMATO INCORRECTO", rechazada=True)
+            self._etapa = 1
+            return self._lineas({
+                4: f"CCI DESTINO  {self._datos['cci']}",
+                5: f"BENEFICIARIO {self._datos.get('beneficiario', '')}",
+                8: "MONEDA:      IMPORTE:",
+            })
+
+        if self._etapa == 1 and tecla == 'enter':
+            # Moneda, importe, indicador
+            self._datos.update(self._asignar(tokens, ['moneda', 'monto', 'indicador']))
+            monto = self._importe(self._datos.get('monto'))
+            if monto is None:
+                return self._respuesta_msg("**IMPORTE INVALIDO", rechazada=True)
+            if self._falla('validacion'):
+                return self._respuesta_msg("**ENTIDAD DESTINO NO DISPONIBLE", rechazada=True)
+            self._etapa = 2
+            return self._lineas({
+                4: f"CCI DESTINO  {self._datos['cci']}",
+                5: f"BENEFICIARIO {self._datos.get('beneficiario', '')}",
+                8: f"{'IMPORTE':<35}{monto:>7.2f}",
+                10: f"{'COMISION IB':<35}{self.COMISION_IB:>7.2f}",
+                11: f"{'COMISION BN':<35}{self.COMISION_BN:>7.2f}",
+                22: self._msg(self.MSG_DATOS_CORRECTOS),
+            })
+
+        if self._etapa == 2 and tecla == 'f4':
+            if self._falla('grabacion'):
+                return self._respuesta_msg("**ERROR EN COMUNICACION CON CCE", rechazada=True)
+            numero = self._siguiente_secuencia()
+            self.estadisticas['grabadas'] += 1
+            self._reiniciar()
+            return self._lineas({22: self._msg(f"{self.MSG_TRANSFERENCIA_GRABADA} NRO {numero}")})
+
+        return self._respuesta_msg("**TECLA NO PERMITIDA")
+
+    def _transaccion_ahorros(self, tecla: str, tokens: List[str]) -> List[str]:
+        """441 - Abono en cuenta de ahorros, se graba directamente con F1"""
+        if tecla != 'f1':
+            return self._lineas({23: "PULSE F1 PARA GRABAR"})
+
+        datos = self._asignar(tokens, ['cuenta', 'memo', 'monto'])
+        cuenta = datos.get('cuenta', '')
+        monto = self._importe(datos.get('monto'))
+        self._reiniciar()
+
+        if len(cuenta) != 11:
+            self.estadisticas['rechazadas'] += 1
+            return self._lineas({23: "CUENTA NO EXISTE"})
+        if monto is None:
+            self.estadisticas['rechazadas'] += 1
+            return self._lineas({23: "IMPORTE INVALIDO"})
+        if self._falla('validacion') or self._falla('grabacion'):
+            self.estadisticas['rechazadas'] += 1
+            return self._lineas({23: "CUENTA BLOQUEADA"})
+
+        titular = self.titulares.get(cuenta, f"TITULAR {cuenta}")
+        secuencia = self._siguiente_secuencia()
+        self.estadisticas['grabadas'] += 1
+        return self._lineas({
+            11: f"CUENTA {cuenta}",
+            13: f"{'SECUENCIA ' + str(secuencia):<41}{titular}",
+            15: f"IMPUESTO ITF {self._itf(monto):.2f}",
+            23: self.MSG_ABONO_OK,
+        })
+
+    def _transaccion_cte(self, tecla: str, tokens: List[str]) -> List[str]:
+        """311/312/321/322 - Cargo o abono en cuenta corriente"""
+        if self._etapa == 0 and tecla == 'enter':
+            self._datos.update(self._asignar(tokens, ['cuenta', 'monto']))
+            if len(self._datos.get('cuenta', '')) != 11:
+                return self._respuesta_linea("CUENTA NO EXISTE", rechazada=True)
+            if self._importe(self._datos.get('monto')) is None:
+                return self._respuesta_linea("IMPORTE INVALIDO", rechazada=True)
+            self._etapa = 1
+            return self._lineas({
+                4: f"CUENTA  {self._datos['cuenta']}",
+                6: "DOCUMENTO:",
+                23: "INGRESE DATOS COMPLEMENTARIOS",
+            })
+
+        if self._etapa == 1 and tecla == 'enter':
+            self._datos['complemento'] = tokens
+            monto = self._importe(self._datos.get('monto'))
+            es_cargo = self._transaccion in ('312', '322')
+            if es_cargo and self._datos['cuenta'] in self.cuentas_sobregiradas:
+                return self._respuesta_linea(self.MSG_SOBREGIRO, rechazada=True)
+            if self._falla('validacion'):
+                mensaje = self.MSG_SOBREGIRO if es_cargo else "CUENTA BLOQUEADA"
+                return self._respuesta_linea(mensaje, rechazada=True)
+            self._etapa = 2
+            return self._lineas({
+                4: f"CUENTA  {self._datos['cuenta']}",
+                7: f"{'IMPUESTO ITF':<61}{self._itf(monto):.2f}",
+                23: self.MSG_PUEDE_GRABAR,
+            })
+
+        if self._etapa == 2 and tecla == 'f4':
+            monto = self._importe(self._datos.get('monto'))
+            if self._falla('grabacion'):
+                return self._respuesta_linea("ERROR DE GRABACION - REINTENTE", rechazada=True)
+            self.estadisticas['grabadas'] += 1
+            self._reiniciar()
+            return self._lineas({
+                7: f"{'IMPUESTO ITF':<61}{self._itf(monto):.2f}",
+                23: f"{self.MSG_GRABACION_CORRECTA} SEC {self._siguiente_secuencia()}",
+            })
+
+        return self._respuesta_linea("TECLA NO PERMITIDA")
+
+    def _transaccion_cargo(self, tecla: str, tokens: List[str]) -> List[str]:
+        """042 - Cargo en cuenta con motivo y glosas"""
+        if self._etapa == 0 and tecla == 'enter':
+            self._datos.update(self._asignar(tokens, ['cuenta', 'monto', 'documento', 'motivo']))
+            self._datos['glosas'] = tokens[4:]
+            cuenta = self._datos.get('cuenta', '')
+            if len(cuenta) != 11:
+                return self._respuesta_linea("CUENTA NO EXISTE", rechazada=True)
+            if self._importe(self._datos.get('monto')) is None:
+                return self._respuesta_linea("IMPORTE INVALIDO", rechazada=True)
+            if cuenta in self.cuentas_sobregiradas or self._falla('validacion'):
+                return self._respuesta_linea(self.MSG_SOBREGIRO, rechazada=True)
+            self._etapa = 1
+            return self._lineas({
+                4: f"CUENTA  {cuenta}",
+                6: f"IMPORTE {self._datos['monto']}",
+                23: self.MSG_PUEDE_GRABAR,
+            })
+
+        if self._etapa == 1 and tecla == 'f4':
+            if self._falla('grabacion'):
+                return self._respuesta_linea("ERROR DE GRABACION - REINTENTE", rechazada=True)
+            self.estadisticas['grabadas'] += 1
+            self._reiniciar()
+            return self._lineas({23: f"{self.MSG_GRABACION_CORRECTA} SEC {self._siguiente_secuencia()}"})
+
+        return self._respuesta_linea("TECLA NO PERMITIDA")
+
+    # ------------------------------------------------------------------
+    # Utilidades
+    # ------------------------------------------------------------------
+
+    def _reiniciar(self):
+        """Vuelve al estado inicial de ingreso de transacción"""
+        self._transaccion = None
+        self._etapa = 0
+        self._datos = {}
+
+    def _falla(self, etapa: str) -> bool:
+        """Decide si se inyecta un error en la etapa indicada"""
+        probabilidad = self.errores.get(etapa, 0.0)
+        return probabilidad > 0 and self._azar.random() < probabilidad
+
+    def _siguiente_secuencia(self) -> int:
+        """Genera el siguiente número de secuencia del host"""
+        self._secuencia += 1
+        return self._secuencia
+
+    def _asignar(self, tokens: List[str], nombres: List[str]) -> Dict[str, str]:
+        """Asigna los valores escritos a los nombres de campo en orden"""
+        return {nombre: valor.strip() for nombre, valor in zip(nombres, tokens)}
+
+    def _importe(self, texto: Optional[str]) -> Optional[float]:
+        """Convierte el importe escrito a número"""
+        try:
+            return float(texto)
+        except (TypeError, ValueError):
+            return None
+
+    def _itf(self, monto: Optional[float]) -> float:
+        """Calcula el ITF (0.005%) de un importe"""
+        return round((monto or 0) * 0.00005, 2)
+
+    def _msg(self, texto: str) -> str:
+        """Formatea una línea MSG con el texto en las columnas 7-54"""
+        return f"MSG    {texto}"
+
+    def _respuesta_msg(self, texto: str, rechazada: bool = False) -> List[str]:
+        """Pantalla de error con línea MSG (transacción 220)"""
+        if rechazada:
+            self.estadisticas['rechazadas'] += 1
+        return self._lineas({22: self._msg(texto)})
+
+    def _respuesta_linea(self, texto: str, rechazada: bool = False) -> List[str]:
+        """Pantalla de error con mensaje en la línea 23"""
+        if rechazada:
+            self.estadisticas['rechazadas'] += 1
+        return self._lineas({23: texto})
+
+    def _pantalla_inicial(self, mensaje: str = "") -> List[str]:
+        """Pantalla en blanco lista para ingresar una transacción"""
+        contenido = {2: "TRANSACCION:"}
+        if mensaje:
+            contenido[23] = mensaje
+        return self._lineas(contenido)
+
+    def _pantalla_transaccion(self) -> List[str]:
+        """Pantalla de ingreso de datos de la transacción elegida"""
+        if self._transaccion not in self.MANEJADORES:
+            transaccion = self._transaccion
+            self._reiniciar()
+            return self._pantalla_inicial(f"TRANSACCION {transaccion} NO EXISTE")
+        return self._lineas({2: f"TRANSACCION: {self._transaccion}", 23: "INGRESE LOS DATOS"})
+
+    def _lineas(self, contenido: Dict[int, str]) -> List[str]:
+        """Construye una pantalla de FILAS x COLUMNAS"""
+        transaccion = self._transaccion or "   "
+        lineas = [""] * self.FILAS
+        lineas[0] = f"SICA/SITB  HOST SIMULADO{'TRX ' + transaccion:>56}"
+        for indice, texto in contenido.items():
+            lineas[indice] = texto
+        return [linea[:self.COLUMNAS].ljust(self.COLUMNAS) for linea in lineas]
+
+    def _con_entrada(self, lineas: List[str]) -> List[str]:
+        """Muestra lo escrito en la línea 1, como el eco del emulador"""
+        eco = " ".join(self._tokens)
+        lineas = list(lineas)
+        lineas[1] = f"> {eco}"[:self.COLUMNAS].ljust(self.COLUMNAS)
+        return lineas
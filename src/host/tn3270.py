@@ -0,0 +1,594 @@
+"""
+Sesión TN3270 directa con el host
+Habla el protocolo del emulador (Telnet + flujo de datos 3270) sin pasar por
+la ventana, el foco ni el portapapeles
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.host.session import CondicionPantalla, HostSession
+
+# Comandos y opciones Telnet (RFC 854, 885, 1091)
+IAC, DONT, DO, WONT, WILL, SB, SE, EOR = 255, 254, 253, 252, 251, 250, 240, 239
+OPT_BINARY, OPT_TTYPE, OPT_EOR = 0, 24, 25
+TTYPE_IS, TTYPE_SEND = 0, 1
+
+# Comandos 3270 (formas CCW y SNA)
+CMD_WRITE = (0xF1, 0x01)
+CMD_ERASE_WRITE = (0xF5, 0x05, 0x7E, 0x0D)
+CMD_ERASE_ALL_UNPROTECTED = (0x6F, 0x0F)
+CMD_READ_BUFFER = (0xF2, 0x02)
+CMD_READ_MODIFIED = (0xF6, 0x06, 0x6E, 0x0E)
+CMD_WSF = (0xF3, 0x11)
+
+# Órdenes del flujo de datos
+ORD_SF, ORD_SBA, ORD_IC, ORD_PT = 0x1D, 0x11, 0x13, 0x05
+ORD_RA, ORD_EUA, ORD_GE = 0x3C, 0x12, 0x08
+ORD_SFE, ORD_SA, ORD_MF = 0x29, 0x28, 0x2C
+
+# Atributos de campo
+ATR_PROTEGIDO = 0x20
+ATR_NUMERICO = 0x10
+ATR_NO_VISIBLE = 0x0C
+ATR_MODIFICADO = 0x01
+
+# WCC
+WCC_REINICIAR_MDT = 0x01
+WCC_RESTAURAR_TECLADO = 0x02
+
+AID_NINGUNO = 0x60
+AID_CAMPO_ESTRUCTURADO = 0x88
+AIDS = {
+    'enter': 0x7D, 'clear': 0x6D, 'pa1': 0x6C, 'pa2': 0x6E, 'pa3': 0x6B,
+    'f1': 0xF1, 'f2': 0xF2, 'f3': 0xF3, 'f4': 0xF4, 'f5': 0xF5, 'f6': 0xF6,
+    'f7': 0xF7, 'f8': 0xF8, 'f9': 0xF9, 'f10': 0x7A, 'f11': 0x7B, 'f12': 0x7C,
+    'f13': 0xC1, 'f14': 0xC2, 'f15': 0xC3, 'f16': 0xC4, 'f17': 0xC5, 'f18': 0xC6,
+    'f19': 0xC7, 'f20': 0xC8, 'f21': 0xC9, 'f22': 0x4A, 'f23': 0x4B, 'f24': 0x4C,
+}
+AIDS_SIN_DATOS = (0x6D, 0x6C, 0x6E, 0x6B)
+
+# Códigos gráficos de 6 bits usados en direcciones de 12 bits y atributos
+CODIGOS_6BIT = bytes([
+    0x40, 0xC1, 0xC2, 0xC3, 0xC4, 0xC5, 0xC6, 0xC7, 0xC8, 0xC9, 0x4A, 0x4B, 0x4C, 0x4D, 0x4E, 0x4F,
+    0x50, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0x5A, 0x5B, 0x5C, 0x5D, 0x5E, 0x5F,
+    0x60, 0x61, 0xE2, 0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0x6A, 0x6B, 0x6C, 0x6D, 0x6E, 0x6F,
+    0xF0, 0xF1, 0xF2, 0xF3, 0xF4, 0xF5, 0xF6, 0xF7, 0xF8, 0xF9, 0x7A, 0x7B, 0x7C, 0x7D, 0x7E, 0x7F,
+])
+
+CODEPAGE = 'cp037'
+_EBCDIC = bytes(range(256)).decode(CODEPAGE)
+
+
+def codificar_direccion(posicion: int) -> bytes:
+    """Codifica una posición del buffer en dos bytes (12 bits, o 14 si no alcanza)"""
+    if posicion < 4096:
+        return bytes([CODIGOS_6BIT[(posicion >> 6) & 0x3F], CODIGOS_6BIT[posicion & 0x3F]])
+    return bytes([(posicion >> 8) & 0x3F, posicion & 0xFF])
+
+
+def decodificar_direccion(alto: int, bajo: int) -> int:
+    """Decodifica una dirección de buffer de 12 o 14 bits"""
+    if alto & 0xC0 == 0:
+        return ((alto & 0x3F) << 8) | bajo
+    return ((alto & 0x3F) << 6) | (bajo & 0x3F)
+
+
+def codificar_atributo(atributo: int) -> int:
+    """Convierte los bits de atributo de campo en su código gráfico"""
+    return CODIGOS_6BIT[atributo & 0x3F]
+
+
+def a_ebcdic(texto: str) -> bytes:
+    """Convierte texto a EBCDIC; los caracteres sin equivalente se reemplazan"""
+    return texto.encode(CODEPAGE, errors='replace')
+
+
+def empaquetar_registro(datos: bytes) -> bytes:
+    """Duplica los IAC y cierra el registro con IAC EOR"""
+    return bytes(datos).replace(bytes([IAC]), bytes([IAC, IAC])) + bytes([IAC, EOR])
+
+
+class FlujoTelnet:
+    """Separa los registros 3270 de los comandos Telnet en los bytes recibidos"""
+
+    def __init__(self):
+        self._pendiente = bytearray()
+        self._registro = bytearray()
+
+    def alimentar(self, datos: bytes) -> List[Tuple]:
+        """
+        Procesa bytes recibidos del socket
+
+        Returns:
+            Eventos ('registro', datos), (DO/DONT/WILL/WONT, opción) o (SB, datos)
+        """
+        self._pendiente += datos
+        buffer = self._pendiente
+        eventos = []
+        i = 0
+
+        while i < len(buffer):
+            byte = buffer[i]
+            if byte != IAC:
+                self._registro.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(buffer):
+                break
+
+            comando = buffer[i + 1]
+            if comando == IAC:
+                self._registro.append(IAC)
+                i += 2
+            elif comando == EOR:
+                eventos.append(('registro', bytes(self._registro)))
+                self._registro.clear()
+                i += 2
+            elif comando in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(buffer):
+                    break
+                eventos.append((comando, buffer[i + 2]))
+                i += 3
+            elif comando == SB:
+                fin = buffer.find(bytes([IAC, SE]), i + 2)
+                if fin < 0:
+                    break
+                eventos.append((SB, bytes(buffer[i + 2:fin])))
+                i = fin + 2
+            else:
+                # NOP, GA y demás comandos sin argumento
+                i += 2
+
+        del buffer[:i]
+        return eventos
+
+
+class TN3270HostSession(HostSession):
+    """Cliente TN3270 que mantiene su propia copia del buffer de pantalla"""
+
+    def __init__(self, host: str, puerto: int = 23, tipo_terminal: str = "IBM-3278-2-E",
+                 timeout: float = 10.0, filas: int = 24, columnas: int = 80):
+        """
+        Args:
+            host: Nombre o IP del servidor TN3270
+            puerto: Puerto del servidor
+            tipo_terminal: Tipo anunciado en la negociación TERMINAL-TYPE
+            timeout: Segundos máximos para conectar y esperar el teclado
+            filas: Filas de la pantalla (modelo 2: 24)
+            columnas: Columnas de la pantalla (modelo 2: 80)
+        """
+        self.host = host
+        self.puerto = puerto
+        self.tipo_terminal = tipo_terminal
+        self.timeout = timeout
+        self.filas = filas
+        self.columnas = columnas
+        self.tamano = filas * columnas
+
+        self._socket: Optional[socket.socket] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._envio = threading.Lock()
+        self._cambio = threading.Condition()
+
+        self._buffer = ['\0'] * self.tamano
+        self._atributos: Dict[int, int] = {}
+        self._cursor = 0
+        self._bloqueado = True
+        self._conectada = False
+        self._escrituras = 0
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    def connect(self):
+        """Abre la conexión y espera la primera pantalla del host"""
+        self._socket = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+        self._socket.settimeout(None)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._conectada = True
+
+        self._hilo = threading.Thread(target=self._leer, name="tn3270-lector", daemon=True)
+        self._hilo.start()
+
+        limite = time.monotonic() + self.timeout
+        with self._cambio:
+            while self._escrituras == 0 and self._conectada:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise TimeoutError(f"El host {self.host}:{self.puerto} no envió la pantalla inicial")
+                self._cambio.wait(restante)
+        if not self._conectada:
+            raise ConnectionError(f"El host {self.host}:{self.puerto} cerró la conexión")
+
+        self.logger.info(f"Sesión TN3270 conectada a {self.host}:{self.puerto}")
+
+    def close(self):
+        """Cierra la conexión con el host"""
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+        if self._hilo is not None:
+            self._hilo.join(timeout=1.0)
+            self._hilo = None
+
+    def _enviar(self, datos: bytes):
+        """Envía bytes crudos al host"""
+        if self._socket is None:
+            raise ConnectionError("La sesión TN3270 no está conectada")
+        with self._envio:
+            self._socket.sendall(datos)
+
+    def _leer(self):
+        """Hilo lector: negocia Telnet y aplica los registros 3270 al buffer"""
+        flujo = FlujoTelnet()
+        try:
+            while True:
+                datos = self._socket.recv(65536)
+                if not datos:
+                    break
+                for evento in flujo.alimentar(datos):
+                    self._atender_evento(evento)
+        except OSError:
+            pass
+        finally:
+            with self._cambio:
+                self._conectada = False
+                self._cambio.notify_all()
+
+    def _atender_evento(self, evento: Tuple):
+        """Responde a la negociación Telnet o procesa un registro 3270"""
+        tipo, valor = evento
+        if tipo == 'registro':
+            self._procesar_registro(valor)
+        elif tipo == DO:
+            respuesta = WILL if valor in (OPT_BINARY, OPT_EOR, OPT_TTYPE) else WONT
+            self._enviar(bytes([IAC, respuesta, valor]))
+        elif tipo == WILL:
+            respuesta = DO if valor in (OPT_BINARY, OPT_EOR) else DONT
+            self._enviar(bytes([IAC, respuesta, valor]))
+        elif tipo == SB and valor[:2] == bytes([OPT_TTYPE, TTYPE_SEND]):
+            self._enviar(bytes([IAC, SB, OPT_TTYPE, TTYPE_IS])
+                         + self.tipo_terminal.encode('ascii') + bytes([IAC, SE]))
+
+    # ------------------------------------------------------------------
+    # Flujo de datos de salida (host -> terminal)
+    # ------------------------------------------------------------------
+
+    def _procesar_registro(self, datos: bytes):
+        """Aplica un comando 3270 recibido del host"""
+        if not datos:
+            return
+
+        comando = datos[0]
+        respuesta = None
+        with self._cambio:
+            if comando in CMD_ERASE_WRITE:
+                self._borrar()
+                self._aplicar_escritura(datos[1:], 0)
+            elif comando in CMD_WRITE:
+                self._aplicar_escritura(datos[1:], self._cursor)
+            elif comando in CMD_ERASE_ALL_UNPROTECTED:
+                self._borrar_no_protegidos()
+                self._bloqueado = False
+            elif comando in CMD_READ_BUFFER:
+                respuesta = self._leer_buffer()
+            elif comando in CMD_READ_MODIFIED:
+                respuesta = self._leer_modificados(AID_NINGUNO)
+            elif comando in CMD_WSF:
+                respuesta = self._respuesta_consulta(datos[1:])
+            else:
+                self.logger.warning(f"Comando 3270 no soportado: 0x{comando:02X}")
+
+            self._escrituras += 1
+            self._cambio.notify_all()
+
+        if respuesta is not None:
+            self._enviar(empaquetar_registro(respuesta))
+
+    def _borrar(self):
+        """Borra el buffer y todos los campos"""
+        self._buffer = ['\0'] * self.tamano
+        self._atributos = {}
+        self._cursor = 0
+
+    def _borrar_no_protegidos(self):
+        """Borra el contenido de los campos no protegidos"""
+        for atributo, inicio, longitud in self._campos():
+            if not self._atributos[atributo] & ATR_PROTEGIDO:
+                for desplazamiento in range(longitud):
+                    self._buffer[(inicio + desplazamiento) % self.tamano] = '\0'
+                self._atributos[atributo] &= ~ATR_MODIFICADO
+        primero = self._siguiente_no_protegido(self.tamano - 1)
+        self._cursor = primero if primero is not None else 0
+
+    def _poner(self, posicion: int, caracter: str):
+        """Escribe un carácter; si había un atributo en esa posición lo elimina"""
+        self._atributos.pop(posicion, None)
+        self._buffer[posicion] = caracter
+
+    def _definir_campo(self, posicion: int, atributo: int):
+        """Coloca un atributo de campo en la posición indicada"""
+        self._atributos[posicion] = atributo & 0x3F
+        self._buffer[posicion] = '\0'
+
+    def _aplicar_escritura(self, datos: bytes, posicion: int):
+        """Interpreta el WCC y las órdenes de un comando Write/Erase Write"""
+        if not datos:
+            return
+
+        wcc = datos[0]
+        if wcc & WCC_REINICIAR_MDT:
+            for atributo in self._atributos:
+                self._atributos[atributo] &= ~ATR_MODIFICADO
+
+        i = 1
+        while i < len(datos):
+            orden = datos[i]
+            if orden == ORD_SBA:
+                posicion = decodificar_direccion(datos[i + 1], datos[i + 2]) % self.tamano
+                i += 3
+            elif orden == ORD_SF:
+                self._definir_campo(posicion, datos[i + 1])
+                posicion = (posicion + 1) % self.tamano
+                i += 2
+            elif orden == ORD_SFE:
+                cantidad = datos[i + 1]
+                pares = datos[i + 2:i + 2 + 2 * cantidad]
+                atributo = 0
+                for tipo, valor in zip(pares[0::2], pares[1::2]):
+                    if tipo == 0xC0:
+                        atributo = valor
+                self._definir_campo(posicion, atributo)
+                posicion = (posicion + 1) % self.tamano
+                i += 2 + 2 * cantidad
+            elif orden == ORD_IC:
+                self._cursor = posicion
+                i += 1
+            elif orden == ORD_PT:
+                siguiente = self._siguiente_no_protegido(posicion)
+                posicion = siguiente if siguiente is not None else 0
+                i += 1
+            elif orden == ORD_RA:
+                destino = decodificar_direccion(datos[i + 1], datos[i + 2]) % self.tamano
+                caracter = datos[i + 3]
+                i += 4
+                if caracter == ORD_GE:
+                    caracter = datos[i]
+                    i += 1
+                while True:
+                    self._poner(posicion, _EBCDIC[caracter])
+                    posicion = (posicion + 1) % self.tamano
+                    if posicion == destino:
+                        break
+            elif orden == ORD_EUA:
+                destino = decodificar_direccion(datos[i + 1], datos[i + 2]) % self.tamano
+                i += 3
+                while True:
+                    atributo = self._atributo_de(posicion)
+                    if posicion not in self._atributos and atributo is not None \
+                            and not self._atributos[atributo] & ATR_PROTEGIDO:
+                        self._buffer[posicion] = '\0'
+                    posicion = (posicion + 1) % self.tamano
+                    if posicion == destino:
+                        break
+            elif orden == ORD_SA:
+                i += 3
+            elif orden == ORD_MF:
+                i += 2 + 2 * datos[i + 1]
+            elif orden == ORD_GE:
+                self._poner(posicion, _EBCDIC[datos[i + 1]])
+                posicion = (posicion + 1) % self.tamano
+                i += 2
+            else:
+                self._poner(posicion, _EBCDIC[orden])
+                posicion = (posicion + 1) % self.tamano
+                i += 1
+
+        if wcc & WCC_RESTAURAR_TECLADO:
+            self._bloqueado = False
+
+    def _respuesta_consulta(self, datos: bytes) -> Optional[bytes]:
+        """Responde a Read Partition Query con las capacidades del modelo 2"""
+        # Campo estructurado Read Partition (0x01) con tipo Query (0x02) o Query List (0x03)
+        if len(datos) < 5 or datos[2] != 0x01 or datos[4] not in (0x02, 0x03):
+            return None
+
+        def campo(contenido: bytes) -> bytes:
+            return (len(contenido) + 2).to_bytes(2, 'big') + contenido
+
+        ancho = self.columnas.to_bytes(2, 'big')
+        alto = self.filas.to_bytes(2, 'big')
+        resumen = campo(bytes([0x81, 0x80, 0x80, 0x81, 0xA6]))
+        area_util = campo(bytes([0x81, 0x81, 0x01, 0x00]) + ancho + alto
+                          + bytes([0x00, 0x00, 0x0A, 0x02, 0xE5, 0x00, 0x02, 0x00, 0x6F, 0x09, 0x0C])
+                          + self.tamano.to_bytes(2, 'big'))
+        particion = campo(bytes([0x81, 0xA6, 0x00, 0x00, 0x0B, 0x01, 0x00]) + ancho + alto + ancho + alto)
+        return bytes([AID_CAMPO_ESTRUCTURADO]) + resumen + area_util + particion
+
+    # ------------------------------------------------------------------
+    # Campos
+    # ------------------------------------------------------------------
+
+    def _campos(self) -> List[Tuple[int, int, int]]:
+        """Devuelve (posición del atributo, inicio, longitud) de cada campo"""
+        posiciones = sorted(self._atributos)
+        campos = []
+        for indice, atributo in enumerate(posiciones):
+            siguiente = posiciones[(indice + 1) % len(posiciones)]
+            longitud = (siguiente - atributo - 1) % self.tamano
+            if len(posiciones) == 1:
+                longitud = self.tamano - 1
+            campos.append((atributo, (atributo + 1) % self.tamano, longitud))
+        return campos
+
+    def _atributo_de(self, posicion: int) -> Optional[int]:
+        """Posición del atributo que gobierna una posición del buffer"""
+        if not self._atributos:
+            return None
+        anteriores = [a for a in self._atributos if a <= posicion]
+        return max(anteriores) if anteriores else max(self._atributos)
+
+    def _campos_entrada(self) -> List[Tuple[int, int, int]]:
+        """Campos no protegidos con al menos una posición"""
+        return [(atributo, inicio, longitud) for atributo, inicio, longitud in self._campos()
+                if longitud and not self._atributos[atributo] & ATR_PROTEGIDO]
+
+    def _siguiente_no_protegido(self, posicion: int) -> Optional[int]:
+        """Inicio del siguiente campo de entrada después de la posición indicada"""
+        entradas = self._campos_entrada()
+        if not entradas:
+            return None
+        for _, inicio, _ in entradas:
+            if inicio > posicion:
+                return inicio
+        return entradas[0][1]
+
+    # ------------------------------------------------------------------
+    # Teclado (terminal -> host)
+    # ------------------------------------------------------------------
+
+    def _esperar_teclado(self):
+        """Espera a que el host desbloquee el teclado (typeahead)"""
+        limite = time.monotonic() + self.timeout
+        with self._cambio:
+            while self._bloqueado:
+                if not self._conectada:
+                    raise ConnectionError("La sesión TN3270 se cerró")
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise TimeoutError("El teclado del host sigue bloqueado")
+                self._cambio.wait(restante)
+
+    def send_keys(self, texto: str):
+        """Escribe en el campo actual con autoskip al completar cada campo"""
+        for caracter in str(texto):
+            self._esperar_teclado()
+
+            with self._cambio:
+                entradas = self._campos_entrada()
+                campo = self._campo_en(self._cursor, entradas)
+                if campo is None:
+                    siguiente = self._siguiente_no_protegido(self._cursor)
+                    if siguiente is None:
+                        raise RuntimeError("La pantalla del host no tiene campos de entrada")
+                    self._cursor = siguiente
+                    campo = self._campo_en(self._cursor, entradas)
+
+                atributo, inicio, longitud = campo
+                self._buffer[self._cursor] = caracter
+                self._atributos[atributo] |= ATR_MODIFICADO
+
+                siguiente = (self._cursor + 1) % self.tamano
+                if siguiente == (inicio + longitud) % self.tamano:
+                    # Campo completo: autoskip al siguiente campo de entrada
+                    self._cursor = self._siguiente_no_protegido(self._cursor)
+                else:
+                    self._cursor = siguiente
+
+    def _campo_en(self, posicion: int,
+                  entradas: List[Tuple[int, int, int]]) -> Optional[Tuple[int, int, int]]:
+        """Campo de entrada que contiene la posición, si existe"""
+        for atributo, inicio, longitud in entradas:
+            if (posicion - inicio) % self.tamano < longitud:
+                return atributo, inicio, longitud
+        return None
+
+    def send_tab(self):
+        """Mueve el cursor al inicio del siguiente campo de entrada"""
+        self._esperar_teclado()
+        with self._cambio:
+            entradas = self._campos_entrada()
+            campo = self._campo_en(self._cursor, entradas)
+            desde = (campo[1] + campo[2] - 1) % self.tamano if campo else self._cursor
+            siguiente = self._siguiente_no_protegido(desde)
+            if siguiente is not None:
+                self._cursor = siguiente
+
+    def send_aid(self, tecla: str):
+        """Envía la tecla AID con el cursor y los campos modificados"""
+        codigo = AIDS.get(tecla.lower())
+        if codigo is None:
+            raise ValueError(f"Tecla AID no soportada: {tecla}")
+
+        self._esperar_teclado()
+        with self._cambio:
+            if codigo in AIDS_SIN_DATOS:
+                registro = bytes([codigo])
+            else:
+                registro = self._leer_modificados(codigo)
+            self._bloqueado = True
+            if tecla.lower() == 'clear':
+                self._borrar()
+
+        self._enviar(empaquetar_registro(registro))
+
+    def _leer_modificados(self, aid: int) -> bytes:
+        """Arma la respuesta Read Modified: AID, cursor y campos con MDT"""
+        registro = bytearray([aid]) + codificar_direccion(self._cursor)
+        for atributo, inicio, longitud in self._campos():
+            if self._atributos[atributo] & ATR_MODIFICADO:
+                texto = ''.join(self._buffer[(inicio + k) % self.tamano] for k in range(longitud))
+                registro += bytes([ORD_SBA]) + codificar_direccion(inicio)
+                registro += a_ebcdic(texto.replace('\0', ''))
+        return bytes(registro)
+
+    def _leer_buffer(self) -> bytes:
+        """Arma la respuesta Read Buffer con todo el contenido de la pantalla"""
+        registro = bytearray([AID_NINGUNO]) + codificar_direccion(self._cursor)
+        for posicion in range(self.tamano):
+            if posicion in self._atributos:
+                registro += bytes([ORD_SF, codificar_atributo(self._atributos[posicion])])
+            else:
+                registro += a_ebcdic(self._buffer[posicion]) if self._buffer[posicion] != '\0' else b'\x00'
+        return bytes(registro)
+
+    # ------------------------------------------------------------------
+    # Pantalla
+    # ------------------------------------------------------------------
+
+    def _lineas(self) -> List[str]:
+        """Texto visible del buffer; atributos y campos no visibles como espacios"""
+        caracteres = []
+        atributo = self._atributos[max(self._atributos)] if self._atributos else 0
+        for posicion, caracter in enumerate(self._buffer):
+            if posicion in self._atributos:
+                atributo = self._atributos[posicion]
+                caracteres.append(' ')
+            elif caracter == '\0' or atributo & ATR_NO_VISIBLE == ATR_NO_VISIBLE:
+                caracteres.append(' ')
+            else:
+                caracteres.append(caracter)
+        texto = ''.join(caracteres)
+        return [texto[i:i + self.columnas] for i in range(0, self.tamano, self.columnas)]
+
+    def read_screen(self) -> List[str]:
+        with self._cambio:
+            return self._lineas()
+
+    def wait_for(self, condicion: CondicionPantalla, timeout: float,
+                 sondeo: float = 0.1,
+                 cancelar: Optional[Callable[[], bool]] = None) -> List[str]:
+        """Espera por notificación del hilo lector en lugar de sondear"""
+        limite = time.monotonic() + timeout
+        with self._cambio:
+            while True:
+                lineas = self._lineas()
+                if not self._bloqueado and condicion(lineas):
+                    return lineas
+                if cancelar is not None and cancelar():
+                    return lineas
+                if not self._conectada:
+                    raise ConnectionError("La sesión TN3270 se cerró")
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self.logger.warning(f"La pantalla no respondió en {timeout:.1f} s")
+                    return lineas
+                self._cambio.wait(min(restante, sondeo))
@@ -6,10 +6,24 @@ Permite configurar rutas de archivos y enlaces
 import customtkinter
 from tkinter import filedialog, messagebox
 import os
-from typing import Optional
+import queue
+import threading
+import time
+import zipfile
+from typing import Optional, Tuple
 
 from src.utils.logger import LoggerMixin
 from src.utils.config_manager import ConfigManager
+from src.core.lectura_xlsx import comparar_cabecera
+
+# Hoja y cabecera de cada plantilla
+CABECERAS_ESPERADAS = {
+    "CCE": ("CCE", ["ID", "Memorandum", "Cuenta", "Beneficiario", "CCI", "Monto", "IB", "BN", "COMENTARIO", "MENSAJE_EMULADOR"]),
+    "CTA_CTES": ("Corriente", ["ID", "Memorandum", "Cta_cargo", "Cta_abono", "Monto", "Glosa", "Comision", "ITF", "Observacion", "Mensaje_cargo", "Mensaje_abono"]),
+    "AHORROS": ("Ahorros", ["ID", "Memo", "Cuenta_cargo", "Beneficiario", "Cuenta_abono", "Monto", "ITF", "Msj_abono", "Beneficiario_final", "Secuencia", "Estado"]),
+    "Cargo": ("Cargo", ["Id", "COD", "Cuenta", "Importe", "Memorandum", "Motivo", "Glosa1", "Glosa2", "Glosa3", "Mensaje_emulacion", "Observacion"]),
+    "LBTR": ("LBTR", ["ID", "Cuenta_cargo", "OBS_1", "OBS_2", "Beneficiario", "CCI", "Entidad_Financiera", "Importe", "RUC", "DOMICILIO", "ESTADO"])
+}
 
 
 class ConfigWindow(customtkinter.CTkToplevel, LoggerMixin):
@@ -119,13 +133,13 @@ class ConfigWindow(customtkinter.CTkToplevel, LoggerMixin):
             self.entry_ruta_archivo.configure(state="readonly")
         
         # Botón para cambiar archivo
-        btn_change_file = customtkinter.CTkButton(
+        self.btn_change_file = customtkinter.CTkButton(
             self.main_frame,
             text="Cambiar",
             width=80,
             command=self._change_origin_file
         )
-        btn_change_file.grid(row=2, column=1, padx=(10, 10), pady=5)
+        self.btn_change_file.grid(row=2, column=1, padx=(10, 10), pady=5)
     
     def _create_destination_section(self):
         """Crea la sección de configuración de ruta de destino"""
@@ -248,27 +262,66 @@ class ConfigWindow(customtkinter.CTkToplevel, LoggerMixin):
             )
             
             if nueva_ruta:
-                # Validar archivo
-                if self._validate_excel_file(nueva_ruta):
-                    # Actualizar configuración
-                    if self.config_manager.modificar_json(self.tipo_operacion, nueva_ruta):
-                        # Actualizar interfaz
-                        self.entry_ruta_archivo.configure(state="normal")
-                        self.entry_ruta_archivo.delete(0, "end")
-                        self.entry_ruta_archivo.insert(0, nueva_ruta)
-                        self.entry_ruta_archivo.xview_moveto(1.0)
-                        self.entry_ruta_archivo.configure(state="readonly")
-                        
-                        # Actualizar ruta de destino automáticamente
-                        directorio = os.path.dirname(nueva_ruta)
-                        self._update_destination_path(directorio)
-                        
-                        self.logger.info(f"Archivo de origen actualizado: {nueva_ruta}")
+                # Validar sin bloquear la ventana; Tk solo se toca desde su propio hilo,
+                # que sondea la cola hasta recibir el resultado
+                self.btn_change_file.configure(state="disabled", text="Validando...")
+                resultados: queue.Queue = queue.Queue(maxsize=1)
+                
+                threading.Thread(
+                    target=lambda: resultados.put(self._validate_excel_file(nueva_ruta)),
+                    name="validar-plantilla", daemon=True
+                ).start()
+                self._esperar_validacion(nueva_ruta, resultados)
                         
         except Exception as e:
             self.logger.error(f"Error cambiando archivo de origen: {e}")
             messagebox.showerror("Error", f"Error al cambiar archivo: {e}")
     
+    def _esperar_validacion(self, nueva_ruta: str, resultados: queue.Queue):
+        """Revisa desde el hilo de Tk si terminó la validación de la plantilla"""
+        try:
+            resultado = resultados.get_nowait()
+        except queue.Empty:
+            self.after(100, lambda: self._esperar_validacion(nueva_ruta, resultados))
+            return
+        self._finish_origin_change(nueva_ruta, resultado)
+    
+    def _finish_origin_change(self, nueva_ruta: str, resultado: Tuple[bool, str, str]):
+        """
+        Muestra el resultado de la validación y aplica el nuevo archivo si es válido
+        
+        Args:
+            nueva_ruta: Archivo seleccionado
+            resultado: (válido, tipo de mensaje o "" si no hay, mensaje)
+        """
+        try:
+            self.btn_change_file.configure(state="normal", text="Cambiar")
+            valido, tipo_mensaje, mensaje = resultado
+            if tipo_mensaje == "error":
+                messagebox.showerror("Error", mensaje)
+            elif tipo_mensaje == "warning":
+                messagebox.showwarning("Advertencia", mensaje)
+            
+            if valido:
+                # Actualizar configuración
+                if self.config_manager.modificar_json(self.tipo_operacion, nueva_ruta):
+                    # Actualizar interfaz
+                    self.entry_ruta_archivo.configure(state="normal")
+                    self.entry_ruta_archivo.delete(0, "end")
+                    self.entry_ruta_archivo.insert(0, nueva_ruta)
+                    self.entry_ruta_archivo.xview_moveto(1.0)
+                    self.entry_ruta_archivo.configure(state="readonly")
+                    
+                    # Actualizar ruta de destino automáticamente
+                    directorio = os.path.dirname(nueva_ruta)
+                    self._update_destination_path(directorio)
+                    
+                    self.logger.info(f"Archivo de origen actualizado: {nueva_ruta}")
+                    
+        except Exception as e:
+            self.logger.error(f"Error cambiando archivo de origen: {e}")
+            messagebox.showerror("Error", f"Error al cambiar archivo: {e}")
+    
     def _change_destination_folder(self):
         """Cambia la carpeta de destino"""
         try:
@@ -315,72 +368,60 @@ class ConfigWindow(customtkinter.CTkToplevel, LoggerMixin):
             self.logger.error(f"Error guardando enlace LBTR: {e}")
             messagebox.showerror("Error", f"Error al guardar enlace: {e}")
     
-    def _validate_excel_file(self, ruta_archivo: str) -> bool:
+    def _validate_excel_file(self, ruta_archivo: str) -> Tuple[bool, str, str]:
         """
         Valida que el archivo Excel tenga el formato correcto
         
+        Lee la lista de hojas y la fila 1 directamente del paquete xlsx/xlsm,
+        sin iniciar Excel; se llama fuera del hilo de la interfaz y no
+        muestra mensajes.
+        
         Args:
             ruta_archivo: Ruta del archivo a validar
         
         Returns:
-            True si es válido
+            (válido, "error"/"warning" o "" si no hay nada que avisar, mensaje)
         """
         try:
-            import xlwings as xw
+            inicio = time.perf_counter()
             
             # Validar que el archivo existe
             if not os.path.exists(ruta_archivo):
-                messagebox.showerror("Error", "El archivo seleccionado no existe")
-                return False
+                return False, "error", "El archivo seleccionado no existe"
             
-            # Validar formato específico según tipo de operación
-            cabeceras_esperadas = {
-                "CCE": ("CCE", ["ID", "Memorandum", "Cuenta", "Beneficiario", "CCI", "Monto", "IB", "BN", "COMENTARIO", "MENSAJE_EMULADOR"]),
-                "CTA_CTES": ("Corriente", ["ID", "Memorandum", "Cta_cargo", "Cta_abono", "Monto", "Glosa", "Comision", "ITF", "Observacion", "Mensaje_cargo", "Mensaje_abono"]),
-                "AHORROS": ("Ahorros", ["ID", "Memo", "Cuenta_cargo", "Beneficiario", "Cuenta_abono", "Monto", "ITF", "Msj_abono", "Beneficiario_final", "Secuencia", "Estado"]),
-                "Cargo": ("Cargo", ["Id", "COD", "Cuenta", "Importe", "Memorandum", "Motivo", "Glosa1", "Glosa2", "Glosa3", "Mensaje_emulacion", "Observacion"]),
-                "LBTR": ("LBTR", ["ID", "Cuenta_cargo", "OBS_1", "OBS_2", "Beneficiario", "CCI", "Entidad_Financiera", "Importe", "RUC", "DOMICILIO", "ESTADO"])
-            }
-            
-            if self.tipo_operacion not in cabeceras_esperadas:
+            if self.tipo_operacion not in CABECERAS_ESPERADAS:
                 # No validar tipos no definidos
-                return True
+                return True, "", ""
             
-            hoja_esperada, cabecera_esperada = cabeceras_esperadas[self.tipo_operacion]
+            hoja_esperada, cabecera_esperada = CABECERAS_ESPERADAS[self.tipo_operacion]
             
-            # Abrir archivo para validación
-            app = xw.App(visible=False)
             try:
-                book = app.books.open(ruta_archivo)
-                
-                # Verificar que existe la hoja
-                if hoja_esperada not in [sheet.name for sheet in book.sheets]:
-                    messagebox.showerror("Error", f"La hoja '{hoja_esperada}' no está presente en el archivo")
-                    return False
-                
-                sheet = book.sheets[hoja_esperada]
-                
-                # Obtener primera fila
-                primera_fila = sheet.range("1:1").options(ndim=1, expand='right').value[:len(cabecera_esperada)]
-                
-                # Verificar cabecera
-                if primera_fila != cabecera_esperada:
-                    messagebox.showwarning(
-                        "Advertencia",
-                        f"La cabecera del archivo no coincide exactamente con el formato esperado.\n"
-                        f"El archivo podría funcionar, pero se recomienda verificar el formato."
-                    )
-                
-                book.close()
-                return True
-                
-            finally:
-                app.quit()
+                comparacion = comparar_cabecera(ruta_archivo, hoja_esperada, cabecera_esperada)
+            except zipfile.BadZipFile:
+                return False, "error", "El archivo no es un libro de Excel .xlsx o .xlsm"
+            
+            self.logger.info(
+                f"Plantilla {os.path.basename(ruta_archivo)} validada en "
+                f"{(time.perf_counter() - inicio) * 1000:.0f} ms"
+            )
+            
+            # Verificar que existe la hoja
+            if not comparacion.hoja_presente:
+                return False, "error", comparacion.detalle()
+            
+            # Verificar cabecera
+            if not comparacion.coincide:
+                return True, "warning", (
+                    f"La cabecera del archivo no coincide exactamente con el formato esperado.\n"
+                    f"{comparacion.detalle()}\n\n"
+                    f"El archivo podría funcionar, pero se recomienda verificar el formato."
+                )
+            
+            return True, "", ""
                 
         except Exception as e:
             self.logger.error(f"Error validando archivo Excel: {e}")
-            messagebox.showerror("Error", f"Error validando archivo: {e}")
-            return False
+            return False, "error", f"Error validando archivo: {e}"
     
     def _apply_changes(self):
         """Aplica cambios pendientes"""
@@ -35,6 +35,7 @@ class ExcelProcessor(customtkinter.CTkToplevel, LoggerMixin):
         # Variables de control
         self.memo_xlc = ""
         self.check_limpiar = None
+        self.check_repartir = None
         self.ent_nro_memo = None
         self.ent_nro_cuenta = None
         self.ent_year_memo = None
@@ -153,6 +154,13 @@ class ExcelProcessor(customtkinter.CTkToplevel, LoggerMixin):
         )
         self.check_limpiar.grid(row=6, column=1, sticky="e", padx=5)
         
+        # Checkbox repartir el memo en todos los templates
+        self.check_repartir = customtkinter.CTkCheckBox(
+            self.main_frame,
+            text="Todas las\nplantillas"
+        )
+        self.check_repartir.grid(row=6, column=2, sticky="e", padx=5)
+        
         # Botón iniciar
         self.btn_iniciar_limpia = customtkinter.CTkButton(
             self.main_frame,
@@ -245,6 +253,13 @@ class ExcelProcessor(customtkinter.CTkToplevel, LoggerMixin):
         )
         self.check_limpiar.grid(row=6, column=3, sticky="e", padx=5, pady=3)
         
+        # Checkbox repartir el memo en todos los templates
+        self.check_repartir = customtkinter.CTkCheckBox(
+            self.main_frame,
+            text="Todas las\nplantillas"
+        )
+        self.check_repartir.grid(row=5, column=3, sticky="e", padx=5, pady=3)
+        
         # Posición del memorándum (específico para LBTR)
         posicion_label = customtkinter.CTkLabel(
             self.main_frame,
@@ -410,7 +425,10 @@ class ExcelProcessor(customtkinter.CTkToplevel, LoggerMixin):
             limpiar = self.check_limpiar.get() == 1
             
             # Procesar según tipo de operación
-            if self.tipo_operacion == "CCE":
+            if self.check_repartir.get() == 1:
+                resultado = self._repartir_memo(memo, year, nro_cuenta, limpiar)
+                
+            elif self.tipo_operacion == "CCE":
                 from src.operations.cce_operations import CCEOperations
                 conca_memo = f'{memo}-{year}'
                 resultado = CCEOperations.leer_xlc(self.memo_xlc, conca_memo, nro_cuenta, limpiar)
@@ -455,6 +473,52 @@ class ExcelProcessor(customtkinter.CTkToplevel, LoggerMixin):
             if hasattr(self, 'btn_iniciar_limpia'):
                 self.btn_iniciar_limpia.configure(state="normal")
     
+    def _repartir_memo(self, memo: str, year: str, nro_cuenta: str, limpiar: bool) -> bool:
+        """
+        Lee el memo una sola vez y carga sus líneas en todos los templates que correspondan
+        
+        Returns:
+            True si se repartió el memo
+        """
+        from src.core.backend_libros import backend_libros
+        from src.core.cache_memos import CacheMemos
+        from src.core.ingesta_memo import DESTINOS, SIN_DESTINO, repartir_memo
+        
+        nombres = {"CCE": "CCE", "AHORROS": "Ahorros", "CTA_CTES": "Cuentas corrientes", "LBTR": "LBTR"}
+        rutas = {operacion: self.config_manager.leer_json(operacion)[0] for operacion in DESTINOS}
+        
+        # LBTR solo se carga con glosa (ventana de LBTR)
+        glosa = None
+        if self.combobox is not None and self.combobox.get() != "--SELECCIONE O ESCRIBA--":
+            glosa = self.combobox.get()
+        
+        try:
+            reparto = repartir_memo(
+                self.memo_xlc, rutas, memo, year, nro_cuenta,
+                self.radio_var.get(), glosa, limpiar,
+                CacheMemos.desde_config(self.config_manager.get_memo_cache()),
+                backend_libros(self.config_manager.get_excel_writes()["backend"])
+            )
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return False
+        
+        lineas = []
+        for operacion, nombre in nombres.items():
+            if reparto[operacion] is not None:
+                lineas.append(f"{nombre}: {reparto[operacion]}")
+            elif operacion == "LBTR" and not glosa:
+                lineas.append(f"{nombre}: no cargado (requiere glosa)")
+            else:
+                lineas.append(f"{nombre}: no cargado (sin template)")
+        lineas.append(f"Sin destino: {reparto[SIN_DESTINO]}")
+        if reparto["hojas_omitidas"]:
+            lineas.append("Algunas hojas se omitieron")
+        
+        self.logger.info(f"Memo repartido: {reparto}")
+        messagebox.showinfo("Memo repartido", "\n".join(lineas))
+        return True
+    
     def _disable_parent_buttons(self):
         """Deshabilita botones en la ventana padre"""
         try:
@@ -18,6 +18,7 @@ import traceback
 
 from src.utils.config_manager import ConfigManager
 from src.utils.logger import LoggerMixin
+from src.core.backend_libros import backend_libros
 from src.interface.config_window import ConfigWindow
 from src.interface.excel_processor import ExcelProcessor
 from src.interface.operation_validator import OperationValidator
@@ -71,6 +72,11 @@ class FideRappiApp(customtkinter.CTk, LoggerMixin):
         self.select_frame_by_name("CCE")
         self.button_frame_cce()
         
+        # Dejar Excel iniciado para la primera operación
+        escritura = self.config_manager.get_excel_writes()
+        if escritura["warm_excel"]:
+            backend_libros(escritura["backend"]).precalentar()
+        
         self.logger.info("Ventana principal inicializada correctamente")
     
     def _get_resource_path(self, relative_path: str) -> str:
@@ -10,6 +10,8 @@ from tkinter import messagebox, filedialog
 import os
 from typing import Optional, List
 
+from src.host.session import HostSession
+from src.host.tn3270 import TN3270HostSession
 from src.utils.logger import LoggerMixin
 from src.utils.config_manager import ConfigManager
 
@@ -17,6 +19,9 @@ from src.utils.config_manager import ConfigManager
 class OperationValidator(LoggerMixin):
     """Clase para validar y ejecutar operaciones en el host bancario"""
     
+    # Métodos que aceptan una lista de sesiones y procesan filas en paralelo
+    METODOS_PARALELOS = ('execute_cce', 'execute_ahorros')
+    
     def __init__(self, tipo_operacion: str):
         """
         Inicializa el validador de operaciones
@@ -79,6 +84,26 @@ class OperationValidator(LoggerMixin):
         try:
             self.cargo_activo = es_cargo
             
+            # Sesión TN3270 directa: no hay ventanas que buscar
+            config_sesion = self.config_manager.get_host_session()
+            if config_sesion["backend"] == "tn3270":
+                sesiones = []
+                try:
+                    for _ in range(max(1, int(config_sesion["sessions"]))):
+                        sesion = TN3270HostSession(
+                            config_sesion["host"],
+                            int(config_sesion["port"]),
+                            tipo_terminal=config_sesion["terminal_type"],
+                            timeout=float(config_sesion["timeout"])
+                        )
+                        sesiones.append(sesion)
+                        sesion.connect()
+                except Exception:
+                    self._cerrar_sesiones(sesiones)
+                    raise
+                self.logger.info(f"Abiertas {len(sesiones)} sesiones TN3270")
+                return self._validar_ventana(sesiones if len(sesiones) > 1 else sesiones[0])
+            
             # Buscar ventanas de producción
             self.ventanas = pyautogui.getWindowsWithTitle("prod")
             self.cant_ventanas = len(self.ventanas)
@@ -197,22 +222,28 @@ class OperationValidator(LoggerMixin):
         Valida una ventana específica y ejecuta la operación
         
         Args:
-            ventana: Ventana a validar
+            ventana: Ventana a validar, sesión TN3270 ya conectada o lista de sesiones
         
         Returns:
             True si se validó y ejecutó correctamente
         """
         try:
-            # Activar y maximizar ventana
-            ventana.maximize()
-            ventana.activate()
-            pyautogui.sleep(0.5)
-            
-            # Copiar contenido del menú
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.3)
-            contenido_menu = pyperclip.paste()
-            lineas_menu = contenido_menu.splitlines()
+            if isinstance(ventana, list):
+                # Varias sesiones: el menú se valida en la primera
+                lineas_menu = ventana[0].read_screen()
+            elif isinstance(ventana, HostSession):
+                lineas_menu = ventana.read_screen()
+            else:
+                # Activar y maximizar ventana
+                ventana.maximize()
+                ventana.activate()
+                pyautogui.sleep(0.5)
+                
+                # Copiar contenido del menú
+                pyautogui.hotkey('ctrl', 'c')
+                pyautogui.sleep(0.3)
+                contenido_menu = pyperclip.paste()
+                lineas_menu = contenido_menu.splitlines()
             
             self.logger.info(f"Validando ventana para {self.tipo_operacion}")
             
@@ -238,14 +269,27 @@ class OperationValidator(LoggerMixin):
             if not codigo_encontrado:
                 raise ValueError(f"No se encuentra el código {codigo_buscar} en la ventana")
             
-            # Importar y ejecutar operación
-            return self._ejecutar_operacion(config_operacion, metodo_ejecutar, ventana)
+            # Importar y ejecutar operación; si arrancó, su hilo cierra las sesiones
+            if self._ejecutar_operacion(config_operacion, metodo_ejecutar, ventana):
+                return True
+            self._cerrar_sesiones(ventana)
+            return False
             
         except Exception as e:
             self.logger.error(f"Error validando ventana: {e}")
             messagebox.showerror("ERROR", f'Error en la verificación de ventanas: {e}')
+            self._cerrar_sesiones(ventana)
             return False
     
+    def _cerrar_sesiones(self, ventana):
+        """Cierra las sesiones con el host (TN3270); las ventanas del emulador quedan abiertas"""
+        for sesion in ventana if isinstance(ventana, list) else [ventana]:
+            if isinstance(sesion, HostSession):
+                try:
+                    sesion.close()
+                except Exception as e:
+                    self.logger.warning(f"Error cerrando sesión con el host: {e}")
+    
     def _ejecutar_operacion(self, config_operacion: dict, metodo_ejecutar: str, ventana) -> bool:
         """
         Ejecuta la operación correspondiente
@@ -283,6 +327,12 @@ class OperationValidator(LoggerMixin):
             # Obtener método a ejecutar
             metodo = getattr(operacion, metodo_ejecutar)
             
+            # Solo los abonos reparten filas entre varias sesiones
+            if isinstance(ventana, list) and metodo_ejecutar not in self.METODOS_PARALELOS:
+                for sesion in ventana[1:]:
+                    sesion.close()
+                ventana = ventana[0]
+            
             # Configurar argumentos según el tipo de operación
             if self.cargo_activo and "cargo" in metodo_ejecutar:
                 # Para operaciones de cargo, solicitar archivo
@@ -360,11 +410,14 @@ class OperationValidator(LoggerMixin):
                 hilo_botones = threading.Thread(target=operacion.detectar_botones)
                 hilos.append(hilo_botones)
             
-            # Hilo para la operación principal
-            if args:
-                hilo_operacion = threading.Thread(target=metodo, args=(ventana, *args))
-            else:
-                hilo_operacion = threading.Thread(target=metodo, args=(ventana,))
+            # Hilo para la operación principal; al terminar, como sea, cierra las sesiones
+            def ejecutar():
+                try:
+                    metodo(ventana, *args)
+                finally:
+                    self._cerrar_sesiones(ventana)
+            
+            hilo_operacion = threading.Thread(target=ejecutar)
             hilos.append(hilo_operacion)
             
             # Iniciar hilos
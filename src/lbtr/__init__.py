@@ -0,0 +1,10 @@
+# src/lbtr/__init__.py
+"""
+Acceso al sistema web LBTR
+Cliente directo de la API y simulador local de la aplicación
+"""
+
+from src.lbtr.api import ClienteAPILBTR
+from src.lbtr.simulador import ServidorLBTRSimulado
+
+__all__ = ['ClienteAPILBTR', 'ServidorLBTRSimulado']
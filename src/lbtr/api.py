@@ -0,0 +1,188 @@
+"""
+Cliente HTTP de la API de LBTR
+La aplicación web de LBTR es una página única: cada "Guardar" termina en un
+POST a su backend. Este cliente inicia sesión una vez y envía las
+transferencias directo a esos servicios, sin navegador, con conexiones
+HTTP/1.1 persistentes reutilizadas entre pedidos y un máximo de pedidos en
+curso a la vez
+"""
+
+import http.client
+import json
+import queue
+import ssl
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.core.diario_ejecucion import TransaccionEnDuda
+from src.utils.logger import LoggerMixin
+
+# Una conexión sin usar por más tiempo que esto se descarta antes de enviar:
+# el servidor puede haberla cerrado y un POST de transferencia no se reintenta
+SEGUNDOS_INACTIVIDAD = 4.0
+
+
+class ClienteAPILBTR(LoggerMixin):
+    """Sesión con la API de LBTR sobre un pool de conexiones HTTP/1.1"""
+
+    # Varios hilos pueden compartir el cliente (EjecutorParalelo)
+    concurrente = True
+
+    def __init__(self, enlace: str, rutas: Dict[str, str], conexiones: int = 4,
+                 timeout: float = 30.0, base: str = ""):
+        """
+        Args:
+            enlace: URL de login de la aplicación (lbtr_details.link)
+            rutas: Servicios 'login', 'transfer' y 'logout', relativos a la base
+            conexiones: Pedidos en curso a la vez (y conexiones abiertas como máximo)
+            timeout: Segundos máximos de cada pedido
+            base: URL base de la API; vacía usa la de la aplicación (enlace sin el #/login)
+        """
+        partes = urlsplit(base or enlace)
+        self._https = partes.scheme == "https"
+        self._servidor = partes.hostname
+        self._puerto = partes.port
+        self._raiz = partes.path if partes.path.endswith("/") else partes.path + "/"
+        self.rutas = dict(rutas)
+        self.conexiones = max(1, int(conexiones))
+        self.timeout = timeout
+
+        self._libres: queue.LifoQueue = queue.LifoQueue()
+        self._cupo = threading.BoundedSemaphore(self.conexiones)
+        self._bloqueo = threading.Lock()
+        self._token: Optional[str] = None
+        self._credenciales: Optional[Tuple[str, str]] = None
+
+        self.estadisticas = {'pedidos': 0, 'conexiones': 0, 'renovaciones': 0}
+
+    def iniciar_sesion(self, usuario: str, clave: str):
+        """
+        Raises:
+            RuntimeError: Usuario o clave incorrectos
+            ConnectionError: La API no respondió como se esperaba (no existe, caída, etc.)
+        """
+        estado, respuesta = self._pedir("POST", "login", {"usuario": usuario, "clave": clave},
+                                        reintentar=True, token=None)
+        # Solo el servicio de login responde el 401 con su mensaje en JSON; un
+        # 401 de otra ruta o de un proxy no dice nada de las credenciales
+        if estado == 401 and respuesta is not None and "mensaje" in respuesta:
+            raise RuntimeError("Usuario y/o clave incorrectos.")
+        if estado != 200 or not respuesta or not respuesta.get("token"):
+            raise ConnectionError(f"LBTR respondió {estado} al login: {(respuesta or {}).get('mensaje', '')}")
+        self._token = respuesta["token"]
+        self._credenciales = (usuario, clave)
+
+    def transferir(self, datos: Dict[str, str]) -> Tuple[bool, str]:
+        """
+        Registra una transferencia interbancaria
+
+        Una sesión vencida (401) se renueva y el pedido se repite: LBTR no lo
+        procesó. Cualquier otra falla de conexión se propaga sin reintentar,
+        porque la transferencia pudo haberse registrado.
+
+        Args:
+            datos: Campos del formulario de nueva transferencia
+
+        Returns:
+            (exito, mensaje de LBTR como lo muestra el modal)
+
+        Raises:
+            TransaccionEnDuda: LBTR respondió 200 sin indicar si la registró
+        """
+        token = self._token
+        estado, respuesta = self._pedir("POST", "transfer", datos, token=token)
+        if estado == 401:
+            self._renovar(token)
+            estado, respuesta = self._pedir("POST", "transfer", datos, token=self._token)
+        if estado != 200:
+            return False, (respuesta or {}).get("mensaje") or f"Error: LBTR respondió {estado}"
+        if respuesta is None or not isinstance(respuesta.get("exito"), bool):
+            raise TransaccionEnDuda("VERIFICAR EN LBTR: respuesta sin resultado de la transferencia")
+        return respuesta["exito"], str(respuesta.get("mensaje", ""))
+
+    def cerrar(self):
+        """Cierra la sesión en LBTR y las conexiones abiertas"""
+        if self._token is not None:
+            try:
+                self._pedir("POST", "logout", {}, reintentar=True, token=self._token)
+            except (OSError, http.client.HTTPException):
+                pass
+            self._token = None
+        while True:
+            try:
+                conexion, _ = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            conexion.close()
+
+    def _renovar(self, vencido: Optional[str]):
+        """Inicia sesión de nuevo una sola vez aunque varios hilos vean el 401"""
+        with self._bloqueo:
+            if self._token == vencido:
+                self.logger.info("La sesión de la API de LBTR venció; se inicia de nuevo")
+                self.estadisticas['renovaciones'] += 1
+                self.iniciar_sesion(*self._credenciales)
+
+    def _pedir(self, metodo: str, servicio: str, datos: Optional[dict],
+               reintentar: bool = False, token: Optional[str] = None) -> Tuple[int, Optional[dict]]:
+        """
+        Envía un pedido JSON por una conexión del pool
+
+        Args:
+            reintentar: Repetir una vez con conexión nueva si la reutilizada
+                estaba cerrada; solo para pedidos que se pueden repetir
+            token: Sesión con la que se envía; quien recibe un 401 renueva
+                justo esa y no una que otro hilo ya renovó
+
+        Returns:
+            (código HTTP, cuerpo JSON); None si el cuerpo no es un objeto JSON
+        """
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8") if datos is not None else None
+        cabeceras = {"Content-Type": "application/json; charset=utf-8", "Accept": "application/json"}
+        if token:
+            cabeceras["Authorization"] = f"Bearer {token}"
+        ruta = self._raiz + self.rutas[servicio]
+
+        with self._cupo:
+            for intento in range(2 if reintentar else 1):
+                conexion, reutilizada = self._tomar()
+                try:
+                    conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+                    respuesta = conexion.getresponse()
+                    contenido = respuesta.read()
+                except (OSError, http.client.HTTPException):
+                    conexion.close()
+                    if intento or not (reintentar and reutilizada):
+                        raise
+                    continue
+                self.estadisticas['pedidos'] += 1
+                if respuesta.will_close:
+                    conexion.close()
+                else:
+                    self._libres.put((conexion, time.monotonic()))
+                try:
+                    cuerpo_json = json.loads(contenido) if contenido else None
+                except ValueError:
+                    cuerpo_json = None
+                return respuesta.status, cuerpo_json if isinstance(cuerpo_json, dict) else None
+
+    def _tomar(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Conexión libre más reciente, o una nueva: (conexión, reutilizada)"""
+        while True:
+            try:
+                conexion, ultimo_uso = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - ultimo_uso < SEGUNDOS_INACTIVIDAD:
+                return conexion, True
+            conexion.close()
+
+        self.estadisticas['conexiones'] += 1
+        if self._https:
+            # Igual que el navegador (--ignore-certificate-errors): el
+            # certificado del servidor interno no es de una CA pública
+            return http.client.HTTPSConnection(self._servidor, self._puerto, timeout=self.timeout,
+                                               context=ssl._create_unverified_context()), False
+        return http.client.HTTPConnection(self._servidor, self._puerto, timeout=self.timeout), False
@@ -0,0 +1,484 @@
+"""
+Simulador local de la aplicación web LBTR
+Sirve una página con los mismos elementos que recorre LBTROperations (login,
+menú dropdownMenu3, formulario de nueva transferencia interbancaria y modal
+mdlMensajeInterbancaria) y la API JSON que la página usa detrás, con
+latencia configurable, inyección de errores y vencimiento de sesión, sin
+necesidad del servidor LBTR del banco
+"""
+
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.logger import LoggerMixin
+
+RUTA_APLICACION = "/LBTR-web/"
+RUTA_API = RUTA_APLICACION + "api/"
+
+MSG_LOGIN_INCORRECTO = "Usuario y/o Contraseña incorrecta"
+MSG_TRANSFERENCIA_OK = "La operación se realizó satisfactoriamente"
+MSG_SESION_VENCIDA = "La sesión ha expirado. Ingrese nuevamente"
+
+_PAGINA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>LBTR - Simulador</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+.oculto { display: none !important; }
+nav { background: #003b70; padding: 6px; }
+nav button { color: #fff; background: none; border: 0; padding: 6px 12px; }
+.menu { position: relative; display: inline-block; }
+.menu .desplegable { display: none; position: absolute; margin: 0; padding: 0; background: #fff;
+                     border: 1px solid #999; min-width: 220px; z-index: 10; }
+.menu:hover .desplegable { display: block; }
+.desplegable li { position: relative; list-style: none; padding: 6px; }
+.desplegable .sub { display: none; position: absolute; left: 100%; top: 0; margin: 0; padding: 0;
+                    background: #fff; border: 1px solid #999; min-width: 120px; }
+.desplegable li:hover .sub { display: block; }
+form div { margin: 4px; }
+#mdlMensajeInterbancaria { position: fixed; top: 20%; left: 30%; width: 40%; background: #fff;
+                           border: 1px solid #333; padding: 10px; z-index: 20; }
+</style>
+</head>
+<body>
+<div id="principal-login" class="oculto">
+  <div><h3>LBTR - Sistema de Liquidación Bruta en Tiempo Real</h3></div>
+  <div>
+    <div>
+      <form id="frmLogin" onsubmit="return false;">
+        <div>
+          <div><label>Usuario</label></div>
+          <div><input type="text" name="user" autocomplete="off"></div>
+          <div><label>Contraseña</label></div>
+          <div><input type="password" name="password"></div>
+          <div><button type="button" id="btnSave">Ingresar</button></div>
+          <div id="msgLogin"></div>
+        </div>
+      </form>
+    </div>
+  </div>
+</div>
+<div id="principal-app" class="oculto">
+  <nav>
+    <div class="menu">
+      <button type="button" id="dropdownMenu3">Operaciones</button>
+      <ul class="desplegable">
+        <li><a href="javascript:void(0)">Transferencia interbancaria</a>
+          <ul class="sub">
+            <li><a id="lnkNuevaInterbancaria" href="#/interbancaria/nuevo">Nuevo</a></li>
+          </ul>
+        </li>
+        <li><a href="javascript:void(0)">Consultas</a></li>
+      </ul>
+    </div>
+  </nav>
+  <div id="vistaInicio"><p>Bienvenido</p></div>
+  <form id="frmInterbancaria" class="oculto" onsubmit="return false;">
+    <div><label>Concepto</label> <select id="selConcepto" disabled></select></div>
+    <div><label>Entidad</label> <select id="selEntidad" disabled></select></div>
+    <div><label>Monto</label> <input type="text" name="monto"></div>
+    <div><label>Observación</label> <input type="text" name="observacion"></div>
+    <div><label>Observación ITF</label> <input type="text" name="observacionITF"></div>
+    <div><label>Cuenta beneficiario (CCI)</label> <input type="text" name="numCuentaBen"></div>
+    <div><label>Nombre beneficiario</label> <input type="text" name="nombreBen"></div>
+    <div><label>Tipo de documento</label> <select id="selTipoDocBen" disabled></select></div>
+    <div><label>Dirección</label> <input type="text" name="direccionBen"></div>
+    <div><label>Número de documento</label> <input type="text" name="numDocumentoBen"></div>
+    <div><button type="button" access="opcion.nuevointerbancaria.guardar" disabled>Guardar</button></div>
+  </form>
+</div>
+<div id="mdlMensajeInterbancaria" class="oculto">
+  <div><h4>Mensaje</h4></div>
+  <div>
+    <div>
+      <div><span>Transferencia interbancaria</span></div>
+      <div>
+        <div id="txtMensajeInterbancaria"></div>
+        <div><button type="button" id="btnCerrarMensaje">Aceptar</button></div>
+      </div>
+    </div>
+  </div>
+</div>
+<script>
+(function () {
+  var token = sessionStorage.getItem('token');
+  var campos = ['monto', 'observacion', 'observacionITF', 'numCuentaBen', 'nombreBen',
+                'direccionBen', 'numDocumentoBen'];
+  var requeridos = ['monto', 'observacion', 'numCuentaBen', 'nombreBen', 'numDocumentoBen'];
+  var selects = {selConcepto: 'conceptos', selEntidad: 'entidades', selTipoDocBen: 'tiposDocumento'};
+  var formulario = document.getElementById('frmInterbancaria');
+  var guardar = formulario.querySelector("button[access='opcion.nuevointerbancaria.guardar']");
+  var exito = false;
+
+  function campo(nombre) { return document.getElementsByName(nombre)[0]; }
+  function mostrar(id, visible) { document.getElementById(id).classList.toggle('oculto', !visible); }
+
+  function pedir(metodo, ruta, datos) {
+    return fetch('api/' + ruta, {
+      method: metodo,
+      headers: {'Content-Type': 'application/json', 'Authorization': 'Bearer ' + (token || '')},
+      body: datos ? JSON.stringify(datos) : undefined
+    }).then(function (respuesta) {
+      return respuesta.json().then(function (cuerpo) {
+        if (respuesta.status === 401 && ruta !== 'login') {
+          vencer();
+          throw new Error(cuerpo.mensaje);
+        }
+        cuerpo.estado = respuesta.status;
+        return cuerpo;
+      });
+    });
+  }
+
+  function vencer() {
+    token = null;
+    sessionStorage.removeItem('token');
+    location.hash = '#/login';
+    enrutar();
+  }
+
+  function enrutar() {
+    var ruta = location.hash || '#/login';
+    if (ruta === '#/login' || !token) {
+      token = null;
+      sessionStorage.removeItem('token');
+      campo('user').value = '';
+      campo('password').value = '';
+      document.getElementById('msgLogin').textContent = '';
+      mostrar('principal-app', false);
+      mostrar('principal-login', true);
+      return;
+    }
+    mostrar('principal-login', false);
+    mostrar('principal-app', true);
+    if (ruta === '#/interbancaria/nuevo') {
+      abrirNuevo();
+    } else {
+      mostrar('frmInterbancaria', false);
+      mostrar('vistaInicio', true);
+    }
+  }
+
+  function abrirNuevo() {
+    mostrar('vistaInicio', false);
+    mostrar('frmInterbancaria', true);
+    limpiar();
+    Object.keys(selects).forEach(function (id) {
+      var select = document.getElementById(id);
+      select.disabled = true;
+      select.innerHTML = '<option value="">Seleccione</option>';
+    });
+    validar();
+    pedir('GET', 'catalogos').then(function (catalogos) {
+      Object.keys(selects).forEach(function (id) {
+        var select = document.getElementById(id);
+        catalogos[selects[id]].forEach(function (opcion) {
+          var elemento = document.createElement('option');
+          elemento.value = opcion.valor;
+          elemento.textContent = opcion.texto;
+          select.appendChild(elemento);
+        });
+        select.disabled = false;
+      });
+    }).catch(function () {});
+  }
+
+  function limpiar() {
+    campos.forEach(function (nombre) { campo(nombre).value = ''; });
+    Object.keys(selects).forEach(function (id) { document.getElementById(id).value = ''; });
+  }
+
+  // Como los validadores de la aplicación real: Guardar solo se habilita
+  // con los eventos input/change de los campos
+  function validar() {
+    var completo = requeridos.every(function (nombre) { return campo(nombre).value.trim() !== ''; })
+      && Object.keys(selects).every(function (id) { return document.getElementById(id).value !== ''; });
+    guardar.disabled = !completo;
+  }
+
+  formulario.addEventListener('input', validar);
+  formulario.addEventListener('change', validar);
+
+  document.getElementById('btnSave').addEventListener('click', function () {
+    pedir('POST', 'login', {usuario: campo('user').value, clave: campo('password').value})
+      .then(function (respuesta) {
+        if (respuesta.token) {
+          token = respuesta.token;
+          sessionStorage.setItem('token', token);
+          location.hash = '#/inicio';
+          enrutar();
+        } else {
+          document.getElementById('msgLogin').textContent = respuesta.mensaje;
+        }
+      });
+  });
+
+  document.getElementById('lnkNuevaInterbancaria').addEventListener('click', function () {
+    // Con el formulario ya abierto el hash no cambia: se recarga igual
+    if (location.hash === '#/interbancaria/nuevo') { abrirNuevo(); }
+  });
+
+  guardar.addEventListener('click', function () {
+    var datos = {
+      concepto: document.getElementById('selConcepto').value,
+      entidad: document.getElementById('selEntidad').value,
+      tipoDocBen: document.getElementById('selTipoDocBen').value
+    };
+    campos.forEach(function (nombre) { datos[nombre] = campo(nombre).value; });
+    guardar.disabled = true;
+    pedir('POST', 'interbancaria', datos).then(function (respuesta) {
+      exito = respuesta.exito;
+      document.getElementById('txtMensajeInterbancaria').textContent = respuesta.mensaje;
+      mostrar('mdlMensajeInterbancaria', true);
+    }).catch(function () {});
+  });
+
+  document.getElementById('btnCerrarMensaje').addEventListener('click', function () {
+    mostrar('mdlMensajeInterbancaria', false);
+    document.getElementById('txtMensajeInterbancaria').textContent = '';
+    if (exito) { limpiar(); }
+    validar();
+  });
+
+  window.addEventListener('hashchange', enrutar);
+  enrutar();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+class ServidorLBTRSimulado(LoggerMixin):
+    """Aplicación LBTR simulada: página para Selenium y API JSON sobre HTTP/1.1"""
+
+    CONCEPTOS = [("1", "PAGO A PROVEEDORES"), ("2", "PAGO DE HABERES"), ("3", "OTROS")]
+    TIPOS_DOCUMENTO = [("1", "DNI"), ("4", "CARNET DE EXTRANJERIA"), ("5", "RUC")]
+    # Los códigos de entidad de LBTROperations.entidades_financieras
+    ENTIDADES = [(str(codigo), f"ENTIDAD {codigo:02d}") for codigo in range(72)]
+
+    def __init__(self, usuarios: Optional[Dict[str, str]] = None, latencia: float = 0.1,
+                 variacion: float = 0.0, errores: Optional[Dict[str, float]] = None,
+                 vigencia: float = 900.0, semilla: Optional[int] = None,
+                 direccion: str = "127.0.0.1", puerto: int = 0):
+        """
+        Inicializa el simulador
+
+        Args:
+            usuarios: Clave por usuario; None acepta cualquier usuario con clave no vacía
+            latencia: Segundos que tarda la API en responder cada pedido
+            variacion: Variación aleatoria máxima (+/-) sobre la latencia
+            errores: Probabilidad de error por etapa ('login': servicio no
+                disponible, 'transferencia': rechazo de la entidad, 'sesion':
+                la sesión vence en ese pedido)
+            vigencia: Segundos sin pedidos tras los que vence una sesión
+            semilla: Semilla para reproducir la inyección de errores
+            direccion: Dirección de escucha
+            puerto: Puerto de escucha; 0 elige uno libre
+        """
+        self.usuarios = dict(usuarios) if usuarios is not None else None
+        self.latencia = latencia
+        self.variacion = variacion
+        self.errores = dict(errores or {})
+        self.vigencia = vigencia
+        self.direccion = direccion
+        self.puerto = puerto
+
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._sesiones: Dict[str, float] = {}
+        self._secuencia = 500000
+        self._servidor: Optional[ThreadingHTTPServer] = None
+
+        self.transferencias: List[dict] = []
+        self.estadisticas = {'pedidos': 0, 'logins': 0, 'catalogos': 0,
+                             'transferencias': 0, 'rechazadas': 0, 'vencidas': 0}
+
+    @property
+    def enlace(self) -> str:
+        """URL de login, como lbtr_details.link"""
+        return f"http://{self.direccion}:{self.puerto}{RUTA_APLICACION}#/login"
+
+    def iniciar(self) -> str:
+        """
+        Inicia el servidor en segundo plano
+
+        Returns:
+            URL de la página de login
+        """
+        self._servidor = ThreadingHTTPServer((self.direccion, self.puerto), _Manejador)
+        self._servidor.daemon_threads = True
+        self._servidor.simulador = self
+        self.puerto = self._servidor.server_address[1]
+        threading.Thread(target=self._servidor.serve_forever, name="lbtr-simulador", daemon=True).start()
+        self.logger.info(f"Simulador LBTR escuchando en {self.enlace}")
+        return self.enlace
+
+    def detener(self):
+        """Detiene el servidor"""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def vencer_sesiones(self):
+        """Vence todas las sesiones abiertas (como un timeout del servidor)"""
+        with self._lock:
+            self._sesiones.clear()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def atender(self, metodo: str, ruta: str, token: str, datos: dict) -> Tuple[int, dict]:
+        """Responde un pedido a la API: (código HTTP, cuerpo JSON)"""
+        self._esperar()
+        with self._lock:
+            self.estadisticas['pedidos'] += 1
+            if (metodo, ruta) == ("POST", "login"):
+                return self._login(datos)
+            if not self._sesion_activa(token):
+                self.estadisticas['vencidas'] += 1
+                return 401, {"mensaje": MSG_SESION_VENCIDA}
+            if (metodo, ruta) == ("GET", "catalogos"):
+                self.estadisticas['catalogos'] += 1
+                return 200, {
+                    "conceptos": self._opciones(self.CONCEPTOS),
+                    "entidades": self._opciones(self.ENTIDADES),
+                    "tiposDocumento": self._opciones(self.TIPOS_DOCUMENTO),
+                }
+            if (metodo, ruta) == ("POST", "interbancaria"):
+                return 200, self._transferencia(datos)
+            if (metodo, ruta) == ("POST", "logout"):
+                self._sesiones.pop(token, None)
+                return 200, {}
+        return 404, {"mensaje": "Recurso no encontrado"}
+
+    def _esperar(self):
+        demora = self.latencia
+        if self.variacion:
+            with self._lock:
+                demora += self._azar.uniform(-self.variacion, self.variacion)
+        if demora > 0:
+            time.sleep(demora)
+
+    def _login(self, datos: dict) -> Tuple[int, dict]:
+        if self._falla('login'):
+            return 503, {"mensaje": "Servicio no disponible"}
+        usuario, clave = str(datos.get("usuario", "")), str(datos.get("clave", ""))
+        valido = bool(usuario and clave) and (self.usuarios is None or self.usuarios.get(usuario) == clave)
+        if not valido:
+            return 401, {"mensaje": MSG_LOGIN_INCORRECTO}
+        token = secrets.token_hex(16)
+        self._sesiones[token] = time.monotonic()
+        self.estadisticas['logins'] += 1
+        return 200, {"token": token}
+
+    def _sesion_activa(self, token: str) -> bool:
+        ultimo = self._sesiones.get(token)
+        ahora = time.monotonic()
+        if ultimo is None or ahora - ultimo > self.vigencia or self._falla('sesion'):
+            self._sesiones.pop(token, None)
+            return False
+        self._sesiones[token] = ahora
+        return True
+
+    def _transferencia(self, datos: dict) -> dict:
+        error = self._validar(datos)
+        if error is None and self._falla('transferencia'):
+            error = "Error: La entidad destino no respondió. Intente nuevamente"
+        if error is not None:
+            self.estadisticas['rechazadas'] += 1
+            return {"exito": False, "mensaje": error}
+        self._secuencia += 1
+        self.transferencias.append(dict(datos, operacion=self._secuencia))
+        self.estadisticas['transferencias'] += 1
+        return {"exito": True, "operacion": self._secuencia,
+                "mensaje": f"{MSG_TRANSFERENCIA_OK}. Nro. de operación: {self._secuencia}"}
+
+    def _validar(self, datos: dict) -> Optional[str]:
+        """Mismas reglas que el backend: primer error encontrado o None"""
+        def valor(clave: str) -> str:
+            return str(datos.get(clave) or "").strip()
+
+        if valor("concepto") not in dict(self.CONCEPTOS):
+            return "Error: Seleccione el concepto"
+        if valor("entidad") not in dict(self.ENTIDADES):
+            return "Error: Seleccione la entidad destino"
+        try:
+            monto = float(valor("monto"))
+        except ValueError:
+            monto = 0.0
+        if monto <= 0:
+            return "Error: El monto no es válido"
+        if not (valor("numCuentaBen").isdigit() and len(valor("numCuentaBen")) == 20):
+            return "Error: El CCI debe tener 20 dígitos"
+        if not valor("nombreBen"):
+            return "Error: Ingrese el nombre del beneficiario"
+        if valor("tipoDocBen") == "5" and not (valor("numDocumentoBen").isdigit()
+                                              and len(valor("numDocumentoBen")) == 11):
+            return "Error: El RUC debe tener 11 dígitos"
+        return None
+
+    def _falla(self, etapa: str) -> bool:
+        """Decide si se inyecta un error en la etapa indicada"""
+        probabilidad = self.errores.get(etapa, 0.0)
+        return probabilidad > 0 and self._azar.random() < probabilidad
+
+    @staticmethod
+    def _opciones(pares) -> List[dict]:
+        return [{"valor": valor, "texto": texto} for valor, texto in pares]
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Sirve la página y la API; HTTP/1.1 para que los clientes reutilicen la conexión"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    def _despachar(self, metodo: str):
+        ruta = self.path.split("?", 1)[0]
+        longitud = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(longitud) if longitud else b""
+
+        if metodo == "GET" and ruta in ("/", RUTA_APLICACION.rstrip("/")):
+            self._responder(302, b"", "text/plain", {"Location": RUTA_APLICACION})
+        elif metodo == "GET" and ruta in (RUTA_APLICACION, RUTA_APLICACION + "index.html"):
+            self._responder(200, _PAGINA.encode("utf-8"), "text/html; charset=utf-8")
+        elif ruta.startswith(RUTA_API):
+            try:
+                datos = json.loads(cuerpo) if cuerpo else {}
+            except ValueError:
+                datos = {}
+            autorizacion = self.headers.get("Authorization", "")
+            token = autorizacion[7:] if autorizacion.startswith("Bearer ") else ""
+            codigo, respuesta = self.server.simulador.atender(metodo, ruta[len(RUTA_API):], token, datos)
+            self._responder(codigo, json.dumps(respuesta, ensure_ascii=False).encode("utf-8"),
+                            "application/json; charset=utf-8")
+        else:
+            self._responder(404, b"", "text/plain")
+
+    def _responder(self, codigo: int, cuerpo: bytes, tipo: str, cabeceras: Optional[Dict[str, str]] = None):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", "no-store")
+        for clave, valor in (cabeceras or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        self.server.simulador.logger.debug(formato % args)
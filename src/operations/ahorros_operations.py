@@ -6,25 +6,55 @@ Maneja abonos y cargos de cuentas de ahorro
 import time
 import os
 import pandas as pd
-import pyautogui
-import pyperclip
-import xlwings as xw
 from tkinter import messagebox
 import keyboard
 import datetime
+import threading
 from typing import Optional, List
 
+from src.core.backend_libros import backend_libros
 from src.core.base_logic import BaseLogic
+from src.core.cache_memos import CacheMemos
+from src.core.carga_plantilla import leer_tabla_archivo
+from src.core.diario_ejecucion import EN_DUDA, TransaccionEnDuda
+from src.core.ingesta_memo import (
+    DESTINOS, bloque_ahorros, clasificar_memo, escribir_en_plantilla, leer_memo,
+)
+from src.core.registros import Registro
+from src.core.screen_conditions import linea_con_contenido
+from src.core.validacion_previa import (
+    ValidacionPrevia, falta, longitud_distinta, monto_invalido, monto_mayor,
+)
+from src.host.layouts import GRABADO, ResultadoPantalla, parsear_pantalla
 from src.utils.config_manager import ConfigManager
 from src.utils.file_manager import FileManager
 
 
+class RegistroAhorros(Registro):
+    """Fila de la plantilla de Ahorros"""
+    
+    CAMPOS = {
+        'memorandum': ('Memo', 'texto'),
+        'beneficiario': ('Beneficiario', 'beneficiario'),
+        'cuenta_abono': ('Cuenta_abono', 'cuenta'),
+        'monto': ('Monto', 'monto'),
+        'estado': ('Estado', 'valor'),
+    }
+    __slots__ = tuple(CAMPOS)
+
+
 class AhorrosOperations(BaseLogic):
     """Clase para manejar operaciones de Ahorros"""
     
+    COLUMNA_ESTADO = 'K'
+    
+    # Compartido entre las instancias de cada sesión en ejecución paralela
+    _dialogo_beneficiario = threading.Lock()
+    
     def __init__(self):
         super().__init__("AHORROS")
         self.config_manager = ConfigManager()
+        self.configurar_escritura(self.config_manager.get_excel_writes())
         self.file_manager = FileManager()
         
         # Definir tipos de datos para las columnas
@@ -71,13 +101,14 @@ class AhorrosOperations(BaseLogic):
         Ejecuta el proceso de abono a cuentas de ahorro
         
         Args:
-            ventana: Ventana del emulador bancario
+            ventana: Ventana del emulador bancario, o lista de sesiones para trabajar en paralelo
         
         Returns:
             True si se completó correctamente
         """
         wb_ahorros = None
-        book_ahorros = None
+        hoja_ahorros = None
+        politica = None
         ruta_procesado = ''
         finalizado = False
         
@@ -92,72 +123,64 @@ class AhorrosOperations(BaseLogic):
             
             directorio = os.path.dirname(ruta_origen)
             
-            # Abrir Excel
-            book_ahorros = xw.App(visible=False)
-            wb_ahorros = book_ahorros.books.open(ruta_origen)
-            hoja_ahorros = wb_ahorros.sheets['Ahorros']
-            
-            # Leer datos del Excel
-            tabla_ahorros = pd.read_excel(ruta_origen, sheet_name='Ahorros', header=0, dtype=self.dicc_tabla)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb_ahorros, hoja_ahorros, politica, tabla_ahorros = self.abrir_plantilla(ruta_origen, 'Ahorros', self.dicc_tabla)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_ahorros = set()
             cont_abonados = 0
             cont_abonos_incorrectos = 0
+            cont_en_duda = 0
+            pendientes = []
             
             self.logger.info(f"Procesando {len(tabla_ahorros)} registros de Ahorros")
             
+            # Validar el lote completo antes de enviar nada al host
+            registros = self.preparar_registros(tabla_ahorros, RegistroAhorros,
+                                                self._validacion_previa(), hoja_ahorros)
+            
             # Procesar cada fila
-            for indice, fila in tabla_ahorros.iterrows():
+            for registro in registros:
                 if self.detener_proceso:
                     break
                 
-                fila_ahorros = indice + 2
-                
-                # Extraer datos de la fila
-                memorandum = str(fila['Memo']).strip()
-                beneficiario = self.limpiar_texto_beneficiario(str(fila['Beneficiario']))
-                cuenta_abono = self.limpiar_numero_cuenta(str(fila['Cuenta_abono']))
-                monto = float(fila['Monto'])
-                itf = fila['ITF']
-                msj_abono = fila['Msj_abono']
-                beneficiario_host = fila['Beneficiario_final']
-                secuencia = fila['Secuencia']
-                estado = fila['Estado']
-                
                 # Agregar memo a la lista
-                if indice == 0:
-                    lista_memo_ahorros.add(memorandum)
-                if memorandum not in lista_memo_ahorros:
-                    lista_memo_ahorros.add(memorandum)
+                lista_memo_ahorros.add(registro.memorandum)
                 
                 # Validar si debe procesarse
-                if not self._debe_procesar_registro(estado, cuenta_abono):
+                if not self._debe_procesar_registro(registro):
                     continue
                 
-                # Procesar abono
-                resultado = self._procesar_abono_ahorros(
-                    ventana, hoja_ahorros, fila_ahorros, cuenta_abono, 
-                    memorandum, monto, beneficiario, directorio, fecha_actual
-                )
-                
-                if resultado['exito']:
+                pendientes.append((registro.fila, registro.cuenta_abono, registro.memorandum,
+                                   registro.monto, registro.beneficiario))
+            
+            # Procesar abonos (en paralelo si se recibieron varias sesiones)
+            resultados = self.procesar_pendientes(
+                ventana, pendientes,
+                lambda operacion, sesion, hoja, p: operacion._procesar_abono_ahorros(
+                    sesion, hoja, *p, directorio, fecha_actual
+                ),
+                hoja_ahorros, politica.fila_terminada,
+                exito=lambda resultado: bool(resultado and resultado['exito'])
+            )
+            for resultado in resultados:
+                if resultado == EN_DUDA:
+                    cont_en_duda += 1
+                elif resultado and resultado['exito']:
                     cont_abonados += 1
                     if not resultado['beneficiario_correcto']:
                         cont_abonos_incorrectos += 1
-                
-                wb_ahorros.save()
             
             # Finalizar proceso
             self.finalizar_operacion()
-            wb_ahorros.save()
+            politica.guardar()
             
             if self.detener_proceso:
                 messagebox.showwarning(
                     "Proceso detenido",
                     "Se ha procedido a detener todos los procesos."
                 )
-            elif cont_abonados == 0 and cont_abonos_incorrectos == 0:
+            elif cont_abonados == 0 and cont_abonos_incorrectos == 0 and cont_en_duda == 0:
                 messagebox.showinfo(
                     "Proceso no iniciado",
                     "No se ha realizado ningún abono, el excel ya está procesado o está vacío."
@@ -173,6 +196,7 @@ class AhorrosOperations(BaseLogic):
                     "Proceso terminado",
                     f"Abonos realizados = {cont_abonados}\n"
                     f"Abonos rectificados = {cont_abonos_incorrectos}/{cont_abonados}"
+                    + (f"\nAbonos en duda (verificar en el host) = {cont_en_duda}" if cont_en_duda else "")
                 )
             
             return True
@@ -189,11 +213,13 @@ class AhorrosOperations(BaseLogic):
             return False
         finally:
             self.finalizar_operacion()
-            if wb_ahorros and book_ahorros:
+            if wb_ahorros:
                 try:
-                    wb_ahorros.save()
-                    wb_ahorros.close()
-                    book_ahorros.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb_ahorros)
                 except Exception as e:
                     self.logger.warning(f"Error cerrando Excel: {e}")
             
@@ -204,9 +230,25 @@ class AhorrosOperations(BaseLogic):
                 except Exception as e:
                     self.logger.warning(f"No se pudo abrir archivo procesado: {e}")
     
-    def _debe_procesar_registro(self, estado: str, cuenta_abono: str) -> bool:
+    def _debe_procesar_registro(self, registro: RegistroAhorros) -> bool:
         """Determina si un registro debe ser procesado"""
-        return pd.isna(estado) and len(cuenta_abono) == 11
+        return pd.isna(registro.estado) and not registro.rechazo
+    
+    def _validacion_previa(self) -> ValidacionPrevia:
+        """Reglas de validación previa de Ahorros con los límites de info.json"""
+        limites = self.config_manager.get_limites("AHORROS")
+        reglas = [
+            ('Falta el memorándum', falta('memorandum')),
+            ('Monto no válido', monto_invalido('monto')),
+            ('Formato no correcto de cuenta', longitud_distinta('cuenta_abono', limites['account_length'])),
+        ]
+        if limites['max_amount'] is not None:
+            reglas.append((f"Monto superior a los S/{limites['max_amount']:,.2f}",
+                           monto_mayor('monto', limites['max_amount'])))
+        return ValidacionPrevia(
+            lambda tabla: tabla['estado'].isna(), reglas,
+            repetidas=('memorandum', 'cuenta_abono', 'monto')
+        )
     
     def _procesar_abono_ahorros(self, ventana, hoja, fila: int, cuenta_abono: str,
                               memorandum: str, monto: float, beneficiario_original: str,
@@ -214,93 +256,64 @@ class AhorrosOperations(BaseLogic):
         """Procesa un abono individual a cuenta de ahorros"""
         try:
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
-            
-            # Limpiar clipboard y ejecutar comandos
-            pyperclip.copy('')
-            pyautogui.press('f5')
-            pyautogui.write('441')  # Código para ahorros
-            time.sleep(self.intervalo)
-            pyautogui.write(cuenta_abono)
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            pyautogui.write(memorandum)
+            self.activar_ventana(ventana)
+            
+            # Limpiar pantalla y ejecutar comandos
+            self.limpiar_pantalla()
+            self.ingresar_transaccion('441')  # Código para ahorros
+            self.escribir(cuenta_abono)
+            self.presionar('Tab')
+            self.escribir(memorandum)
             
             if self.detener_proceso:
                 return {'exito': False, 'beneficiario_correcto': True}
             
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            pyautogui.press('Tab')
-            pyautogui.press('Tab')
-            pyautogui.write(self.formatear_monto(monto))
-            time.sleep(self.intervalo)
+            self.presionar('Tab')
+            self.presionar('Tab')
+            self.presionar('Tab')
+            self.escribir(self.formatear_monto(monto))
             
             if self.detener_proceso:
                 return {'exito': False, 'beneficiario_correcto': True}
             
-            pyautogui.press('f1')  # Grabar
-            time.sleep(self.intervalo)
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.3)
-            
-            # Procesar respuesta
-            panel_host_ahorros = pyperclip.paste()
-            lineas_ahorros = panel_host_ahorros.splitlines()
+            # Grabar y esperar el mensaje del host en la línea 23
+            lineas_ahorros = self.grabar('f1', linea_con_contenido(23))
+            resultado = parsear_pantalla('AHORROS_ABONO', lineas_ahorros)
             
-            if len(lineas_ahorros) > 23:
-                msj_abono = lineas_ahorros[23].strip()
-            else:
-                msj_abono = "Error: Respuesta incompleta del sistema"
-            
-            if "OK" in msj_abono:
+            if resultado.es(GRABADO):
                 return self._procesar_respuesta_exitosa(
-                    hoja, fila, lineas_ahorros, beneficiario_original, 
+                    hoja, fila, resultado, beneficiario_original, 
                     directorio, fecha_actual, memorandum
                 )
             else:
                 # Error en el abono
                 hoja.range(f'K{fila}').value = "Error con los datos"
-                hoja.range(f'H{fila}').value = msj_abono
+                hoja.range(f'H{fila}').value = resultado.mensaje
                 return {'exito': False, 'beneficiario_correcto': True}
                 
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando abono ahorros: {e}")
             return {'exito': False, 'beneficiario_correcto': True}
     
-    def _procesar_respuesta_exitosa(self, hoja, fila: int, lineas: List[str],
+    def _procesar_respuesta_exitosa(self, hoja, fila: int, resultado: ResultadoPantalla,
                                   beneficiario_original: str, directorio: str,
                                   fecha_actual: datetime, memorandum: str) -> dict:
         """Procesa una respuesta exitosa del emulador"""
         try:
-            # Extraer información de la respuesta
-            secuencia = ""
-            beneficiario_host = ""
-            impuesto_itf = 0
-            
-            if len(lineas) > 13:
-                # Obtener secuencia
-                buscar_secuencia = lineas[13][:41] if len(lineas[13]) > 41 else lineas[13]
-                secuencia = buscar_secuencia.replace('SECUENCIA', '').strip()
+            # Secuencia y beneficiario (línea 13), ITF (línea 15) y mensaje final
+            secuencia = resultado.get('secuencia', '')
+            beneficiario_host = resultado.get('beneficiario', '')
+            
+            if resultado['secuencia'] is not None:
                 hoja.range(f'J{fila}').value = secuencia
-                
-                # Obtener beneficiario del host
-                if len(lineas[13]) > 41:
-                    beneficiario_host = lineas[13][41:].strip()
-                    hoja.range(f'I{fila}').value = beneficiario_host
-            
-            if len(lineas) > 15:
-                # Obtener ITF
-                buscar_itf = lineas[15]
-                impuesto_itf = buscar_itf.replace('IMPUESTO ITF', '').strip()
-                hoja.range(f'G{fila}').value = impuesto_itf
-            
-            # Guardar mensaje final
-            if len(lineas) > 23:
-                msj_abono = lineas[23].strip()
-                hoja.range(f'H{fila}').value = msj_abono
+                hoja.range(f'I{fila}').value = beneficiario_host
+            
+            if resultado['itf'] is not None:
+                hoja.range(f'G{fila}').value = resultado['itf']
+            
+            hoja.range(f'H{fila}').value = resultado.mensaje
             
             # Verificar si el beneficiario coincide
             beneficiario_correcto = True
@@ -334,17 +347,17 @@ class AhorrosOperations(BaseLogic):
             )
             
             os.makedirs(os.path.dirname(ruta_screenshot), exist_ok=True)
-            screenshot = pyautogui.screenshot()
-            screenshot.save(ruta_screenshot)
-            
-            # Preguntar al usuario qué hacer
-            respuesta = messagebox.askyesno(
-                "Problemas",
-                "Beneficiarios no coinciden ¿Deseas continuar?\n"
-                "Si en caso va a extornar, no cierre esta ventana y haga el extorno.\n"
-                "Marcar SÍ, grabará en el excel como GRABADO el abono, "
-                "en caso marque NO se grabará como EXTORNADO"
-            )
+            self.guardar_captura(ruta_screenshot)
+            
+            # Preguntar al usuario qué hacer (una consulta a la vez si hay varias sesiones)
+            with self._dialogo_beneficiario:
+                respuesta = messagebox.askyesno(
+                    "Problemas",
+                    "Beneficiarios no coinciden ¿Deseas continuar?\n"
+                    "Si en caso va a extornar, no cierre esta ventana y haga el extorno.\n"
+                    "Marcar SÍ, grabará en el excel como GRABADO el abono, "
+                    "en caso marque NO se grabará como EXTORNADO"
+                )
             
             if respuesta:
                 hoja.range(f'K{fila}').value = "GRABADO"
@@ -396,7 +409,7 @@ class AhorrosOperations(BaseLogic):
             self.logger.info(f"Iniciando cargo Ahorros desde: {archivo_xlc}")
             
             # Leer datos del archivo
-            tabla_cargo = pd.read_excel(archivo_xlc, sheet_name='Ahorros', header=0, dtype=self.dicc_tabla)
+            tabla_cargo = leer_tabla_archivo(archivo_xlc, 'Ahorros', self.dicc_tabla)
             
             # Validar consistencia de datos
             memo_unicos = tabla_cargo['Memo'].nunique()
@@ -421,23 +434,20 @@ class AhorrosOperations(BaseLogic):
             suma_itf_str = self.formatear_monto(suma_itf)
             
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
             # Ejecutar secuencia de cargo
-            time.sleep(2)
-            pyautogui.press('f5')
-            pyautogui.write('042')  # Código de cargo
-            pyautogui.write(cuenta)
-            pyautogui.write(suma_montos_str)
-            pyautogui.press('tab')
-            pyautogui.write(memo)
-            pyautogui.press('tab')
-            pyautogui.write('84')  # Motivo
-            pyautogui.write(f"MEMO {memo}-{fecha_actual.year}-BN-7101")
-            pyautogui.press('tab')
-            pyautogui.write(f"AHORROS S/.{suma_montos_str} ITF {suma_itf_str}")
+            self.limpiar_pantalla()
+            self.ingresar_transaccion('042')  # Código de cargo
+            self.escribir(cuenta)
+            self.escribir(suma_montos_str)
+            self.presionar('tab')
+            self.escribir(memo)
+            self.presionar('tab')
+            self.escribir('84')  # Motivo
+            self.escribir(f"MEMO {memo}-{fecha_actual.year}-BN-7101")
+            self.presionar('tab')
+            self.escribir(f"AHORROS S/.{suma_montos_str} ITF {suma_itf_str}")
             
             self.logger.info(f"Cargo Ahorros ejecutado - Monto: {suma_montos_str}, ITF: {suma_itf_str}")
             return True
@@ -476,81 +486,22 @@ class AhorrosOperations(BaseLogic):
                 messagebox.showerror("Error", "No se pudo obtener la configuración")
                 return False
             
-            # Tipos de datos esperados
-            dtype = {
-                'N°': str,
-                'Beneficiario': str,
-                'Nº  Cuenta': str,
-                'Tipo de Cuenta': str,
-                'Entidad Financiera': str,
-                'Monto (S/)': float
-            }
-            
             # Abrir archivos Excel
-            with xw.App(visible=False) as book_ahorros:
-                wb = book_ahorros.books.open(ruta_origen)
+            with backend_libros(config_manager.get_excel_writes()["backend"]).libro(ruta_origen) as wb:
                 hoja = wb.sheets['Ahorros']
                 
-                # Leer todas las hojas del archivo fuente
-                hojas = pd.read_excel(ruta_xlc, dtype=dtype, sheet_name=None)
-                
-                hojas_validas = []
-                hoja_no_util = False
-                
-                # Validar hojas
-                for nombre_hoja, df in hojas.items():
-                    if "DETRACCION" in nombre_hoja.upper():
-                        continue
-                    if set(df.columns) == set(dtype.keys()):
-                        hojas_validas.append(df)
-                    else:
-                        hoja_no_util = True
+                # Leer y combinar las hojas útiles del archivo fuente
+                df, hoja_no_util = leer_memo(ruta_xlc, CacheMemos.desde_config(config_manager.get_memo_cache()))
                 
-                if not hojas_validas:
+                if df is None:
                     messagebox.showerror("Error", "No se encontraron hojas válidas en el archivo")
                     return False
                 
-                # Limpiar excel si se solicita
-                if limpiar:
-                    ultima_fila2 = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                    valor_d2 = hoja.range('D2').value
-                    if ultima_fila2 != 2 or valor_d2:
-                        hoja.range('2:90').delete()
-                        hoja.range('G2:K2').value = None
-                
-                # Combinar datos válidos
-                df = pd.concat(hojas_validas, ignore_index=True)
-                
-                # Procesar datos - filtrar solo cuentas de ahorros
-                df['Nº  Cuenta'] = df['Nº  Cuenta'].str.replace('-', '', regex=False)
-                df_filtro = df.dropna(subset=['N°', 'Nº  Cuenta', 'Monto (S/)'])
-                df_ahorros = df_filtro[df_filtro['Nº  Cuenta'].str.len() == 11]
-                df_final = df_ahorros[df_ahorros['Tipo de Cuenta'] == 'AHORROS']
-                df_final.reset_index(drop=True, inplace=True)
-                
-                # Encontrar última fila
-                ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                valor_f2 = hoja.range('F2').value
-                if valor_f2 is None:
-                    ultima_fila = 1
-                
-                # Procesar cada registro
-                for _, fila in df_final.iterrows():
-                    ultima_fila += 1
-                    
-                    beneficiario = BaseLogic("").limpiar_texto_beneficiario(fila['Beneficiario'])
-                    cuenta = BaseLogic("").limpiar_numero_cuenta(fila['Nº  Cuenta'])
-                    monto = fila['Monto (S/)']
-                    
-                    # Escribir en excel
-                    hoja.range(f'B{ultima_fila}').value = memo
-                    hoja.range(f'C{ultima_fila}').value = nro_cuenta
-                    hoja.range(f'D{ultima_fila}').value = beneficiario
-                    hoja.range(f'E{ultima_fila}').value = cuenta
-                    hoja.range(f'F{ultima_fila}').value = monto
-                    wb.save()
+                # Filtrar, normalizar y agregar las líneas de Ahorros en un solo bloque
+                lineas = clasificar_memo(df, ['AHORROS'])['AHORROS']
+                escribir_en_plantilla(hoja, DESTINOS['AHORROS'], bloque_ahorros(lineas, memo, nro_cuenta), limpiar)
                 
-                wb.close()
+                wb.save()
                 libro_activo = True
                 
                 mensaje = "Revisar excel." if not hoja_no_util else 'Revisar excel. Algunas hojas se omitieron'
@@ -6,25 +6,46 @@ Maneja cargos individuales a cuentas
 import time
 import os
 import pandas as pd
-import pyautogui
-import pyperclip
-import xlwings as xw
 from tkinter import messagebox
 import keyboard
 import datetime
 from typing import Optional
 
 from src.core.base_logic import BaseLogic
+from src.core.diario_ejecucion import TransaccionEnDuda
+from src.core.registros import Registro
+from src.core.screen_conditions import linea_con_contenido, texto_presente
+from src.core.validacion_previa import ValidacionPrevia, falta, monto_invalido, monto_mayor
+from src.host.layouts import DATOS_CORRECTOS, GRABADO, parsear_pantalla
 from src.utils.config_manager import ConfigManager
 from src.utils.file_manager import FileManager
 
 
+class RegistroCargo(Registro):
+    """Fila de la plantilla de Cargo"""
+    
+    CAMPOS = {
+        'cuenta': ('Cuenta', 'cuenta'),
+        'importe': ('Importe', 'monto'),
+        'memo': ('Memorandum', 'texto'),
+        'motivo': ('Motivo', 'texto'),
+        'glosa1': ('Glosa1', 'texto'),
+        'glosa2': ('Glosa2', 'opcional'),
+        'glosa3': ('Glosa3', 'opcional'),
+        'observacion': ('Observacion', 'valor'),
+    }
+    __slots__ = tuple(CAMPOS)
+
+
 class CargoOperations(BaseLogic):
     """Clase para manejar operaciones de Cargo individual"""
     
+    COLUMNA_ESTADO = 'K'
+    
     def __init__(self):
         super().__init__("Cargo")
         self.config_manager = ConfigManager()
+        self.configurar_escritura(self.config_manager.get_excel_writes())
         self.file_manager = FileManager()
         
         # Definir tipos de datos para las columnas
@@ -77,7 +98,8 @@ class CargoOperations(BaseLogic):
             True si se completó correctamente
         """
         wb = None
-        book = None
+        hoja = None
+        politica = None
         ruta_procesado = ''
         finalizado = False
         
@@ -92,67 +114,66 @@ class CargoOperations(BaseLogic):
             
             directorio = os.path.dirname(ruta_origen)
             
-            # Abrir Excel
-            book = xw.App(visible=False)
-            wb = book.books.open(ruta_origen)
-            hoja = wb.sheets['Cargo']
-            
-            # Leer datos del Excel
-            tabla_cargo = pd.read_excel(ruta_origen, sheet_name='Cargo', header=0, dtype=self.dicc_tabla)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb, hoja, politica, tabla_cargo = self.abrir_plantilla(ruta_origen, 'Cargo', self.dicc_tabla)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_cce = set()
             cont_cargados = 0
             cont_no_cargados = 0
+            cont_en_duda = 0
             
             self.logger.info(f"Procesando {len(tabla_cargo)} registros de Cargo")
             
+            # Validar el lote completo antes de enviar nada al host
+            registros = self.preparar_registros(tabla_cargo, RegistroCargo, self._validacion_previa(), hoja)
+            
             # Procesar cada fila
-            for indice, fila in tabla_cargo.iterrows():
+            for registro in registros:
                 if self.detener_proceso:
                     break
                 
-                fila_df = indice + 2
-                
-                # Extraer datos de la fila
-                cod = str(fila['COD']).strip()
-                cuenta = self.limpiar_numero_cuenta(str(fila['Cuenta']))
-                importe = float(fila['Importe'])
-                memo = str(fila['Memorandum']).strip()
-                motivo = str(fila['Motivo']).strip()
-                glosa1 = str(fila['Glosa1']).strip()
-                glosa2 = str(fila['Glosa2']).strip() if not pd.isna(fila['Glosa2']) else ""
-                glosa3 = str(fila['Glosa3']).strip() if not pd.isna(fila['Glosa3']) else ""
-                obs = fila['Observacion']
-                
-                self.logger.info(f"Procesando fila {fila_df} - Memo: {memo}, Importe: {importe}")
+                self.logger.info(
+                    f"Procesando fila {registro.fila} - Memo: {registro.memo}, Importe: {registro.importe}"
+                )
                 
                 # Agregar memo a la lista
-                if indice == 0:
-                    lista_memo_cce.add(memo)
-                if memo not in lista_memo_cce:
-                    lista_memo_cce.add(memo)
+                lista_memo_cce.add(registro.memo)
                 
-                # Verificar si ya está procesado
-                if not pd.isna(obs):
-                    self.logger.info(f"Fila {fila_df} ya tiene observación: {obs}")
+                # Verificar si ya está procesado o se rechazó en la validación previa
+                if registro.rechazo:
+                    self.logger.info(f"Fila {registro.fila} rechazada: {registro.rechazo}")
+                    continue
+                if not pd.isna(registro.observacion):
+                    self.logger.info(f"Fila {registro.fila} ya tiene observación: {registro.observacion}")
                     continue
                 
                 # Procesar cargo
-                resultado = self._procesar_cargo_individual(
-                    ventana, hoja, fila_df, cuenta, importe, memo, 
-                    motivo, glosa1, glosa2, glosa3
-                )
+                datos = (registro.cuenta, registro.importe, registro.memo, registro.motivo,
+                         registro.glosa1, registro.glosa2, registro.glosa3)
+                try:
+                    resultado = self.transaccion_con_diario(
+                        hoja, registro.fila, datos,
+                        lambda hoja_fila: self._procesar_cargo_individual(
+                            ventana, hoja_fila, registro.fila, *datos
+                        )
+                    )
+                except TransaccionEnDuda as e:
+                    # Sin respuesta del host no se envían más cargos
+                    self.logger.error(f"Fila {registro.fila} en duda, se detiene el lote: {e}")
+                    cont_en_duda += 1
+                    break
                 
                 if resultado:
                     cont_cargados += 1
-                else:
+                elif resultado is not None:
                     cont_no_cargados += 1
                 
-                wb.save()
+                politica.fila_terminada()
             
             # Finalizar proceso
             self.finalizar_operacion()
+            politica.guardar()
             
             if self.detener_proceso:
                 messagebox.showwarning(
@@ -170,6 +191,7 @@ class CargoOperations(BaseLogic):
                     "Proceso finalizado",
                     f"Cargos realizados = {cont_cargados}\n"
                     f"Cargos no realizados = {cont_no_cargados}"
+                    + (f"\nCargos en duda (verificar en el host) = {cont_en_duda}" if cont_en_duda else "")
                 )
             
             return True
@@ -181,11 +203,13 @@ class CargoOperations(BaseLogic):
             return False
         finally:
             self.finalizar_operacion()
-            if wb and book:
+            if wb:
                 try:
-                    wb.save()
-                    wb.close()
-                    book.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb)
                 except Exception as e:
                     self.logger.warning(f"Error cerrando Excel: {e}")
             
@@ -196,6 +220,22 @@ class CargoOperations(BaseLogic):
                 except Exception as e:
                     self.logger.warning(f"No se pudo abrir archivo procesado: {e}")
     
+    def _validacion_previa(self) -> ValidacionPrevia:
+        """Reglas de validación previa de Cargo con los límites de info.json"""
+        limites = self.config_manager.get_limites("Cargo")
+        reglas = [
+            ('Falta el memorándum', falta('memo')),
+            ('Falta la cuenta', falta('cuenta')),
+            ('Importe no válido', monto_invalido('importe')),
+        ]
+        if limites['max_amount'] is not None:
+            reglas.append((f"Importe superior a los S/{limites['max_amount']:,.2f}",
+                           monto_mayor('importe', limites['max_amount'])))
+        return ValidacionPrevia(
+            lambda tabla: tabla['observacion'].isna(), reglas,
+            repetidas=('memo', 'cuenta', 'importe', 'motivo', 'glosa1', 'glosa2', 'glosa3')
+        )
+    
     def _procesar_cargo_individual(self, ventana, hoja, fila: int, cuenta: str,
                                  importe: float, memo: str, motivo: str,
                                  glosa1: str, glosa2: str, glosa3: str) -> bool:
@@ -204,64 +244,48 @@ class CargoOperations(BaseLogic):
             self.logger.info(f"Iniciando carga en el sistema para memo: {memo}")
             
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
             # Ejecutar secuencia de cargo
-            pyautogui.press('f5')
-            pyautogui.write('042')  # Código de cargo
-            pyautogui.write(cuenta)
-            pyautogui.write(self.formatear_monto(importe))
-            pyautogui.press('tab')
-            pyautogui.write(memo)
-            pyautogui.press('tab')
-            pyautogui.write('84')  # Motivo fijo
-            pyautogui.write(glosa1)
-            pyautogui.press('tab')
-            pyautogui.write(glosa2)
-            pyautogui.press('tab')
-            pyautogui.write(glosa3)
-            pyautogui.press('enter')
-            time.sleep(2)
+            self.limpiar_pantalla()
+            self.ingresar_transaccion('042')  # Código de cargo
+            self.escribir(cuenta)
+            self.escribir(self.formatear_monto(importe))
+            self.presionar('tab')
+            self.escribir(memo)
+            self.presionar('tab')
+            self.escribir('84')  # Motivo fijo
+            self.escribir(glosa1)
+            self.presionar('tab')
+            self.escribir(glosa2)
+            self.presionar('tab')
+            self.escribir(glosa3)
             
             # Capturar respuesta de validación
-            pyautogui.hotkey('ctrl', 'c')
-            time.sleep(0.2)
-            foto_panel = pyperclip.paste()
-            time.sleep(0.3)
-            panel = foto_panel.splitlines()
+            panel = self.presionar_y_esperar('enter', linea_con_contenido(23))
             
-            self.logger.info("Contenido del panel (análisis detallado):")
+            self.logger.debug("Contenido del panel (análisis detallado):")
             for i, linea in enumerate(panel):
-                self.logger.info(f"Línea {i}: '{linea}'")
-            
-            # Buscar mensaje de validación
-            msj_emulacion = ""
-            for linea in panel:
-                if "DATOS CORRECTOS PUEDE GRABAR" in linea:
-                    msj_emulacion = linea.strip()
-                    self.logger.info(f"Mensaje de validación encontrado: '{msj_emulacion}'")
-                    break
-            
-            # Si no se encuentra, usar línea predeterminada
-            if not msj_emulacion and len(panel) > 23:
-                msj_emulacion = panel[23].strip()
-                self.logger.info(f"Usando línea predeterminada 23: '{msj_emulacion}'")
+                self.logger.debug(f"Línea {i}: '{linea}'")
             
+            # Mensaje de validación: línea con el texto esperado o la línea 23
+            validacion = parsear_pantalla('CARGO_VALIDACION', panel)
+            msj_emulacion = validacion.mensaje
             self.logger.info(f"Mensaje final de validación: '{msj_emulacion}'")
             
-            if "DATOS CORRECTOS PUEDE GRABAR" in msj_emulacion:
+            if validacion.es(DATOS_CORRECTOS):
                 self.logger.info(f"Validación exitosa: {msj_emulacion}")
                 return self._grabar_cargo(hoja, fila, memo)
             else:
                 # Error en validación
                 hoja.range(f'J{fila}').value = msj_emulacion
                 hoja.range(f'K{fila}').value = "DATOS ERRONEOS"
-                pyautogui.press('f5')
+                self.presionar('f5')
                 self.logger.error(f"Error en validación para la fila {fila}: {msj_emulacion}")
                 return False
                 
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando cargo individual: {e}")
             return False
@@ -269,58 +293,34 @@ class CargoOperations(BaseLogic):
     def _grabar_cargo(self, hoja, fila: int, memo: str) -> bool:
         """Graba el cargo en el emulador"""
         try:
-            pyautogui.press('f4')  # Grabar
-            time.sleep(0.2)
-            pyautogui.hotkey('ctrl', 'c')
-            time.sleep(0.2)
-            foto_grabacion = pyperclip.paste()
-            time.sleep(0.3)
-            
-            foto_grabacion_lineas = foto_grabacion.splitlines()
-            self.logger.info("Contenido de foto_grabacion:")
+            # Grabar y esperar el mensaje de grabación
+            foto_grabacion_lineas = self.grabar(
+                'f4', texto_presente("GRABACION", "ERROR", "RECHAZADO", "CORRECTO")
+            )
+            self.logger.debug("Contenido de foto_grabacion:")
             for i, linea in enumerate(foto_grabacion_lineas):
-                self.logger.info(f"Línea {i}: {linea}")
-            
-            # Buscar mensaje de grabación
-            msj_grabacion = ""
-            for linea in foto_grabacion_lineas:
-                if "GRABACION CORRECTA" in linea:
-                    msj_grabacion = linea.strip()
-                    self.logger.info(f"¡Mensaje de grabación correcta encontrado: '{msj_grabacion}'!")
-                    break
-            
-            # Si no se encontró, buscar en línea específica
-            if not msj_grabacion and len(foto_grabacion_lineas) > 29:
-                msj_grabacion = foto_grabacion_lineas[29].strip()
-                self.logger.info(f"Usando línea 29: '{msj_grabacion}'")
-            
-            # Buscar cualquier mensaje relevante si aún está vacío
-            if not msj_grabacion:
-                for linea in foto_grabacion_lineas:
-                    if any(msg in linea for msg in ["GRABACION", "ERROR", "RECHAZADO", "CORRECTO"]):
-                        msj_grabacion = linea.strip()
-                        self.logger.info(f"Encontrado mensaje alternativo: '{msj_grabacion}'")
-                        break
+                self.logger.debug(f"Línea {i}: {linea}")
             
+            # Mensaje de grabación: texto esperado, línea 29 o cualquier mensaje relevante
+            grabacion = parsear_pantalla('CARGO_GRABACION', foto_grabacion_lineas)
+            msj_grabacion = grabacion.mensaje
             self.logger.info(f"Mensaje final de grabación: '{msj_grabacion}'")
             
-            # Si aún está vacío, establecer valor predeterminado
-            if not msj_grabacion:
-                msj_grabacion = "NO SE DETECTÓ MENSAJE DE GRABACIÓN"
-            
-            if "GRABACION CORRECTA" in msj_grabacion:
+            if grabacion.es(GRABADO):
                 hoja.range(f'J{fila}').value = msj_grabacion
                 hoja.range(f'K{fila}').value = "OK"
-                pyautogui.press('f5')
+                self.presionar('f5')
                 self.logger.info(f"Grabación exitosa para la fila {fila}")
                 return True
             else:
                 hoja.range(f'J{fila}').value = msj_grabacion
                 hoja.range(f'K{fila}').value = "REVISAR"
-                pyautogui.press('f5')
+                self.presionar('f5')
                 self.logger.error(f"Error en grabación para la fila {fila}: {msj_grabacion}")
                 return False
                 
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error grabando cargo: {e}")
             return False
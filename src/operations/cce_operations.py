@@ -6,25 +6,52 @@ Maneja abonos y cargos de CCE
 import time
 import os
 import pandas as pd
-import pyautogui
-import pyperclip
-import xlwings as xw
 from tkinter import messagebox
 import keyboard
 import datetime
 from typing import Optional, Tuple, List
 
+from src.core.backend_libros import backend_libros
 from src.core.base_logic import BaseLogic
+from src.core.cache_memos import CacheMemos
+from src.core.carga_plantilla import leer_tabla_archivo
+from src.core.diario_ejecucion import EN_DUDA, TransaccionEnDuda
+from src.core.ingesta_memo import (
+    DESTINOS, bloque_cce, clasificar_memo, escribir_en_plantilla, leer_memo,
+)
+from src.core.registros import Registro
+from src.core.screen_conditions import linea_msg_presente
+from src.core.validacion_previa import (
+    ValidacionPrevia, cci_invalido, falta, longitud_distinta, monto_invalido, monto_mayor,
+)
+from src.host.layouts import DATOS_CORRECTOS, GRABADO, parsear_pantalla
 from src.utils.config_manager import ConfigManager
 from src.utils.file_manager import FileManager
 
 
+class RegistroCCE(Registro):
+    """Fila de la plantilla CCE"""
+    
+    CAMPOS = {
+        'memorandum': ('Memorandum', 'texto'),
+        'cuenta': ('Cuenta', 'cuenta'),
+        'beneficiario': ('Beneficiario', 'beneficiario'),
+        'cci': ('CCI', 'cuenta'),
+        'monto': ('Monto', 'monto'),
+        'comentario': ('COMENTARIO', 'valor'),
+    }
+    __slots__ = tuple(CAMPOS)
+
+
 class CCEOperations(BaseLogic):
     """Clase para manejar operaciones de CCE"""
     
+    COLUMNA_ESTADO = 'I'
+    
     def __init__(self):
         super().__init__("CCE")
         self.config_manager = ConfigManager()
+        self.configurar_escritura(self.config_manager.get_excel_writes())
         self.file_manager = FileManager()
         
         # Definir tipos de datos para las columnas
@@ -70,7 +97,7 @@ class CCEOperations(BaseLogic):
         Ejecuta el proceso de abono CCE
         
         Args:
-            ventana: Ventana del emulador bancario
+            ventana: Ventana del emulador bancario, o lista de sesiones para trabajar en paralelo
         
         Returns:
             True si se completó correctamente
@@ -78,7 +105,8 @@ class CCEOperations(BaseLogic):
         ruta_procesado = ''
         finalizado = False
         wb_cce = None
-        book_cce = None
+        hoja_cce = None
+        politica = None
         
         try:
             self.iniciar_operacion()
@@ -91,70 +119,63 @@ class CCEOperations(BaseLogic):
             
             directorio = os.path.dirname(ruta_origen)
             
-            # Abrir Excel
-            book_cce = xw.App(visible=False)
-            wb_cce = book_cce.books.open(ruta_origen)
-            hoja_cce = wb_cce.sheets['CCE']
-            
-            # Leer datos del Excel
-            tabla_cce = pd.read_excel(ruta_origen, sheet_name='CCE', header=0, dtype=self.dicc_tabla)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb_cce, hoja_cce, politica, tabla_cce = self.abrir_plantilla(ruta_origen, 'CCE', self.dicc_tabla)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_cce = set()
             cont_abonados = 0
             cont_no_abonados = 0
+            cont_en_duda = 0
+            pendientes = []
             
             self.logger.info(f"Procesando {len(tabla_cce)} registros de CCE")
             
+            # Validar el lote completo antes de enviar nada al host
+            registros = self.preparar_registros(tabla_cce, RegistroCCE, self._validacion_previa(), hoja_cce)
+            
             # Procesar cada fila
-            for indice, fila in tabla_cce.iterrows():
+            for registro in registros:
                 if self.detener_proceso:
                     break
                 
-                fila_cce = indice + 2
-                
-                # Extraer datos de la fila
-                memorandum = str(fila['Memorandum']).strip()
-                cuenta = self.limpiar_numero_cuenta(str(fila['Cuenta']))
-                beneficiario = self.limpiar_texto_beneficiario(str(fila['Beneficiario']))
-                cci = self.limpiar_numero_cuenta(str(fila['CCI']))
-                monto = float(fila['Monto'])
-                comentario = fila['COMENTARIO']
-                
                 # Agregar memo a la lista para el nombre del archivo
-                if indice == 0:
-                    lista_memo_cce.add(memorandum)
-                if memorandum not in lista_memo_cce:
-                    lista_memo_cce.add(memorandum)
+                lista_memo_cce.add(registro.memorandum)
                 
-                # Validaciones
-                if not self._validar_registro_cce(fila_cce, hoja_cce, cci, monto, comentario):
+                # Rechazada en la validación previa o ya procesada
+                if registro.rechazo or not pd.isna(registro.comentario):
                     cont_no_abonados += 1
                     continue
                 
-                # Procesar abono
-                resultado = self._procesar_abono_cce(
-                    ventana, hoja_cce, fila_cce, cci, beneficiario, 
-                    memorandum, cuenta, monto, directorio, fecha_actual
-                )
-                
-                if resultado:
+                pendientes.append((registro.fila, registro.cci, registro.beneficiario,
+                                   registro.memorandum, registro.cuenta, registro.monto))
+            
+            # Procesar abonos (en paralelo si se recibieron varias sesiones)
+            resultados = self.procesar_pendientes(
+                ventana, pendientes,
+                lambda operacion, sesion, hoja, p: operacion._procesar_abono_cce(
+                    sesion, hoja, *p, directorio, fecha_actual
+                ),
+                hoja_cce, politica.fila_terminada
+            )
+            for resultado in resultados:
+                if resultado == EN_DUDA:
+                    cont_en_duda += 1
+                elif resultado:
                     cont_abonados += 1
-                else:
+                elif resultado is not None:
                     cont_no_abonados += 1
-                
-                wb_cce.save()
             
             # Finalizar proceso
             self.finalizar_operacion()
-            wb_cce.save()
+            politica.guardar()
             
             if self.detener_proceso:
                 messagebox.showwarning(
                     "Proceso detenido",
                     "Se ha procedido a detener todos los procesos."
                 )
-            elif cont_abonados == 0 and cont_no_abonados == 0:
+            elif cont_abonados == 0 and cont_no_abonados == 0 and cont_en_duda == 0:
                 messagebox.showinfo(
                     "Proceso no iniciado",
                     "No se ha realizado ningún abono, el excel ya está procesado o está vacío."
@@ -170,6 +191,7 @@ class CCEOperations(BaseLogic):
                     "Proceso finalizado",
                     f"Abonos realizados = {cont_abonados}\n"
                     f"Abonos no realizados = {cont_no_abonados}"
+                    + (f"\nAbonos en duda (verificar en el host) = {cont_en_duda}" if cont_en_duda else "")
                 )
             
             return True
@@ -186,11 +208,13 @@ class CCEOperations(BaseLogic):
             return False
         finally:
             self.finalizar_operacion()
-            if wb_cce and book_cce:
+            if wb_cce:
                 try:
-                    wb_cce.save()
-                    wb_cce.close()
-                    book_cce.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb_cce)
                 except Exception as e:
                     self.logger.warning(f"Error cerrando Excel: {e}")
             
@@ -201,28 +225,21 @@ class CCEOperations(BaseLogic):
                 except Exception as e:
                     self.logger.warning(f"No se pudo abrir archivo procesado: {e}")
     
-    def _validar_registro_cce(self, fila: int, hoja: object, cci: str, 
-                            monto: float, comentario: str) -> bool:
-        """Valida un registro de CCE"""
-        try:
-            # Verificar si ya está procesado
-            if not pd.isna(comentario):
-                return False
-            
-            # Validar monto
-            if monto >= 10000:
-                hoja.range(f'I{fila}').value = 'Monto superior a los S/9,999.99'
-                return False
-            
-            # Validar CCI
-            if len(cci) != 20:
-                hoja.range(f'I{fila}').value = 'Formato no correcto de CCI'
-                return False
-            
-            return True
-        except Exception as e:
-            self.logger.error(f"Error validando registro: {e}")
-            return False
+    def _validacion_previa(self) -> ValidacionPrevia:
+        """Reglas de validación previa de CCE con los límites de info.json"""
+        limites = self.config_manager.get_limites("CCE")
+        reglas = [
+            ('Falta el memorándum', falta('memorandum')),
+            ('Monto no válido', monto_invalido('monto')),
+            (f"Monto superior a los S/{limites['max_amount']:,.2f}", monto_mayor('monto', limites['max_amount'])),
+            ('Formato no correcto de CCI', longitud_distinta('cci', limites['cci_length'])),
+        ]
+        if limites['cci_check_digits']:
+            reglas.append(('Dígitos de control del CCI incorrectos', cci_invalido('cci')))
+        return ValidacionPrevia(
+            lambda tabla: tabla['comentario'].isna(), reglas,
+            repetidas=('memorandum', 'cci', 'monto')
+        )
     
     def _procesar_abono_cce(self, ventana, hoja, fila: int, cci: str, beneficiario: str,
                           memorandum: str, cuenta: str, monto: float, 
@@ -230,63 +247,38 @@ class CCEOperations(BaseLogic):
         """Procesa un abono CCE individual"""
         try:
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
-            
-            # Limpiar clipboard
-            pyperclip.copy('')
+            self.activar_ventana(ventana)
             
-            # Ejecutar secuencia de comandos
-            pyautogui.press('f5')
-            time.sleep(self.intervalo)
+            # Limpiar pantalla
+            self.limpiar_pantalla()
             
             if self.detener_proceso:
                 return False
             
             # Ingresar datos
-            pyautogui.write('220')  # Código de transacción
-            time.sleep(self.intervalo)
-            pyautogui.write(cci)
-            time.sleep(self.intervalo)
-            pyautogui.write(beneficiario)
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.write(f"MEMO {memorandum}-BN-7101")
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.write(cuenta)
-            time.sleep(self.intervalo)
+            self.ingresar_transaccion('220')  # Código de transacción
+            self.escribir(cci)
+            self.escribir(beneficiario)
+            self.presionar('Tab')
+            self.escribir(f"MEMO {memorandum}-BN-7101")
+            self.presionar('Tab')
+            self.escribir(cuenta)
             
             if self.detener_proceso:
                 return False
             
-            pyautogui.press('Enter')
-            time.sleep(self.intervalo)
-            pyautogui.write('sol')
-            time.sleep(self.intervalo)
-            pyautogui.write(self.formatear_monto(monto))
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.write('1')
-            time.sleep(self.intervalo)
+            self.presionar_y_esperar('Enter')
+            self.escribir('sol')
+            self.escribir(self.formatear_monto(monto))
+            self.presionar('Tab')
+            self.presionar('Tab')
+            self.escribir('1')
             
             if self.detener_proceso:
                 return False
             
-            pyautogui.press('Enter')
-            time.sleep(self.intervalo)
-            
-            # Capturar respuesta del emulador
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.3)
-            panel_emulacion = pyperclip.paste()
-            lineas_emulacion = panel_emulacion.splitlines()
+            # Esperar la respuesta de validación del emulador
+            lineas_emulacion = self.presionar_y_esperar('Enter', linea_msg_presente())
             
             if self.detener_proceso:
                 return False
@@ -297,6 +289,8 @@ class CCEOperations(BaseLogic):
                 directorio, fecha_actual
             )
             
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando abono CCE: {e}")
             return False
@@ -306,40 +300,34 @@ class CCEOperations(BaseLogic):
                                    directorio: str, fecha_actual: datetime) -> bool:
         """Procesa la respuesta del emulador"""
         try:
-            # Extraer comisiones y mensajes
-            for linea in lineas:
-                # Procesar comisión IB
-                if "COMISION IB" in linea:
-                    comision_ib = linea[35:42].strip()
-                    hoja.range(f'G{fila}').value = float(comision_ib) if comision_ib else 0
+            resultado = parsear_pantalla('CCE_VALIDACION', lineas)
+            
+            if resultado['comision_ib'] is not None:
+                hoja.range(f'G{fila}').value = resultado['comision_ib']
+            if resultado['comision_bn'] is not None:
+                hoja.range(f'H{fila}').value = resultado['comision_bn']
+            
+            if resultado.es(DATOS_CORRECTOS):
+                # Grabar operación
+                return self._grabar_operacion(hoja, fila, memorandum, beneficiario, 
+                                            directorio, fecha_actual)
+            
+            if resultado.fila_mensaje is not None:
+                # Error en validación
+                hoja.range(f'I{fila}').value = 'ERROR DE GRABACIÓN'
+                hoja.range(f'J{fila}').value = resultado.mensaje
                 
-                # Procesar comisión BN
-                if "COMISION BN" in linea:
-                    comision_bn = linea[35:42].strip()
-                    hoja.range(f'H{fila}').value = float(comision_bn) if comision_bn else 0
+                # Capturar pantalla para evidencia
+                self._capturar_pantalla_error(memorandum, beneficiario, 
+                                            directorio, fecha_actual)
                 
-                # Procesar mensaje de validación
-                if "MSG" in linea:
-                    msg_emulacion = linea[7:54].strip()
-                    
-                    if '**DATOS CORRECTOS' in msg_emulacion:
-                        # Grabar operación
-                        return self._grabar_operacion(hoja, fila, memorandum, beneficiario, 
-                                                    directorio, fecha_actual)
-                    else:
-                        # Error en validación
-                        hoja.range(f'I{fila}').value = 'ERROR DE GRABACIÓN'
-                        hoja.range(f'J{fila}').value = msg_emulacion
-                        
-                        # Capturar pantalla para evidencia
-                        self._capturar_pantalla_error(memorandum, beneficiario, 
-                                                    directorio, fecha_actual)
-                        
-                        pyautogui.press('f5')
-                        return False
+                self.presionar('f5')
+                return False
             
             return False
             
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando respuesta emulador: {e}")
             return False
@@ -348,31 +336,22 @@ class CCEOperations(BaseLogic):
                         directorio: str, fecha_actual: datetime) -> bool:
         """Graba la operación en el emulador"""
         try:
-            pyperclip.copy('')
-            pyautogui.sleep(0.5)
-            pyautogui.press('f4')  # Grabar
-            pyautogui.sleep(0.5)
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.5)
-            
-            panel_grabacion = pyperclip.paste()
-            lineas_grabacion = panel_grabacion.splitlines()
-            
-            for linea in lineas_grabacion:
-                if "MSG" in linea:
-                    if "TRANSFERENCIA GRABADA" in linea:
-                        # Grabación exitosa
-                        hoja.range(f'I{fila}').value = 'ABONADO'
-                        hoja.range(f'J{fila}').value = linea.strip()
-                        return True
-                    else:
-                        # Error en grabación
-                        hoja.range(f'I{fila}').value = 'NO ABONADO'
-                        hoja.range(f'J{fila}').value = linea.strip()
-                        return False
+            # Grabar y esperar el nuevo mensaje del host
+            lineas_grabacion = self.grabar('f4', linea_msg_presente())
+            
+            resultado = parsear_pantalla('CCE_GRABACION', lineas_grabacion)
+            if resultado.fila_mensaje is not None:
+                hoja.range(f'J{fila}').value = resultado.mensaje
+                if resultado.es(GRABADO):
+                    hoja.range(f'I{fila}').value = 'ABONADO'
+                    return True
+                hoja.range(f'I{fila}').value = 'NO ABONADO'
+                return False
             
             return False
             
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error grabando operación: {e}")
             return False
@@ -389,8 +368,7 @@ class CCEOperations(BaseLogic):
             
             os.makedirs(os.path.dirname(ruta_screenshot), exist_ok=True)
             
-            screenshot = pyautogui.screenshot()
-            screenshot.save(ruta_screenshot)
+            self.guardar_captura(ruta_screenshot)
             
             self.logger.info(f"Captura de error guardada: {ruta_screenshot}")
             
@@ -439,7 +417,7 @@ class CCEOperations(BaseLogic):
             self.logger.info(f"Iniciando cargo CCE desde: {archivo_xlc}")
             
             # Leer datos del archivo
-            tabla_cargo = pd.read_excel(archivo_xlc, sheet_name='CCE', header=0, dtype=self.dicc_tabla)
+            tabla_cargo = leer_tabla_archivo(archivo_xlc, 'CCE', self.dicc_tabla)
             
             # Validar consistencia de datos
             memo_unicos = tabla_cargo['Memorandum'].nunique()
@@ -470,23 +448,20 @@ class CCEOperations(BaseLogic):
             importe_total_str = self.formatear_monto(importe_total)
             
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
             # Ejecutar secuencia de cargo
-            time.sleep(2)
-            pyautogui.press('f5')
-            pyautogui.write('042')  # Código de cargo
-            pyautogui.write(cuenta)
-            pyautogui.write(importe_total_str)
-            pyautogui.press('tab')
-            pyautogui.write(nro_memo)
-            pyautogui.press('tab')
-            pyautogui.write('84')  # Motivo
-            pyautogui.write(f"MEMO {memo}-BN-7101")
-            pyautogui.press('tab')
-            pyautogui.write(f"CCE {suma_montos_str} IB {suma_ib_str} BN {suma_bn_str}")
+            self.limpiar_pantalla()
+            self.ingresar_transaccion('042')  # Código de cargo
+            self.escribir(cuenta)
+            self.escribir(importe_total_str)
+            self.presionar('tab')
+            self.escribir(nro_memo)
+            self.presionar('tab')
+            self.escribir('84')  # Motivo
+            self.escribir(f"MEMO {memo}-BN-7101")
+            self.presionar('tab')
+            self.escribir(f"CCE {suma_montos_str} IB {suma_ib_str} BN {suma_bn_str}")
             
             self.logger.info(f"Cargo CCE ejecutado - Total: {importe_total_str}")
             return True
@@ -525,81 +500,22 @@ class CCEOperations(BaseLogic):
                 messagebox.showerror("Error", "No se pudo obtener la configuración")
                 return False
             
-            # Tipos de datos esperados
-            dtype = {
-                'N°': str,
-                'Beneficiario': str,
-                'Nº  Cuenta': str,
-                'Tipo de Cuenta': str,
-                'Entidad Financiera': str,
-                'Monto (S/)': float
-            }
-            
             # Abrir archivos Excel
-            with xw.App(visible=False) as book_cce:
-                wb = book_cce.books.open(ruta_origen)
+            with backend_libros(config_manager.get_excel_writes()["backend"]).libro(ruta_origen) as wb:
                 hoja = wb.sheets['CCE']
                 
-                # Leer todas las hojas del archivo fuente
-                hojas = pd.read_excel(ruta_xlc, dtype=dtype, sheet_name=None)
-                
-                hojas_validas = []
-                hoja_no_util = False
-                
-                # Validar hojas
-                for nombre_hoja, df in hojas.items():
-                    if "DETRACCION" in nombre_hoja.upper():
-                        continue
-                    if set(df.columns) == set(dtype.keys()):
-                        hojas_validas.append(df)
-                    else:
-                        hoja_no_util = True
+                # Leer y combinar las hojas útiles del archivo fuente
+                df, hoja_no_util = leer_memo(ruta_xlc, CacheMemos.desde_config(config_manager.get_memo_cache()))
                 
-                if not hojas_validas:
+                if df is None:
                     messagebox.showerror("Error", "No se encontraron hojas válidas en el archivo")
                     return False
                 
-                # Limpiar excel si se solicita
-                if limpiar:
-                    ultima_fila2 = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                    valor_e2 = hoja.range('E2').value
-                    if ultima_fila2 != 2 or valor_e2:
-                        hoja.range('2:90').delete()
-                        hoja.range('G2:J2').value = None
-                
-                # Combinar datos válidos
-                df = pd.concat(hojas_validas, ignore_index=True)
-                
-                # Procesar datos
-                df['Nº  Cuenta'] = df['Nº  Cuenta'].str.replace('-', '', regex=False)
-                df_filtro = df.dropna(subset=['N°', 'Nº  Cuenta', 'Monto (S/)'])
-                df_cci_valido = df_filtro[df_filtro['Nº  Cuenta'].str.len() == 20]
-                df_cce = df_cci_valido[df_cci_valido['Monto (S/)'] < 10000].copy()
-                df_cce.reset_index(drop=True, inplace=True)
-                
-                # Encontrar última fila
-                ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                valor_d2 = hoja.range('D2').value
-                if valor_d2 is None:
-                    ultima_fila = 1
-                
-                # Procesar cada registro
-                for _, fila in df_cce.iterrows():
-                    ultima_fila += 1
-                    
-                    beneficiario = BaseLogic("").limpiar_texto_beneficiario(fila['Beneficiario'])
-                    cuenta_cci = BaseLogic("").limpiar_numero_cuenta(fila['Nº  Cuenta'])
-                    monto = fila['Monto (S/)']
-                    
-                    # Escribir en excel
-                    hoja.range(f'B{ultima_fila}').value = memo
-                    hoja.range(f'C{ultima_fila}').value = nro_cuenta
-                    hoja.range(f'D{ultima_fila}').value = beneficiario
-                    hoja.range(f'E{ultima_fila}').value = cuenta_cci
-                    hoja.range(f'F{ultima_fila}').value = monto
-                    wb.save()
+                # Filtrar, normalizar y agregar las líneas de CCE en un solo bloque
+                lineas = clasificar_memo(df, ['CCE'])['CCE']
+                escribir_en_plantilla(hoja, DESTINOS['CCE'], bloque_cce(lineas, memo, nro_cuenta), limpiar)
                 
-                wb.close()
+                wb.save()
                 libro_activo = True
                 
                 mensaje = "Revisar excel." if not hoja_no_util else 'Revisar excel. Algunas hojas se omitieron'
@@ -6,25 +6,55 @@ Maneja transferencias entre cuentas corrientes (cargo y abono)
 import time
 import os
 import pandas as pd
-import pyautogui
-import pyperclip
-import xlwings as xw
 from tkinter import messagebox
 import keyboard
 import datetime
 from typing import Optional, Dict
 
+from src.core.backend_libros import backend_libros
 from src.core.base_logic import BaseLogic
+from src.core.cache_memos import CacheMemos
+from src.core.diario_ejecucion import TransaccionEnDuda
+from src.core.ingesta_memo import (
+    DESTINOS, bloque_cte, clasificar_memo, escribir_en_plantilla, leer_memo,
+)
+from src.core.registros import Registro
+from src.core.screen_conditions import linea_con_contenido
+from src.core.validacion_previa import (
+    ValidacionPrevia, falta, longitud_distinta, monto_invalido, monto_mayor,
+)
+from src.host.layouts import DATOS_CORRECTOS, GRABADO, SOBREGIRO, parsear_pantalla
 from src.utils.config_manager import ConfigManager
 from src.utils.file_manager import FileManager
 
 
+class RegistroCTE(Registro):
+    """Fila de la plantilla de Cuentas Corrientes"""
+    
+    CAMPOS = {
+        'memorandum': ('Memorandum', 'texto'),
+        'cta_cargo': ('Cta_cargo', 'cuenta'),
+        'cta_abono': ('Cta_abono', 'cuenta'),
+        'monto': ('Monto', 'monto'),
+        'glosa': ('Glosa', 'texto'),
+        'comision': ('Comision', 'texto'),
+        'itf': ('ITF_cargo', 'monto_o_cero'),
+        'observacion': ('Observacion', 'valor'),
+        'mensaje_cargo': ('Mensaje_cargo', 'valor'),
+        'mensaje_abono': ('Mensaje_abono', 'valor'),
+    }
+    __slots__ = tuple(CAMPOS)
+
+
 class CTEOperations(BaseLogic):
     """Clase para manejar operaciones de Cuentas Corrientes"""
     
+    COLUMNA_ESTADO = 'I'
+    
     def __init__(self):
         super().__init__("CTA_CTES")
         self.config_manager = ConfigManager()
+        self.configurar_escritura(self.config_manager.get_excel_writes())
         self.file_manager = FileManager()
         
         # Definir tipos de datos para las columnas
@@ -78,7 +108,8 @@ class CTEOperations(BaseLogic):
             True si se completó correctamente
         """
         wb_cte = None
-        book_cte = None
+        hoja_cte = None
+        politica = None
         ruta_procesado = ''
         finalizado = False
         
@@ -93,13 +124,8 @@ class CTEOperations(BaseLogic):
             
             directorio = os.path.dirname(ruta_origen)
             
-            # Abrir Excel
-            book_cte = xw.App(visible=False)
-            wb_cte = book_cte.books.open(ruta_origen)
-            hoja_cte = wb_cte.sheets['Corriente']
-            
-            # Leer datos del Excel
-            tabla_cte = pd.read_excel(ruta_origen, sheet_name='Corriente', header=0, dtype=self.dicc_tabla_cte)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb_cte, hoja_cte, politica, tabla_cte = self.abrir_plantilla(ruta_origen, 'Corriente', self.dicc_tabla_cte)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_cte = set()
@@ -107,83 +133,107 @@ class CTEOperations(BaseLogic):
             cont_no_abonados = 0
             cont_cargados = 0
             cont_no_cargados = 0
+            cont_en_duda = 0
             
             self.logger.info(f"Procesando {len(tabla_cte)} registros de Cuentas Corrientes")
             
+            # Validar el lote completo antes de enviar nada al host
+            registros = self.preparar_registros(tabla_cte, RegistroCTE, self._validacion_previa(), hoja_cte)
+            
             # Procesar cada fila
-            for indice, fila in tabla_cte.iterrows():
+            for registro in registros:
                 if self.detener_proceso:
                     break
                 
-                fila_cte = indice + 2
-                
-                # Extraer datos de la fila
-                memorandum = str(fila['Memorandum']).strip()
-                cta_cargo = self.limpiar_numero_cuenta(str(fila['Cta_cargo']))
-                cta_abono = self.limpiar_numero_cuenta(str(fila['Cta_abono']))
-                monto = float(fila['Monto'])
-                glosa = str(fila['Glosa']).strip()
-                comision = str(fila['Comision']).strip()
-                itf = fila['ITF_cargo'] if not pd.isna(fila['ITF_cargo']) else 0
-                observacion = fila['Observacion']
-                mensaje_cargo = fila['Mensaje_cargo']
-                mensaje_abono = fila['Mensaje_abono']
-                
                 # Agregar memo a la lista
-                if indice == 0:
-                    lista_memo_cte.add(memorandum)
-                if memorandum not in lista_memo_cte:
-                    lista_memo_cte.add(memorandum)
+                lista_memo_cte.add(registro.memorandum)
                 
-                # Validar datos
-                if not self._validar_datos_cte(cta_cargo, cta_abono):
+                # Rechazada en la validación previa
+                if registro.rechazo:
                     continue
                 
-                pyperclip.copy('')
                 validar_cargo = False
+                resultado_cargo = None
                 
                 # PROCESO DE CARGO
-                if self._debe_procesar_cargo(observacion, mensaje_cargo, cta_cargo, cta_abono):
-                    resultado_cargo = self._procesar_cargo_cte(
-                        ventana, hoja_cte, fila_cte, cta_cargo, monto, 
-                        memorandum, comision, glosa, cta_abono
-                    )
+                if self._debe_procesar_cargo(registro.observacion, registro.mensaje_cargo):
+                    def cargar(hoja):
+                        resultado = self._procesar_cargo_cte(
+                            ventana, hoja, registro.fila, registro.cta_cargo, registro.monto,
+                            registro.memorandum, registro.comision, registro.glosa, registro.cta_abono
+                        )
+                        if resultado['exito'] and resultado['itf']:
+                            hoja.range(f'H{registro.fila}').value = resultado['itf']
+                        return resultado
+                    
+                    try:
+                        resultado_cargo = self.transaccion_con_diario(
+                            hoja_cte, registro.fila,
+                            ('CARGO', registro.cta_cargo, registro.monto, registro.memorandum,
+                             registro.comision, registro.glosa, registro.cta_abono),
+                            cargar, exito=lambda resultado: resultado['exito']
+                        )
+                    except TransaccionEnDuda as e:
+                        # Sin respuesta del host no se envían más transacciones
+                        self.logger.error(f"Cargo de la fila {registro.fila} en duda, se detiene el lote: {e}")
+                        cont_en_duda += 1
+                        break
                     
-                    if resultado_cargo['exito']:
+                    if resultado_cargo is None:
+                        pass  # Ya grabado o en duda según el diario
+                    elif resultado_cargo['exito']:
                         cont_cargados += 1
                         validar_cargo = True
-                        if resultado_cargo['itf']:
-                            hoja_cte.range(f'H{fila_cte}').value = resultado_cargo['itf']
                     else:
                         cont_no_cargados += 1
                 
                 # PROCESO DE ABONO
-                if self._debe_procesar_abono(mensaje_abono, mensaje_cargo, validar_cargo):
-                    resultado_abono = self._procesar_abono_cte(
-                        ventana, hoja_cte, fila_cte, cta_abono, monto,
-                        memorandum, glosa, cta_cargo, itf
-                    )
+                if self._debe_procesar_abono(registro.mensaje_abono, registro.mensaje_cargo, validar_cargo):
+                    itf_cargo = resultado_cargo.get('itf', 0) if resultado_cargo else 0
                     
-                    if resultado_abono['exito']:
+                    def abonar(hoja):
+                        resultado = self._procesar_abono_cte(
+                            ventana, hoja, registro.fila, registro.cta_abono, registro.monto,
+                            registro.memorandum, registro.glosa, registro.cta_cargo, registro.itf
+                        )
+                        if resultado['exito']:
+                            # Actualizar ITF total si es necesario
+                            self._actualizar_itf_total(hoja, registro.fila, resultado['itf'],
+                                                       itf_cargo, registro.itf)
+                        return resultado
+                    
+                    try:
+                        resultado_abono = self.transaccion_con_diario(
+                            hoja_cte, registro.fila,
+                            ('ABONO', registro.cta_abono, registro.monto, registro.memorandum,
+                             registro.glosa, registro.cta_cargo),
+                            abonar, exito=lambda resultado: resultado['exito']
+                        )
+                    except TransaccionEnDuda as e:
+                        self.logger.error(f"Abono de la fila {registro.fila} en duda, se detiene el lote: {e}")
+                        cont_en_duda += 1
+                        break
+                    
+                    if resultado_abono is None:
+                        pass
+                    elif resultado_abono['exito']:
                         cont_abonados += 1
-                        # Actualizar ITF total si es necesario
-                        self._actualizar_itf_total(hoja_cte, fila_cte, resultado_abono['itf'], 
-                                                 resultado_cargo.get('itf', 0) if 'resultado_cargo' in locals() else 0, itf)
                     else:
                         cont_no_abonados += 1
                 
-                wb_cte.save()
+                politica.fila_terminada()
             
             # Finalizar proceso
             self.finalizar_operacion()
-            wb_cte.save()
+            politica.guardar()
             
             if self.detener_proceso:
                 messagebox.showwarning(
                     "Proceso detenido",
                     "Se ha procedido a detener todos los procesos."
                 )
-            elif all(count == 0 for count in [cont_abonados, cont_no_abonados, cont_cargados, cont_no_cargados]):
+            elif all(count == 0 for count in [cont_abonados, cont_no_abonados, cont_cargados, cont_no_cargados,
+                                              cont_en_duda]):
                 messagebox.showwarning(
                     "Proceso no iniciado",
                     "Revisar excel, no hay cargos ni abonos por procesar."
@@ -201,6 +251,7 @@ class CTEOperations(BaseLogic):
                     f"Cargos no realizados = {cont_no_cargados}\n"
                     f"Abonos realizados = {cont_abonados}\n" 
                     f"Abonos no realizados = {cont_no_abonados}"
+                    + (f"\nTransacciones en duda (verificar en el host) = {cont_en_duda}" if cont_en_duda else "")
                 )
             
             return True
@@ -212,11 +263,13 @@ class CTEOperations(BaseLogic):
             return False
         finally:
             self.finalizar_operacion()
-            if wb_cte and book_cte:
+            if wb_cte:
                 try:
-                    wb_cte.save()
-                    wb_cte.close()
-                    book_cte.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb_cte)
                 except Exception as e:
                     self.logger.warning(f"Error cerrando Excel: {e}")
             
@@ -227,15 +280,31 @@ class CTEOperations(BaseLogic):
                 except Exception as e:
                     self.logger.warning(f"No se pudo abrir archivo procesado: {e}")
     
-    def _validar_datos_cte(self, cta_cargo: str, cta_abono: str) -> bool:
-        """Valida que las cuentas tengan la longitud correcta"""
-        return len(cta_cargo) == 11 and len(cta_abono) == 11
+    def _validacion_previa(self) -> ValidacionPrevia:
+        """
+        Reglas de validación previa de Cuentas Corrientes con los límites de info.json
+        
+        Solo se validan las filas sin cargo; las que ya tienen el cargo
+        grabado y esperan el abono pasaron la validación en su momento.
+        """
+        limites = self.config_manager.get_limites("CTA_CTES")
+        reglas = [
+            ('Falta el memorándum', falta('memorandum')),
+            ('Monto no válido', monto_invalido('monto')),
+            ('Formato no correcto de cuenta de cargo', longitud_distinta('cta_cargo', limites['account_length'])),
+            ('Formato no correcto de cuenta de abono', longitud_distinta('cta_abono', limites['account_length'])),
+        ]
+        if limites['max_amount'] is not None:
+            reglas.append((f"Monto superior a los S/{limites['max_amount']:,.2f}",
+                           monto_mayor('monto', limites['max_amount'])))
+        return ValidacionPrevia(
+            lambda tabla: tabla['observacion'].isna() & tabla['mensaje_cargo'].isna(), reglas,
+            repetidas=('memorandum', 'cta_cargo', 'cta_abono', 'monto')
+        )
     
-    def _debe_procesar_cargo(self, observacion: str, mensaje_cargo: str, 
-                           cta_cargo: str, cta_abono: str) -> bool:
+    def _debe_procesar_cargo(self, observacion: str, mensaje_cargo: str) -> bool:
         """Determina si debe procesarse el cargo"""
-        return (pd.isna(observacion) and pd.isna(mensaje_cargo) and 
-                len(cta_cargo) == 11 and len(cta_abono) == 11)
+        return pd.isna(observacion) and pd.isna(mensaje_cargo)
     
     def _debe_procesar_abono(self, mensaje_abono: str, mensaje_cargo: str, validar_cargo: bool) -> bool:
         """Determina si debe procesarse el abono"""
@@ -248,110 +317,79 @@ class CTEOperations(BaseLogic):
         """Procesa el cargo en cuenta corriente"""
         try:
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
             # Determinar código de transacción según tipo de cuenta
             cod_cargo = self._determinar_codigo_cargo(cta_cargo)
             
             # Ejecutar secuencia de cargo
-            pyautogui.press('f5')
+            self.limpiar_pantalla()
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            pyautogui.write(cod_cargo)
-            time.sleep(self.intervalo)
-            pyautogui.write(cta_cargo)
-            time.sleep(self.intervalo)
-            pyautogui.write(self.formatear_monto(monto))
+            self.ingresar_transaccion(cod_cargo)
+            self.escribir(cta_cargo)
+            self.escribir(self.formatear_monto(monto))
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            pyautogui.press('enter')
-            time.sleep(self.intervalo)
-            pyautogui.write(memorandum)
-            time.sleep(self.intervalo)
-            pyautogui.press('tab')
-            pyautogui.press('tab')
-            pyautogui.write(comision)
-            time.sleep(self.intervalo)
-            pyautogui.write(glosa)
+            self.presionar_y_esperar('enter')
+            self.escribir(memorandum)
+            self.presionar('tab')
+            self.presionar('tab')
+            self.escribir(comision)
+            self.escribir(glosa)
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            time.sleep(self.intervalo)
-            pyautogui.press('tab')
-            pyautogui.write(f"TRANSF A CTA CTE BN {cta_abono}")
-            pyautogui.press('tab')
-            pyautogui.write(cta_abono)
-            pyautogui.press('enter')
+            self.presionar('tab')
+            self.escribir(f"TRANSF A CTA CTE BN {cta_abono}")
+            self.presionar('tab')
+            self.escribir(cta_abono)
+            
+            # Procesar respuesta del emulador
+            self.activar_ventana(ventana)
+            lineas_emulacion = self.presionar_y_esperar('enter', linea_con_contenido(23))
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            # Procesar respuesta del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
-            
-            time.sleep(0.2)
-            pyautogui.hotkey('ctrl', 'c')
-            time.sleep(0.2)
-            panel_emulacion = pyperclip.paste()
-            lineas_emulacion = panel_emulacion.splitlines()
-            
-            if len(lineas_emulacion) > 23:
-                linea_msj = lineas_emulacion[23].strip()
-            else:
-                linea_msj = "Error: Respuesta incompleta"
-            
-            if 'DATOS CORRECTOS PUEDE GRABAR' in linea_msj:
-                # Extraer ITF del cargo
-                itf_cargo = 0
-                if len(lineas_emulacion) > 7:
-                    itf_texto = lineas_emulacion[7][61:].strip()
-                    if itf_texto:
-                        itf_cargo = float(itf_texto)
+            validacion = parsear_pantalla('CTE_VALIDACION', lineas_emulacion)
+            
+            if validacion.es(DATOS_CORRECTOS):
+                # ITF del cargo
+                itf_cargo = validacion.get('itf', 0)
                 
                 # Grabar la operación
                 if self.detener_proceso:
                     return {'exito': False, 'itf': itf_cargo}
                 
-                pyperclip.copy('')
-                time.sleep(0.3)
-                pyautogui.press('f4')  # Grabar
-                time.sleep(0.3)
-                pyautogui.hotkey('ctrl', 'c')
-                time.sleep(0.3)
-                panel_grabacion = pyperclip.paste()
-                lineas_grabacion = panel_grabacion.splitlines()
-                
-                if len(lineas_grabacion) > 23:
-                    mensaje_grabacion = lineas_grabacion[23].strip()
-                else:
-                    mensaje_grabacion = "Error en grabación"
+                # Grabar y esperar el mensaje de grabación
+                lineas_grabacion = self.grabar('f4', linea_con_contenido(23))
+                grabacion = parsear_pantalla('CTE_GRABACION', lineas_grabacion)
                 
-                if 'GRABACION CORRECTA' in mensaje_grabacion:
+                if grabacion.es(GRABADO):
                     hoja.range(f'I{fila}').value = 'CARGADO'
-                    hoja.range(f'J{fila}').value = mensaje_grabacion
+                    hoja.range(f'J{fila}').value = grabacion.mensaje
                     return {'exito': True, 'itf': itf_cargo}
                 else:
                     hoja.range(f'I{fila}').value = 'NO CARGADO'
-                    hoja.range(f'J{fila}').value = mensaje_grabacion
+                    hoja.range(f'J{fila}').value = grabacion.mensaje
                     return {'exito': False, 'itf': itf_cargo}
             
-            elif "CUENTA SOBREGIRADA" in linea_msj:
+            elif validacion.es(SOBREGIRO):
                 hoja.range(f'I{fila}').value = 'SIN FONDOS'
-                hoja.range(f'J{fila}').value = linea_msj
+                hoja.range(f'J{fila}').value = validacion.mensaje
                 return {'exito': False, 'itf': 0}
             else:
                 hoja.range(f'I{fila}').value = 'NO CARGADO'
-                hoja.range(f'J{fila}').value = linea_msj
+                hoja.range(f'J{fila}').value = validacion.mensaje
                 return {'exito': False, 'itf': 0}
                 
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando cargo CTE: {e}")
             return {'exito': False, 'itf': 0}
@@ -362,97 +400,67 @@ class CTEOperations(BaseLogic):
         """Procesa el abono en cuenta corriente"""
         try:
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
             # Determinar código de transacción según tipo de cuenta
             cod_abono = self._determinar_codigo_abono(cta_abono)
             
             # Ejecutar secuencia de abono
-            pyautogui.press('f5')
-            pyperclip.copy('')
+            self.limpiar_pantalla()
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            pyautogui.write(cod_abono)
-            time.sleep(self.intervalo)
-            pyautogui.write(cta_abono)
-            time.sleep(self.intervalo)
-            pyautogui.write(self.formatear_monto(monto))
+            self.ingresar_transaccion(cod_abono)
+            self.escribir(cta_abono)
+            self.escribir(self.formatear_monto(monto))
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            pyautogui.press('enter')
-            time.sleep(self.intervalo)
-            pyautogui.write(memorandum)
+            self.presionar_y_esperar('enter')
+            self.escribir(memorandum)
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            time.sleep(self.intervalo)
-            pyautogui.press('tab')
-            pyautogui.press('tab')
-            pyautogui.press('tab')
-            time.sleep(self.intervalo)
-            pyautogui.write(glosa)
-            time.sleep(self.intervalo)
-            pyautogui.press('tab')
-            pyautogui.write(f"TRANSF DE CTA CTE BN {cta_cargo}")
+            self.presionar('tab')
+            self.presionar('tab')
+            self.presionar('tab')
+            self.escribir(glosa)
+            self.presionar('tab')
+            self.escribir(f"TRANSF DE CTA CTE BN {cta_cargo}")
             
             if self.detener_proceso:
                 return {'exito': False, 'itf': 0}
             
-            pyautogui.press('tab')
-            pyautogui.write("00000000000")
-            pyautogui.press('enter')
-            pyautogui.sleep(0.4)
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.4)
-            panel_emulacion = pyperclip.paste()
-            lineas_emulacion = panel_emulacion.splitlines()
-            
-            if len(lineas_emulacion) > 23:
-                linea_msj = lineas_emulacion[23].strip()
-            else:
-                linea_msj = "Error: Respuesta incompleta"
-            
-            if 'DATOS CORRECTOS PUEDE GRABAR' in linea_msj:
-                pyperclip.copy('')
-                time.sleep(0.3)
-                pyautogui.press('f4')  # Grabar
-                pyautogui.sleep(0.5)
-                pyautogui.hotkey('ctrl', 'c')
-                pyautogui.sleep(0.5)
-                panel_grabacion = pyperclip.paste()
-                lineas_grabacion = panel_grabacion.splitlines()
-                
-                # Extraer ITF del abono
-                itf_abono = 0
-                if len(lineas_grabacion) > 7:
-                    itf_texto = lineas_grabacion[7][61:].strip()
-                    if itf_texto:
-                        itf_abono = float(itf_texto)
+            self.presionar('tab')
+            self.escribir("00000000000")
+            lineas_emulacion = self.presionar_y_esperar('enter', linea_con_contenido(23))
+            validacion = parsear_pantalla('CTE_VALIDACION', lineas_emulacion)
+            
+            if validacion.es(DATOS_CORRECTOS):
+                # Grabar y esperar el mensaje de grabación
+                lineas_grabacion = self.grabar('f4', linea_con_contenido(23))
+                grabacion = parsear_pantalla('CTE_GRABACION', lineas_grabacion)
                 
-                if len(lineas_grabacion) > 23:
-                    mensaje_grabacion = lineas_grabacion[23].strip()
-                else:
-                    mensaje_grabacion = "Error en grabación"
+                # ITF del abono
+                itf_abono = grabacion.get('itf', 0)
                 
-                if 'GRABACION CORRECTA' in mensaje_grabacion:
+                if grabacion.es(GRABADO):
                     hoja.range(f'I{fila}').value = 'CARGADO Y ABONADO'
-                    hoja.range(f'K{fila}').value = mensaje_grabacion
+                    hoja.range(f'K{fila}').value = grabacion.mensaje
                     return {'exito': True, 'itf': itf_abono}
                 else:
                     hoja.range(f'I{fila}').value = 'NO ABONADO'
-                    hoja.range(f'K{fila}').value = mensaje_grabacion
+                    hoja.range(f'K{fila}').value = grabacion.mensaje
                     return {'exito': False, 'itf': itf_abono}
             else:
                 hoja.range(f'I{fila}').value = 'NO ABONADO'
-                hoja.range(f'K{fila}').value = linea_msj
+                hoja.range(f'K{fila}').value = validacion.mensaje
                 return {'exito': False, 'itf': 0}
                 
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando abono CTE: {e}")
             return {'exito': False, 'itf': 0}
@@ -537,81 +545,22 @@ class CTEOperations(BaseLogic):
                 messagebox.showerror("Error", "No se pudo obtener la configuración")
                 return False
             
-            # Tipos de datos esperados
-            dtype = {
-                'N°': str,
-                'Beneficiario': str,
-                'Nº  Cuenta': str,
-                'Tipo de Cuenta': str,
-                'Entidad Financiera': str,
-                'Monto (S/)': float
-            }
-            
             # Abrir archivos Excel
-            with xw.App(visible=False) as book_cte:
-                wb = book_cte.books.open(ruta_origen)
+            with backend_libros(config_manager.get_excel_writes()["backend"]).libro(ruta_origen) as wb:
                 hoja = wb.sheets['Corriente']
                 
-                # Leer todas las hojas del archivo fuente
-                hojas = pd.read_excel(ruta_xlc, dtype=dtype, sheet_name=None)
-                
-                hojas_validas = []
-                hoja_no_util = False
+                # Leer y combinar las hojas útiles del archivo fuente
+                df, hoja_no_util = leer_memo(ruta_xlc, CacheMemos.desde_config(config_manager.get_memo_cache()))
                 
-                # Validar hojas
-                for nombre_hoja, df in hojas.items():
-                    if "DETRACCION" in nombre_hoja.upper():
-                        continue
-                    if set(df.columns) == set(dtype.keys()):
-                        hojas_validas.append(df)
-                    else:
-                        hoja_no_util = True
-                
-                if not hojas_validas:
+                if df is None:
                     messagebox.showerror("Error", "No se encontraron hojas válidas en el archivo")
                     return False
                 
-                # Limpiar excel si se solicita
-                if limpiar:
-                    ultima_fila2 = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                    valor_c2 = hoja.range('C2').value
-                    if ultima_fila2 != 2 or valor_c2:
-                        hoja.range('2:90').delete()
-                        hoja.range('H2:I2').value = None
-                
-                # Combinar datos válidos
-                df = pd.concat(hojas_validas, ignore_index=True)
-                
-                # Procesar datos - filtrar solo cuentas corrientes
-                df['Nº  Cuenta'] = df['Nº  Cuenta'].str.replace('-', '', regex=False)
-                df_filtro = df.dropna(subset=['N°', 'Nº  Cuenta', 'Monto (S/)'])
-                df_cta_valido = df_filtro[df_filtro['Tipo de Cuenta'] == 'CORRIENTE']
-                df_final = df_cta_valido[df_cta_valido['Nº  Cuenta'].str.len() == 11]
-                df_final.reset_index(drop=True, inplace=True)
-                
-                # Encontrar última fila
-                ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                valor_b2 = hoja.range('B2').value
-                if valor_b2 is None:
-                    ultima_fila = 1
-                
-                # Procesar cada registro
-                for _, fila in df_final.iterrows():
-                    ultima_fila += 1
-                    
-                    beneficiario = BaseLogic("").limpiar_texto_beneficiario(fila['Beneficiario'])
-                    cuenta_abono = BaseLogic("").limpiar_numero_cuenta(fila['Nº  Cuenta'])
-                    monto = fila['Monto (S/)']
-                    
-                    # Escribir en excel
-                    hoja.range(f'B{ultima_fila}').value = memo
-                    hoja.range(f'C{ultima_fila}').value = nro_cuenta
-                    hoja.range(f'D{ultima_fila}').value = cuenta_abono
-                    hoja.range(f'E{ultima_fila}').value = monto
-                    hoja.range(f'F{ultima_fila}').value = f'MEMO {memo}-{year}-BN-7101'
-                    wb.save()
+                # Filtrar, normalizar y agregar las líneas de Cuentas Corrientes en un solo bloque
+                lineas = clasificar_memo(df, ['CTA_CTES'])['CTA_CTES']
+                escribir_en_plantilla(hoja, DESTINOS['CTA_CTES'], bloque_cte(lineas, memo, nro_cuenta, year), limpiar)
                 
-                wb.close()
+                wb.save()
                 libro_activo = True
                 
                 mensaje = "Revisar excel." if not hoja_no_util else 'Revisar excel. Algunas hojas se omitieron'
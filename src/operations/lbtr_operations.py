@@ -3,43 +3,97 @@ Operaciones LBTR (Sistema de Liquidación Bruta en Tiempo Real)
 Maneja transferencias interbancarias a través del sistema web LBTR
 """
 
-import time
 import os
+import http.client
 import pandas as pd
-import xlwings as xw
-import pyautogui
-import pyperclip
 from tkinter import messagebox
 import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
 try:
-    from selenium import webdriver
     from selenium.webdriver.common.by import By
-    from selenium.webdriver.edge.options import Options
-    from selenium.webdriver.common.action_chains import ActionChains
-    from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.support.ui import Select
-    from selenium.common.exceptions import NoSuchElementException, TimeoutException
-    from selenium.webdriver.common.keys import Keys
+    from selenium.common.exceptions import TimeoutException, WebDriverException
     SELENIUM_AVAILABLE = True
 except ImportError:
     SELENIUM_AVAILABLE = False
-    webdriver = None
 
+from src.core.backend_libros import backend_libros
 from src.core.base_logic import BaseLogic
+from src.core.cache_memos import CacheMemos
+from src.core.diario_ejecucion import EN_DUDA, TransaccionEnDuda
+from src.core.ingesta_memo import (
+    DESTINOS, bloque_lbtr, clasificar_memo, escribir_en_plantilla, leer_memo,
+)
+from src.core.registros import Registro
+from src.core.screen_conditions import linea_con_contenido
+from src.core.sesion_lbtr import SesionLBTR, formulario_listo
+from src.core.validacion_previa import (
+    ValidacionPrevia, cci_invalido, longitud_distinta, monto_invalido, monto_mayor, monto_menor,
+)
+from src.host.layouts import DATOS_CORRECTOS, GRABADO, parsear_pantalla
+from src.lbtr.api import ClienteAPILBTR
 from src.utils.config_manager import ConfigManager
 from src.utils.file_manager import FileManager
 
 
+# Asigna todos los campos y selects del formulario en una sola llamada y
+# dispara los eventos que escuchan los validadores de la página. Devuelve
+# los campos que no pudo llenar (ausentes, deshabilitados u opción inexistente)
+_LLENAR_FORMULARIO = """
+var campos = arguments[0], fallidos = [];
+campos.forEach(function (campo) {
+    var clave = campo[0], valor = campo[1];
+    var elemento = document.getElementById(clave) || document.getElementsByName(clave)[0];
+    if (!elemento || elemento.disabled) { fallidos.push(clave); return; }
+    if (elemento.tagName === 'SELECT' && !Array.prototype.some.call(
+            elemento.options, function (opcion) { return opcion.value === valor; })) {
+        fallidos.push(clave);
+        return;
+    }
+    elemento.focus();
+    elemento.value = valor;
+    elemento.dispatchEvent(new Event('input', {bubbles: true}));
+    elemento.dispatchEvent(new Event('change', {bubbles: true}));
+    elemento.dispatchEvent(new Event('blur'));
+});
+return fallidos;
+"""
+
+
+class RegistroLBTR(Registro):
+    """Fila de la plantilla LBTR (transferencias y su cargo)"""
+    
+    CAMPOS = {
+        'cuenta_cargo': ('Cuenta_cargo', 'cuenta'),
+        'obs_1': ('OBS_1', 'texto'),
+        'obs_2': ('OBS_2', 'texto'),
+        'beneficiario': ('Beneficiario', 'beneficiario'),
+        'cci': ('CCI', 'cuenta'),
+        'entidad_financiera': ('Entidad_Financiera', 'texto'),
+        'importe': ('Importe', 'monto'),
+        'ruc': ('RUC', 'texto'),
+        'domicilio': ('DOMICILIO', 'texto'),
+        'estado': ('ESTADO', 'valor'),
+    }
+    __slots__ = tuple(CAMPOS)
+
+
 class LBTROperations(BaseLogic):
     """Clase para manejar operaciones LBTR"""
     
+    COLUMNA_ESTADO = 'K'
+    
     def __init__(self):
         super().__init__("LBTR")
         self.config_manager = ConfigManager()
+        self.configurar_escritura(self.config_manager.get_excel_writes())
         self.file_manager = FileManager()
+        configuracion_lbtr = self.config_manager.get_lbtr_session()
+        self.sesion_web = SesionLBTR.obtener()
+        self.sesion_web.configurar(configuracion_lbtr)
+        self.modo_llenado = configuracion_lbtr["fill_mode"]
         
         # Verificar disponibilidad de Selenium
         if not SELENIUM_AVAILABLE:
@@ -155,7 +209,8 @@ class LBTROperations(BaseLogic):
           Returns:
             True si se completó correctamente
         """
-        if not SELENIUM_AVAILABLE:
+        api = self.config_manager.get_lbtr_api()
+        if not SELENIUM_AVAILABLE and not api["enabled"]:
             messagebox.showerror(
                 "Error",
                 "Selenium no está disponible. Instale las dependencias necesarias:\n"
@@ -165,8 +220,10 @@ class LBTROperations(BaseLogic):
             return False
         
         driver = None
+        cliente = None
         wb_lbtr = None
-        book_lbtr = None
+        hoja_lbtr = None
+        politica = None
         ruta_procesado = ''
         
         try:
@@ -182,86 +239,89 @@ class LBTROperations(BaseLogic):
             
             directorio = os.path.dirname(ruta_origen)
             
-            # Abrir Excel
-            book_lbtr = xw.App(visible=False)
-            wb_lbtr = book_lbtr.books.open(ruta_origen)
-            hoja_lbtr = wb_lbtr.sheets['LBTR']
-            
-            # Leer datos del Excel
-            tabla_lbtr = pd.read_excel(ruta_origen, sheet_name='LBTR', header=0, dtype=self.dicc_tabla)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb_lbtr, hoja_lbtr, politica, tabla_lbtr = self.abrir_plantilla(ruta_origen, 'LBTR', self.dicc_tabla)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_lbtr = set()
             cont_abonados = 0
             cont_no_abonados = 0
+            cont_en_duda = 0
             
             self.logger.info(f"Procesando {len(tabla_lbtr)} registros de LBTR")
             
-            # Configurar e iniciar Selenium
-            driver = self._init_selenium_driver(enlace)
-            if not driver:
-                return False
-            
-            # Hacer login
-            if not self._login_lbtr(driver, usuario, clave):
-                return False
+            # Validar el lote completo antes de abrir el navegador
+            registros = self.preparar_registros(tabla_lbtr, RegistroLBTR, self._validacion_previa(), hoja_lbtr)
+            hay_validas = any(pd.isna(registro.estado) and not registro.rechazo for registro in registros)
+            
+            if hay_validas and api["enabled"]:
+                # Enviar por la API de LBTR; si no responde se usa el navegador
+                cliente = self._abrir_api(api, enlace, usuario, clave)
+            if hay_validas and cliente is None:
+                # Pedir el navegador con la sesión iniciada y el formulario abierto
+                driver = self._prestar_driver(enlace, usuario, clave)
+                if not driver:
+                    return False
             
-            # Navegar al módulo de transferencias
-            if not self._navigate_to_transfers(driver):
-                return False
+            if cliente is not None:
+                cont_abonados, cont_no_abonados, cont_en_duda = self._transferir_por_api(
+                    cliente, registros, hoja_lbtr, politica, lista_memo_lbtr
+                )
             
-            # Procesar cada transferencia
-            for indice, fila in tabla_lbtr.iterrows():
+            # Procesar cada transferencia en el navegador
+            for registro in registros if driver else ():
                 if self.detener_proceso:
                     break
                 
-                fila_lbtr = indice + 2
-                
-                # Extraer datos de la fila
-                obs_1 = str(fila['OBS_1']).strip()
-                obs_2 = str(fila['OBS_2']).strip()
-                beneficiario = self.limpiar_texto_beneficiario(str(fila['Beneficiario']))
-                cci = self.limpiar_numero_cuenta(str(fila['CCI']))
-                entidad_financiera = str(fila['Entidad_Financiera']).strip()
-                importe = float(fila['Importe'])
-                ruc_completo = str(fila['RUC']).strip()
-                domicilio_completo = str(fila['DOMICILIO']).strip()
-                estado = fila['ESTADO']
-                
                 # Validar si debe procesarse
-                if not pd.isna(estado):
+                if not pd.isna(registro.estado):
+                    continue
+                if registro.rechazo:
+                    cont_no_abonados += 1
                     continue
                 
+                # Una sesión vencida a mitad del lote se recupera sin perder la fila
+                if self.sesion_web.vencida():
+                    self.logger.info("La sesión de LBTR venció durante el lote; se inicia de nuevo")
+                    self.sesion_web.reanudar(clave)
+                
                 # Extraer datos de RUC y domicilio
-                ruc = self._extract_after_colon(ruc_completo)
-                domicilio = self._extract_after_colon(domicilio_completo)
+                ruc = self._extract_after_colon(registro.ruc)
+                domicilio = self._extract_after_colon(registro.domicilio)
                 
                 # Extraer número de memo
-                titulo_memo = self._extract_memo_number(obs_1, obs_2)
+                titulo_memo = self._extract_memo_number(registro.obs_1, registro.obs_2)
                 if titulo_memo:
-                    if indice == 0:
-                        lista_memo_lbtr.add(titulo_memo)
-                    if titulo_memo not in lista_memo_lbtr:
-                        lista_memo_lbtr.add(titulo_memo)
+                    lista_memo_lbtr.add(titulo_memo)
                 
                 # Procesar transferencia
-                resultado = self._procesar_transferencia_lbtr(
-                    driver, hoja_lbtr, fila_lbtr, obs_1, obs_2, beneficiario,
-                    cci, entidad_financiera, importe, ruc, domicilio
-                )
+                try:
+                    resultado = self.transaccion_con_diario(
+                        hoja_lbtr, registro.fila,
+                        ('TRANSFERENCIA', registro.cci, registro.entidad_financiera, registro.importe,
+                         registro.obs_1, registro.obs_2, registro.beneficiario),
+                        lambda hoja: self._procesar_transferencia_lbtr(
+                            driver, hoja, registro.fila, registro.obs_1, registro.obs_2, registro.beneficiario,
+                            registro.cci, registro.entidad_financiera, registro.importe, ruc, domicilio
+                        )
+                    )
+                except TransaccionEnDuda as e:
+                    # Sin respuesta de LBTR no se envían más transferencias
+                    self.logger.error(f"Fila {registro.fila} en duda, se detiene el lote: {e}")
+                    cont_en_duda += 1
+                    break
                 
                 if resultado:
                     cont_abonados += 1
-                else:
+                elif resultado is not None:
                     cont_no_abonados += 1
                 
-                wb_lbtr.save()
-                time.sleep(5)  # Pausa entre transferencias
+                politica.fila_terminada()
             
             # Finalizar proceso
-            wb_lbtr.save()
+            politica.guardar()
             
-            if cont_abonados == 0 and cont_no_abonados == 0:
+            if cont_abonados == 0 and cont_no_abonados == 0 and cont_en_duda == 0:
                 messagebox.showinfo(
                     "Proceso no iniciado",
                     "No se ha realizado ningún abono, el excel ya está procesado o está vacío."
@@ -275,6 +335,7 @@ class LBTROperations(BaseLogic):
                     "Proceso terminado",
                     f"Transferencias realizadas = {cont_abonados}\n"
                     f"Transferencias fallidas = {cont_no_abonados}"
+                    + (f"\nTransferencias en duda (verificar en LBTR) = {cont_en_duda}" if cont_en_duda else "")
                 )
             
             return True
@@ -290,20 +351,23 @@ class LBTROperations(BaseLogic):
         finally:
             self.finalizar_operacion()
             
-            # Cerrar recursos
+            if cliente is not None:
+                cliente.cerrar()
+            
+            # Devolver el navegador: queda abierto para el siguiente lote
             if driver:
                 try:
-                    driver.quit()
-                    # Limpiar directorio temporal de browser
-                    self._cleanup_temp_browser_data()
+                    self.sesion_web.devolver()
                 except:
                     pass
             
-            if wb_lbtr and book_lbtr:
+            if wb_lbtr:
                 try:
-                    wb_lbtr.save()
-                    wb_lbtr.close()
-                    book_lbtr.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb_lbtr)
                 except:
                     pass
             
@@ -314,60 +378,121 @@ class LBTROperations(BaseLogic):
                 except:
                     pass
 
-    def _cleanup_temp_browser_data(self):
-        """Limpia los directorios temporales del navegador"""
+    def _prestar_driver(self, enlace: str, usuario: str, clave: str):
+        """Pide a la sesión de LBTR el navegador listo para transferir"""
+        # Verificar que existe el driver
+        driver_path = self._find_edge_driver()
+        if not driver_path:
+            messagebox.showerror(
+                "Error",
+                "No se encontró msedgedriver.exe\n"
+                "Descargue el driver desde: https://developer.microsoft.com/en-us/microsoft-edge/tools/webdriver/"
+            )
+            return None
+        
         try:
-            import shutil
-            temp_browser_dir = os.path.join(os.getcwd(), "temp_browser_data")
-            if os.path.exists(temp_browser_dir):
-                shutil.rmtree(temp_browser_dir, ignore_errors=True)
+            return self.sesion_web.prestar(enlace, usuario, clave, driver_path)
         except Exception as e:
-            self.logger.warning(f"No se pudo limpiar directorio temporal: {e}")
-      
-    def _init_selenium_driver(self, enlace: str):
-        """Inicializa el driver de Selenium"""
+            self.logger.error(f"Error iniciando sesión en LBTR: {e}")
+            messagebox.showerror("Error", str(e))
+            return None
+    
+    def _abrir_api(self, api: Dict, enlace: str, usuario: str, clave: str) -> Optional[ClienteAPILBTR]:
+        """
+        Cliente de la API de LBTR con la sesión iniciada
+        
+        Returns:
+            None si la API no responde; el lote sigue por el navegador
+        
+        Raises:
+            RuntimeError: Usuario o clave incorrectos
+        """
+        cliente = ClienteAPILBTR(enlace, api["routes"], api["connections"], api["timeout"], api["base"])
         try:
-            # Verificar que existe el driver
-            driver_path = self._find_edge_driver()
-            if not driver_path:
-                messagebox.showerror(
-                    "Error",
-                    "No se encontró msedgedriver.exe\n"
-                    "Descargue el driver desde: https://developer.microsoft.com/en-us/microsoft-edge/tools/webdriver/"
-                )
-                return None
-            
-            # Configurar el servicio de Edge
-            servicio = webdriver.EdgeService(executable_path=driver_path)
-            edge_options = Options()
-            edge_options.add_argument('--ignore-certificate-errors')
-            edge_options.add_argument("--inprivate")
-            # Agregar directorio único de datos de usuario para evitar conflictos
-            user_data_dir = os.path.join(os.getcwd(), "temp_browser_data", str(int(time.time())))
-            edge_options.add_argument(f"--user-data-dir={user_data_dir}")
-            # Deshabilitar extensiones y otras características que pueden causar problemas
-            edge_options.add_argument("--disable-extensions")
-            edge_options.add_argument("--disable-plugins")
-            edge_options.add_argument("--no-sandbox")
-            edge_options.add_argument("--disable-dev-shm-usage")
-            
-            # Crear driver
-            driver = webdriver.Edge(service=servicio, options=edge_options)
-            driver.maximize_window()
-            
-            # Navegar a la página
-            driver.get(enlace)
-            
-            # Configurar un tiempo de espera implícito
-            driver.implicitly_wait(5)  # Espera hasta 5 segundos para encontrar elementos
-            
-            return driver
-            
-        except Exception as e:
-            self.logger.error(f"Error inicializando Selenium: {e}")
-            messagebox.showerror("Error", f"Error inicializando navegador: {e}")
+            cliente.iniciar_sesion(usuario, clave)
+            return cliente
+        except (OSError, http.client.HTTPException) as e:
+            self.logger.warning(f"API de LBTR no disponible ({e}); se usa el navegador")
+            cliente.cerrar()
             return None
     
+    def _transferir_por_api(self, cliente: ClienteAPILBTR, registros, hoja, politica,
+                            lista_memos: set) -> Tuple[int, int, int]:
+        """
+        Envía las transferencias válidas por la API, hasta api.connections a la vez
+        
+        Returns:
+            (transferencias realizadas, transferencias fallidas o rechazadas,
+            transferencias en duda)
+        """
+        cont_no_abonados = 0
+        pendientes = []
+        documentos = {}
+        for registro in registros:
+            if not pd.isna(registro.estado):
+                continue
+            if registro.rechazo:
+                cont_no_abonados += 1
+                continue
+            
+            titulo_memo = self._extract_memo_number(registro.obs_1, registro.obs_2)
+            if titulo_memo:
+                lista_memos.add(titulo_memo)
+            
+            # Mismos datos de diario que en el navegador: una fila grabada por
+            # un camino no se reenvía por el otro
+            documentos[registro.fila] = (self._extract_after_colon(registro.ruc),
+                                         self._extract_after_colon(registro.domicilio))
+            pendientes.append((registro.fila, 'TRANSFERENCIA', registro.cci, registro.entidad_financiera,
+                               registro.importe, registro.obs_1, registro.obs_2, registro.beneficiario))
+        
+        resultados = self.procesar_pendientes(
+            [cliente] * cliente.conexiones, pendientes,
+            lambda operacion, sesion, hoja_fila, p: operacion._transferir_api(
+                sesion, hoja_fila, p, *documentos[p[0]]
+            ),
+            hoja, politica.fila_terminada
+        )
+        cont_en_duda = sum(1 for resultado in resultados if resultado == EN_DUDA)
+        cont_abonados = sum(1 for resultado in resultados if resultado is True)
+        cont_no_abonados += sum(1 for resultado in resultados if resultado is False)
+        return cont_abonados, cont_no_abonados, cont_en_duda
+    
+    def _transferir_api(self, cliente: ClienteAPILBTR, hoja, pendiente, ruc: str, domicilio: str) -> bool:
+        """Envía una transferencia por la API y escribe la respuesta de LBTR en ESTADO"""
+        fila, _, cci, entidad_financiera, importe, obs_1, obs_2, beneficiario = pendiente
+        valor_entidad = self._obtener_codigo_entidad(entidad_financiera)
+        if valor_entidad is None:
+            hoja.range(f'K{fila}').value = "Error: entidad financiera no reconocida."
+            return False
+        
+        try:
+            exito, mensaje = cliente.transferir({
+                "concepto": "1",
+                "entidad": valor_entidad,
+                "monto": self.formatear_monto(importe),
+                "observacion": obs_1,
+                "observacionITF": obs_2,
+                "numCuentaBen": cci,
+                "nombreBen": beneficiario,
+                "tipoDocBen": "5",
+                "direccionBen": domicilio,
+                "numDocumentoBen": ruc,
+            })
+        except (OSError, http.client.HTTPException) as e:
+            # Sin respuesta no se sabe si LBTR la registró: la fila queda en
+            # duda en el diario y no se reenvía en la próxima ejecución
+            self.logger.error(f"Sin respuesta de LBTR en la fila {fila}: {e}")
+            raise TransaccionEnDuda("VERIFICAR EN LBTR: sin respuesta del servidor") from e
+        
+        hoja.range(f'K{fila}').value = mensaje
+        return exito
+    
+    def activar_ventana(self, ventana):
+        """El cliente de la API de LBTR no tiene ventana; las demás sesiones son del host"""
+        if not isinstance(ventana, ClienteAPILBTR):
+            super().activar_ventana(ventana)
+    
     def _find_edge_driver(self) -> Optional[str]:
         """Busca el driver de Edge en ubicaciones comunes"""
         possible_paths = [
@@ -383,183 +508,141 @@ class LBTROperations(BaseLogic):
         
         return None
     
-    def _login_lbtr(self, driver, usuario: str, clave: str) -> bool:
-        """Realiza el login en el sistema LBTR"""
-        try:
-            # Encontrar campos de login
-            text_user = driver.find_element(By.NAME, "user")
-            text_user.send_keys(usuario)
-            
-            text_password = driver.find_element(By.NAME, "password")
-            text_password.send_keys(clave)
-            
-            # Hacer click en el botón de login
-            submit_button = driver.find_element(By.ID, "btnSave")
-            submit_button.click()
-            
-            time.sleep(2)
-            
-            # Verificar si el login fue exitoso
-            return self._verificar_login_exitoso(driver)
-            
-        except Exception as e:
-            self.logger.error(f"Error en login LBTR: {e}")
-            return False
-    
-    def _verificar_login_exitoso(self, driver) -> bool:
-        """Verifica si el login fue exitoso"""
-        try:
-            # Intentar encontrar mensaje de error
-            try:
-                mensaje_login = driver.find_element(By.XPATH, '//*[@id="principal-login"]/div[2]/div/form/div[1]/div[6]')
-                mensaje_texto = mensaje_login.text
-                
-                if "Usuario y/o Contraseña incorrecta" in mensaje_texto:
-                    messagebox.showerror("Error", "Usuario y/o clave incorrectos.")
-                    return False
-            except NoSuchElementException:
-                # Si no encuentra el mensaje de error, el login fue exitoso
-                pass
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error verificando login: {e}")
-            return False
-    
-    def _navigate_to_transfers(self, driver) -> bool:
-        """Navega al módulo de transferencias interbancarias"""
-        try:
-            # Localizar el menú principal
-            menu = driver.find_element(By.ID, "dropdownMenu3")
-            actions = ActionChains(driver)
-            actions.move_to_element(menu).perform()
-            
-            driver.implicitly_wait(5)
-            
-            # Navegar a transferencia interbancaria
-            submenu_transferencia = driver.find_element(By.XPATH, "//a[text()='Transferencia interbancaria']")
-            actions.move_to_element(submenu_transferencia).perform()
-            
-            driver.implicitly_wait(5)
-            time.sleep(1)
-            
-            # Hacer click en "Nuevo"
-            nuevo = driver.find_element(By.LINK_TEXT, "Nuevo")
-            actions.move_to_element(nuevo).perform()
-            driver.implicitly_wait(2)
-            nuevo.click()
-            
-            time.sleep(3)
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error navegando a transferencias: {e}")
-            return False
-    
     def _procesar_transferencia_lbtr(self, driver, hoja, fila: int, obs_1: str, obs_2: str,
                                    beneficiario: str, cci: str, entidad_financiera: str,
                                    importe: float, ruc: str, domicilio: str) -> bool:
-        """Procesa una transferencia LBTR individual"""
+        """
+        Procesa una transferencia LBTR individual
+        
+        Raises:
+            TransaccionEnDuda: Si después de Guardar no llegó la respuesta de LBTR
+        """
+        guardada = False  # Se pulsó Guardar: desde aquí la transferencia pudo registrarse
+        resultado = None
         try:
-            # Seleccionar concepto
-            concepto = Select(driver.find_element(By.ID, "selConcepto"))
-            concepto.select_by_value("1")
-            
-            # Seleccionar entidad financiera
+            # Código de la entidad financiera
             valor_entidad = self._obtener_codigo_entidad(entidad_financiera)
-            if valor_entidad is not None:
-                entidad = Select(driver.find_element(By.ID, "selEntidad"))
-                entidad.select_by_value(valor_entidad)
-            else:
+            if valor_entidad is None:
                 hoja.range(f'K{fila}').value = "Error: entidad financiera no reconocida."
                 return False
             
-            # Ingresar monto
-            text_monto = driver.find_element(By.NAME, "monto")
-            text_monto.click()
-            text_monto.clear()
-            text_monto.send_keys(self.formatear_monto(importe))
-            
-            # Ingresar observación 1
-            text_observacion = driver.find_element(By.NAME, "observacion")
-            text_observacion.click()
-            text_observacion.clear()
-            text_observacion.send_keys(obs_1)
-            
-            # Ingresar observación ITF
-            text_observacion_itf = driver.find_element(By.NAME, "observacionITF")
-            text_observacion_itf.click()
-            text_observacion_itf.clear()
-            text_observacion_itf.send_keys(obs_2)
-            
-            # Ingresar CCI
-            text_cci = driver.find_element(By.NAME, "numCuentaBen")
-            text_cci.click()
-            text_cci.clear()
-            text_cci.send_keys(cci)
-            
-            # Ingresar beneficiario
-            text_nombre = driver.find_element(By.NAME, "nombreBen")
-            text_nombre.click()
-            text_nombre.clear()
-            text_nombre.send_keys(beneficiario)
-            
-            # Seleccionar tipo de documento (RUC)
-            tipo_doc = Select(driver.find_element(By.ID, "selTipoDocBen"))
-            tipo_doc.select_by_value("5")
-            
-            # Ingresar dirección
-            text_direccion = driver.find_element(By.NAME, "direccionBen")
-            text_direccion.click()
-            text_direccion.clear()
-            text_direccion.send_keys(domicilio)
-            
-            # Ingresar número de documento (RUC)
-            text_doc = driver.find_element(By.NAME, "numDocumentoBen")
-            text_doc.click()
-            text_doc.clear()
-            text_doc.send_keys(ruc)
-            
-            time.sleep(1)
-            
-            # Guardar transferencia
-            guardar_button = driver.find_element(By.XPATH, "//button[@access='opcion.nuevointerbancaria.guardar']")
+            # Esperar el formulario habilitado y con sus opciones cargadas
+            self.sesion_web.esperar(formulario_listo)
+            
+            # Valores del formulario en el orden en que los pide la página
+            # (el tipo de documento antes del número que valida)
+            campos = [
+                ("selConcepto", "1"),
+                ("selEntidad", valor_entidad),
+                ("monto", self.formatear_monto(importe)),
+                ("observacion", obs_1),
+                ("observacionITF", obs_2),
+                ("numCuentaBen", cci),
+                ("nombreBen", beneficiario),
+                ("selTipoDocBen", "5"),
+                ("direccionBen", domicilio),
+                ("numDocumentoBen", ruc),
+            ]
+            if self.modo_llenado != "script" or not self._llenar_por_script(driver, campos):
+                self._llenar_por_teclado(driver, campos)
+            
+            # Guardar transferencia cuando el formulario lo habilite
+            guardar_button = self.sesion_web.esperar(EC.element_to_be_clickable(
+                (By.XPATH, "//button[@access='opcion.nuevointerbancaria.guardar']")))
             guardar_button.click()
+            guardada = True
             
             # Esperar respuesta del modal
-            wait = WebDriverWait(driver, 12)
-            wait.until(EC.visibility_of_element_located((By.ID, "mdlMensajeInterbancaria")))
+            self.sesion_web.esperar(EC.visibility_of_element_located((By.ID, "mdlMensajeInterbancaria")))
             
             # Obtener mensaje de respuesta
             mensaje_elemento = driver.find_element(By.XPATH, '//*[@id="mdlMensajeInterbancaria"]/div[2]/div/div[2]/div[1]')
-            mensaje_texto = mensaje_elemento.text
+            mensaje_texto = self.sesion_web.esperar(lambda _: mensaje_elemento.text.strip())
             
             # Procesar respuesta
-            if "La operación se realizó satisfactoriamente" in mensaje_texto:
-                hoja.range(f'K{fila}').value = mensaje_texto
-                resultado = True
-            else:
-                hoja.range(f'K{fila}').value = mensaje_texto
-                resultado = False
+            hoja.range(f'K{fila}').value = mensaje_texto
+            resultado = "La operación se realizó satisfactoriamente" in mensaje_texto
             
             # Cerrar modal
             btn_mensaje = driver.find_element(By.XPATH, '//*[@id="mdlMensajeInterbancaria"]/div[2]/div/div[2]/div[2]/button')
             btn_mensaje.click()
-            driver.implicitly_wait(4)
+            self.sesion_web.esperar(EC.invisibility_of_element_located((By.ID, "mdlMensajeInterbancaria")))
             
             if not resultado:
-                # Si hay error, refrescar página para siguiente operación
-                driver.refresh()
-                time.sleep(5)
-                # Re-navegar al módulo
-                self._navigate_to_transfers(driver)
+                # Si hay error, recargar la aplicación y volver al formulario
+                self.sesion_web.recargar()
             
             return resultado
             
         except Exception as e:
             self.logger.error(f"Error procesando transferencia LBTR: {e}")
+            # El formulario o el modal quedaron en un estado desconocido
+            try:
+                self.sesion_web.recargar()
+            except Exception as error_recarga:
+                self.logger.warning(f"No se pudo recargar LBTR: {error_recarga}")
+            if guardada and resultado is None:
+                raise TransaccionEnDuda("VERIFICAR EN LBTR: sin respuesta al guardar la transferencia") from e
+            return bool(resultado)
+    
+    def _llenar_por_script(self, driver, campos) -> bool:
+        """
+        Llena el formulario en una sola ida y vuelta con execute_script
+        
+        Returns:
+            False si algún campo no estaba o una opción no existía; el
+            llamador completa entonces el formulario por teclado
+        """
+        try:
+            fallidos = driver.execute_script(_LLENAR_FORMULARIO, campos)
+        except WebDriverException as e:
+            self.logger.warning(f"No se pudo llenar el formulario LBTR por script: {e}")
             return False
+        if fallidos:
+            self.logger.warning(f"Campos LBTR no llenados por script: {', '.join(fallidos)}")
+            return False
+        return True
+    
+    def _llenar_por_teclado(self, driver, campos):
+        """Llena el formulario campo por campo como lo haría el usuario"""
+        for clave, valor in campos:
+            if clave.startswith("sel"):
+                Select(driver.find_element(By.ID, clave)).select_by_value(valor)
+            else:
+                campo = driver.find_element(By.NAME, clave)
+                campo.click()
+                campo.clear()
+                campo.send_keys(valor)
+    
+    def _validacion_previa(self) -> ValidacionPrevia:
+        """Reglas de validación previa de LBTR con los límites de info.json"""
+        limites = self.config_manager.get_limites("LBTR")
+        
+        def sin_memo(tabla):
+            return [self._extract_memo_number(obs_1, obs_2) is None
+                    for obs_1, obs_2 in zip(tabla['obs_1'], tabla['obs_2'])]
+        
+        def entidad_desconocida(tabla):
+            desconocidas = [entidad for entidad in tabla['entidad_financiera'].unique()
+                            if self._obtener_codigo_entidad(entidad) is None]
+            return tabla['entidad_financiera'].isin(desconocidas)
+        
+        reglas = [
+            ('Falta el memorándum', sin_memo),
+            ('Importe no válido', monto_invalido('importe')),
+            (f"Importe menor a S/{limites['min_amount']:,.2f}", monto_menor('importe', limites['min_amount'])),
+            ('Formato no correcto de CCI', longitud_distinta('cci', limites['cci_length'])),
+        ]
+        if limites['cci_check_digits']:
+            reglas.append(('Dígitos de control del CCI incorrectos', cci_invalido('cci')))
+        reglas.append(("Error: entidad financiera no reconocida.", entidad_desconocida))
+        if limites['max_amount'] is not None:
+            reglas.append((f"Importe superior a los S/{limites['max_amount']:,.2f}",
+                           monto_mayor('importe', limites['max_amount'])))
+        return ValidacionPrevia(
+            lambda tabla: tabla['estado'].isna(), reglas,
+            repetidas=('cci', 'importe', 'obs_1', 'obs_2')
+        )
     
     def _obtener_codigo_entidad(self, entidad_financiera: str) -> Optional[str]:
         """Obtiene el código de entidad financiera"""
@@ -629,7 +712,8 @@ class LBTROperations(BaseLogic):
             True si se completó correctamente
         """
         wb_lbtr = None
-        book_lbtr = None
+        hoja_lbtr = None
+        politica = None
         
         try:
             # Definir estructura para archivo de historial
@@ -647,60 +731,57 @@ class LBTROperations(BaseLogic):
                 'ESTADO': str
             }
             
-            # Abrir archivo de historial
-            book_lbtr = xw.App(visible=False)
-            wb_lbtr = book_lbtr.books.open(archivo_xlc)
-            hoja_lbtr = wb_lbtr.sheets['LBTR']
-            
-            # Leer datos
-            tabla_lbtr = pd.read_excel(archivo_xlc, sheet_name='LBTR', header=0, dtype=dicc_tabla_historial)
+            # Abrir la plantilla y leer sus filas en una sola pasada
+            wb_lbtr, hoja_lbtr, politica, tabla_lbtr = self.abrir_plantilla(archivo_xlc, 'LBTR', dicc_tabla_historial)
             
             fecha_actual = self.get_fecha_actual()
             lista_memo_lbtr = set()
             cont_cargados = 0
             cont_no_cargados = 0
+            cont_en_duda = 0
             
             self.logger.info(f"Procesando cargo LBTR desde: {archivo_xlc}")
             
             # Procesar cada fila exitosa
-            for indice, fila in tabla_lbtr.iterrows():
-                fila_lbtr = indice + 2
-                
-                cuenta = self.limpiar_numero_cuenta(str(fila['Cuenta_cargo']))
-                obs_1 = str(fila['OBS_1']).strip()
-                obs_2 = str(fila['OBS_2']).strip()
-                importe = float(fila['Importe'])
-                estado = fila['ESTADO']
-                
+            for registro in self.preparar_registros(tabla_lbtr, RegistroLBTR):
                 # Extraer número de memo
-                titulo_memo = self._extract_memo_number(obs_1, obs_2)
+                titulo_memo = self._extract_memo_number(registro.obs_1, registro.obs_2)
                 if titulo_memo:
-                    if indice == 0:
-                        lista_memo_lbtr.add(titulo_memo)
-                    if titulo_memo not in lista_memo_lbtr:
-                        lista_memo_lbtr.add(titulo_memo)
+                    lista_memo_lbtr.add(titulo_memo)
                 
                 # Procesar solo transferencias exitosas
-                if "La operación se realizó satisfactoriamente" in str(estado):
-                    resultado = self._procesar_cargo_lbtr_individual(
-                        ventana, hoja_lbtr, fila_lbtr, cuenta, importe, titulo_memo, obs_1
-                    )
+                if "La operación se realizó satisfactoriamente" in str(registro.estado):
+                    try:
+                        resultado = self.transaccion_con_diario(
+                            hoja_lbtr, registro.fila,
+                            ('CARGO', registro.cuenta_cargo, registro.importe, titulo_memo, registro.obs_1),
+                            lambda hoja: self._procesar_cargo_lbtr_individual(
+                                ventana, hoja, registro.fila, registro.cuenta_cargo, registro.importe,
+                                titulo_memo, registro.obs_1
+                            )
+                        )
+                    except TransaccionEnDuda as e:
+                        # Sin respuesta del host no se envían más cargos
+                        self.logger.error(f"Fila {registro.fila} en duda, se detiene el lote: {e}")
+                        cont_en_duda += 1
+                        break
                     
                     if resultado:
                         cont_cargados += 1
-                    else:
+                    elif resultado is not None:
                         cont_no_cargados += 1
                     
-                    wb_lbtr.save()
+                    politica.fila_terminada()
             
-            wb_lbtr.close()
+            politica.guardar()
             
             messagebox.showinfo(
                 "FINALIZADO",
                 f"Cargos terminados.\n"
                 f"Exitosos: {cont_cargados}\n"
                 f"Fallidos: {cont_no_cargados}\n"
-                "Revisar excel."
+                + (f"En duda (verificar en el host): {cont_en_duda}\n" if cont_en_duda else "")
+                + "Revisar excel."
             )
             
             return True
@@ -710,11 +791,13 @@ class LBTROperations(BaseLogic):
             messagebox.showerror("ERROR", f"Error procesando cargo LBTR: {e}")
             return False
         finally:
-            if wb_lbtr and book_lbtr:
+            if wb_lbtr:
                 try:
-                    wb_lbtr.save()
-                    wb_lbtr.close()
-                    book_lbtr.quit()
+                    try:
+                        if politica is not None:
+                            politica.cerrar()
+                    finally:
+                        self.libros.devolver(wb_lbtr)
                 except:
                     pass
     
@@ -726,85 +809,50 @@ class LBTROperations(BaseLogic):
             monto_total = self.formatear_monto(importe + 14)
             
             # Activar ventana del emulador
-            if not ventana.isActive:
-                ventana.maximize()
-                ventana.activate()
+            self.activar_ventana(ventana)
             
-            # Limpiar clipboard
-            pyperclip.copy('')
-            pyautogui.press('f5')
-            pyperclip.copy('')
+            # Limpiar pantalla
+            self.limpiar_pantalla()
             
             # Ejecutar secuencia de cargo
-            pyautogui.write('042')  # Código de transacción
-            time.sleep(self.intervalo)
-            pyautogui.write(cuenta)  # Cuenta
-            time.sleep(self.intervalo)
-            pyautogui.write(monto_total)  # Importe total
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.write(memorandum)  # Documento
-            time.sleep(self.intervalo)
-            pyautogui.press('Tab')
-            time.sleep(self.intervalo)
-            pyautogui.write('84')  # Motivo
-            time.sleep(self.intervalo)
+            self.ingresar_transaccion('042')  # Código de transacción
+            self.escribir(cuenta)  # Cuenta
+            self.escribir(monto_total)  # Importe total
+            self.presionar('Tab')
+            self.escribir(memorandum)  # Documento
+            self.presionar('Tab')
+            self.escribir('84')  # Motivo
             
             # Glosa 1 - Memorándum
             if len(obs_1) <= 50:
-                pyautogui.write(obs_1)
-                pyautogui.press('Tab')
+                self.escribir(obs_1)
+                self.presionar('Tab')
             else:
-                pyautogui.write(obs_1[:50])
+                self.escribir(obs_1[:50])
             
             # Glosa 2 - Detalle del importe
             glosa_importe = f'Importe {importe} comision S/14'
-            pyautogui.write(glosa_importe)
-            pyautogui.press('Enter')
-            time.sleep(self.intervalo)
+            self.escribir(glosa_importe)
             
             # Capturar respuesta del emulador
-            pyautogui.hotkey('ctrl', 'c')
-            pyautogui.sleep(0.3)
-            panel = pyperclip.paste()
-            pyautogui.sleep(0.2)
-            
-            lineas = panel.splitlines()
-            if len(lineas) > 23:
-                msj_cargo = lineas[23].strip()
-            else:
-                msj_cargo = "Error: Respuesta incompleta del sistema"
+            lineas = self.presionar_y_esperar('Enter', linea_con_contenido(23))
+            validacion = parsear_pantalla('LBTR_CARGO_VALIDACION', lineas)
             
-            if "CORRECTOS" in msj_cargo:
+            if validacion.es(DATOS_CORRECTOS):
                 # Grabar operación
-                pyautogui.sleep(0.2)
-                pyautogui.press('f4')  # Grabar
-                pyautogui.sleep(0.2)
-                pyautogui.hotkey('ctrl', 'c')
-                pyautogui.sleep(0.3)
-                
-                panel2 = pyperclip.paste()
-                lineas2 = panel2.splitlines()
-                
-                if len(lineas2) > 23:
-                    msj_cargo2 = lineas2[23].strip()
-                else:
-                    msj_cargo2 = "Error en grabación"
-                
-                hoja.range(f'K{fila}').value = msj_cargo2
+                lineas2 = self.grabar('f4', linea_con_contenido(23))
+                grabacion = parsear_pantalla('LBTR_CARGO_GRABACION', lineas2)
                 
-                if "GRABACION CORRECTA" in msj_cargo2:
-                    resultado = True
-                else:
-                    resultado = False
+                hoja.range(f'K{fila}').value = grabacion.mensaje
+                resultado = grabacion.es(GRABADO)
             else:
-                hoja.range(f'K{fila}').value = msj_cargo
+                hoja.range(f'K{fila}').value = validacion.mensaje
                 resultado = False
             
-            pyperclip.copy('')
             return resultado
             
+        except TransaccionEnDuda:
+            raise
         except Exception as e:
             self.logger.error(f"Error procesando cargo LBTR individual: {e}")
             return False
@@ -840,112 +888,27 @@ class LBTROperations(BaseLogic):
                 messagebox.showerror("Error", "No se pudo obtener la configuración")
                 return False
             
-            # Tipos de datos esperados
-            dtype = {
-                'N°': str,
-                'Beneficiario': str,
-                'Nº  Cuenta': str,
-                'Tipo de Cuenta': str,
-                'Entidad Financiera': str,
-                'Monto (S/)': float
-            }
-            
             # Abrir archivos Excel
-            with xw.App(visible=True) as book:
-                wb = book.books.open(ruta_origen)
+            with backend_libros(config_manager.get_excel_writes()["backend"]).libro(ruta_origen) as wb:
                 hoja = wb.sheets['LBTR']
                 
-                # Leer todas las hojas del archivo fuente
-                hojas = pd.read_excel(ruta_xlc, dtype=dtype, sheet_name=None)
-                
-                hojas_validas = []
-                hoja_no_util = False
+                # Leer y combinar las hojas útiles del archivo fuente
+                df, hoja_no_util = leer_memo(ruta_xlc, CacheMemos.desde_config(config_manager.get_memo_cache()))
                 
-                # Validar hojas
-                for nombre_hoja, df in hojas.items():
-                    if "DETRACCION" in nombre_hoja.upper():
-                        continue
-                    if set(df.columns) == set(dtype.keys()):
-                        hojas_validas.append(df)
-                    else:
-                        hoja_no_util = True
-                
-                if not hojas_validas:
+                if df is None:
                     messagebox.showerror("Error", "No se encontraron hojas válidas en el archivo")
                     return False
                 
-                # Combinar datos válidos
-                df = pd.concat(hojas_validas, ignore_index=True)
-                
-                # Eliminar transferencias del Banco Nación
-                df = df.drop(df[df['Entidad Financiera'] == 'NACION'].index)
-                
-                # Limpiar excel si se solicita
-                if limpiar:
-                    ultima_fila2 = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                    valor_e2 = hoja.range('E2').value
-                    if ultima_fila2 == 2 or valor_e2:
-                        hoja.range('2:90').delete()
-                        hoja.range('K2').value = None
-                        ultima_fila = 1
-                
-                # Encontrar última fila
-                ultima_fila = hoja.range('E' + str(hoja.cells.last_cell.row)).end('up').row
-                valor_b2 = hoja.range('D2').value
-                if valor_b2 is None:
-                    ultima_fila = 1
-                
-                es_lbtr = False
-                
-                # Procesar cada registro
-                for indice, fila in df.iterrows():
-                    numero = fila['N°']
-                    beneficiario = fila['Beneficiario']
-                    nro_cuenta_cci = fila['Nº  Cuenta']
-                    tipo_cuenta = fila['Tipo de Cuenta']
-                    entidad = fila['Entidad Financiera']
-                    monto = fila['Monto (S/)']
-                    
-                    # Verificar si es registro válido
-                    if pd.isna(beneficiario):
-                        continue
-                    elif numero and monto > 9999.99:
-                        # Es una transferencia LBTR
-                        ultima_fila += 1
-                        es_lbtr = True
-                        
-                        hoja.range(f'B{ultima_fila}').value = nro_cuenta
-                        beneficiario_limpio = BaseLogic("").limpiar_texto_beneficiario(str(beneficiario))
-                        hoja.range(f'E{ultima_fila}').value = beneficiario_limpio
-                        hoja.range(f'F{ultima_fila}').value = nro_cuenta_cci
-                        hoja.range(f'G{ultima_fila}').value = entidad
-                        hoja.range(f'H{ultima_fila}').value = monto
-                        
-                        # Configurar observaciones según posición
-                        if posicion == 1:
-                            hoja.range(f'C{ultima_fila}').value = f"MEMO {memo}-{year}-BN-7101 ANEXO {numero}"
-                            hoja.range(f'D{ultima_fila}').value = glosa
-                        else:
-                            hoja.range(f'D{ultima_fila}').value = f"MEMO {memo}-{year}-BN-7101 ANEXO {numero}"
-                            hoja.range(f'C{ultima_fila}').value = glosa
-                    elif numero and monto < 10000:
-                        es_lbtr = False
-                    
-                    # Procesar información adicional (RUC y DOMICILIO)
-                    if es_lbtr and pd.isna(numero):
-                        if "RUC" in str(beneficiario):
-                            hoja.range(f'I{ultima_fila}').value = beneficiario
-                        elif "DOMICILIO" in str(beneficiario):
-                            hoja.range(f'J{ultima_fila}').value = beneficiario
-                    
-                    wb.save()
-                    finalizado = True
+                # Armar una fila por transferencia (sin Banco Nación) y agregarlas en un solo bloque
+                lineas = clasificar_memo(df, ['LBTR'])['LBTR']
+                bloque = bloque_lbtr(lineas, memo, year, nro_cuenta, posicion, glosa)
+                escribir_en_plantilla(hoja, DESTINOS['LBTR'], bloque, limpiar)
+                finalizado = not lineas.empty
                 
                 mensaje = "Revisar excel." if not hoja_no_util else 'Revisar excel. Algunas hojas se omitieron'
                 messagebox.showinfo("Proceso terminado", mensaje)
                 
                 wb.save()
-                wb.close()
                 
             return True
             
@@ -962,13 +925,3 @@ class LBTROperations(BaseLogic):
                     os.startfile(ruta_origen)
                 except:
                     pass
-    
-    def _cleanup_temp_browser_data(self):
-        """Limpia los directorios temporales del navegador"""
-        try:
-            import shutil
-            temp_browser_dir = os.path.join(os.getcwd(), "temp_browser_data")
-            if os.path.exists(temp_browser_dir):
-                shutil.rmtree(temp_browser_dir, ignore_errors=True)
-        except Exception as e:
-            self.logger.warning(f"No se pudo limpiar directorio temporal: {e}")
\ No newline at end of file
@@ -220,6 +220,149 @@ class ConfigManager:
         except Exception:
             return {}
     
+    def get_host_session(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de la sesión con el host
+        
+        Returns:
+            Diccionario con backend ('gui' o 'tn3270'), host, port, terminal_type,
+            timeout y sessions (sesiones TN3270 simultáneas permitidas)
+        """
+        configuracion = {
+            "backend": "gui",
+            "host": "",
+            "port": 23,
+            "terminal_type": "IBM-3278-2-E",
+            "timeout": 10,
+            "sessions": 1
+        }
+        configuracion.update(self.get_config().get("host_session", {}))
+        return configuracion
+    
+    def get_excel_writes(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de escritura de resultados en Excel
+        
+        Returns:
+            Diccionario con flush_rows (filas acumuladas antes de escribirlas
+            en la hoja; 0 solo al guardar), save_every_rows y save_every_seconds
+            (cuándo guardar el libro; 0 desactiva cada criterio), journal,
+            journal_file (diario de ejecución SQLite, ruta absoluta),
+            warm_excel (iniciar Excel oculto al abrir la aplicación) y
+            backend ('xlwings' para editar las plantillas en Excel u
+            'openpyxl' para editar el archivo sin Excel)
+        """
+        configuracion = {
+            "flush_rows": 50,
+            "save_every_rows": 20,
+            "save_every_seconds": 60,
+            "journal": True,
+            "journal_file": "logs/diario_ejecucion.db",
+            "warm_excel": True,
+            "backend": "xlwings"
+        }
+        configuracion.update(self.get_config().get("excel_writes", {}))
+        ruta = Path(configuracion["journal_file"])
+        if not ruta.is_absolute():
+            ruta = self.base_dir / ruta
+        configuracion["journal_file"] = str(ruta)
+        return configuracion
+    
+    def get_memo_cache(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de la caché de memos leídos
+        
+        Returns:
+            Diccionario con enabled, dir (carpeta de la caché, ruta absoluta)
+            y max_mb (tamaño máximo; se descartan los memos menos usados)
+        """
+        configuracion = {
+            "enabled": True,
+            "dir": "logs/cache_memos",
+            "max_mb": 200
+        }
+        configuracion.update(self.get_config().get("memo_cache", {}))
+        ruta = Path(configuracion["dir"])
+        if not ruta.is_absolute():
+            ruta = self.base_dir / ruta
+        configuracion["dir"] = str(ruta)
+        return configuracion
+    
+    def get_limites(self, tipo_operacion: str) -> Dict[str, Any]:
+        """
+        Obtiene los límites de la validación previa de una operación
+        
+        Args:
+            tipo_operacion: Clave de la operación en files (CCE, AHORROS, ...)
+        
+        Returns:
+            Diccionario con max_amount y min_amount (None si la operación no
+            tiene ese límite), cci_length, account_length y cci_check_digits
+            (validar los dígitos de control del CCI)
+        """
+        limites = {
+            "max_amount": None,
+            "min_amount": None,
+            "cci_length": 20,
+            "account_length": 11,
+            "cci_check_digits": False  # Sin contrastar aún con CCI reales
+        }
+        # Los límites que ya aplicaban las operaciones antes de estar en info.json
+        limites.update({
+            "CCE": {"max_amount": 9999.99},
+            "LBTR": {"min_amount": 10000.0}
+        }.get(tipo_operacion, {}))
+        seccion = self.get_config().get("files", {}).get(tipo_operacion, {})
+        limites.update({clave: seccion[clave] for clave in limites if clave in seccion})
+        return limites
+    
+    def get_lbtr_session(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del navegador de LBTR
+        
+        Returns:
+            Diccionario con warm_session (mantener Edge abierto y con la sesión
+            iniciada entre lotes), keep_alive_seconds (cada cuánto se renueva
+            la sesión mientras no hay lote en curso), timeout (segundos
+            máximos de cada espera en la página) y fill_mode ('script' llena
+            el formulario en una sola llamada, 'keys' tecla por tecla)
+        """
+        configuracion = {
+            "warm_session": True,
+            "keep_alive_seconds": 240,
+            "timeout": 30,
+            "fill_mode": "script"
+        }
+        lbtr = self.get_config().get("lbtr_details", {})
+        configuracion.update({clave: lbtr[clave] for clave in configuracion if clave in lbtr})
+        return configuracion
+    
+    def get_lbtr_api(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del envío de transferencias LBTR por la API
+        
+        Returns:
+            Diccionario con enabled (enviar sin navegador; si la API no
+            responde se usa el navegador), base (URL de la API; vacía usa la
+            del enlace de LBTR), routes (servicios login, transfer y logout
+            relativos a la base), connections (pedidos en curso a la vez) y
+            timeout (segundos por pedido)
+        """
+        configuracion = {
+            "enabled": False,
+            "base": "",
+            "routes": {
+                "login": "api/login",
+                "transfer": "api/interbancaria",
+                "logout": "api/logout"
+            },
+            "connections": 4,
+            "timeout": 30
+        }
+        api = self.get_config().get("lbtr_details", {}).get("api", {})
+        configuracion.update({clave: api[clave] for clave in configuracion if clave in api})
+        return configuracion
+    
     def get_base_directory(self) -> Path:
         """Retorna el directorio base de la aplicación"""
         return self.base_dir
\ No newline at end of file